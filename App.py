@@ -1,16 +1,25 @@
 import sys
 import time
-import config
-from PyQt5.QtGui import QIcon, QFontDatabase
-from qgis.core import QgsApplication
-from widgets.mainWindow import MainWindow
-from widgets.SplashScreen import SplashScreen
+
+# 计时从导入模块之前开始，以下导入需放在计时之后
+_start = time.perf_counter()
+
+import config  # noqa: E402
+from PyQt5.QtGui import QIcon, QFontDatabase  # noqa: E402
+from qgis.core import Qgis, QgsApplication, QgsMessageLog  # noqa: E402
+from widgets.mainWindow import MainWindow  # noqa: E402
+from widgets.SplashScreen import SplashScreen  # noqa: E402
+
+_import_time = time.perf_counter() - _start
 
 
 class App:
 
     def __init__(self):
         import qdarkstyle
+        # 启动耗时，使用 --timings 运行时写入日志
+        self.timings = [('导入模块', _import_time)]
+        start = time.perf_counter()
         self.qgs = QgsApplication([], True)
         self.splash = SplashScreen()
         self.splash.show()
@@ -21,10 +30,23 @@ class App:
         self.qgs.setQuitOnLastWindowClosed(True)
         self.qgs.setPrefixPath('qgis', True)
         self.qgs.initQgis()
+        self.timings.append(('初始化 QGIS', time.perf_counter() - start))
         self.qgs.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt5', palette=qdarkstyle.LightPalette))
         # self.qgs.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt5'))
+        start = time.perf_counter()
         self.win = MainWindow()
+        self.timings.append(('创建主窗口', time.perf_counter() - start))
+        start = time.perf_counter()
         config.setup_env()
+        self.timings.append(('注册算法', time.perf_counter() - start))
+        if '--timings' in sys.argv:
+            self.log_timings()
+
+    def log_timings(self):
+        from processing import Processing
+        lines = ['{0:<40} {1:8.3f} s'.format(step, seconds) for step, seconds in self.timings]
+        lines.append(Processing.startupReport())
+        QgsMessageLog.logMessage('\n'.join(lines), 'Processing', Qgis.Info)
 
     def run(self):
         time.sleep(2.5)
@@ -9,4 +9,5 @@ def setup_env():
     sys.path.append('plugins')
 
     from processing import Processing
-    Processing.initialize()
+    # 算法元数据来自缓存清单，提供者模块在第一次创建算法时才导入
+    Processing.initialize(lazy=True)
@@ -27,6 +27,7 @@ from processing.tools.general import *  # NOQA
 from processing.tools.general import (
     algorithmHelp,
     run,
+    runBatch,
     runAndLoadResults,
     createAlgorithmDialog,
     execAlgorithmDialog
@@ -40,6 +41,7 @@ import qgis.processing
 
 qgis.processing.algorithmHelp = algorithmHelp
 qgis.processing.run = run
+qgis.processing.runBatch = runBatch
 qgis.processing.runAndLoadResults = runAndLoadResults
 qgis.processing.createAlgorithmDialog = createAlgorithmDialog
 qgis.processing.execAlgorithmDialog = execAlgorithmDialog
@@ -108,12 +108,16 @@ class GdalAlgorithmProvider(QgsProcessingProvider):
             ProcessingConfig.settingIcons[self.name()] = self.icon()
             ProcessingConfig.addSetting(Setting(self.name(), 'ACTIVATE_GDAL',
                                                 self.tr('Activate'), True))
+            ProcessingConfig.addSetting(Setting(self.name(), GdalUtils.GDAL_IN_PROCESS,
+                                                self.tr('Run warp, translate, merge and build VRT in-process when possible'),
+                                                True))
             ProcessingConfig.readSettings()
             self.refreshAlgorithms()
         return True
 
     def unload(self):
         ProcessingConfig.removeSetting('ACTIVATE_GDAL')
+        ProcessingConfig.removeSetting(GdalUtils.GDAL_IN_PROCESS)
 
     def isActive(self):
         return ProcessingConfig.getSetting('ACTIVATE_GDAL')
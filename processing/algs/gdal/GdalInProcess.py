@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    GdalInProcess.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by QGIS Processing contributors
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Processing contributors'
+__date__ = 'October 2026'
+__copyright__ = '(C) 2026, QGIS Processing contributors'
+
+import os
+import re
+import uuid
+import warnings
+
+from qgis.core import (QgsRunProcess,
+                       QgsProcessingException)
+
+from qgis.PyQt.QtCore import QCoreApplication
+
+with warnings.catch_warnings():
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+    from osgeo import gdal
+
+# number of values following each option, for the options which can be
+# passed on to the GDAL utility functions
+WARP_OPTIONS = {
+    '-s_srs': 1, '-t_srs': 1, '-ct': 1, '-to': 1, '-r': 1, '-tr': 2, '-tap': 0, '-te': 4, '-te_srs': 1,
+    '-ts': 2, '-ot': 1, '-wt': 1, '-srcnodata': 1, '-dstnodata': 1, '-srcalpha': 0, '-nosrcalpha': 0,
+    '-dstalpha': 0, '-wo': 1, '-co': 1, '-of': 1, '-multi': 0, '-wm': 1, '-et': 1, '-cutline': 1,
+    '-cl': 1, '-cwhere': 1, '-csql': 1, '-cblend': 1, '-crop_to_cutline': 0, '-order': 1, '-tps': 0,
+    '-rpc': 0, '-geoloc': 0, '-nomd': 0, '-cvmd': 1, '-setci': 0, '-oo': 1, '-doo': 1, '-ovr': 1,
+    '-novshiftgrid': 0, '-srcband': 1, '-dstband': 1,
+}
+
+TRANSLATE_OPTIONS = {
+    '-ot': 1, '-of': 1, '-b': 1, '-mask': 1, '-expand': 1, '-outsize': 2, '-tr': 2, '-r': 1,
+    '-unscale': 0, '-srcwin': 4, '-projwin': 4, '-projwin_srs': 1, '-epo': 0, '-eco': 0, '-a_srs': 1,
+    '-a_scale': 1, '-a_offset': 1, '-a_ullr': 4, '-a_nodata': 1, '-colorinterp': 1, '-mo': 1, '-co': 1,
+    '-nogcp': 0, '-sds': 0, '-stats': 0, '-norat': 0, '-noxmp': 0, '-oo': 1, '-strict': 0,
+}
+
+BUILDVRT_OPTIONS = {
+    '-tileindex': 1, '-resolution': 1, '-te': 4, '-tr': 2, '-tap': 0, '-separate': 0, '-b': 1, '-sd': 1,
+    '-allow_projection_difference': 0, '-addalpha': 0, '-hidenodata': 0, '-srcnodata': 1, '-vrtnodata': 1,
+    '-ignore_srcmaskband': 0, '-a_srs': 1, '-r': 1, '-oo': 1, '-input_file_list': 1, '-overwrite': 0,
+    '-strict': 0, '-non_strict': 0,
+}
+
+MERGE_OPTIONS = {
+    '-o': 1, '-of': 1, '-ot': 1, '-co': 1, '-n': 1, '-a_nodata': 1, '-separate': 0, '-ps': 2,
+    '-ul_lr': 4, '-tap': 0, '-v': 0, '--optfile': 1,
+}
+
+# options only understood by the command line programs, which have no effect here
+IGNORED_OPTIONS = ('-q', '-quiet', '--quiet', '-v', '-overwrite')
+
+
+class GdalCommand:
+    """A GDAL utility command line split into its options, its positional
+    arguments and the configuration options set with --config.
+    """
+
+    def __init__(self, program, options, positionals, config):
+        self.program = program
+        self.options = options
+        self.positionals = positionals
+        self.config = config
+
+    @staticmethod
+    def parse(tokens, arities):
+        """Parses the arguments of a command, or returns None if any of them
+        is not an option listed in arities.
+        """
+        program = os.path.basename(tokens[0])
+        program = re.sub(r'\.(py|bat|exe)$', '', program)
+
+        options = []
+        positionals = []
+        config = {}
+        i = 1
+        while i < len(tokens):
+            token = tokens[i]
+            if token == '--config':
+                if i + 2 >= len(tokens):
+                    return None
+                config[tokens[i + 1]] = tokens[i + 2]
+                i += 3
+            elif re.match(r'^-\D', token):
+                count = arities.get(token)
+                if count is None or i + count >= len(tokens):
+                    return None
+                options.append(tokens[i:i + count + 1])
+                i += count + 1
+            else:
+                positionals.append(token)
+                i += 1
+        return GdalCommand(program, options, positionals, config)
+
+    def has(self, name):
+        return any(option[0] == name for option in self.options)
+
+    def values(self, name):
+        """Returns the values of every occurrence of an option."""
+        return [option[1:] for option in self.options if option[0] == name]
+
+    def arguments(self, exclude=()):
+        """Returns the options as a flat list of arguments for the GDAL
+        utility functions.
+        """
+        arguments = []
+        for option in self.options:
+            if option[0] not in IGNORED_OPTIONS and option[0] not in exclude:
+                arguments.extend(option)
+        return arguments
+
+
+class GdalInProcess:
+    """Runs the common GDAL utilities through the gdal.Warp, gdal.Translate
+    and gdal.BuildVRT functions of the GDAL Python bindings, in the QGIS
+    process.
+
+    Progress is reported through a GDAL progress callback, which also stops
+    the utility when the feedback is canceled. Commands using options which
+    cannot be mapped are left to the command line programs.
+    """
+
+    @staticmethod
+    def command(commands):
+        """Returns the parsed GdalCommand for commands if they can be run
+        in-process, or None.
+        """
+        fused_command = ' '.join([str(c) for c in commands])
+        tokens = QgsRunProcess.splitCommand(fused_command)
+        if not tokens:
+            return None
+
+        program = re.sub(r'\.(py|bat|exe)$', '', os.path.basename(tokens[0]))
+        runners = {
+            'gdalwarp': (WARP_OPTIONS, GdalInProcess._checkWarp),
+            'gdal_translate': (TRANSLATE_OPTIONS, GdalInProcess._checkTranslate),
+            'gdalbuildvrt': (BUILDVRT_OPTIONS, GdalInProcess._checkBuildVrt),
+            'gdal_merge': (MERGE_OPTIONS, GdalInProcess._checkMerge),
+        }
+        if program not in runners:
+            return None
+        arities, check = runners[program]
+        arities = dict(arities, **{o: 0 for o in IGNORED_OPTIONS if o not in arities})
+        command = GdalCommand.parse(tokens, arities)
+        if command is None or not check(command):
+            return None
+        return command
+
+    @staticmethod
+    def _keepsExistingOutput(command, output):
+        # without -overwrite, the command line programs update an existing output
+        return os.path.exists(output) and not command.has('-overwrite')
+
+    @staticmethod
+    def _checkWarp(command):
+        return len(command.positionals) >= 2 and \
+            not GdalInProcess._keepsExistingOutput(command, command.positionals[-1])
+
+    @staticmethod
+    def _checkTranslate(command):
+        return len(command.positionals) == 2
+
+    @staticmethod
+    def _checkBuildVrt(command):
+        if not command.positionals or GdalInProcess._keepsExistingOutput(command, command.positionals[0]):
+            return False
+        return len(command.positionals) > 1 or command.has('-input_file_list')
+
+    @staticmethod
+    def _checkMerge(command):
+        outputs = command.values('-o')
+        return len(outputs) == 1 and not os.path.exists(outputs[0][0])
+
+    @staticmethod
+    def run(command, feedback):
+        """Runs a command returned by GdalInProcess.command and returns the
+        messages logged by GDAL.
+        """
+        loglines = [GdalInProcess.tr('GDAL execution console output')]
+
+        def on_error(error_class, error_number, message):
+            loglines.append(message)
+            if error_class in (gdal.CE_Failure, gdal.CE_Fatal):
+                on_error.last = message
+                feedback.reportError(message)
+            elif error_class == gdal.CE_Warning:
+                feedback.pushInfo(message)
+            else:
+                feedback.pushConsoleInfo(message)
+
+        on_error.last = None
+
+        # --config options are set for the calling thread only, so commands
+        # run in parallel by batch rows do not see each other's options
+        previous_config = {key: gdal.GetThreadLocalConfigOption(key) for key in command.config}
+        for key, value in command.config.items():
+            gdal.SetThreadLocalConfigOption(key, value)
+        gdal.PushErrorHandler(on_error)
+        try:
+            runner = getattr(GdalInProcess, '_run_' + command.program)
+            result = runner(command, feedback)
+        except RuntimeError as e:
+            # raised instead of returning None when GDAL exceptions are enabled
+            on_error.last = str(e)
+            result = None
+        finally:
+            gdal.PopErrorHandler()
+            for key, value in previous_config.items():
+                gdal.SetThreadLocalConfigOption(key, value)
+
+        if feedback.isCanceled():
+            feedback.pushInfo(GdalInProcess.tr('Process was canceled and did not complete'))
+        elif not result:
+            raise QgsProcessingException(on_error.last or GdalInProcess.tr('GDAL failed to create the output'))
+        else:
+            feedback.setProgress(100)
+            feedback.pushInfo(GdalInProcess.tr('Process completed successfully'))
+        return loglines
+
+    @staticmethod
+    def progress(feedback, start=0.0, end=100.0):
+        """Returns a GDAL progress callback reporting to feedback between
+        start and end percents, and stopping GDAL when feedback is canceled.
+        """
+        def callback(complete, message, data):
+            feedback.setProgress(start + complete * (end - start))
+            return 0 if feedback.isCanceled() else 1
+
+        return callback
+
+    @staticmethod
+    def _run_gdalwarp(command, feedback):
+        dataset = gdal.Warp(command.positionals[-1], command.positionals[:-1],
+                            options=command.arguments(), callback=GdalInProcess.progress(feedback))
+        # the output is flushed to disk when the dataset is dereferenced
+        return dataset is not None
+
+    @staticmethod
+    def _run_gdal_translate(command, feedback):
+        source, destination = command.positionals
+        dataset = gdal.Translate(destination, source,
+                                 options=command.arguments(), callback=GdalInProcess.progress(feedback))
+        # the output is flushed to disk when the dataset is dereferenced
+        return dataset is not None
+
+    @staticmethod
+    def _run_gdalbuildvrt(command, feedback):
+        destination, *sources = command.positionals
+        for values in command.values('-input_file_list'):
+            with open(values[0]) as f:
+                sources.extend(line.strip() for line in f if line.strip())
+        dataset = gdal.BuildVRT(destination, sources,
+                                options=command.arguments(exclude=('-input_file_list',)),
+                                callback=GdalInProcess.progress(feedback))
+        # the output is flushed to disk when the dataset is dereferenced
+        return dataset is not None
+
+    @staticmethod
+    def _run_gdal_merge(command, feedback):
+        """gdal_merge is run as a virtual mosaic written to /vsimem/, then
+        translated to the output.
+        """
+        sources = list(command.positionals)
+        for values in command.values('--optfile'):
+            with open(values[0]) as f:
+                for line in f:
+                    sources.extend(QgsRunProcess.splitCommand(line.strip()))
+        if not sources:
+            raise QgsProcessingException(GdalInProcess.tr('No input files to merge'))
+
+        vrt_options = {'separate': command.has('-separate'),
+                       'targetAlignedPixels': command.has('-tap')}
+        if command.has('-ps'):
+            x_res, y_res = command.values('-ps')[-1]
+        else:
+            # gdal_merge takes the pixel size of the first input
+            first = gdal.Open(sources[0])
+            if first is None:
+                return False
+            transform = first.GetGeoTransform()
+            x_res, y_res = transform[1], transform[5]
+            first = None
+        vrt_options['resolution'] = 'user'
+        vrt_options['xRes'] = abs(float(x_res))
+        vrt_options['yRes'] = abs(float(y_res))
+        if command.has('-ul_lr'):
+            ulx, uly, lrx, lry = [float(v) for v in command.values('-ul_lr')[-1]]
+            vrt_options['outputBounds'] = (ulx, lry, lrx, uly)
+
+        translate_arguments = command.arguments(exclude=('-o', '-n', '-a_nodata', '-separate', '-ps', '-ul_lr',
+                                                         '-tap', '--optfile'))
+        if command.has('-n'):
+            vrt_options['srcNodata'] = command.values('-n')[-1][0]
+            # areas not covered by any input are set to 0 by gdal_merge
+            vrt_options['VRTNodata'] = 0
+        if command.has('-a_nodata'):
+            vrt_options['VRTNodata'] = command.values('-a_nodata')[-1][0]
+            translate_arguments.extend(['-a_nodata', command.values('-a_nodata')[-1][0]])
+        elif command.has('-n'):
+            translate_arguments.extend(['-a_nodata', 'none'])
+
+        vrt = '/vsimem/processing_merge_{}.vrt'.format(uuid.uuid4().hex)
+        try:
+            mosaic = gdal.BuildVRT(vrt, sources, callback=GdalInProcess.progress(feedback, 0, 5), **vrt_options)
+            if mosaic is None:
+                return False
+            mosaic = None
+            if feedback.isCanceled():
+                return False
+            dataset = gdal.Translate(command.values('-o')[-1][0], vrt, options=translate_arguments,
+                                     callback=GdalInProcess.progress(feedback, 5, 100))
+            # the output is flushed to disk when the dataset is dereferenced
+            return dataset is not None
+        finally:
+            gdal.Unlink(vrt)
+
+    @classmethod
+    def tr(cls, string, context=''):
+        if context == '':
+            context = cls.__name__
+        return QCoreApplication.translate(context, string)
@@ -68,6 +68,7 @@ except:
 
 class GdalUtils:
     GDAL_HELP_PATH = 'GDAL_HELP_PATH'
+    GDAL_IN_PROCESS = 'GDAL_IN_PROCESS'
 
     supportedRasters = None
     supportedOutputRasters = None
@@ -99,6 +100,15 @@ class GdalUtils:
         QgsMessageLog.logMessage(fused_command, 'Processing', Qgis.Info)
         feedback.pushInfo(GdalUtils.tr('GDAL command:'))
         feedback.pushCommandInfo(fused_command)
+
+        # common utilities are run through the GDAL Python bindings when possible
+        if gdalAvailable and ProcessingConfig.getSetting(GdalUtils.GDAL_IN_PROCESS):
+            from processing.algs.gdal.GdalInProcess import GdalInProcess
+            command = GdalInProcess.command(commands)
+            if command is not None:
+                feedback.pushInfo(GdalUtils.tr('Running GDAL in-process'))
+                return GdalInProcess.run(command, feedback)
+
         feedback.pushInfo(GdalUtils.tr('GDAL command output:'))
 
         loglines = [GdalUtils.tr('GDAL execution console output')]
@@ -23,8 +23,9 @@ __copyright__ = '(C) 2013, Victor Olaya'
 
 import warnings
 
-from qgis.core import (QgsFeatureRequest,
-                       QgsProcessingParameterFeatureSource,
+import numpy
+
+from qgis.core import (QgsProcessingParameterFeatureSource,
                        QgsProcessingParameterField,
                        QgsProcessingException,
                        QgsProcessingParameterFileDestination)
@@ -87,12 +88,11 @@ class BarPlot(QgisAlgorithm):
 
         output = self.parameterAsFileOutput(parameters, self.OUTPUT, context)
 
-        values = vector.values(source, valuefieldname)
-
-        x_var = vector.convert_nulls([i[namefieldname] for i in source.getFeatures(QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry))], '<NULL>')
+        values = vector.columns(source, namefieldname, valuefieldname, numeric=[valuefieldname], feedback=feedback)
+        x_var = values[namefieldname].astype(object).filled('<NULL>')
 
         data = [go.Bar(x=x_var,
-                       y=values[valuefieldname])]
+                       y=values[valuefieldname].filled(numpy.nan))]
         plt.offline.plot(data, filename=output, auto_open=False)
 
         return {self.OUTPUT: output}
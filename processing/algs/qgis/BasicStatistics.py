@@ -28,19 +28,23 @@ from qgis.PyQt.QtCore import QVariant
 from qgis.PyQt.QtGui import QIcon
 
 from qgis.core import (QgsApplication,
-                       QgsStatisticalSummary,
                        QgsStringStatisticalSummary,
                        QgsDateTimeStatisticalSummary,
                        QgsFeatureRequest,
                        QgsProcessing,
                        QgsProcessingException,
+                       QgsProcessingParameterBoolean,
+                       QgsProcessingParameterDefinition,
                        QgsProcessingParameterFeatureSource,
                        QgsProcessingParameterField,
                        QgsProcessingParameterFileDestination,
                        QgsProcessingOutputNumber,
-                       QgsProcessingFeatureSource)
+                       QgsProcessingFeatureSource,
+                       QgsProcessingUtils)
 
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
+from processing.core.ProcessingConfig import ProcessingConfig
+from processing.tools.statistics import NumericSummary, accumulate
 
 pluginPath = os.path.split(os.path.split(os.path.dirname(__file__))[0])[0]
 
@@ -48,6 +52,7 @@ pluginPath = os.path.split(os.path.split(os.path.dirname(__file__))[0])[0]
 class BasicStatisticsForField(QgisAlgorithm):
     INPUT_LAYER = 'INPUT_LAYER'
     FIELD_NAME = 'FIELD_NAME'
+    APPROXIMATE = 'APPROXIMATE'
     OUTPUT_HTML_FILE = 'OUTPUT_HTML_FILE'
 
     MIN = 'MIN'
@@ -71,6 +76,8 @@ class BasicStatisticsForField(QgisAlgorithm):
     THIRDQUARTILE = 'THIRDQUARTILE'
     IQR = 'IQR'
 
+    BATCH_SIZE = 65536
+
     def icon(self):
         return QgsApplication.getThemeIcon("/algorithms/mAlgorithmBasicStatistics.svg")
 
@@ -100,6 +107,12 @@ class BasicStatisticsForField(QgisAlgorithm):
                                                       self.tr('Field to calculate statistics on'),
                                                       None, self.INPUT_LAYER, QgsProcessingParameterField.Any))
 
+        approximate = QgsProcessingParameterBoolean(self.APPROXIMATE,
+                                                    self.tr('Approximate median, quartiles and majority with streaming sketches'),
+                                                    defaultValue=False)
+        approximate.setFlags(approximate.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(approximate)
+
         self.addParameter(QgsProcessingParameterFileDestination(self.OUTPUT_HTML_FILE, self.tr('Statistics'),
                                                                 self.tr('HTML files (*.html)'), None, True))
 
@@ -149,7 +162,8 @@ class BasicStatisticsForField(QgisAlgorithm):
         results = {}
 
         if field.isNumeric():
-            d, results = self.calcNumericStats(features, feedback, field, count)
+            approximate = self.parameterAsBoolean(parameters, self.APPROXIMATE, context)
+            d, results = self.calcNumericStats(features, feedback, field, count, approximate)
         elif field.type() in (QVariant.Date, QVariant.Time, QVariant.DateTime):
             d, results = self.calcDateTimeStats(features, feedback, field, count)
         else:
@@ -162,15 +176,37 @@ class BasicStatisticsForField(QgisAlgorithm):
 
         return results
 
-    def calcNumericStats(self, features, feedback, field, count):
+    def calcNumericStats(self, features, feedback, field, count, approximate=False):
         total = 100.0 / count if count else 0
-        stat = QgsStatisticalSummary()
-        for current, ft in enumerate(features):
-            if feedback.isCanceled():
-                break
-            stat.addVariant(ft[field.name()])
-            feedback.setProgress(int(current * total))
-        stat.finalize()
+
+        def batches():
+            values = []
+            first = None
+            for current, ft in enumerate(features):
+                if feedback.isCanceled():
+                    break
+                if first is None:
+                    first = ft.id()
+                values.append(ft[field.name()])
+                if len(values) == self.BATCH_SIZE:
+                    feedback.setProgress(int(current * total))
+                    yield first, values
+                    values = []
+                    first = None
+            if values:
+                yield first, values
+
+        # without approximation, values are spilled to disk so that medians,
+        # quartiles and counts of distinct values stay exact
+        directory = QgsProcessingUtils.tempFolder()
+        threads = int(ProcessingConfig.getSetting(ProcessingConfig.MAX_THREADS))
+        stat = accumulate(batches(),
+                          lambda: NumericSummary(exact=not approximate, directory=directory),
+                          NumericSummary.addValues, NumericSummary.merge, threads)
+        try:
+            stat.finalize()
+        finally:
+            stat.close()
 
         cv = stat.stDev() / stat.mean() if stat.mean() != 0 else 0
 
@@ -23,12 +23,13 @@ __copyright__ = '(C) 2017, Matteo Ghetta'
 
 import warnings
 
+import numpy
+
 from qgis.core import (QgsProcessingException,
                        QgsProcessingParameterFeatureSource,
                        QgsProcessingParameterField,
                        QgsProcessingParameterEnum,
-                       QgsProcessingParameterFileDestination,
-                       QgsFeatureRequest)
+                       QgsProcessingParameterFileDestination)
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
 from processing.tools import vector
 
@@ -99,10 +100,8 @@ class BoxPlot(QgisAlgorithm):
 
         output = self.parameterAsFileOutput(parameters, self.OUTPUT, context)
 
-        values = vector.values(source, valuefieldname)
-
-        x_index = source.fields().lookupField(namefieldname)
-        x_var = vector.convert_nulls([i[namefieldname] for i in source.getFeatures(QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry).setSubsetOfAttributes([x_index]))], '<NULL>')
+        values = vector.columns(source, namefieldname, valuefieldname, numeric=[valuefieldname], feedback=feedback)
+        x_var = values[namefieldname].astype(object).filled('<NULL>')
 
         msdIndex = self.parameterAsEnum(parameters, self.MSD, context)
         msd = True
@@ -114,7 +113,7 @@ class BoxPlot(QgisAlgorithm):
 
         data = [go.Box(
                 x=x_var,
-                y=values[valuefieldname],
+                y=values[valuefieldname].filled(numpy.nan),
                 boxmean=msd)]
 
         plt.offline.plot(data, filename=output, auto_open=False)
@@ -21,21 +21,31 @@ __author__ = 'Piotr Pociask'
 __date__ = 'May 2014'
 __copyright__ = '(C) 2014, Piotr Pociask'
 
+import numpy
+
 from qgis.PyQt.QtCore import QCoreApplication
-from math import sqrt
 
-from qgis.core import (QgsApplication,
+from qgis.core import (NULL,
+                       QgsApplication,
                        QgsFeature,
                        QgsFeatureSink,
+                       QgsFields,
+                       QgsGeometry,
+                       QgsLineString,
+                       QgsMultiPolygon,
+                       QgsPolygon,
                        QgsWkbTypes,
                        QgsProcessing,
                        QgsProcessingException,
+                       QgsProcessingMultiStepFeedback,
                        QgsProcessingParameterFeatureSource,
+                       QgsProcessingParameterField,
                        QgsProcessingParameterNumber,
                        QgsProcessingParameterBoolean,
                        QgsProcessingParameterFeatureSink)
-import processing
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
+from processing.algs.qgis import triangulation
+from processing.tools import spatial
 
 
 class ConcaveHull(QgisAlgorithm):
@@ -43,6 +53,7 @@ class ConcaveHull(QgisAlgorithm):
     ALPHA = 'ALPHA'
     HOLES = 'HOLES'
     NO_MULTIGEOMETRY = 'NO_MULTIGEOMETRY'
+    FIELD = 'FIELD'
     OUTPUT = 'OUTPUT'
 
     def group(self):
@@ -64,6 +75,9 @@ class ConcaveHull(QgisAlgorithm):
                                                         self.tr('Allow holes'), defaultValue=True))
         self.addParameter(QgsProcessingParameterBoolean(self.NO_MULTIGEOMETRY,
                                                         self.tr('Split multipart geometry into singleparts geometries'), defaultValue=False))
+        self.addParameter(QgsProcessingParameterField(self.FIELD,
+                                                      self.tr('Field (set if creating concave hulls by class)'),
+                                                      parentLayerParameterName=self.INPUT, optional=True))
 
         self.addParameter(QgsProcessingParameterFeatureSink(self.OUTPUT, self.tr('Concave hull'), type=QgsProcessing.TypeVectorPolygon))
 
@@ -90,88 +104,78 @@ class ConcaveHull(QgisAlgorithm):
         alpha = self.parameterAsDouble(parameters, self.ALPHA, context)
         holes = self.parameterAsBoolean(parameters, self.HOLES, context)
         no_multigeom = self.parameterAsBoolean(parameters, self.NO_MULTIGEOMETRY, context)
-
-        # Delaunay triangulation from input point layer
-        feedback.setProgressText(QCoreApplication.translate('ConcaveHull', 'Creating Delaunay triangles…'))
-        delaunay_layer = processing.run("qgis:delaunaytriangulation", {'INPUT': parameters[ConcaveHull.INPUT], 'OUTPUT': 'memory:'}, feedback=feedback, context=context)['OUTPUT']
-
-        # Get max edge length from Delaunay triangles
-        feedback.setProgressText(QCoreApplication.translate('ConcaveHull', 'Computing edges max length…'))
-
-        features = delaunay_layer.getFeatures()
-        count = delaunay_layer.featureCount()
-        if count == 0:
-            raise QgsProcessingException(self.tr('No Delaunay triangles created.'))
-
-        counter = 50. / count
-        lengths = []
-        edges = {}
-        for feat in features:
-            if feedback.isCanceled():
-                break
-
-            line = feat.geometry().asPolygon()[0]
-            for i in range(len(line) - 1):
-                lengths.append(sqrt(line[i].sqrDist(line[i + 1])))
-            edges[feat.id()] = max(lengths[-3:])
-            feedback.setProgress(feat.id() * counter)
-        max_length = max(lengths)
-
-        # Get features with longest edge longer than alpha*max_length
-        feedback.setProgressText(QCoreApplication.translate('ConcaveHull', 'Removing features…'))
-        counter = 50. / len(edges)
-        i = 0
-        ids = []
-        for id, max_len in edges.items():
-            if feedback.isCanceled():
-                break
-
-            if max_len > alpha * max_length:
-                ids.append(id)
-            feedback.setProgress(50 + i * counter)
-            i += 1
-
-        # Remove features
-        delaunay_layer.dataProvider().deleteFeatures(ids)
-
-        # Dissolve all Delaunay triangles
-        feedback.setProgressText(QCoreApplication.translate('ConcaveHull', 'Dissolving Delaunay triangles…'))
-        dissolved_layer = processing.run("native:dissolve", {'INPUT': delaunay_layer, 'OUTPUT': 'memory:'}, feedback=feedback, context=context)['OUTPUT']
-
-        # Save result
-        feedback.setProgressText(QCoreApplication.translate('ConcaveHull', 'Saving data…'))
-        feat = QgsFeature()
-        dissolved_layer.getFeatures().nextFeature(feat)
-
-        # Not needed anymore, free up some resources
-        del delaunay_layer
-        del dissolved_layer
+        field_name = self.parameterAsString(parameters, self.FIELD, context)
+
+        fields = layer.fields()
+        attributes = []
+        if field_name:
+            field_index = layer.fields().lookupField(field_name)
+            if field_index < 0:
+                raise QgsProcessingException(self.tr('Unable to find grouping field'))
+            fields = QgsFields()
+            fields.append(layer.fields()[field_index])
+            attributes = [field_index]
 
         (sink, dest_id) = self.parameterAsSink(parameters, self.OUTPUT, context,
-                                               layer.fields(), QgsWkbTypes.Polygon, layer.sourceCrs())
+                                               fields, QgsWkbTypes.Polygon, layer.sourceCrs())
         if sink is None:
             raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
 
-        geom = feat.geometry()
-        if no_multigeom and geom.isMultipart():
-            # Only singlepart geometries are allowed
-            geom_list = geom.asGeometryCollection()
-            for single_geom in geom_list:
-                if feedback.isCanceled():
-                    break
-
-                single_feature = QgsFeature()
-                if not holes:
-                    # Delete holes
-                    single_geom = single_geom.removeInteriorRings()
-                single_feature.setGeometry(single_geom)
-                sink.addFeature(single_feature, QgsFeatureSink.FastInsert)
+        multiStepFeedback = QgsProcessingMultiStepFeedback(2, feedback)
+
+        # read the points of all groups in a single pass
+        multiStepFeedback.setProgressText(QCoreApplication.translate('ConcaveHull', 'Reading points…'))
+        _, xy, values = spatial.pointArrays(layer, attributes=attributes, feedback=multiStepFeedback)
+        if field_name:
+            keys = {}
+            codes = numpy.array([keys.setdefault(None if v == NULL else v, len(keys)) for v in values[0]],
+                                dtype=numpy.int64)
+            order = numpy.argsort(codes, kind='stable')
+            groups = zip(keys, numpy.split(order, numpy.cumsum(numpy.bincount(codes, minlength=len(keys)))[:-1]))
         else:
-            # Multipart geometries are allowed
-            if not holes:
-                # Delete holes
-                geom = geom.removeInteriorRings()
-                feat.setGeometry(geom)
-            sink.addFeature(feat, QgsFeatureSink.FastInsert)
+            keys = {None: 0}
+            groups = [(None, numpy.arange(len(xy)))]
+
+        multiStepFeedback.setCurrentStep(1)
+        multiStepFeedback.setProgressText(QCoreApplication.translate('ConcaveHull', 'Computing alpha shapes…'))
+        triangulated = False
+        for current, (value, rows) in enumerate(groups):
+            if feedback.isCanceled():
+                break
+
+            unique, _ = triangulation.uniquePoints(xy[rows])
+            triangles = triangulation.delaunayTriangles(unique)
+            triangulated = triangulated or len(triangles) > 0
+            polygons = triangulation.alphaShape(unique, triangles, alpha)
+            geometries = [self.polygon(shell, rings if holes else []) for shell, rings in polygons]
+            if geometries and not no_multigeom:
+                multipolygon = QgsMultiPolygon()
+                for geometry in geometries:
+                    multipolygon.addGeometry(geometry)
+                geometries = [multipolygon]
+
+            for geometry in geometries:
+                feat = QgsFeature(fields)
+                feat.setGeometry(QgsGeometry(geometry))
+                if field_name:
+                    feat.setAttributes([value])
+                sink.addFeature(feat, QgsFeatureSink.FastInsert)
+
+            multiStepFeedback.setProgress(100.0 * (current + 1) / len(keys))
+
+        if not triangulated and not feedback.isCanceled():
+            raise QgsProcessingException(self.tr('No Delaunay triangles created.'))
 
         return {self.OUTPUT: dest_id}
+
+    def polygon(self, shell, holes):
+        polygon = QgsPolygon()
+        polygon.setExteriorRing(self.ring(shell))
+        for hole in holes:
+            polygon.addInteriorRing(self.ring(hole))
+        return polygon
+
+    def ring(self, coords):
+        x = coords[:, 0].tolist()
+        y = coords[:, 1].tolist()
+        return QgsLineString(x + x[:1], y + y[:1])
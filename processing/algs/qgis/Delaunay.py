@@ -23,6 +23,8 @@ __copyright__ = '(C) 2012, Victor Olaya'
 
 import os
 
+import numpy
+
 from qgis.PyQt.QtCore import QVariant
 
 from qgis.core import (QgsApplication,
@@ -36,20 +38,25 @@ from qgis.core import (QgsApplication,
                        QgsProcessing,
                        QgsFields,
                        QgsProcessingException,
+                       QgsProcessingParameterDefinition,
+                       QgsProcessingParameterEnum,
                        QgsProcessingParameterFeatureSource,
                        QgsProcessingParameterFeatureSink)
 
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
 
-from . import voronoi
+from . import triangulation
 
 pluginPath = os.path.split(os.path.split(os.path.dirname(__file__))[0])[0]
 
 
 class Delaunay(QgisAlgorithm):
     INPUT = 'INPUT'
+    BACKEND = 'BACKEND'
     OUTPUT = 'OUTPUT'
 
+    CHUNK_SIZE = 10000
+
     def icon(self):
         return QgsApplication.getThemeIcon("/algorithms/mAlgorithmDelaunay.svg")
 
@@ -67,6 +74,14 @@ class Delaunay(QgisAlgorithm):
 
     def initAlgorithm(self, config=None):
         self.addParameter(QgsProcessingParameterFeatureSource(self.INPUT, self.tr('Input layer'), [QgsProcessing.TypeVectorPoint]))
+        self.backends = [self.tr('GEOS'),
+                         self.tr('Python (legacy)')]
+        backend_param = QgsProcessingParameterEnum(self.BACKEND,
+                                                   self.tr('Triangulation backend'),
+                                                   self.backends,
+                                                   defaultValue=0)
+        backend_param.setFlags(backend_param.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(backend_param)
         self.addParameter(QgsProcessingParameterFeatureSink(self.OUTPUT, self.tr('Delaunay triangulation'), type=QgsProcessing.TypeVectorPolygon))
 
     def name(self):
@@ -79,6 +94,7 @@ class Delaunay(QgisAlgorithm):
         source = self.parameterAsSource(parameters, self.INPUT, context)
         if source is None:
             raise QgsProcessingException(self.invalidSourceError(parameters, self.INPUT))
+        backend = triangulation.BACKENDS[self.parameterAsEnum(parameters, self.BACKEND, context)]()
 
         fields = QgsFields()
         fields.append(QgsField('POINTA', QVariant.Double, '', 24, 15))
@@ -91,28 +107,21 @@ class Delaunay(QgisAlgorithm):
             raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
 
         pts = []
-        ptDict = {}
-        ptNdx = -1
-        c = voronoi.Context()
-        features = source.getFeatures()
+        features = source.getFeatures(QgsFeatureRequest().setSubsetOfAttributes([]))
         total = 100.0 / source.featureCount() if source.featureCount() else 0
         for current, inFeat in enumerate(features):
             if feedback.isCanceled():
                 break
 
-            geom = QgsGeometry(inFeat.geometry())
+            geom = inFeat.geometry()
             if geom.isNull():
                 continue
             if geom.isMultipart():
                 points = geom.asMultiPoint()
             else:
                 points = [geom.asPoint()]
-            for n, point in enumerate(points):
-                x = point.x()
-                y = point.y()
-                pts.append((x, y))
-                ptNdx += 1
-                ptDict[ptNdx] = (inFeat.id(), n)
+            for point in points:
+                pts.append((point.x(), point.y()))
             feedback.setProgress(int(current * total))
 
         if len(pts) < 3:
@@ -120,39 +129,25 @@ class Delaunay(QgisAlgorithm):
                 self.tr('Input file should contain at least 3 points. Choose '
                         'another file and try again.'))
 
-        uniqueSet = set(pts)
-        ids = [pts.index(item) for item in uniqueSet]
-        sl = voronoi.SiteList([voronoi.Site(*i) for i in uniqueSet])
-        c.triangulate = True
-        voronoi.voronoi(sl, c)
-        triangles = c.triangles
-        feat = QgsFeature()
+        # Triangle vertices are identified by the index of the first input
+        # point at their location
+        unique, ids = triangulation.uniquePoints(numpy.array(pts, dtype=numpy.float64))
+        triangles = backend.delaunayTriangles(unique)
 
-        total = 100.0 / len(triangles) if triangles else 1
-        for current, triangle in enumerate(triangles):
+        total = 100.0 / len(triangles) if len(triangles) else 1
+        for start in range(0, len(triangles), self.CHUNK_SIZE):
             if feedback.isCanceled():
                 break
 
-            indices = list(triangle)
-            indices.append(indices[0])
-            polygon = []
-            attrs = []
-            for step, index in enumerate(indices):
-                fid, n = ptDict[ids[index]]
-                request = QgsFeatureRequest().setFilterFid(fid)
-                inFeat = next(source.getFeatures(request))
-                geom = QgsGeometry(inFeat.geometry())
-                if geom.isMultipart():
-                    point = QgsPointXY(geom.asMultiPoint()[n])
-                else:
-                    point = QgsPointXY(geom.asPoint())
-                polygon.append(point)
-                if step <= 3:
-                    attrs.append(ids[index])
-            feat.setAttributes(attrs)
-            geometry = QgsGeometry().fromPolygonXY([polygon])
-            feat.setGeometry(geometry)
-            sink.addFeature(feat, QgsFeatureSink.FastInsert)
-            feedback.setProgress(int(current * total))
+            features = []
+            for indices in triangles[start:start + self.CHUNK_SIZE].tolist():
+                indices.append(indices[0])
+                feat = QgsFeature()
+                feat.setAttributes([int(ids[index]) for index in indices[:3]])
+                polygon = [QgsPointXY(*unique[index]) for index in indices]
+                feat.setGeometry(QgsGeometry().fromPolygonXY([polygon]))
+                features.append(feat)
+            sink.addFeatures(features, QgsFeatureSink.FastInsert)
+            feedback.setProgress(int((start + len(features)) * total))
 
         return {self.OUTPUT: dest_id}
@@ -22,23 +22,25 @@ __date__ = 'January 2017'
 __copyright__ = '(C) 2017, Bernhard Ströbl'
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 from qgis.PyQt.QtGui import QIcon
 
 from qgis.core import (QgsApplication,
                        QgsFeatureRequest,
-                       QgsFeature,
                        QgsFeatureSink,
-                       QgsGeometry,
                        QgsProcessingAlgorithm,
                        QgsProcessingException,
-                       QgsProcessingUtils,
+                       QgsProcessingMultiStepFeedback,
+                       QgsSpatialIndex,
                        QgsProcessingParameterVectorLayer,
                        QgsProcessingParameterEnum,
                        QgsProcessing,
                        QgsProcessingParameterFeatureSink)
 
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
+from processing.algs.qgis.elimination import Elimination, sliverClusters
+from processing.core.ProcessingConfig import ProcessingConfig
 
 pluginPath = os.path.split(os.path.split(os.path.dirname(__file__))[0])[0]
 
@@ -91,146 +93,83 @@ class EliminateSelection(QgisAlgorithm):
 
     def processAlgorithm(self, parameters, context, feedback):
         inLayer = self.parameterAsVectorLayer(parameters, self.INPUT, context)
-        boundary = self.parameterAsEnum(parameters, self.MODE, context) == self.MODE_BOUNDARY
-        smallestArea = self.parameterAsEnum(parameters, self.MODE, context) == self.MODE_SMALLEST_AREA
+        mode = self.parameterAsEnum(parameters, self.MODE, context)
+        threads = int(ProcessingConfig.getSetting(ProcessingConfig.MAX_THREADS))
 
         if inLayer.selectedFeatureCount() == 0:
             feedback.reportError(self.tr('{0}: (No selection in input layer "{1}")').format(self.displayName(), parameters[self.INPUT]))
 
-        featToEliminate = []
         selFeatIds = inLayer.selectedFeatureIds()
+        selected = set(selFeatIds)
 
         (sink, dest_id) = self.parameterAsSink(parameters, self.OUTPUT, context,
                                                inLayer.fields(), inLayer.wkbType(), inLayer.sourceCrs())
         if sink is None:
             raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
 
-        for aFeat in inLayer.getFeatures():
-            if feedback.isCanceled():
+        multi_feedback = QgsProcessingMultiStepFeedback(4, feedback)
+
+        # one index for all features, slivers included, built once
+        multi_feedback.pushInfo(self.tr('Building spatial index'))
+        request = QgsFeatureRequest().setSubsetOfAttributes([])
+        index = QgsSpatialIndex(inLayer.getFeatures(request), multi_feedback)
+
+        # Keep references to the features to eliminate
+        multi_feedback.setCurrentStep(1)
+        featToEliminate = {}
+        candidates = {}
+        neighbours = {}
+        total = 100.0 / len(selected) if selected else 0
+        for current, feat in enumerate(inLayer.getFeatures(QgsFeatureRequest().setFilterFids(selFeatIds))):
+            if multi_feedback.isCanceled():
                 break
-
-            if aFeat.id() in selFeatIds:
-                # Keep references to the features to eliminate
-                featToEliminate.append(aFeat)
-            else:
-                # write the others to output
-                sink.addFeature(aFeat, QgsFeatureSink.FastInsert)
-
-        del sink
-
-        # Delete all features to eliminate in processLayer
-        processLayer = QgsProcessingUtils.mapLayerFromString(dest_id, context)
-        processLayer.startEditing()
-
-        # ANALYZE
-        if len(featToEliminate) > 0:  # Prevent zero division
-            start = 20.00
-            add = 80.00 / len(featToEliminate)
-        else:
-            start = 100
-
-        feedback.setProgress(start)
-        madeProgress = True
-
-        # We go through the list and see if we find any polygons we can
-        # merge the selected with. If we have no success with some we
-        # merge and then restart the whole story.
-        while madeProgress:  # Check if we made any progress
-            madeProgress = False
-            featNotEliminated = []
-
-            # Iterate over the polygons to eliminate
-            for i in range(len(featToEliminate)):
-                if feedback.isCanceled():
+            featToEliminate[feat.id()] = feat
+            hits = index.intersects(feat.geometry().boundingBox())
+            candidates[feat.id()] = [fid for fid in hits if fid not in selected]
+            neighbours[feat.id()] = [fid for fid in hits if fid in selected and fid != feat.id()]
+            multi_feedback.setProgress(int(current * total))
+
+        # geometry store of the polygons which may receive a sliver
+        receiving = set()
+        for fids in candidates.values():
+            receiving.update(fids)
+        geometries = {}
+        if receiving:
+            for feat in inLayer.getFeatures(QgsFeatureRequest().setFilterFids(list(receiving)).setSubsetOfAttributes([])):
+                if multi_feedback.isCanceled():
                     break
+                geometries[feat.id()] = feat.geometry()
 
-                feat = featToEliminate.pop()
-                geom2Eliminate = feat.geometry()
-                bbox = geom2Eliminate.boundingBox()
-                fit = processLayer.getFeatures(
-                    QgsFeatureRequest().setFilterRect(bbox).setSubsetOfAttributes([]))
-                mergeWithFid = None
-                mergeWithGeom = None
-                max = 0
-                min = -1
-                selFeat = QgsFeature()
-
-                # use prepared geometries for faster intersection tests
-                engine = QgsGeometry.createGeometryEngine(geom2Eliminate.constGet())
-                engine.prepareGeometry()
-
-                while fit.nextFeature(selFeat):
-                    if feedback.isCanceled():
-                        break
-
-                    selGeom = selFeat.geometry()
-
-                    if engine.intersects(selGeom.constGet()):
-                        # We have a candidate
-                        iGeom = geom2Eliminate.intersection(selGeom)
-
-                        if not iGeom:
-                            continue
-
-                        if boundary:
-                            selValue = iGeom.length()
-                        else:
-                            # area. We need a common boundary in
-                            # order to merge
-                            if 0 < iGeom.length():
-                                selValue = selGeom.area()
-                            else:
-                                selValue = -1
-
-                        if -1 != selValue:
-                            useThis = True
-
-                            if smallestArea:
-                                if -1 == min:
-                                    min = selValue
-                                else:
-                                    if selValue < min:
-                                        min = selValue
-                                    else:
-                                        useThis = False
-                            else:
-                                if selValue > max:
-                                    max = selValue
-                                else:
-                                    useThis = False
-
-                            if useThis:
-                                mergeWithFid = selFeat.id()
-                                mergeWithGeom = QgsGeometry(selGeom)
-                # End while fit
-
-                if mergeWithFid is not None:
-                    # A successful candidate
-                    newGeom = mergeWithGeom.combine(geom2Eliminate)
-
-                    if processLayer.changeGeometry(mergeWithFid, newGeom):
-                        madeProgress = True
-                    else:
-                        raise QgsProcessingException(
-                            self.tr('Could not replace geometry of feature with id {0}').format(mergeWithFid))
-
-                    start = start + add
-                    feedback.setProgress(start)
-                else:
-                    featNotEliminated.append(feat)
-
-            # End for featToEliminate
-
-            featToEliminate = featNotEliminated
-
-        # End while
-        if not processLayer.commitChanges():
-            raise QgsProcessingException(self.tr('Could not commit changes'))
-
-        for feature in featNotEliminated:
-            if feedback.isCanceled():
+        # ANALYZE
+        multi_feedback.setCurrentStep(2)
+        multi_feedback.pushInfo(self.tr('Eliminating {0} polygons').format(len(featToEliminate)))
+        eliminator = Elimination({fid: feat.geometry() for fid, feat in featToEliminate.items()},
+                                 geometries, candidates, neighbours, mode)
+        clusters = sliverClusters(candidates, neighbours)
+        done = 0
+        with ThreadPoolExecutor(max_workers=max(1, threads)) as executor:
+            for cluster, _ in zip(clusters, executor.map(lambda c: eliminator.eliminate(c, multi_feedback), clusters)):
+                done += len(cluster)
+                multi_feedback.setProgress(int(done * total))
+
+        # write everything once, the merged geometries replacing the original ones
+        multi_feedback.setCurrentStep(3)
+        changed = set(eliminator.merged.values())
+        total = 100.0 / inLayer.featureCount() if inLayer.featureCount() else 0
+        for current, feat in enumerate(inLayer.getFeatures()):
+            if multi_feedback.isCanceled():
                 break
-
-            processLayer.dataProvider().addFeature(feature, QgsFeatureSink.FastInsert)
+            if feat.id() in selected:
+                continue
+            if feat.id() in changed:
+                feat.setGeometry(geometries[feat.id()])
+            sink.addFeature(feat, QgsFeatureSink.FastInsert)
+            multi_feedback.setProgress(int(current * total))
+
+        for fid, feature in featToEliminate.items():
+            if multi_feedback.isCanceled():
+                break
+            if fid not in eliminator.merged:
+                sink.addFeature(feature, QgsFeatureSink.FastInsert)
 
         return {self.OUTPUT: dest_id}
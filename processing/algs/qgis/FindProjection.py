@@ -22,6 +22,7 @@ __date__ = 'February 2017'
 __copyright__ = '(C) 2017, Nyall Dawson'
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 from qgis.core import (QgsGeometry,
                        QgsFeature,
@@ -33,6 +34,7 @@ from qgis.core import (QgsGeometry,
                        QgsCoordinateTransformContext,
                        QgsWkbTypes,
                        QgsProcessingException,
+                       QgsProcessingMultiStepFeedback,
                        QgsProcessingParameterFeatureSource,
                        QgsProcessingParameterExtent,
                        QgsProcessingParameterCrs,
@@ -41,6 +43,8 @@ from qgis.core import (QgsGeometry,
 from qgis.PyQt.QtCore import QVariant
 
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
+from processing.algs.qgis.crsindex import CrsIndex
+from processing.core.ProcessingConfig import ProcessingConfig
 
 pluginPath = os.path.split(os.path.split(os.path.dirname(__file__))[0])[0]
 
@@ -110,43 +114,62 @@ class FindProjection(QgisAlgorithm):
         engine = QgsGeometry.createGeometryEngine(target_geom.constGet())
         engine.prepareGeometry()
 
-        layer_bounds = QgsGeometry.fromRect(source.sourceExtent())
+        layer_extent = source.sourceExtent()
+        layer_bounds = QgsGeometry.fromRect(layer_extent)
 
-        crses_to_check = QgsCoordinateReferenceSystem.validSrsIds()
-        total = 100.0 / len(crses_to_check)
+        threads = int(ProcessingConfig.getSetting(ProcessingConfig.MAX_THREADS))
+        multi_feedback = QgsProcessingMultiStepFeedback(2, feedback)
 
-        found_results = 0
+        # only CRSs whose area of use is near the layer extent are transformed
+        index = CrsIndex.load(multi_feedback, threads)
+        if multi_feedback.isCanceled():
+            return {self.OUTPUT: dest_id}
+        candidates = index.candidates(layer_extent.xMinimum(), layer_extent.yMinimum(),
+                                      layer_extent.xMaximum(), layer_extent.yMaximum())
+        multi_feedback.pushInfo(self.tr('Checking {0} of {1} CRSs').format(len(candidates), len(index)))
+
+        multi_feedback.setCurrentStep(1)
+        total = 100.0 / len(candidates) if len(candidates) else 0
 
-        transform_context = QgsCoordinateTransformContext()
-        for current, srs_id in enumerate(crses_to_check):
-            if feedback.isCanceled():
-                break
+        found_results = 0
 
+        def transformed(srs_id):
+            if multi_feedback.isCanceled():
+                return None, None
             candidate_crs = QgsCoordinateReferenceSystem.fromSrsId(srs_id)
             if not candidate_crs.isValid():
-                continue
+                return candidate_crs, None
 
-            transform_candidate = QgsCoordinateTransform(candidate_crs, target_crs, transform_context)
+            transform_candidate = QgsCoordinateTransform(candidate_crs, target_crs, QgsCoordinateTransformContext())
             transform_candidate.setBallparkTransformsAreAppropriate(True)
             transform_candidate.disableFallbackOperationHandler(True)
             transformed_bounds = QgsGeometry(layer_bounds)
             try:
                 if transformed_bounds.transform(transform_candidate) != 0:
-                    continue
+                    return candidate_crs, None
             except:
-                continue
+                return candidate_crs, None
+            return candidate_crs, transformed_bounds
 
-            try:
-                if engine.intersects(transformed_bounds.constGet()):
-                    feedback.pushInfo(self.tr('Found candidate CRS: {}').format(candidate_crs.authid()))
-                    f = QgsFeature(fields)
-                    f.setAttributes([candidate_crs.authid()])
-                    sink.addFeature(f, QgsFeatureSink.FastInsert)
-                    found_results += 1
-            except:
-                continue
+        with ThreadPoolExecutor(max_workers=max(1, threads)) as executor:
+            # the prepared engine is only used from this thread
+            for current, (candidate_crs, transformed_bounds) in enumerate(executor.map(transformed, index.srsIds[candidates].tolist())):
+                if multi_feedback.isCanceled():
+                    break
+
+                multi_feedback.setProgress(int(current * total))
+                if transformed_bounds is None:
+                    continue
 
-            feedback.setProgress(int(current * total))
+                try:
+                    if engine.intersects(transformed_bounds.constGet()):
+                        multi_feedback.pushInfo(self.tr('Found candidate CRS: {}').format(candidate_crs.authid()))
+                        f = QgsFeature(fields)
+                        f.setAttributes([candidate_crs.authid()])
+                        sink.addFeature(f, QgsFeatureSink.FastInsert)
+                        found_results += 1
+                except:
+                    continue
 
         if found_results == 0:
             feedback.reportError(self.tr('No matching projections found'))
@@ -24,12 +24,14 @@ __copyright__ = '(C) 2014, Alexander Bruy'
 import os
 import csv
 
-from osgeo import gdal, ogr, osr
+import numpy
 
 from qgis.core import (QgsRectangle,
                        QgsGeometry,
                        QgsFeatureRequest,
                        QgsProcessingException,
+                       QgsProcessingMultiStepFeedback,
+                       QgsSpatialIndex,
                        QgsProcessing,
                        QgsProcessingParameterBoolean,
                        QgsProcessingParameterNumber,
@@ -40,8 +42,6 @@ from qgis.core import (QgsRectangle,
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
 from processing.tools import raster
 
-from qgis.PyQt.QtCore import QCoreApplication
-
 
 class HypsometricCurves(QgisAlgorithm):
     INPUT_DEM = 'INPUT_DEM'
@@ -79,35 +79,30 @@ class HypsometricCurves(QgisAlgorithm):
         return self.tr('Hypsometric curves')
 
     def processAlgorithm(self, parameters, context, feedback):
-        try:
-            import numpy
-        except ImportError:
-            raise QgsProcessingException(QCoreApplication.translate('HypsometricCurves', 'This algorithm requires the Python “numpy” library. Please install this library and try again.'))
-
         raster_layer = self.parameterAsRasterLayer(parameters, self.INPUT_DEM, context)
         target_crs = raster_layer.crs()
-        rasterPath = raster_layer.source()
 
         source = self.parameterAsSource(parameters, self.BOUNDARY_LAYER, context)
         if source is None:
             raise QgsProcessingException(self.invalidSourceError(parameters, self.BOUNDARY_LAYER))
 
         step = self.parameterAsDouble(parameters, self.STEP, context)
+        if step <= 0:
+            raise QgsProcessingException(self.tr('Step must be greater than 0'))
         percentage = self.parameterAsBoolean(parameters, self.USE_PERCENTAGE, context)
 
         outputPath = self.parameterAsString(parameters, self.OUTPUT_DIRECTORY, context)
         if not os.path.exists(outputPath):
             os.makedirs(outputPath)
 
-        rasterDS = gdal.Open(rasterPath, gdal.GA_ReadOnly)
+        rasterDS, rasterBand = raster.openBand(raster_layer)
         geoTransform = rasterDS.GetGeoTransform()
-        rasterBand = rasterDS.GetRasterBand(1)
-        noData = rasterBand.GetNoDataValue()
 
         cellXSize = abs(geoTransform[1])
         cellYSize = abs(geoTransform[5])
         rasterXSize = rasterDS.RasterXSize
         rasterYSize = rasterDS.RasterYSize
+        rasterDS = None
 
         rasterBBox = QgsRectangle(geoTransform[0],
                                   geoTransform[3] - cellYSize * rasterYSize,
@@ -115,133 +110,97 @@ class HypsometricCurves(QgisAlgorithm):
                                   geoTransform[3])
         rasterGeom = QgsGeometry.fromRect(rasterBBox)
 
-        crs = osr.SpatialReference()
-        crs.ImportFromProj4(str(target_crs.toProj()))
-
-        memVectorDriver = ogr.GetDriverByName('Memory')
-        memRasterDriver = gdal.GetDriverByName('MEM')
+        multi_feedback = QgsProcessingMultiStepFeedback(3, feedback)
 
+        # zone labels start at 1, label 0 is for cells outside all zones
+        fids = []
+        geometries = []
         features = source.getFeatures(QgsFeatureRequest().setDestinationCrs(target_crs, context.transformContext()))
         total = 100.0 / source.featureCount() if source.featureCount() else 0
-
         for current, f in enumerate(features):
-            if not f.hasGeometry():
-                continue
-
-            if feedback.isCanceled():
+            if multi_feedback.isCanceled():
                 break
 
-            geom = f.geometry()
-            intersectedGeom = rasterGeom.intersection(geom)
+            if not f.hasGeometry():
+                continue
 
+            intersectedGeom = rasterGeom.intersection(f.geometry())
             if intersectedGeom.isEmpty():
-                feedback.pushInfo(
+                multi_feedback.pushInfo(
                     self.tr('Feature {0} does not intersect raster or '
                             'entirely located in NODATA area').format(f.id()))
                 continue
 
-            fName = os.path.join(
-                outputPath, 'histogram_{}_{}.csv'.format(source.sourceName(), f.id()))
-
-            ogrGeom = ogr.CreateGeometryFromWkt(intersectedGeom.asWkt())
-            bbox = intersectedGeom.boundingBox()
-            xMin = bbox.xMinimum()
-            xMax = bbox.xMaximum()
-            yMin = bbox.yMinimum()
-            yMax = bbox.yMaximum()
-
-            (startColumn, startRow) = raster.mapToPixel(xMin, yMax, geoTransform)
-            (endColumn, endRow) = raster.mapToPixel(xMax, yMin, geoTransform)
-
-            width = endColumn - startColumn
-            height = endRow - startRow
-
-            srcOffset = (startColumn, startRow, width, height)
-            srcArray = rasterBand.ReadAsArray(*srcOffset)
-
-            if srcOffset[2] == 0 or srcOffset[3] == 0:
+            fids.append(f.id())
+            geometries.append(intersectedGeom)
+            multi_feedback.setProgress(int(current * total))
+
+        # overlapping zones go to separate label rasters
+        rasterizers = []
+        for group in self.zoneGroups(geometries):
+            rasterizers.append(raster.ZoneRasterizer(geoTransform,
+                                                     [bytes(geometries[i].asWkb()) for i in group],
+                                                     [i + 1 for i in group]))
+
+        def scan(reducer):
+            for xoff, yoff, block in raster.scanblocks(raster_layer, multi_feedback):
+                ysize, xsize = block.shape
+                for rasterizer in rasterizers:
+                    reducer.update(rasterizer.labels(xoff, yoff, xsize, ysize), block)
+            return reducer
+
+        # bins start at the minimum of each zone, which is needed first
+        multi_feedback.setCurrentStep(1)
+        ranges = scan(raster.ZonalRangeReducer(len(fids)))
+        multi_feedback.setCurrentStep(2)
+        histograms = scan(raster.ZonalHistogramReducer(ranges.min, ranges.max, step))
+        if multi_feedback.isCanceled():
+            return {self.OUTPUT_DIRECTORY: outputPath}
+
+        for zone, fid in enumerate(fids, 1):
+            if ranges.count[zone] == 0:
                 feedback.pushInfo(
-                    self.tr('Feature {0} is smaller than raster '
-                            'cell size').format(f.id()))
+                    self.tr('Feature {0} does not intersect raster or '
+                            'entirely located in NODATA area').format(fid))
                 continue
 
-            newGeoTransform = (
-                geoTransform[0] + srcOffset[0] * geoTransform[1],
-                geoTransform[1],
-                0.0,
-                geoTransform[3] + srcOffset[1] * geoTransform[5],
-                0.0,
-                geoTransform[5]
-            )
-
-            memVDS = memVectorDriver.CreateDataSource('out')
-            memLayer = memVDS.CreateLayer('poly', crs, ogr.wkbPolygon)
-
-            ft = ogr.Feature(memLayer.GetLayerDefn())
-            ft.SetGeometry(ogrGeom)
-            memLayer.CreateFeature(ft)
-            ft.Destroy()
-
-            rasterizedDS = memRasterDriver.Create('', srcOffset[2],
-                                                  srcOffset[3], 1, gdal.GDT_Byte)
-            rasterizedDS.SetGeoTransform(newGeoTransform)
-            gdal.RasterizeLayer(rasterizedDS, [1], memLayer, burn_values=[1])
-            rasterizedArray = rasterizedDS.ReadAsArray()
-
-            srcArray = numpy.nan_to_num(srcArray)
-            masked = numpy.ma.MaskedArray(srcArray,
-                                          mask=numpy.logical_or(srcArray == noData,
-                                                                numpy.logical_not(rasterizedArray)))
-
-            self.calculateHypsometry(f.id(), fName, feedback, masked,
-                                     cellXSize, cellYSize, percentage, step)
-
-            memVDS = None
-            rasterizedDS = None
-            feedback.setProgress(int(current * total))
+            if percentage:
+                multiplier = 100.0 / ranges.count[zone]
+            else:
+                multiplier = cellXSize * cellYSize
 
-        rasterDS = None
+            counts, elevations = histograms.histogram(zone)
+            fName = os.path.join(
+                outputPath, 'histogram_{}_{}.csv'.format(source.sourceName(), fid))
+            with open(fName, 'w', newline='', encoding='utf-8') as out_file:
+                writer = csv.writer(out_file)
+                writer.writerow([self.tr('Area'), self.tr('Elevation')])
+                writer.writerows(zip((numpy.cumsum(counts) * multiplier).tolist(), elevations.tolist()))
 
         return {self.OUTPUT_DIRECTORY: outputPath}
 
-    def calculateHypsometry(self, fid, fName, feedback, data, pX, pY,
-                            percentage, step):
-        out = dict()
-        d = data.compressed()
-        if d.size == 0:
-            feedback.pushInfo(
-                self.tr('Feature {0} does not intersect raster or '
-                        'entirely located in NODATA area').format(fid))
-            return
-
-        minValue = d.min()
-        maxValue = d.max()
-        startValue = minValue
-        tmpValue = minValue + step
-        while startValue < maxValue:
-            out[tmpValue] = ((startValue <= d) & (d < tmpValue)).sum()
-            startValue = tmpValue
-            tmpValue += step
-
-        if percentage:
-            multiplier = 100.0 / len(d.flat)
-        else:
-            multiplier = pX * pY
-
-        for k, v in out.items():
-            out[k] = v * multiplier
-
-        prev = None
-        for i in sorted(out.items()):
-            if prev is None:
-                out[i[0]] = i[1]
-            else:
-                out[i[0]] = i[1] + out[prev]
-            prev = i[0]
-
-        with open(fName, 'w', newline='', encoding='utf-8') as out_file:
-            writer = csv.writer(out_file)
-            writer.writerow([self.tr('Area'), self.tr('Elevation')])
-
-            for i in sorted(out.items()):
-                writer.writerow([i[1], i[0]])
+    def zoneGroups(self, geometries):
+        """Splits zones into groups of zones which do not overlap, as a label
+        raster holds a single zone per cell. Zones which only touch share a
+        group.
+        """
+        index = QgsSpatialIndex()
+        group_of = []
+        groups = []
+        for i, geometry in enumerate(geometries):
+            engine = QgsGeometry.createGeometryEngine(geometry.constGet())
+            engine.prepareGeometry()
+            used = set()
+            for j in index.intersects(geometry.boundingBox()):
+                other = geometries[j].constGet()
+                if engine.intersects(other) and not engine.touches(other):
+                    used.add(group_of[j])
+            group = 0
+            while group in used:
+                group += 1
+            if group == len(groups):
+                groups.append([])
+            groups[group].append(i)
+            group_of.append(group)
+            index.addFeature(i, geometry.boundingBox())
+        return groups
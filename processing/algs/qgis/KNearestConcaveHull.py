@@ -26,11 +26,13 @@ __copyright__ = '(C) 2014, Detlev Neumann'
 import os.path
 import math
 
+import numpy
+
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QVariant
 
-from qgis.core import (QgsApplication,
-                       QgsExpression,
+from qgis.core import (NULL,
+                       QgsApplication,
                        QgsFeature,
                        QgsFeatureRequest,
                        QgsFeatureSink,
@@ -43,10 +45,10 @@ from qgis.core import (QgsApplication,
                        QgsProcessingParameterFeatureSource,
                        QgsProcessingParameterField,
                        QgsProcessingParameterNumber,
-                       QgsPoint,
                        QgsPointXY,
                        QgsWkbTypes)
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
+from processing.tools.spatial import PointIndex
 
 
 class KNearestConcaveHull(QgisAlgorithm):
@@ -107,175 +109,123 @@ class KNearestConcaveHull(QgisAlgorithm):
         fields = QgsFields()
         fields.append(QgsField('id', QVariant.Int, '', 20))
 
-        current = 0
-
         # Get properties of the field the grouping is based on
         if use_field:
             field_index = source.fields().lookupField(field_name)
-            if field_index >= 0:
-                fields.append(source.fields()[field_index])  # Add a field with the name of the grouping field
-
-                # Initialize writer
-                (sink, dest_id) = self.parameterAsSink(parameters, self.OUTPUT, context,
-                                                       fields, QgsWkbTypes.Polygon, source.sourceCrs())
-                if sink is None:
-                    raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
-
-                success = False
-                fid = 0
-
-                # Get unique values of grouping field
-                unique_values = source.uniqueValues(field_index)
-                total = 100.0 / float(source.featureCount() * len(unique_values))
-
-                for unique in unique_values:
-                    points = []
-                    filter = QgsExpression.createFieldEqualityExpression(field_name, unique)
-                    request = QgsFeatureRequest().setFilterExpression(filter)
-                    request.setSubsetOfAttributes([])
-                    # Get features with the grouping attribute equal to the current grouping value
-                    features = source.getFeatures(request)
-                    for in_feature in features:
-                        if feedback.isCanceled():
-                            break
-                        # Add points or vertices of more complex geometry
-                        points.extend(extract_points(in_feature.geometry()))
-                        current += 1
-                        feedback.setProgress(int(current * total))
-                    # A minimum of 3 points is necessary to proceed
-                    if len(points) >= 3:
-                        out_feature = QgsFeature()
-                        the_hull = concave_hull(points, kneighbors)
-                        if the_hull:
-                            vertex = [QgsPointXY(point[0], point[1]) for point in the_hull]
-                            poly = QgsGeometry().fromPolygonXY([vertex])
-
-                            out_feature.setGeometry(poly)
-                            # Give the polygon the same attribute as the point grouping attribute
-                            out_feature.setAttributes([fid, unique])
-                            sink.addFeature(out_feature, QgsFeatureSink.FastInsert)
-                            success = True  # at least one polygon created
-                    fid += 1
-                if not success:
-                    raise QgsProcessingException('No hulls could be created. Most likely there were not at least three unique points in any of the groups.')
-            else:
+            if field_index < 0:
                 # Field parameter provided but can't read from it
                 raise QgsProcessingException('Unable to find grouping field')
-
-        else:
-            # Not grouped by field
-            # Initialize writer
-            (sink, dest_id) = self.parameterAsSink(parameters, self.OUTPUT, context,
-                                                   fields, QgsWkbTypes.Polygon, source.sourceCrs())
-            if sink is None:
-                raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
-
-            points = []
-            request = QgsFeatureRequest()
-            request.setSubsetOfAttributes([])
-            features = source.getFeatures(request)  # Get all features
-            total = 100.0 / source.featureCount() if source.featureCount() else 0
-            for in_feature in features:
-                if feedback.isCanceled():
-                    break
-                # Add points or vertices of more complex geometry
-                points.extend(extract_points(in_feature.geometry()))
-                current += 1
-                feedback.setProgress(int(current * total))
-
+            fields.append(source.fields()[field_index])  # Add a field with the name of the grouping field
+
+        # Initialize writer
+        (sink, dest_id) = self.parameterAsSink(parameters, self.OUTPUT, context,
+                                               fields, QgsWkbTypes.Polygon, source.sourceCrs())
+        if sink is None:
+            raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
+
+        # Bucket the points or vertices of all features by grouping value in a single pass
+        request = QgsFeatureRequest()
+        request.setSubsetOfAttributes([field_index] if use_field else [])
+        groups = {}
+        total = 50.0 / source.featureCount() if source.featureCount() else 0
+        for current, in_feature in enumerate(source.getFeatures(request)):
+            if feedback.isCanceled():
+                break
+            value = None
+            if use_field:
+                value = in_feature[field_index]
+                if value == NULL:
+                    value = None
+            groups.setdefault(value, []).extend(extract_points(in_feature.geometry()))
+            feedback.setProgress(int(current * total))
+
+        if not use_field:
+            points = groups.get(None, [])
+            # A minimum of 3 points is necessary to proceed
+            if len(points) < 3:
+                raise QgsProcessingException('At least three points are required to create a concave hull.')
+            the_hull = concave_hull(points, kneighbors)
+            if not the_hull:
+                # the_hull returns None only when there are less than three points after cleaning
+                raise QgsProcessingException('At least three unique points are required to create a concave hull.')
+            sink.addFeature(hull_feature(the_hull, [0]), QgsFeatureSink.FastInsert)
+            feedback.setProgress(100)
+            return {self.OUTPUT: dest_id}
+
+        success = False
+        total = 50.0 / len(groups) if groups else 0
+        for fid, (unique, points) in enumerate(groups.items()):
+            if feedback.isCanceled():
+                break
             # A minimum of 3 points is necessary to proceed
             if len(points) >= 3:
-                out_feature = QgsFeature()
                 the_hull = concave_hull(points, kneighbors)
                 if the_hull:
-                    vertex = [QgsPointXY(point[0], point[1]) for point in the_hull]
-                    poly = QgsGeometry().fromPolygonXY([vertex])
-
-                    out_feature.setGeometry(poly)
-                    out_feature.setAttributes([0])
-                    sink.addFeature(out_feature, QgsFeatureSink.FastInsert)
-                else:
-                    # the_hull returns None only when there are less than three points after cleaning
-                    raise QgsProcessingException('At least three unique points are required to create a concave hull.')
-            else:
-                raise QgsProcessingException('At least three points are required to create a concave hull.')
+                    # Give the polygon the same attribute as the point grouping attribute
+                    sink.addFeature(hull_feature(the_hull, [fid, unique]), QgsFeatureSink.FastInsert)
+                    success = True  # at least one polygon created
+            feedback.setProgress(50 + int((fid + 1) * total))
+        if not success:
+            raise QgsProcessingException('No hulls could be created. Most likely there were not at least three unique points in any of the groups.')
 
         return {self.OUTPUT: dest_id}
 
 
-def clean_list(list_of_points):
+def hull_feature(the_hull, attributes):
     """
-    Deletes duplicate points in list_of_points
+    Returns a polygon feature with the vertices *the_hull* and the given attributes
     """
-    return list(set(list_of_points))
+    out_feature = QgsFeature()
+    vertex = [QgsPointXY(point[0], point[1]) for point in the_hull]
+    out_feature.setGeometry(QgsGeometry().fromPolygonXY([vertex]))
+    out_feature.setAttributes(attributes)
+    return out_feature
 
 
-def find_min_y_point(list_of_points):
+def clean_list(list_of_points):
     """
-    Returns that point of *list_of_points* having minimal y-coordinate
+    Returns the distinct points of list_of_points as a (n, 2) array
 
-    :param list_of_points: list of tuples
-    :return: tuple (x, y)
+    :param list_of_points: list of tuples (x, y) or array of coordinates
+    :return: numpy array
     """
-    min_y_pt = list_of_points[0]
-    for point in list_of_points[1:]:
-        if point[1] < min_y_pt[1] or (point[1] == min_y_pt[1] and point[0] < min_y_pt[0]):
-            min_y_pt = point
-    return min_y_pt
+    return numpy.unique(numpy.asarray(list_of_points, dtype=numpy.float64).reshape(-1, 2), axis=0)
 
 
-def add_point(vector, element):
-    """
-    Returns vector with the given element append to the right
+def find_min_y_point(points):
     """
-    vector.append(element)
-    return vector
+    Returns the index of the point of *points* having minimal y-coordinate, the leftmost one
+    if there are several of them
 
-
-def remove_point(vector, element):
-    """
-    Returns a copy of vector without the given element
+    :param points: (n, 2) array
+    :return: integer
     """
-    vector.pop(vector.index(element))
-    return vector
+    return int(numpy.lexsort((points[:, 0], points[:, 1]))[0])
 
 
-def euclidean_distance(point1, point2):
+def nearest_points(index, available, point, k):
     """
-    Returns the euclidean distance of the 2 given points.
+    Returns the indices of the k closest neighbors of the specified point among the points flagged
+    in *available*, nearest first. The measure of proximity is the Euclidean distance. Fewer than k
+    indices are returned when there are not enough available points.
 
-    :param point1: tuple (x, y)
-    :param point2: tuple (x, y)
-    :return: float
-    """
-    return math.sqrt(math.pow(point1[0] - point2[0], 2) + math.pow(point1[1] - point2[1], 2))
+    The index covers all points, including those already used by the hull, so it is queried for a
+    growing number of neighbors until enough available ones are found.
 
-
-def nearest_points(list_of_points, point, k):
-    """
-    Returns a list of the indices of the k closest neighbors from list_of_points to the specified point. The measure
-    of proximity is the Euclidean distance. Internally, k becomes the minimum between the given value for k and the
-    number of points in list_of_points
-
-    :param list_of_points: list of tuples
+    :param index: PointIndex over all points
+    :param available: boolean array
     :param point: tuple (x, y)
     :param k: integer
-    :return: list of k tuples
+    :return: array of indices
     """
-    # build a list of tuples of distances between point *point* and every point in *list_of_points*, and
-    # their respective index of list *list_of_distances*
-    list_of_distances = []
-    for index in range(len(list_of_points)):
-        list_of_distances.append((euclidean_distance(list_of_points[index], point), index))
-
-    # sort distances in ascending order
-    list_of_distances.sort()
-
-    # get the k nearest neighbors of point
-    nearest_list = []
-    for index in range(min(k, len(list_of_points))):
-        nearest_list.append((list_of_points[list_of_distances[index][1]]))
-    return nearest_list
+    n = len(available)
+    count = min(n, 2 * k)
+    while True:
+        _, indices = index.query([point], count)
+        indices = indices[0][available[indices[0]]]
+        if len(indices) >= k or count == n:
+            return indices[:k]
+        count = min(n, count * 4)
 
 
 def angle(from_point, to_point):
@@ -284,265 +234,228 @@ def angle(from_point, to_point):
     positive for segments with upward direction (north), otherwise negative (south). Values ranges from 0 at the
     right (east) to pi at the left side (west).
 
-    :param from_point: tuple (x, y)
-    :param to_point: tuple (x, y)
-    :return: float
+    :param from_point: tuple (x, y) or (n, 2) array
+    :param to_point: tuple (x, y) or (n, 2) array
+    :return: float or array
     """
-    return math.atan2(to_point[1] - from_point[1], to_point[0] - from_point[0])
+    to_point = numpy.asarray(to_point)
+    from_point = numpy.asarray(from_point)
+    return numpy.arctan2(to_point[..., 1] - from_point[..., 1], to_point[..., 0] - from_point[..., 0])
 
 
 def angle_difference(angle1, angle2):
     """
     Calculates the difference between the given angles in clockwise direction as radians.
 
-    :param angle1: float
-    :param angle2: float
-    :return: float; between 0 and 2*Pi
+    :param angle1: float or array
+    :param angle2: float or array
+    :return: float or array; between 0 and 2*Pi
     """
-    if (angle1 > 0 and angle2 >= 0) and angle1 > angle2:
-        return abs(angle1 - angle2)
-    elif (angle1 >= 0 and angle2 > 0) and angle1 < angle2:
-        return 2 * math.pi + angle1 - angle2
-    elif (angle1 < 0 and angle2 <= 0) and angle1 < angle2:
-        return 2 * math.pi + angle1 + abs(angle2)
-    elif (angle1 <= 0 and angle2 < 0) and angle1 > angle2:
-        return abs(angle1 - angle2)
-    elif angle1 <= 0 < angle2:
-        return 2 * math.pi + angle1 - angle2
-    elif angle1 >= 0 >= angle2:
-        return angle1 + abs(angle2)
-    else:
-        return 0
-
-
-def intersect(line1, line2):
+    return numpy.mod(angle1 - angle2, 2 * math.pi)
+
+
+def intersect(start1, end1, start2, end2):
     """
-    Returns True if the two given line segments intersect each other, and False otherwise.
+    Tests the line segments (start1, end1) against the line segments (start2, end2) and returns True where
+    they intersect each other. Arguments are arrays of coordinates with a last axis of size 2 and are
+    broadcast against each other. Parallel segments never intersect.
 
-    :param line1: 2-tuple of tuple (x, y)
-    :param line2: 2-tuple of tuple (x, y)
-    :return: boolean
+    :return: boolean array
     """
-    a1 = line1[1][1] - line1[0][1]
-    b1 = line1[0][0] - line1[1][0]
-    c1 = a1 * line1[0][0] + b1 * line1[0][1]
-    a2 = line2[1][1] - line2[0][1]
-    b2 = line2[0][0] - line2[1][0]
-    c2 = a2 * line2[0][0] + b2 * line2[0][1]
-    tmp = (a1 * b2 - a2 * b1)
-    if tmp == 0:
-        return False
-    sx = (c1 * b2 - c2 * b1) / tmp
-    if (sx > line1[0][0] and sx > line1[1][0]) or (sx > line2[0][0] and sx > line2[1][0]) or\
-            (sx < line1[0][0] and sx < line1[1][0]) or (sx < line2[0][0] and sx < line2[1][0]):
-        return False
-    sy = (a1 * c2 - a2 * c1) / tmp
-    if (sy > line1[0][1] and sy > line1[1][1]) or (sy > line2[0][1] and sy > line2[1][1]) or\
-            (sy < line1[0][1] and sy < line1[1][1]) or (sy < line2[0][1] and sy < line2[1][1]):
-        return False
-    return True
-
-
-def point_in_polygon_q(point, list_of_points):
+    a1 = end1[..., 1] - start1[..., 1]
+    b1 = start1[..., 0] - end1[..., 0]
+    c1 = a1 * start1[..., 0] + b1 * start1[..., 1]
+    a2 = end2[..., 1] - start2[..., 1]
+    b2 = start2[..., 0] - end2[..., 0]
+    c2 = a2 * start2[..., 0] + b2 * start2[..., 1]
+    tmp = a1 * b2 - a2 * b1
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        sx = (c1 * b2 - c2 * b1) / tmp
+        sy = (a1 * c2 - a2 * c1) / tmp
+
+    def within(s, p, q):
+        return ~(((s > p) & (s > q)) | ((s < p) & (s < q)))
+
+    return ((tmp != 0) &
+            within(sx, start1[..., 0], end1[..., 0]) & within(sx, start2[..., 0], end2[..., 0]) &
+            within(sy, start1[..., 1], end1[..., 1]) & within(sy, start2[..., 1], end2[..., 1]))
+
+
+def points_in_polygon(points, polygon, chunk_size=1000000):
     """
-    Return True if given point *point* is laying in the polygon described by the vertices *list_of_points*,
-    otherwise False
-
-    Based on the "Ray Casting Method" described by Joel Lawhead in this blog article:
+    Returns a boolean array telling which of the (n, 2) *points* lay in the closed polygon described by the
+    vertices *polygon*, using the "Ray Casting Method" described by Joel Lawhead in this blog article:
     http://geospatialpython.com/2011/01/point-in-polygon.html
 
+    Points are tested against all edges at once, in chunks of about chunk_size point/edge pairs.
     """
-    x = point[0]
-    y = point[1]
-    poly = [(pt[0], pt[1]) for pt in list_of_points]
-    n = len(poly)
-    inside = False
-
-    p1x, p1y = poly[0]
-    for i in range(n + 1):
-        p2x, p2y = poly[i % n]
-        if y > min(p1y, p2y):
-            if y <= max(p1y, p2y):
-                if x <= max(p1x, p2x):
-                    if p1y != p2y:
-                        xints = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
-                    if p1x == p2x or x <= xints:
-                        inside = not inside
-        p1x, p1y = p2x, p2y
-
+    polygon = numpy.asarray(polygon, dtype=numpy.float64)
+    p1 = polygon[:-1]
+    p2 = polygon[1:]
+    ymin = numpy.minimum(p1[:, 1], p2[:, 1])
+    ymax = numpy.maximum(p1[:, 1], p2[:, 1])
+    xmax = numpy.maximum(p1[:, 0], p2[:, 0])
+    vertical = p1[:, 0] == p2[:, 0]
+
+    inside = numpy.zeros(len(points), dtype=bool)
+    step = max(1, chunk_size // max(len(p1), 1))
+    for start in range(0, len(points), step):
+        x = points[start:start + step, 0:1]
+        y = points[start:start + step, 1:2]
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            xints = (y - p1[:, 1]) * (p2[:, 0] - p1[:, 0]) / (p2[:, 1] - p1[:, 1]) + p1[:, 0]
+        crossings = (y > ymin) & (y <= ymax) & (x <= xmax) & (vertical | (x <= xints))
+        inside[start:start + step] = numpy.count_nonzero(crossings, axis=1) % 2 == 1
     return inside
 
 
 def extract_points(geom):
     """
-    Generate list of QgsPoints from QgsGeometry *geom* ( can be point, line, or polygon )
-    Code taken from fTools plugin
+    Generate list of point coordinates from QgsGeometry *geom* ( can be point, line, or polygon )
 
     :param geom: an arbitrary geometry feature
-    :return: list of points
+    :return: list of tuples (x, y)
     """
-    multi_geom = QgsGeometry()
-    temp_geom = []
-    # point geometry
-    if geom.type() == 0:
-        if geom.isMultipart():
-            temp_geom = geom.asMultiPoint()
-        else:
-            temp_geom.append(geom.asPoint())
-    # line geometry
-    if geom.type() == 1:
-        # if multipart feature explode to single part
-        if geom.isMultipart():
-            multi_geom = geom.asMultiPolyline()
-            for i in multi_geom:
-                temp_geom.extend(i)
-        else:
-            temp_geom = geom.asPolyline()
-    # polygon geometry
-    elif geom.type() == 2:
-        # if multipart feature explode to single part
-        if geom.isMultipart():
-            multi_geom = geom.asMultiPolygon()
-            # now single part polygons
-            for i in multi_geom:
-                # explode to line segments
-                for j in i:
-                    temp_geom.extend(j)
-        else:
-            multi_geom = geom.asPolygon()
-            # explode to line segments
-            for i in multi_geom:
-                temp_geom.extend(i)
-    return temp_geom
-
-
-def sort_by_angle(list_of_points, last_point, last_angle):
+    return [(vertex.x(), vertex.y()) for vertex in geom.vertices()]
+
+
+def sort_by_angle(points, candidates, last_point, last_angle):
     """
-    returns the points in list_of_points in descending order of angle to the last segment of the envelope, measured
+    returns the candidate indices in descending order of angle to the last segment of the envelope, measured
     in a clockwise direction. Thus, the rightmost of the neighboring points is always selected. The first point of
     this list will be the next point of the envelope.
     """
+    keys = angle_difference(last_angle, angle(last_point, points[candidates]))
+    return candidates[numpy.argsort(-keys, kind='stable')]
 
-    def getkey(item):
-        return angle_difference(last_angle, angle(last_point, item))
-
-    vertex_list = sorted(list_of_points, key=getkey, reverse=True)
-    return vertex_list
 
-
-def concave_hull(points_list, k):
+def trace_hull(points, index, k):
     """
-    Calculates a valid concave hull polygon containing all given points. The algorithm searches for that
-    point in the neighborhood of k nearest neighbors which maximizes the rotation angle in clockwise direction
-    without intersecting any previous line segments.
+    Follows the envelope of *points* with k nearest neighbors, see concave_hull. Returns the vertex indices of the
+    closed hull, or None when no valid hull can be built with this number of neighbors.
 
-    This is an implementation of the algorithm described by Adriano Moreira and Maribel Yasmina Santos:
-    CONCAVE HULL: A neighborhood_k-NEAREST NEIGHBORS APPROACH FOR THE COMPUTATION OF THE REGION OCCUPIED BY A SET OF POINTS.
-    GRAPP 2007 - International Conference on Computer Graphics Theory and Applications; pp 61-68.
-
-    :param points_list: list of tuples (x, y)
+    :param points: (n, 2) array of distinct points
+    :param index: PointIndex over points
     :param k: integer
-    :return: list of tuples (x, y)
+    :return: array of indices
     """
-    # return an empty list if not enough points are given
-    if k > len(points_list):
-        k = len(points_list)
-
-    # the number of nearest neighbors k must be greater than or equal to 3
-    kk = max(k, 3)
-
-    # delete duplicate points
-    point_set = clean_list(points_list)
-
-    # if point_set has less then 3 points no polygon can be created and an empty list will be returned
-    if len(point_set) < 3:
-        return None
-
-    # if point_set has 3 points then these are already vertices of the hull. Append the first point to
-    # close the hull polygon
-    if len(point_set) == 3:
-        return add_point(point_set, point_set[0])
-
-    # make sure that k neighbors can be found
-    kk = min(kk, len(point_set))
+    n = len(points)
+    available = numpy.ones(n, dtype=bool)
 
     # start with the point having the smallest y-coordinate (most southern point)
-    first_point = find_min_y_point(point_set)
+    first_point = find_min_y_point(points)
 
     # add this points as the first vertex of the hull
-    hull = [first_point]
+    hull = numpy.empty(n + 1, dtype=numpy.int64)
+    hull[0] = first_point
+    size = 1
 
     # make the first vertex of the hull to the current point
     current_point = first_point
 
-    # remove the point from the point_set, to prevent him being among the nearest points
-    point_set = remove_point(point_set, first_point)
+    # remove the point from the point set, to prevent him being among the nearest points
+    available[first_point] = False
+    remaining = n - 1
     previous_angle = math.pi
 
     # step counts the number of segments
     step = 2
 
-    # as long as point_set is not empty or search is returning to the starting point
-    while (current_point != first_point) or (step == 2) and (len(point_set) > 0):
+    # as long as point set is not empty or search is returning to the starting point
+    while (current_point != first_point) or (step == 2) and (remaining > 0):
 
-        # after 3 iterations add the first point to point_set again, otherwise a hull cannot be closed
+        # after 3 iterations add the first point to point set again, otherwise a hull cannot be closed
         if step == 5:
-            point_set = add_point(point_set, first_point)
+            available[first_point] = True
+            remaining += 1
 
         # search the k nearest neighbors of the current point
-        k_nearest_points = nearest_points(point_set, current_point, kk)
+        candidates = nearest_points(index, available, points[current_point], k)
+        if not len(candidates):
+            return None
 
         # sort the candidates (neighbors) in descending order of right-hand turn. This way the algorithm progresses
         # in clockwise direction through as many points as possible
-        c_points = sort_by_angle(k_nearest_points, current_point, previous_angle)
-
-        its = True
-        i = -1
-
-        # search for the nearest point to which the connecting line does not intersect any existing segment
-        while its is True and (i < len(c_points) - 1):
-            i += 1
-            if c_points[i] == first_point:
-                last_point = 1
-            else:
-                last_point = 0
-            j = 2
-            its = False
-
-            while its is False and (j < len(hull) - last_point):
-                its = intersect((hull[step - 2], c_points[i]), (hull[step - 2 - j], hull[step - 1 - j]))
-                j += 1
-
-        # there is no candidate to which the connecting line does not intersect any existing segment, so the
-        # for the next candidate fails. The algorithm starts again with an increased number of neighbors
-        if its is True:
-            return concave_hull(points_list, kk + 1)
+        candidates = sort_by_angle(points, candidates, points[current_point], previous_angle)
+
+        # test the connecting lines to all candidates against the existing segments, except the last one which
+        # shares the current point, and except the first one for a candidate closing the hull
+        segments = max(size - 2, 0)
+        starts = points[hull[:segments]]
+        ends = points[hull[1:segments + 1]]
+        crossing = intersect(points[current_point], points[candidates][:, numpy.newaxis], starts, ends)
+        if crossing.shape[1]:
+            crossing[candidates == first_point, 0] = False
+        free = numpy.flatnonzero(~crossing.any(axis=1))
+
+        # there is no candidate to which the connecting line does not intersect any existing segment
+        if not len(free):
+            return None
 
         # the first point which complies with the requirements is added to the hull and gets the current point
-        current_point = c_points[i]
-        hull = add_point(hull, current_point)
+        current_point = int(candidates[free[0]])
+        hull[size] = current_point
+        size += 1
 
         # calculate the angle between the last vertex and his precursor, that is the last segment of the hull
         # in reversed direction
-        previous_angle = angle(hull[step - 1], hull[step - 2])
+        previous_angle = angle(points[hull[size - 1]], points[hull[size - 2]])
 
-        # remove current_point from point_set
-        point_set = remove_point(point_set, current_point)
+        # remove current_point from point set
+        available[current_point] = False
+        remaining -= 1
 
         # increment counter
         step += 1
 
-    all_inside = True
-    i = len(point_set) - 1
+    hull = hull[:size]
 
     # check if all points are within the created polygon
-    while (all_inside is True) and (i >= 0):
-        all_inside = point_in_polygon_q(point_set[i], hull)
-        i -= 1
-
-    # since at least one point is out of the computed polygon, try again with a higher number of neighbors
-    if all_inside is False:
-        return concave_hull(points_list, kk + 1)
+    if not points_in_polygon(points[available], points[hull]).all():
+        return None
 
     # a valid hull has been constructed
     return hull
+
+
+def concave_hull(points_list, k):
+    """
+    Calculates a valid concave hull polygon containing all given points. The algorithm searches for that
+    point in the neighborhood of k nearest neighbors which maximizes the rotation angle in clockwise direction
+    without intersecting any previous line segments.
+
+    This is an implementation of the algorithm described by Adriano Moreira and Maribel Yasmina Santos:
+    CONCAVE HULL: A neighborhood_k-NEAREST NEIGHBORS APPROACH FOR THE COMPUTATION OF THE REGION OCCUPIED BY A SET OF POINTS.
+    GRAPP 2007 - International Conference on Computer Graphics Theory and Applications; pp 61-68.
+
+    :param points_list: list of tuples (x, y) or (n, 2) array
+    :param k: integer
+    :return: list of tuples (x, y)
+    """
+    # delete duplicate points
+    point_set = clean_list(points_list)
+
+    # if point_set has less then 3 points no polygon can be created and None will be returned
+    if len(point_set) < 3:
+        return None
+
+    # if point_set has 3 points then these are already vertices of the hull. Append the first point to
+    # close the hull polygon
+    if len(point_set) == 3:
+        return [tuple(point) for point in point_set.tolist()] + [tuple(point_set[0].tolist())]
+
+    # the number of nearest neighbors k must be greater than or equal to 3, and make sure that k neighbors
+    # can be found
+    kk = min(max(k, 3), len(point_set))
+
+    # the index is built once and shared by all attempts
+    index = PointIndex(point_set)
+
+    # while at least one point is out of the computed polygon or the envelope gets stuck, try again with a
+    # higher number of neighbors
+    while kk <= len(point_set):
+        hull = trace_hull(point_set, index, kk)
+        if hull is not None:
+            return [tuple(point) for point in point_set[hull].tolist()]
+        kk += 1
+    return None
@@ -86,18 +86,14 @@ class MeanAndStdDevPlot(QgisAlgorithm):
 
         output = self.parameterAsFileOutput(parameters, self.OUTPUT, context)
 
-        values = vector.values(source, namefieldname, valuefieldname)
+        values = vector.columns(source, namefieldname, valuefieldname, numeric=[valuefieldname], feedback=feedback)
 
         d = {}
-        for i in range(len(values[namefieldname])):
-            v = values[namefieldname][i]
-            if v not in d:
-                d[v] = [values[valuefieldname][i]]
-            else:
-                d[v].append(values[valuefieldname][i])
+        for name, value in zip(values[namefieldname].tolist(), values[valuefieldname].tolist()):
+            d.setdefault(name, []).append(value)
 
         data = [
-            go.Box(y=list(v),
+            go.Box(y=v,
                    boxmean='sd',
                    name=k)
             for k, v in d.items()
@@ -22,7 +22,8 @@ __date__ = 'August 2012'
 __copyright__ = '(C) 2012, Victor Olaya'
 
 import os
-import math
+
+import numpy
 
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QVariant
@@ -34,6 +35,7 @@ from qgis.core import (QgsApplication,
                        QgsProject,
                        QgsFeature,
                        QgsGeometry,
+                       QgsMultiPoint,
                        QgsDistanceArea,
                        QgsFeatureSink,
                        QgsProcessingParameterFeatureSource,
@@ -43,10 +45,11 @@ from qgis.core import (QgsApplication,
                        QgsProcessingParameterField,
                        QgsProcessingParameterNumber,
                        QgsProcessingParameterFeatureSink,
-                       QgsSpatialIndex,
+                       QgsProcessingMultiStepFeedback,
                        QgsWkbTypes)
 
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
+from processing.tools import spatial
 
 pluginPath = os.path.split(os.path.split(os.path.dirname(__file__))[0])[0]
 
@@ -144,6 +147,56 @@ class PointDistance(QgisAlgorithm):
             return self.linearMatrix(parameters, context, source, source_field, target_source, target_field, same_source_and_target,
                                      matType, nPoints, feedback)
 
+    BATCH_SIZE = 1000
+
+    def loadTargets(self, context, source, target_source, targetIdx, feedback, keep_geometries=False):
+        """Loads ids, coordinates and id field values of all target points, in
+        the input CRS, in a single pass.
+        """
+        request = QgsFeatureRequest().setDestinationCrs(source.sourceCrs(), context.transformContext())
+        if not keep_geometries:
+            fids, xy, (ids,) = spatial.pointArrays(target_source, request, [targetIdx], feedback)
+            return fids, xy, ids, None
+
+        # keep the points themselves too, so Z/M values make it to the output multipoints
+        fids = []
+        ids = []
+        geometries = []
+        total = 100.0 / target_source.featureCount() if target_source.featureCount() else 0
+        for current, f in enumerate(target_source.getFeatures(request.setSubsetOfAttributes([targetIdx]))):
+            if feedback.isCanceled():
+                break
+            if f.hasGeometry():
+                fids.append(f.id())
+                ids.append(f[targetIdx])
+                geometries.append(f.geometry().constGet().clone())
+            feedback.setProgress(int(current * total))
+        xy = numpy.array([(p.x(), p.y()) for p in geometries], dtype=numpy.float64).reshape(-1, 2)
+        return numpy.array(fids, dtype=numpy.int64), xy, ids, geometries
+
+    def inputBatches(self, source, inIdx, feedback, batch_size):
+        """Yields lists of input features with point geometries."""
+        features = source.getFeatures(QgsFeatureRequest().setSubsetOfAttributes([inIdx]))
+        total = 100.0 / source.featureCount() if source.featureCount() else 0
+        batch = []
+        for current, f in enumerate(features):
+            if feedback.isCanceled():
+                break
+            if f.hasGeometry():
+                batch.append(f)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+                feedback.setProgress(int(current * total))
+        if batch and not feedback.isCanceled():
+            yield batch
+
+    def distanceCalculator(self, context, source):
+        distArea = QgsDistanceArea()
+        distArea.setSourceCrs(source.sourceCrs(), context.transformContext())
+        distArea.setEllipsoid(context.ellipsoid())
+        return spatial.DistanceCalculator(distArea, context.transformContext())
+
     def linearMatrix(self, parameters, context, source, inField, target_source, targetField, same_source_and_target,
                      matType, nPoints, feedback):
 
@@ -176,110 +229,106 @@ class PointDistance(QgisAlgorithm):
         if sink is None:
             raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
 
-        index = QgsSpatialIndex(target_source.getFeatures(QgsFeatureRequest().setSubsetOfAttributes([]).setDestinationCrs(source.sourceCrs(), context.transformContext())), feedback)
-
-        distArea = QgsDistanceArea()
-        distArea.setSourceCrs(source.sourceCrs(), context.transformContext())
-        distArea.setEllipsoid(context.ellipsoid())
-
-        features = source.getFeatures(QgsFeatureRequest().setSubsetOfAttributes([inIdx]))
-        total = 100.0 / source.featureCount() if source.featureCount() else 0
-        for current, inFeat in enumerate(features):
-            if feedback.isCanceled():
-                break
-
-            inGeom = inFeat.geometry()
-            inID = str(inFeat[inIdx])
-            featList = index.nearestNeighbor(inGeom.asPoint(), nPoints)
-            distList = []
-            vari = 0.0
-            request = QgsFeatureRequest().setFilterFids(featList).setSubsetOfAttributes([outIdx]).setDestinationCrs(source.sourceCrs(), context.transformContext())
-            for outFeat in target_source.getFeatures(request):
-                if feedback.isCanceled():
-                    break
-
-                if same_source_and_target and inFeat.id() == outFeat.id():
-                    continue
-
-                outID = outFeat[outIdx]
-                outGeom = outFeat.geometry()
-                dist = distArea.measureLine(inGeom.asPoint(),
-                                            outGeom.asPoint())
-
-                if matType == 0:
+        multi_feedback = QgsProcessingMultiStepFeedback(2, feedback)
+        targetFids, targetXY, targetIds, targetGeoms = self.loadTargets(context, source, target_source, outIdx,
+                                                                        multi_feedback, keep_geometries=matType == 0)
+        multi_feedback.setCurrentStep(1)
+        index = spatial.PointIndex(targetXY)
+        calculator = self.distanceCalculator(context, source)
+        targetCoords = calculator.toEllipsoid(targetXY)
+
+        k = min(nPoints, len(targetFids))
+        batch_size = max(1, min(self.BATCH_SIZE, 2000000 // max(k, 1)))
+        for batch in self.inputBatches(source, inIdx, multi_feedback, batch_size):
+            inXY = numpy.array([(f.geometry().constGet().x(), f.geometry().constGet().y()) for f in batch],
+                               dtype=numpy.float64).reshape(-1, 2)
+            _, neighbours = index.query(inXY, k)
+            dist = calculator.distances(calculator.toEllipsoid(inXY)[:, None, :], targetCoords[neighbours])
+
+            valid = numpy.ones(neighbours.shape, dtype=bool)
+            if same_source_and_target:
+                inFids = numpy.array([f.id() for f in batch], dtype=numpy.int64)
+                valid = targetFids[neighbours] != inFids[:, None]
+                if k == nPoints:
+                    # drop the farthest point for inputs which were not among their own neighbours
+                    extra = valid.all(axis=1)
+                    valid[extra, -1] = False
+
+            out_features = []
+            if matType == 0:
+                for row, inFeat in enumerate(batch):
+                    inID = str(inFeat[inIdx])
+                    for col in numpy.nonzero(valid[row])[0]:
+                        target = neighbours[row, col]
+                        out_geom = QgsMultiPoint()
+                        out_geom.addGeometry(inFeat.geometry().constGet().clone())
+                        out_geom.addGeometry(targetGeoms[target].clone())
+                        out_feature = QgsFeature()
+                        out_feature.setGeometry(QgsGeometry(out_geom))
+                        out_feature.setAttributes([inID, targetIds[target], float(dist[row, col])])
+                        out_features.append(out_feature)
+            else:
+                masked = numpy.ma.MaskedArray(dist, mask=~valid)
+                means = masked.mean(axis=1)
+                stddevs = masked.std(axis=1)
+                mins = masked.min(axis=1)
+                maxs = masked.max(axis=1)
+                for row, inFeat in enumerate(batch):
                     out_feature = QgsFeature()
-                    out_geom = QgsGeometry.unaryUnion([inFeat.geometry(), outFeat.geometry()])
-                    out_feature.setGeometry(out_geom)
-                    out_feature.setAttributes([inID, outID, dist])
-                    sink.addFeature(out_feature, QgsFeatureSink.FastInsert)
-                else:
-                    distList.append(float(dist))
-
-            if matType != 0:
-                mean = sum(distList) / len(distList)
-                for i in distList:
-                    vari += (i - mean) * (i - mean)
-                vari = math.sqrt(vari / len(distList))
-
-                out_feature = QgsFeature()
-                out_feature.setGeometry(inFeat.geometry())
-                out_feature.setAttributes([inID, mean, vari, min(distList), max(distList)])
-                sink.addFeature(out_feature, QgsFeatureSink.FastInsert)
-
-            feedback.setProgress(int(current * total))
+                    out_feature.setGeometry(inFeat.geometry())
+                    out_feature.setAttributes([str(inFeat[inIdx]), float(means[row]), float(stddevs[row]),
+                                               float(mins[row]), float(maxs[row])])
+                    out_features.append(out_feature)
+            sink.addFeatures(out_features, QgsFeatureSink.FastInsert)
 
         return {self.OUTPUT: dest_id}
 
     def regularMatrix(self, parameters, context, source, inField, target_source, targetField,
                       nPoints, feedback):
 
-        distArea = QgsDistanceArea()
-        distArea.setSourceCrs(source.sourceCrs(), context.transformContext())
-        distArea.setEllipsoid(context.ellipsoid())
-
         inIdx = source.fields().lookupField(inField)
         targetIdx = target_source.fields().lookupField(targetField)
 
-        index = QgsSpatialIndex(target_source.getFeatures(QgsFeatureRequest().setSubsetOfAttributes([]).setDestinationCrs(source.sourceCrs(), context.transformContext())), feedback)
+        multi_feedback = QgsProcessingMultiStepFeedback(2, feedback)
+        targetFids, targetXY, targetIds, _ = self.loadTargets(context, source, target_source, targetIdx, multi_feedback)
+        multi_feedback.setCurrentStep(1)
+        index = spatial.PointIndex(targetXY)
+        calculator = self.distanceCalculator(context, source)
 
-        first = True
+        columns = None
         sink = None
         dest_id = None
-        features = source.getFeatures(QgsFeatureRequest().setSubsetOfAttributes([inIdx]))
-        total = 100.0 / source.featureCount() if source.featureCount() else 0
-        for current, inFeat in enumerate(features):
-            if feedback.isCanceled():
-                break
+        batch_size = max(1, min(self.BATCH_SIZE, 2000000 // max(min(nPoints, len(targetFids)), 1)))
+        for batch in self.inputBatches(source, inIdx, multi_feedback, batch_size):
+            inXY = numpy.array([(f.geometry().constGet().x(), f.geometry().constGet().y()) for f in batch],
+                               dtype=numpy.float64).reshape(-1, 2)
+            if columns is None:
+                # the targets nearest to the first input point become the matrix columns,
+                # in the order the target source returns them
+                _, neighbours = index.query(inXY[:1], nPoints)
+                columns = numpy.sort(neighbours[0])
+                columnCoords = calculator.toEllipsoid(targetXY[columns])
 
-            inGeom = inFeat.geometry()
-            if first:
-                featList = index.nearestNeighbor(inGeom.asPoint(), nPoints)
-                first = False
                 fields = QgsFields()
                 input_id_field = source.fields()[inIdx]
                 input_id_field.setName('ID')
                 fields.append(input_id_field)
-                for f in target_source.getFeatures(QgsFeatureRequest().setFilterFids(featList).setSubsetOfAttributes([targetIdx]).setDestinationCrs(source.sourceCrs(), context.transformContext())):
-                    fields.append(QgsField(str(f[targetField]), QVariant.Double))
+                for target in columns:
+                    fields.append(QgsField(str(targetIds[target]), QVariant.Double))
 
                 (sink, dest_id) = self.parameterAsSink(parameters, self.OUTPUT, context,
                                                        fields, source.wkbType(), source.sourceCrs())
                 if sink is None:
                     raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
 
-            data = [inFeat[inField]]
-            for target in target_source.getFeatures(QgsFeatureRequest().setSubsetOfAttributes([]).setFilterFids(featList).setDestinationCrs(source.sourceCrs(), context.transformContext())):
-                if feedback.isCanceled():
-                    break
-                outGeom = target.geometry()
-                dist = distArea.measureLine(inGeom.asPoint(),
-                                            outGeom.asPoint())
-                data.append(dist)
-
-            out_feature = QgsFeature()
-            out_feature.setGeometry(inGeom)
-            out_feature.setAttributes(data)
-            sink.addFeature(out_feature, QgsFeatureSink.FastInsert)
-            feedback.setProgress(int(current * total))
+            dist = calculator.distances(calculator.toEllipsoid(inXY)[:, None, :], columnCoords[None, :, :])
+
+            out_features = []
+            for row, inFeat in enumerate(batch):
+                out_feature = QgsFeature()
+                out_feature.setGeometry(inFeat.geometry())
+                out_feature.setAttributes([inFeat[inField]] + dist[row].tolist())
+                out_features.append(out_feature)
+            sink.addFeatures(out_features, QgsFeatureSink.FastInsert)
 
         return {self.OUTPUT: dest_id}
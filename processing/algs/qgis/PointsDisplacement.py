@@ -22,11 +22,12 @@ __date__ = 'July 2013'
 __copyright__ = '(C) 2013, Alexander Bruy'
 
 import math
+
+import numpy
+
 from qgis.core import (QgsFeatureSink,
+                       QgsFeatureRequest,
                        QgsGeometry,
-                       QgsPointXY,
-                       QgsSpatialIndex,
-                       QgsRectangle,
                        QgsProcessing,
                        QgsProcessingException,
                        QgsProcessingParameterFeatureSource,
@@ -34,6 +35,7 @@ from qgis.core import (QgsFeatureSink,
                        QgsProcessingParameterBoolean,
                        QgsProcessingParameterFeatureSink)
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
+from processing.tools import spatial
 
 
 class PointsDisplacement(QgisAlgorithm):
@@ -43,6 +45,8 @@ class PointsDisplacement(QgisAlgorithm):
     HORIZONTAL = 'HORIZONTAL'
     OUTPUT = 'OUTPUT'
 
+    BATCH_SIZE = 65536
+
     def group(self):
         return self.tr('Vector geometry')
 
@@ -85,22 +89,17 @@ class PointsDisplacement(QgisAlgorithm):
         if sink is None:
             raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
 
-        features = source.getFeatures()
-
-        total = 100.0 / source.featureCount() if source.featureCount() else 0
-
-        def searchRect(p):
-            return QgsRectangle(p.x() - proximity, p.y() - proximity, p.x() + proximity, p.y() + proximity)
-
-        index = QgsSpatialIndex()
-
         # NOTE: this is a Python port of QgsPointDistanceRenderer::renderFeature. If refining this algorithm,
         # please port the changes to QgsPointDistanceRenderer::renderFeature also!
 
-        clustered_groups = []
-        group_index = {}
-        group_locations = {}
-        for current, f in enumerate(features):
+        # group the points in a single pass, reading geometries only
+        clusters = spatial.PointClusters(proximity)
+        request = QgsFeatureRequest().setSubsetOfAttributes([])
+        total = 50.0 / source.featureCount() if source.featureCount() else 0
+        fids = []
+        batch_fids = []
+        batch = []
+        for current, f in enumerate(source.getFeatures(request)):
             if feedback.isCanceled():
                 break
 
@@ -108,79 +107,61 @@ class PointsDisplacement(QgisAlgorithm):
                 continue
 
             point = f.geometry().asPoint()
-
-            other_features_within_radius = index.intersects(searchRect(point))
-            if not other_features_within_radius:
-                index.addFeature(f)
-                group = [f]
-                clustered_groups.append(group)
-                group_index[f.id()] = len(clustered_groups) - 1
-                group_locations[f.id()] = point
-            else:
-                # find group with closest location to this point (may be more than one within search tolerance)
-                min_dist_feature_id = other_features_within_radius[0]
-                min_dist = group_locations[min_dist_feature_id].distance(point)
-                for i in range(1, len(other_features_within_radius)):
-                    candidate_id = other_features_within_radius[i]
-                    new_dist = group_locations[candidate_id].distance(point)
-                    if new_dist < min_dist:
-                        min_dist = new_dist
-                        min_dist_feature_id = candidate_id
-
-                group_index_pos = group_index[min_dist_feature_id]
-                group = clustered_groups[group_index_pos]
-
-                # calculate new centroid of group
-                old_center = group_locations[min_dist_feature_id]
-                group_locations[min_dist_feature_id] = QgsPointXY((old_center.x() * len(group) + point.x()) / (len(group) + 1.0),
-                                                                  (old_center.y() * len(group) + point.y()) / (len(group) + 1.0))
-                # add to a group
-                clustered_groups[group_index_pos].append(f)
-                group_index[f.id()] = group_index_pos
-
-            feedback.setProgress(int(current * total))
-
-        current = 0
-        total = 100.0 / len(clustered_groups) if clustered_groups else 1
-        feedback.setProgress(0)
-
-        fullPerimeter = 2 * math.pi
-
-        for group in clustered_groups:
+            batch_fids.append(f.id())
+            batch.append((point.x(), point.y()))
+            if len(batch) == self.BATCH_SIZE:
+                clusters.addPoints(batch)
+                fids.append(numpy.array(batch_fids, dtype=numpy.int64))
+                batch_fids = []
+                batch = []
+                feedback.setProgress(int(current * total))
+        clusters.addPoints(batch)
+        fids.append(numpy.array(batch_fids, dtype=numpy.int64))
+
+        fids = numpy.concatenate(fids)
+        xy = displacementRings(clusters, radius, horizontal)
+        order = numpy.argsort(fids, kind='stable')
+        sorted_fids = fids[order]
+
+        total = 50.0 / len(fids) if len(fids) else 0
+        for current, f in enumerate(source.getFeatures()):
             if feedback.isCanceled():
                 break
 
-            count = len(group)
-            if count == 1:
-                sink.addFeature(group[0], QgsFeatureSink.FastInsert)
-            else:
-                angleStep = fullPerimeter / count
-                if count == 2 and horizontal:
-                    currentAngle = math.pi / 2
-                else:
-                    currentAngle = 0
-
-                old_point = group_locations[group[0].id()]
-
-                for f in group:
-                    if feedback.isCanceled():
-                        break
-
-                    sinusCurrentAngle = math.sin(currentAngle)
-                    cosinusCurrentAngle = math.cos(currentAngle)
-                    dx = radius * sinusCurrentAngle
-                    dy = radius * cosinusCurrentAngle
+            if not f.hasGeometry():
+                continue
 
+            position = numpy.searchsorted(sorted_fids, f.id())
+            if position < len(sorted_fids) and sorted_fids[position] == f.id():
+                x, y = xy[order[position]]
+                if not numpy.isnan(x):
                     # we want to keep any existing m/z values
                     point = f.geometry().constGet().clone()
-                    point.setX(old_point.x() + dx)
-                    point.setY(old_point.y() + dy)
+                    point.setX(x)
+                    point.setY(y)
                     f.setGeometry(QgsGeometry(point))
 
-                    sink.addFeature(f, QgsFeatureSink.FastInsert)
-                    currentAngle += angleStep
-
-            current += 1
-            feedback.setProgress(int(current * total))
+            sink.addFeature(f, QgsFeatureSink.FastInsert)
+            feedback.setProgress(50 + int(current * total))
 
         return {self.OUTPUT: dest_id}
+
+
+def displacementRings(clusters, radius, horizontal=False):
+    """Returns a (n, 2) array with the displaced location of every point of
+    clusters, spread on a circle of the given radius around the center of
+    their group. Points alone in their group get NaN and are left in place.
+    """
+    groups = clusters.groups()
+    sizes = clusters.sizes()[groups]
+    centers = clusters.centers()[groups]
+
+    angles = clusters.ranks() * (2 * math.pi / sizes)
+    if horizontal:
+        angles[sizes == 2] += math.pi / 2
+
+    xy = numpy.empty((len(groups), 2))
+    xy[:, 0] = centers[:, 0] + radius * numpy.sin(angles)
+    xy[:, 1] = centers[:, 1] + radius * numpy.cos(angles)
+    xy[sizes == 1] = numpy.nan
+    return xy
@@ -21,14 +21,14 @@ __author__ = 'Alexander Bruy'
 __date__ = 'August 2013'
 __copyright__ = '(C) 2013, Alexander Bruy'
 
-from osgeo import gdal
 from qgis.PyQt.QtCore import QVariant
 from qgis.core import (QgsFeature,
                        QgsFeatureSink,
                        QgsFields,
                        QgsField,
                        QgsGeometry,
-                       QgsPointXY,
+                       QgsLineString,
+                       QgsPoint,
                        QgsWkbTypes,
                        QgsProcessing,
                        QgsProcessingException,
@@ -46,6 +46,9 @@ class PointsFromLines(QgisAlgorithm):
     INPUT_VECTOR = 'INPUT_VECTOR'
     OUTPUT = 'OUTPUT'
 
+    # number of points sent to the sink at once
+    BATCH_SIZE = 10000
+
     def group(self):
         return self.tr('Vector creation')
 
@@ -74,11 +77,7 @@ class PointsFromLines(QgisAlgorithm):
             raise QgsProcessingException(self.invalidSourceError(parameters, self.INPUT_VECTOR))
 
         raster_layer = self.parameterAsRasterLayer(parameters, self.INPUT_RASTER, context)
-        rasterPath = raster_layer.source()
-
-        rasterDS = gdal.Open(rasterPath, gdal.GA_ReadOnly)
-        geoTransform = rasterDS.GetGeoTransform()
-        rasterDS = None
+        sampler = raster.RasterSampler(raster_layer)
 
         fields = QgsFields()
         fields.append(QgsField('id', QVariant.Int, '', 10, 0))
@@ -90,12 +89,9 @@ class PointsFromLines(QgisAlgorithm):
         if sink is None:
             raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
 
-        outFeature = QgsFeature()
-        outFeature.setFields(fields)
-
-        self.fid = 0
-        self.lineId = 0
-        self.pointId = 0
+        fid = 0
+        lineId = 0
+        batch = []
 
         features = source.getFeatures(QgsFeatureRequest().setDestinationCrs(raster_layer.crs(), context.transformContext()))
         total = 100.0 / source.featureCount() if source.featureCount() else 0
@@ -106,102 +102,34 @@ class PointsFromLines(QgisAlgorithm):
             if not f.hasGeometry():
                 continue
 
-            geom = f.geometry()
-            if geom.isMultipart():
-                lines = geom.asMultiPolyline()
-                for line in lines:
-                    for i in range(len(line) - 1):
-                        p1 = line[i]
-                        p2 = line[i + 1]
-
-                        (x1, y1) = raster.mapToPixel(p1.x(), p1.y(),
-                                                     geoTransform)
-                        (x2, y2) = raster.mapToPixel(p2.x(), p2.y(),
-                                                     geoTransform)
+            pointId = 0
+            for part in self.lineParts(f.geometry()):
+                (cols, rows) = sampler.lineCells(part.xVector(), part.yVector())
+                for x, y in sampler.toMap(cols, rows).tolist():
+                    outFeature = QgsFeature(fields)
+                    outFeature.setGeometry(QgsGeometry(QgsPoint(x, y)))
+                    outFeature.setAttributes([fid, lineId, pointId])
+                    batch.append(outFeature)
+                    fid += 1
+                    pointId += 1
 
-                        self.buildLine(x1, y1, x2, y2, geoTransform,
-                                       sink, outFeature)
-            else:
-                points = geom.asPolyline()
-                for i in range(len(points) - 1):
-                    p1 = points[i]
-                    p2 = points[i + 1]
+            if len(batch) >= self.BATCH_SIZE:
+                sink.addFeatures(batch, QgsFeatureSink.FastInsert)
+                batch = []
 
-                    (x1, y1) = raster.mapToPixel(p1.x(), p1.y(), geoTransform)
-                    (x2, y2) = raster.mapToPixel(p2.x(), p2.y(), geoTransform)
-
-                    self.buildLine(x1, y1, x2, y2, geoTransform, sink,
-                                   outFeature)
-
-            self.pointId = 0
-            self.lineId += 1
+            lineId += 1
 
             feedback.setProgress(int(current * total))
 
+        sink.addFeatures(batch, QgsFeatureSink.FastInsert)
+
         return {self.OUTPUT: dest_id}
 
-    def buildLine(self, startX, startY, endX, endY, geoTransform, writer, feature):
-        if startX == endX:
-            if startY > endY:
-                (startY, endY) = (endY, startY)
-            row = startX
-            for col in range(startY, endY + 1):
-                self.createPoint(row, col, geoTransform, writer, feature)
-        elif startY == endY:
-            if startX > endX:
-                (startX, endX) = (endX, startX)
-            col = startY
-            for row in range(startX, endX + 1):
-                self.createPoint(row, col, geoTransform, writer, feature)
+    def lineParts(self, geometry):
+        geometry = geometry.constGet()
+        if QgsWkbTypes.isMultiType(geometry.wkbType()):
+            parts = [geometry.geometryN(i) for i in range(geometry.numGeometries())]
         else:
-            width = endX - startX
-            height = endY - startY
-
-            if width < 0:
-                dx1 = -1
-                dx2 = -1
-            else:
-                dx1 = 1
-                dx2 = 1
-
-            if height < 0:
-                dy1 = -1
-            else:
-                dy1 = 1
-            dy2 = 0
-
-            longest = abs(width)
-            shortest = abs(height)
-            if not longest > shortest:
-                (longest, shortest) = (shortest, longest)
-                if height < 0:
-                    dy2 = -1
-                else:
-                    dy2 = 1
-                dx2 = 0
-
-            err = longest / 2
-            for i in range(longest + 1):
-                self.createPoint(startX, startY, geoTransform, writer, feature)
-
-                err += shortest
-                if not err < longest:
-                    err = err - longest
-                    startX += dx1
-                    startY += dy1
-                else:
-                    startX += dx2
-                    startY += dy2
-
-    def createPoint(self, pX, pY, geoTransform, writer, feature):
-        (x, y) = raster.pixelToMap(pX, pY, geoTransform)
-
-        feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(x, y)))
-        feature['id'] = self.fid
-        feature['line_id'] = self.lineId
-        feature['point_id'] = self.pointId
-
-        self.fid += 1
-        self.pointId += 1
-
-        writer.addFeature(feature, QgsFeatureSink.FastInsert)
+            parts = [geometry]
+        # curved parts are segmentized, as asPolyline() does
+        return [part if isinstance(part, QgsLineString) else part.segmentize() for part in parts]
@@ -23,6 +23,8 @@ __copyright__ = '(C) 2013, Victor Olaya'
 
 import warnings
 
+import numpy
+
 from qgis.core import (QgsProcessingException,
                        QgsProcessingParameterFeatureSource,
                        QgsProcessingParameterField,
@@ -75,11 +77,6 @@ class PolarPlot(QgisAlgorithm):
         except ImportError:
             raise QgsProcessingException(QCoreApplication.translate('PolarPlot', 'This algorithm requires the Python “plotly” library. Please install this library and try again.'))
 
-        try:
-            import numpy as np
-        except ImportError:
-            raise QgsProcessingException(QCoreApplication.translate('PolarPlot', 'This algorithm requires the Python “numpy” library. Please install this library and try again.'))
-
         source = self.parameterAsSource(parameters, self.INPUT, context)
         if source is None:
             raise QgsProcessingException(self.invalidSourceError(parameters, self.INPUT))
@@ -89,10 +86,10 @@ class PolarPlot(QgisAlgorithm):
 
         output = self.parameterAsFileOutput(parameters, self.OUTPUT, context)
 
-        values = vector.values(source, valuefieldname)
+        values = vector.columns(source, valuefieldname, numeric=True, feedback=feedback)[valuefieldname]
 
-        data = [go.Area(r=values[valuefieldname],
-                        t=np.degrees(np.arange(0.0, 2 * np.pi, 2 * np.pi / len(values[valuefieldname]))))]
+        data = [go.Area(r=values.filled(numpy.nan),
+                        t=numpy.degrees(numpy.arange(0.0, 2 * numpy.pi, 2 * numpy.pi / len(values))))]
         plt.offline.plot(data, filename=output, auto_open=False)
 
         return {self.OUTPUT: output}
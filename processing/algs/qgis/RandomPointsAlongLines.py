@@ -31,7 +31,6 @@ from qgis.core import (QgsField,
                        QgsGeometry,
                        QgsPointXY,
                        QgsWkbTypes,
-                       QgsSpatialIndex,
                        QgsFeatureRequest,
                        QgsDistanceArea,
                        QgsProject,
@@ -44,7 +43,7 @@ from qgis.core import (QgsField,
                        QgsProcessingParameterDefinition)
 
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
-from processing.tools import vector
+from processing.tools import spatial, vector
 
 
 class RandomPointsAlongLines(QgisAlgorithm):
@@ -105,8 +104,7 @@ class RandomPointsAlongLines(QgisAlgorithm):
         featureCount = source.featureCount()
         total = 100.0 / pointCount if pointCount else 1
 
-        index = QgsSpatialIndex()
-        points = {}
+        index = spatial.PointGrid(minDistance)
 
         da = QgsDistanceArea()
         da.setSourceCrs(source.sourceCrs(), context.transformContext())
@@ -152,15 +150,14 @@ class RandomPointsAlongLines(QgisAlgorithm):
             # generate random point
             p = QgsPointXY(rx, ry)
             geom = QgsGeometry.fromPointXY(p)
-            if vector.checkMinDistance(p, index, minDistance, points):
+            if vector.checkMinDistance(p, index, minDistance):
                 f = QgsFeature(nPoints)
                 f.initAttributes(1)
                 f.setFields(fields)
                 f.setAttribute('id', nPoints)
                 f.setGeometry(geom)
                 sink.addFeature(f, QgsFeatureSink.FastInsert)
-                index.addFeature(f)
-                points[nPoints] = p
+                index.insert(rx, ry)
                 nPoints += 1
                 feedback.setProgress(int(nPoints * total))
             nIterations += 1
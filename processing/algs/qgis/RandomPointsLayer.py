@@ -22,20 +22,18 @@ __date__ = 'April 2014'
 __copyright__ = '(C) 2014, Alexander Bruy'
 
 import os
-import random
+
+import numpy
 
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QVariant
 from qgis.core import (QgsApplication,
                        QgsField,
                        QgsFeatureSink,
-                       QgsFeature,
                        QgsFields,
-                       QgsGeometry,
-                       QgsPointXY,
                        QgsWkbTypes,
-                       QgsSpatialIndex,
                        QgsFeatureRequest,
+                       QgsGeometry,
                        QgsProcessing,
                        QgsProcessingException,
                        QgsProcessingParameterNumber,
@@ -45,7 +43,7 @@ from qgis.core import (QgsApplication,
                        QgsProcessingParameterDefinition)
 
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
-from processing.tools import vector
+from processing.algs.qgis import randompoints
 
 pluginPath = os.path.split(os.path.split(os.path.dirname(__file__))[0])[0]
 
@@ -54,6 +52,7 @@ class RandomPointsLayer(QgisAlgorithm):
     INPUT = 'INPUT'
     POINTS_NUMBER = 'POINTS_NUMBER'
     MIN_DISTANCE = 'MIN_DISTANCE'
+    SEED = 'SEED'
     OUTPUT = 'OUTPUT'
 
     def icon(self):
@@ -82,6 +81,12 @@ class RandomPointsLayer(QgisAlgorithm):
         self.addParameter(QgsProcessingParameterDistance(self.MIN_DISTANCE,
                                                          self.tr('Minimum distance between points'),
                                                          0, self.INPUT, False, 0, 1000000000))
+        seed_param = QgsProcessingParameterNumber(self.SEED,
+                                                  self.tr('Random seed'),
+                                                  QgsProcessingParameterNumber.Integer,
+                                                  None, True, 0, 4294967295)
+        seed_param.setFlags(seed_param.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(seed_param)
         self.addParameter(QgsProcessingParameterFeatureSink(self.OUTPUT,
                                                             self.tr('Random points'),
                                                             type=QgsProcessing.TypeVectorPoint))
@@ -97,12 +102,9 @@ class RandomPointsLayer(QgisAlgorithm):
         if source is None:
             raise QgsProcessingException(self.invalidSourceError(parameters, self.INPUT))
 
-        pointCount = self.parameterAsDouble(parameters, self.POINTS_NUMBER, context)
+        pointCount = self.parameterAsInt(parameters, self.POINTS_NUMBER, context)
         minDistance = self.parameterAsDouble(parameters, self.MIN_DISTANCE, context)
 
-        bbox = source.sourceExtent()
-        sourceIndex = QgsSpatialIndex(source, feedback)
-
         fields = QgsFields()
         fields.append(QgsField('id', QVariant.Int, '', 10, 0))
 
@@ -111,46 +113,28 @@ class RandomPointsLayer(QgisAlgorithm):
         if sink is None:
             raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
 
-        nPoints = 0
-        nIterations = 0
+        if self.SEED in parameters and parameters[self.SEED] is not None:
+            rng = numpy.random.RandomState(self.parameterAsInt(parameters, self.SEED, context))
+        else:
+            rng = numpy.random.RandomState()
+
+        # points are drawn inside the union of the polygons of the layer
+        request = QgsFeatureRequest().setSubsetOfAttributes([])
+        geometries = [f.geometry() for f in source.getFeatures(request) if f.hasGeometry()]
+        mask = randompoints.PolygonMask.fromGeometry(QgsGeometry.unaryUnion(geometries))
+        del geometries
+
         maxIterations = pointCount * 200
-        total = 100.0 / pointCount if pointCount else 1
-
-        index = QgsSpatialIndex()
-        points = {}
-
-        random.seed()
-
-        while nIterations < maxIterations and nPoints < pointCount:
-            if feedback.isCanceled():
-                break
-
-            rx = bbox.xMinimum() + bbox.width() * random.random()
-            ry = bbox.yMinimum() + bbox.height() * random.random()
-
-            p = QgsPointXY(rx, ry)
-            geom = QgsGeometry.fromPointXY(p)
-            ids = sourceIndex.intersects(geom.buffer(5, 5).boundingBox())
-            if len(ids) > 0 and \
-                    vector.checkMinDistance(p, index, minDistance, points):
-                request = QgsFeatureRequest().setFilterFids(ids).setSubsetOfAttributes([])
-                for f in source.getFeatures(request):
-                    if feedback.isCanceled():
-                        break
-
-                    tmpGeom = f.geometry()
-                    if geom.within(tmpGeom):
-                        f = QgsFeature(nPoints)
-                        f.initAttributes(1)
-                        f.setFields(fields)
-                        f.setAttribute('id', nPoints)
-                        f.setGeometry(geom)
-                        sink.addFeature(f, QgsFeatureSink.FastInsert)
-                        index.addFeature(f)
-                        points[nPoints] = p
-                        nPoints += 1
-                        feedback.setProgress(int(nPoints * total))
-            nIterations += 1
+        if minDistance:
+            xy = randompoints.poissonDiskPoints(mask, pointCount, minDistance, rng, maxIterations,
+                                                feedback=feedback)
+        else:
+            xy = randompoints.randomPoints(mask, pointCount, rng, maxIterations, feedback)
+        if feedback.isCanceled():
+            return {self.OUTPUT: dest_id}
+
+        randompoints.writePoints(sink, fields, xy)
+        nPoints = len(xy)
 
         if nPoints < pointCount:
             feedback.pushInfo(self.tr('Could not generate requested number of random points. '
@@ -22,18 +22,15 @@ __date__ = 'April 2014'
 __copyright__ = '(C) 2014, Alexander Bruy'
 
 import os
-import random
+
+import numpy
 
 from qgis.PyQt.QtCore import QVariant
 from qgis.core import (QgsApplication,
                        QgsField,
                        QgsFeatureSink,
-                       QgsFeature,
                        QgsFields,
-                       QgsGeometry,
-                       QgsPointXY,
                        QgsWkbTypes,
-                       QgsSpatialIndex,
                        QgsExpression,
                        QgsDistanceArea,
                        QgsPropertyDefinition,
@@ -49,7 +46,7 @@ from qgis.core import (QgsApplication,
                        QgsProcessingParameterEnum)
 
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
-from processing.tools import vector
+from processing.algs.qgis import randompoints
 
 pluginPath = os.path.split(os.path.split(os.path.dirname(__file__))[0])[0]
 
@@ -60,6 +57,7 @@ class RandomPointsPolygons(QgisAlgorithm):
     EXPRESSION = 'EXPRESSION'
     MIN_DISTANCE = 'MIN_DISTANCE'
     STRATEGY = 'STRATEGY'
+    SEED = 'SEED'
     OUTPUT = 'OUTPUT'
 
     def icon(self):
@@ -110,6 +108,12 @@ class RandomPointsPolygons(QgisAlgorithm):
         self.addParameter(QgsProcessingParameterDistance(self.MIN_DISTANCE,
                                                          self.tr('Minimum distance between points'),
                                                          None, self.INPUT, True, 0, 1000000000))
+        seed_param = QgsProcessingParameterNumber(self.SEED,
+                                                  self.tr('Random seed'),
+                                                  QgsProcessingParameterNumber.Integer,
+                                                  None, True, 0, 4294967295)
+        seed_param.setFlags(seed_param.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(seed_param)
         self.addParameter(QgsProcessingParameterFeatureSink(self.OUTPUT,
                                                             self.tr('Random points'),
                                                             type=QgsProcessing.TypeVectorPoint))
@@ -130,6 +134,10 @@ class RandomPointsPolygons(QgisAlgorithm):
             minDistance = self.parameterAsDouble(parameters, self.MIN_DISTANCE, context)
         else:
             minDistance = None
+        if self.SEED in parameters and parameters[self.SEED] is not None:
+            rng = numpy.random.RandomState(self.parameterAsInt(parameters, self.SEED, context))
+        else:
+            rng = numpy.random.RandomState()
 
         expressionContext = self.createExpressionContext(parameters, context, source)
         dynamic_value = QgsProcessingParameters.isDynamic(parameters, "VALUE")
@@ -185,10 +193,6 @@ class RandomPointsPolygons(QgisAlgorithm):
                         continue
 
             fGeom = f.geometry()
-            engine = QgsGeometry.createGeometryEngine(fGeom.constGet())
-            engine.prepareGeometry()
-
-            bbox = fGeom.boundingBox()
             if strategy == 0:
                 pointCount = int(this_value)
             else:
@@ -198,42 +202,17 @@ class RandomPointsPolygons(QgisAlgorithm):
                 feedback.pushInfo("Skip feature {} as number of points for it is 0.".format(f.id()))
                 continue
 
-            index = None
+            mask = randompoints.PolygonMask.fromGeometry(fGeom)
+            maxIterations = pointCount * 200
             if minDistance:
-                index = QgsSpatialIndex()
-            points = {}
+                xy = randompoints.poissonDiskPoints(mask, pointCount, minDistance, rng, maxIterations,
+                                                    feedback=feedback)
+            else:
+                xy = randompoints.randomPoints(mask, pointCount, rng, maxIterations, feedback)
 
-            nPoints = 0
-            nIterations = 0
-            maxIterations = pointCount * 200
-            feature_total = total / pointCount if pointCount else 1
-
-            random.seed()
-
-            while nIterations < maxIterations and nPoints < pointCount:
-                if feedback.isCanceled():
-                    break
-
-                rx = bbox.xMinimum() + bbox.width() * random.random()
-                ry = bbox.yMinimum() + bbox.height() * random.random()
-
-                p = QgsPointXY(rx, ry)
-                geom = QgsGeometry.fromPointXY(p)
-                if engine.contains(geom.constGet()) and \
-                        (not minDistance or vector.checkMinDistance(p, index, minDistance, points)):
-                    f = QgsFeature(nPoints)
-                    f.initAttributes(1)
-                    f.setFields(fields)
-                    f.setAttribute('id', pointId)
-                    f.setGeometry(geom)
-                    sink.addFeature(f, QgsFeatureSink.FastInsert)
-                    if minDistance:
-                        index.addFeature(f)
-                    points[nPoints] = p
-                    nPoints += 1
-                    pointId += 1
-                    feedback.setProgress(current_progress + int(nPoints * feature_total))
-                nIterations += 1
+            randompoints.writePoints(sink, fields, xy, pointId)
+            nPoints = len(xy)
+            pointId += nPoints
 
             if nPoints < pointCount:
                 feedback.pushInfo(self.tr('Could not generate requested number of random '
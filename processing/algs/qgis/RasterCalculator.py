@@ -25,10 +25,13 @@ import os
 import math
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
 from processing.algs.gdal.GdalUtils import GdalUtils
+from processing.algs.qgis.rastercalc import TiledRasterCalculator
 from qgis.core import (QgsProcessing,
                        QgsProcessingException,
                        QgsProcessingUtils,
                        QgsProcessingParameterCrs,
+                       QgsProcessingParameterDefinition,
+                       QgsProcessingParameterEnum,
                        QgsProcessingParameterMultipleLayers,
                        QgsProcessingParameterNumber,
                        QgsProcessingParameterExtent,
@@ -48,6 +51,9 @@ class RasterCalculator(QgisAlgorithm):
     CELLSIZE = 'CELLSIZE'
     EXPRESSION = 'EXPRESSION'
     CRS = 'CRS'
+    ENGINE = 'ENGINE'
+    BLOCK_SIZE = 'BLOCK_SIZE'
+    OPTIONS = 'OPTIONS'
     OUTPUT = 'OUTPUT'
 
     def group(self):
@@ -88,6 +94,31 @@ class RasterCalculator(QgisAlgorithm):
                                                        self.tr('Output extent'),
                                                        optional=True))
         self.addParameter(QgsProcessingParameterCrs(self.CRS, 'Output CRS', optional=True))
+
+        self.engines = [self.tr('QGIS raster calculator'),
+                        self.tr('Tiled multi-threaded (NumPy)')]
+        engine_param = QgsProcessingParameterEnum(self.ENGINE,
+                                                  self.tr('Calculation engine'),
+                                                  self.engines,
+                                                  defaultValue=0)
+        engine_param.setFlags(engine_param.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(engine_param)
+
+        block_param = QgsProcessingParameterNumber(self.BLOCK_SIZE,
+                                                   self.tr('Block size in pixels (tiled engine only)'),
+                                                   minValue=16, defaultValue=512)
+        block_param.setFlags(block_param.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(block_param)
+
+        options_param = QgsProcessingParameterString(self.OPTIONS,
+                                                     self.tr('Additional creation options (tiled engine only)'),
+                                                     defaultValue='',
+                                                     optional=True)
+        options_param.setFlags(options_param.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        options_param.setMetadata({
+            'widget_wrapper': {
+                'class': 'processing.algs.gdal.ui.RasterOptionsWidget.RasterOptionsWidgetWrapper'}})
+        self.addParameter(options_param)
         self.addParameter(QgsProcessingParameterRasterDestination(self.OUTPUT, self.tr('Output')))
 
     def name(self):
@@ -174,6 +205,20 @@ class RasterCalculator(QgisAlgorithm):
         height = round((bbox.yMaximum() - bbox.yMinimum()) / cellsize)
         driverName = GdalUtils.getFormatShortNameFromFilename(output)
 
+        if self.parameterAsEnum(parameters, self.ENGINE, context) == 1:
+            calc = TiledRasterCalculator(expression,
+                                         output,
+                                         driverName,
+                                         bbox,
+                                         crs,
+                                         width,
+                                         height,
+                                         entries,
+                                         blockSize=self.parameterAsInt(parameters, self.BLOCK_SIZE, context),
+                                         creationOptions=self.parameterAsString(parameters, self.OPTIONS, context))
+            calc.processCalculation(feedback)
+            return {self.OUTPUT: output}
+
         calc = QgsRasterCalculator(expression,
                                    output,
                                    driverName,
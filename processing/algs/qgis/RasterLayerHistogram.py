@@ -85,16 +85,17 @@ class RasterLayerHistogram(QgisAlgorithm):
 
         output = self.parameterAsFileOutput(parameters, self.OUTPUT, context)
 
-        # ALERT: this is potentially blocking if the layer is too big
-        values = raster.scanraster(layer, feedback, band)
-
-        valueslist = [
-            v
-            for v in values
-            if v is not None
-        ]
-        data = [go.Histogram(x=valueslist,
-                             nbinsx=nbins)]
+        # first pass finds the value range, second pass bins the values
+        stats, = raster.reduceraster(layer, [raster.StatisticsReducer()], feedback, band)
+        if stats.count == 0:
+            raise QgsProcessingException(self.tr('Raster band contains only NODATA values'))
+
+        histogram, = raster.reduceraster(layer, [raster.HistogramReducer(nbins, stats.min, stats.max)], feedback, band)
+        counts, edges = histogram.result()
+
+        data = [go.Bar(x=((edges[:-1] + edges[1:]) / 2).tolist(),
+                       y=counts.tolist(),
+                       width=(edges[1:] - edges[:-1]).tolist())]
         plt.offline.plot(data, filename=output, auto_open=False)
 
         return {self.OUTPUT: output}
@@ -24,8 +24,6 @@ __copyright__ = '(C) 2017, Nyall Dawson'
 import os
 import math
 
-from collections import defaultdict
-
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QVariant
 from qgis.core import (NULL,
@@ -35,12 +33,11 @@ from qgis.core import (NULL,
                        QgsFeatureSink,
                        QgsFeatureRequest,
                        QgsGeometry,
-                       QgsFeatureSource,
-                       QgsCoordinateTransform,
-                       QgsStatisticalSummary,
+                       QgsSpatialIndex,
                        QgsDateTimeStatisticalSummary,
                        QgsStringStatisticalSummary,
                        QgsProcessing,
+                       QgsProcessingMultiStepFeedback,
                        QgsProcessingUtils,
                        QgsProcessingException,
                        QgsProcessingParameterBoolean,
@@ -51,6 +48,7 @@ from qgis.core import (NULL,
 
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
 from processing.tools import vector
+from processing.tools.statistics import NumericSummary
 
 pluginPath = os.path.split(os.path.split(os.path.dirname(__file__))[0])[0]
 
@@ -161,9 +159,6 @@ class SpatialJoinSummary(QgisAlgorithm):
         if join_source is None:
             raise QgsProcessingException(self.invalidSourceError(parameters, self.JOIN))
 
-        if join_source.hasSpatialIndex() == QgsFeatureSource.SpatialIndexNotPresent:
-            feedback.reportError(self.tr("No spatial index exists for join layer, performance will be severely degraded"))
-
         join_fields = self.parameterAsFields(parameters, self.JOIN_FIELDS, context)
         discard_nomatch = self.parameterAsBoolean(parameters, self.DISCARD_NONMATCHING, context)
         summaries = [self.statistics[i][0] for i in
@@ -272,6 +267,28 @@ class SpatialJoinSummary(QgisAlgorithm):
         # do the join
         predicates = [self.predicates[i][0] for i in self.parameterAsEnums(parameters, self.PREDICATE, context)]
 
+        # only keep the distinct values or a quantile sketch when a statistic needs them
+        numeric_distinct = bool({'unique', 'minority', 'majority'}.intersection(summaries))
+        numeric_quantiles = bool({'median', 'q1', 'q3', 'iqr'}.intersection(summaries))
+
+        def createSummaries():
+            stats = []
+            for field_type in field_types:
+                if field_type == 'numeric':
+                    stats.append(NumericSummary(quantiles=numeric_quantiles, distinct=numeric_distinct))
+                elif field_type == 'datetime':
+                    stats.append(QgsDateTimeStatisticalSummary())
+                else:
+                    stats.append(QgsStringStatisticalSummary())
+            return stats
+
+        # build a single spatial index over the join layer, in the base layer CRS
+        multi_feedback = QgsProcessingMultiStepFeedback(2, feedback)
+        multi_feedback.pushInfo(self.tr('Building spatial index over join layer'))
+        index_request = QgsFeatureRequest().setSubsetOfAttributes([]).setDestinationCrs(source.sourceCrs(), context.transformContext())
+        index = QgsSpatialIndex(join_source.getFeatures(index_request), multi_feedback)
+
+        multi_feedback.setCurrentStep(1)
         features = source.getFeatures()
         total = 100.0 / source.featureCount() if source.featureCount() else 0
 
@@ -279,43 +296,37 @@ class SpatialJoinSummary(QgisAlgorithm):
             if feedback.isCanceled():
                 break
 
-            if not f.hasGeometry():
-                if not discard_nomatch:
-                    # ensure consistent count of attributes - otherwise non matching
-                    # features will have incorrect attribute length
-                    # and provider may reject them
-                    attrs = f.attributes()
-                    if len(attrs) < len(out_fields):
-                        attrs += [NULL] * (len(out_fields) - len(attrs))
-                    f.setAttributes(attrs)
-                    sink.addFeature(f, QgsFeatureSink.FastInsert)
-                continue
-
-            engine = None
-
-            values = []
-
-            request = QgsFeatureRequest().setFilterRect(f.geometry().boundingBox()).setSubsetOfAttributes(join_field_indexes).setDestinationCrs(source.sourceCrs(), context.transformContext())
-            for test_feat in join_source.getFeatures(request):
-                if feedback.isCanceled():
-                    break
-
-                join_attributes = []
-                for a in join_field_indexes:
-                    join_attributes.append(test_feat[a])
+            matched = 0
+            stats = None
+            candidates = index.intersects(f.geometry().boundingBox()) if f.hasGeometry() else []
+            if candidates:
+                engine = QgsGeometry.createGeometryEngine(f.geometry().constGet())
+                engine.prepareGeometry()
+                stats = createSummaries()
+
+                request = QgsFeatureRequest().setFilterFids(candidates).setSubsetOfAttributes(join_field_indexes).setDestinationCrs(source.sourceCrs(), context.transformContext())
+                for test_feat in join_source.getFeatures(request):
+                    if feedback.isCanceled():
+                        break
 
-                if engine is None:
-                    engine = QgsGeometry.createGeometryEngine(f.geometry().constGet())
-                    engine.prepareGeometry()
+                    join_geometry = test_feat.geometry().constGet()
+                    if not any(getattr(engine, predicate)(join_geometry) for predicate in predicates):
+                        continue
 
-                for predicate in predicates:
-                    if getattr(engine, predicate)(test_feat.geometry().constGet()):
-                        values.append(join_attributes)
-                        break
+                    # accumulate the joined values, nothing is kept per joined feature
+                    matched += 1
+                    for stat, field_type, a in zip(stats, field_types, join_field_indexes):
+                        v = test_feat[a]
+                        if field_type == 'numeric':
+                            stat.addVariant(v)
+                        elif field_type == 'datetime':
+                            stat.addValue(v)
+                        else:
+                            stat.addString('' if v == NULL else str(v))
 
-            feedback.setProgress(int(current * total))
+            multi_feedback.setProgress(int(current * total))
 
-            if len(values) == 0:
+            if matched == 0:
                 if discard_nomatch:
                     continue
                 else:
@@ -329,21 +340,14 @@ class SpatialJoinSummary(QgisAlgorithm):
                     sink.addFeature(f, QgsFeatureSink.FastInsert)
             else:
                 attrs = f.attributes()
-                for i in range(len(join_field_indexes)):
-                    attribute_values = [v[i] for v in values]
-                    field_type = field_types[i]
+                for stat, field_type in zip(stats, field_types):
+                    stat.finalize()
                     if field_type == 'numeric':
-                        stat = QgsStatisticalSummary()
-                        for v in attribute_values:
-                            stat.addVariant(v)
-                        stat.finalize()
                         for s in numeric_fields:
                             if s[0] in summaries:
                                 val = getattr(stat, s[2])()
                                 attrs.append(val if not math.isnan(val) else NULL)
                     elif field_type == 'datetime':
-                        stat = QgsDateTimeStatisticalSummary()
-                        stat.calculate(attribute_values)
                         for s in datetime_fields:
                             if s[0] in summaries:
                                 if s[0] == 'filled':
@@ -355,13 +359,6 @@ class SpatialJoinSummary(QgisAlgorithm):
                                 else:
                                     attrs.append(getattr(stat, s[2])())
                     else:
-                        stat = QgsStringStatisticalSummary()
-                        for v in attribute_values:
-                            if v == NULL:
-                                stat.addString('')
-                            else:
-                                stat.addString(str(v))
-                        stat.finalize()
                         for s in string_fields:
                             if s[0] in summaries:
                                 if s[0] == 'filled':
@@ -21,8 +21,9 @@ __author__ = 'Victor Olaya'
 __date__ = 'September 2012'
 __copyright__ = '(C) 2012, Victor Olaya'
 
-from qgis.core import (QgsProcessingParameterFeatureSource,
-                       QgsStatisticalSummary,
+from qgis.core import (QgsProcessingParameterBoolean,
+                       QgsProcessingParameterDefinition,
+                       QgsProcessingParameterFeatureSource,
                        QgsDateTimeStatisticalSummary,
                        QgsStringStatisticalSummary,
                        QgsFeatureRequest,
@@ -38,19 +39,27 @@ from qgis.core import (QgsProcessingParameterFeatureSource,
                        QgsFeatureSink,
                        QgsProcessing,
                        QgsProcessingFeatureSource,
+                       QgsProcessingUtils,
                        NULL)
 from qgis.PyQt.QtCore import QVariant
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
+from processing.core.ProcessingConfig import ProcessingConfig
+from processing.tools.statistics import NumericSummary, SpillBudget, accumulate
 
-from collections import defaultdict
+from collections import Counter, defaultdict
 
 
 class StatisticsByCategories(QgisAlgorithm):
     INPUT = 'INPUT'
     VALUES_FIELD_NAME = 'VALUES_FIELD_NAME'
     CATEGORIES_FIELD_NAME = 'CATEGORIES_FIELD_NAME'
+    APPROXIMATE = 'APPROXIMATE'
     OUTPUT = 'OUTPUT'
 
+    BATCH_SIZE = 65536
+    # values of all categories kept in memory before spilling, shared by the worker threads
+    MEMORY_BUDGET = 1 << 23
+
     def group(self):
         return self.tr('Vector analysis')
 
@@ -82,6 +91,11 @@ class StatisticsByCategories(QgisAlgorithm):
                                                       self.tr('Field(s) with categories'),
                                                       parentLayerParameterName=self.INPUT,
                                                       type=QgsProcessingParameterField.Any, allowMultiple=True))
+        approximate = QgsProcessingParameterBoolean(self.APPROXIMATE,
+                                                    self.tr('Approximate median, quartiles and majority with streaming sketches'),
+                                                    defaultValue=False)
+        approximate.setFlags(approximate.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(approximate)
 
         self.addParameter(QgsProcessingParameterFeatureSink(self.OUTPUT, self.tr('Statistics by category')))
 
@@ -97,6 +111,7 @@ class StatisticsByCategories(QgisAlgorithm):
             raise QgsProcessingException(self.invalidSourceError(parameters, self.INPUT))
 
         value_field_name = self.parameterAsString(parameters, self.VALUES_FIELD_NAME, context)
+        self.threads = int(ProcessingConfig.getSetting(ProcessingConfig.MAX_THREADS))
         category_field_names = self.parameterAsFields(parameters, self.CATEGORIES_FIELD_NAME, context)
 
         value_field_index = source.fields().lookupField(value_field_name)
@@ -173,52 +188,100 @@ class StatisticsByCategories(QgisAlgorithm):
         request.setSubsetOfAttributes(attrs)
         features = source.getFeatures(request, QgsProcessingFeatureSource.FlagSkipGeometryValidityChecks)
         total = 50.0 / source.featureCount() if source.featureCount() else 0
+
+        # categories are output in order of first appearance
+        order = {}
+
+        def batches():
+            batch = []
+            first = None
+            for current, feat in enumerate(features):
+                if feedback.isCanceled():
+                    break
+
+                attrs = feat.attributes()
+                cat = tuple([attrs[c] for c in category_field_indexes])
+                if cat not in order:
+                    order[cat] = len(order)
+                if first is None:
+                    first = feat.id()
+                batch.append((cat, attrs[value_field_index] if value_field is not None else None))
+                if len(batch) == self.BATCH_SIZE:
+                    feedback.setProgress(int(current * total))
+                    yield first, batch
+                    batch = []
+                    first = None
+            if batch:
+                yield first, batch
+
         if field_type == 'none':
-            values = defaultdict(lambda: 0)
+            values = accumulate(batches(), Counter, self.countBatch, Counter.update, self.threads)
+        elif field_type == 'numeric':
+            # without approximation, the values of each category are spilled to
+            # disk so that medians, quartiles and counts of distinct values stay exact.
+            # Each worker gets its share of one memory budget for all categories,
+            # spilling the largest categories first when it is exceeded
+            directory = QgsProcessingUtils.tempFolder()
+            exact = not self.parameterAsBoolean(parameters, self.APPROXIMATE, context)
+
+            def create():
+                budget = SpillBudget(self.MEMORY_BUDGET // max(1, self.threads))
+                return defaultdict(lambda: NumericSummary(exact=exact, directory=directory, budget=budget))
+
+            values = accumulate(batches(), create, self.addNumericBatch, self.mergeNumeric, self.threads)
         else:
-            values = defaultdict(list)
-        for current, feat in enumerate(features):
-            if feedback.isCanceled():
-                break
-
-            feedback.setProgress(int(current * total))
-            attrs = feat.attributes()
-            cat = tuple([attrs[c] for c in category_field_indexes])
-            if field_type == 'none':
-                values[cat] += 1
-                continue
-            if field_type == 'numeric':
-                if attrs[value_field_index] == NULL:
-                    continue
-                else:
-                    value = float(attrs[value_field_index])
-            elif field_type == 'string':
-                if attrs[value_field_index] == NULL:
-                    value = ''
-                else:
-                    value = str(attrs[value_field_index])
-            elif attrs[value_field_index] == NULL:
-                value = NULL
-            else:
-                value = attrs[value_field_index]
-            values[cat].append(value)
+            # the QGIS summaries of dates and strings cannot be merged, so these
+            # are accumulated on a single thread
+            summary = QgsDateTimeStatisticalSummary if field_type == 'datetime' else QgsStringStatisticalSummary
+            values = defaultdict(summary)
+            for _, batch in batches():
+                for cat, value in batch:
+                    if field_type == 'datetime':
+                        values[cat].addValue(value)
+                    else:
+                        values[cat].addString('' if value == NULL else str(value))
+        values = {cat: values[cat] for cat in sorted(values, key=order.get)}
 
         (sink, dest_id) = self.parameterAsSink(parameters, self.OUTPUT, context,
                                                fields, QgsWkbTypes.NoGeometry, QgsCoordinateReferenceSystem())
         if sink is None:
             raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
 
-        if field_type == 'none':
-            self.saveCounts(values, sink, feedback)
-        elif field_type == 'numeric':
-            self.calcNumericStats(values, sink, feedback)
-        elif field_type == 'datetime':
-            self.calcDateTimeStats(values, sink, feedback)
-        else:
-            self.calcStringStats(values, sink, feedback)
+        try:
+            if field_type == 'none':
+                self.saveCounts(values, sink, feedback)
+            elif field_type == 'numeric':
+                self.calcNumericStats(values, sink, feedback)
+            elif field_type == 'datetime':
+                self.calcDateTimeStats(values, sink, feedback)
+            else:
+                self.calcStringStats(values, sink, feedback)
+        finally:
+            if field_type == 'numeric':
+                for stat in values.values():
+                    stat.close()
 
         return {self.OUTPUT: dest_id}
 
+    def countBatch(self, counts, batch):
+        counts.update(cat for cat, _ in batch)
+
+    def addNumericBatch(self, stats, batch):
+        # categories without any value are not output
+        grouped = defaultdict(list)
+        for cat, value in batch:
+            if value != NULL:
+                grouped[cat].append(value)
+        for cat, v in grouped.items():
+            stats[cat].addValues(v)
+
+    def mergeNumeric(self, stats, other):
+        for cat, stat in other.items():
+            if cat in stats:
+                stats[cat].merge(stat)
+            else:
+                stats[cat] = stat
+
     def saveCounts(self, values, sink, feedback):
         total = 50.0 / len(values) if values else 0
         current = 0
@@ -233,17 +296,15 @@ class StatisticsByCategories(QgisAlgorithm):
             current += 1
 
     def calcNumericStats(self, values, sink, feedback):
-        stat = QgsStatisticalSummary()
-
         total = 50.0 / len(values) if values else 0
         current = 0
-        for cat, v in values.items():
+        for cat, stat in values.items():
             if feedback.isCanceled():
                 break
 
             feedback.setProgress(int(current * total) + 50)
 
-            stat.calculate(v)
+            stat.finalize()
             f = QgsFeature()
             f.setAttributes(list(cat) + [stat.count(),
                                          stat.variety(),
@@ -264,17 +325,15 @@ class StatisticsByCategories(QgisAlgorithm):
             current += 1
 
     def calcDateTimeStats(self, values, sink, feedback):
-        stat = QgsDateTimeStatisticalSummary()
-
         total = 50.0 / len(values) if values else 0
         current = 0
-        for cat, v in values.items():
+        for cat, stat in values.items():
             if feedback.isCanceled():
                 break
 
             feedback.setProgress(int(current * total) + 50)
 
-            stat.calculate(v)
+            stat.finalize()
             f = QgsFeature()
             f.setAttributes(list(cat) + [stat.count(),
                                          stat.countDistinct(),
@@ -288,17 +347,15 @@ class StatisticsByCategories(QgisAlgorithm):
             current += 1
 
     def calcStringStats(self, values, sink, feedback):
-        stat = QgsStringStatisticalSummary()
-
         total = 50.0 / len(values) if values else 0
         current = 0
-        for cat, v in values.items():
+        for cat, stat in values.items():
             if feedback.isCanceled():
                 break
 
             feedback.setProgress(int(current * total) + 50)
 
-            stat.calculate(v)
+            stat.finalize()
             f = QgsFeature()
             f.setAttributes(list(cat) + [stat.count(),
                                          stat.countDistinct(),
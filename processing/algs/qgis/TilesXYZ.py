@@ -22,16 +22,20 @@ __date__ = 'April 2019'
 __copyright__ = '(C) 2019 by Lutra Consulting Limited'
 
 import os
+import sys
 import math
-import re
+import json
+import time
+import hashlib
+import multiprocessing
 import urllib.parse
-from uuid import uuid4
 
+import queue
 import sqlite3
-from osgeo import gdal
 from qgis.PyQt.QtCore import QSize, Qt, QByteArray, QBuffer
 from qgis.PyQt.QtGui import QColor, QImage, QPainter
 from qgis.core import (QgsProcessingException,
+                       QgsProcessingParameterDefinition,
                        QgsProcessingParameterEnum,
                        QgsProcessingParameterNumber,
                        QgsProcessingParameterBoolean,
@@ -44,17 +48,21 @@ from qgis.core import (QgsProcessingException,
                        QgsGeometry,
                        QgsRectangle,
                        QgsMapSettings,
+                       QgsMapLayerStyle,
                        QgsCoordinateTransform,
                        QgsCoordinateReferenceSystem,
                        QgsMapRendererCustomPainterJob,
                        QgsLabelingEngineSettings,
                        QgsApplication,
+                       QgsExpressionContext,
                        QgsExpressionContextUtils,
+                       QgsProject,
                        QgsProcessingAlgorithm)
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
 import threading
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from processing.core.ProcessingConfig import ProcessingConfig
+from processing.tools.system import isWindows
 
 
 # TMS functions taken from https://alastaira.wordpress.com/2011/07/06/converting-tms-tile-coordinates-to-googlebingosm-tile-coordinates/ #spellok
@@ -110,6 +118,10 @@ class MetaTile:
     def columns(self):
         return max([c for _, c, _ in self.tiles]) + 1
 
+    def key(self):
+        _, _, first = self.tiles[0]
+        return '{}/{}/{}'.format(first.z, first.x, first.y)
+
     def extent(self):
         _, _, first = self.tiles[0]
         _, _, last = self.tiles[-1]
@@ -135,6 +147,163 @@ def get_metatiles(extent, zoom, size=4):
     return list(metatiles.values())
 
 
+def create_map_settings(layers, dpi, tile_format, color, expression_context):
+    settings = QgsMapSettings()
+    settings.setOutputImageFormat(QImage.Format_ARGB32_Premultiplied)
+    settings.setDestinationCrs(QgsCoordinateReferenceSystem('EPSG:3857'))
+    settings.setLayers(layers)
+    settings.setOutputDpi(dpi)
+    if tile_format == 'PNG':
+        settings.setBackgroundColor(color)
+
+    # disable partial labels (they would be cut at the edge of tiles)
+    labeling_engine_settings = settings.labelingEngineSettings()
+    labeling_engine_settings.setFlag(QgsLabelingEngineSettings.UsePartialCandidates, False)
+    settings.setLabelingEngineSettings(labeling_engine_settings)
+
+    # Transfer context scopes to MapSettings
+    settings.setExpressionContext(expression_context)
+    return settings
+
+
+def render_metatile(settings, metatile, tile_width, tile_height, color, wgs_to_dest):
+    """Renders a metatile with the given map settings and returns a list of
+    (tile, image) tuples, one for each tile it contains.
+    """
+    size = QSize(tile_width * metatile.rows(), tile_height * metatile.columns())
+    extent = QgsRectangle(*metatile.extent())
+    metatile_settings = QgsMapSettings(settings)
+    metatile_settings.setExtent(wgs_to_dest.transformBoundingBox(extent))
+    metatile_settings.setOutputSize(size)
+
+    # Append MapSettings scope in order to update map variables (e.g @map_scale) with new extent data
+    exp_context = QgsExpressionContext(settings.expressionContext())
+    exp_context.appendScope(QgsExpressionContextUtils.mapSettingsScope(metatile_settings))
+    metatile_settings.setExpressionContext(exp_context)
+
+    image = QImage(size, QImage.Format_ARGB32_Premultiplied)
+    image.fill(color)
+    dpm = round(metatile_settings.outputDpi() / 25.4 * 1000)
+    image.setDotsPerMeterX(dpm)
+    image.setDotsPerMeterY(dpm)
+    painter = QPainter(image)
+    job = QgsMapRendererCustomPainterJob(metatile_settings, painter)
+    job.renderSynchronously()
+    painter.end()
+
+    return [(tile, image.copy(tile_width * r, tile_height * c, tile_width, tile_height))
+            for r, c, tile in metatile.tiles]
+
+
+def encode_tile(image, tile_format, quality=-1):
+    data = QByteArray()
+    buff = QBuffer(data)
+    image.save(buff, tile_format, quality)
+    return data.data()
+
+
+########################################################################
+# Multiprocess rendering
+########################################################################
+# Each worker process starts its own QgsApplication and reads the project
+# once in init_tile_worker(). Metatiles are sent to workers as plain tuples
+# and come back as encoded tile blobs, which the parent hands to the writer.
+_worker = {}
+
+
+def init_tile_worker(prefix_path, project_path, layer_ids, dpi, tile_format, quality, color_argb,
+                     tile_width, tile_height):
+    app = QgsApplication([], False)
+    app.setPrefixPath(prefix_path, True)
+    app.initQgis()
+    project = QgsProject.instance()
+    if not project.read(project_path):
+        raise QgsProcessingException('Could not read project {}'.format(project_path))
+
+    layers = [project.mapLayer(layer_id) for layer_id in layer_ids]
+    color = QColor.fromRgba(color_argb)
+    expression_context = QgsExpressionContext()
+    expression_context.appendScopes([QgsExpressionContextUtils.globalScope(),
+                                     QgsExpressionContextUtils.projectScope(project)])
+    _worker.update({
+        'app': app,
+        'settings': create_map_settings([layer for layer in layers if layer is not None], dpi, tile_format,
+                                        color, expression_context),
+        'wgs_to_dest': QgsCoordinateTransform(QgsCoordinateReferenceSystem('EPSG:4326'),
+                                              QgsCoordinateReferenceSystem('EPSG:3857'),
+                                              project.transformContext()),
+        'tile_format': tile_format,
+        'quality': quality,
+        'color': color,
+        'tile_width': tile_width,
+        'tile_height': tile_height,
+    })
+
+
+def render_metatile_in_worker(tiles):
+    metatile = MetaTile()
+    for r, c, x, y, z in tiles:
+        metatile.add_tile(r, c, Tile(x, y, z))
+    rendered = render_metatile(_worker['settings'], metatile, _worker['tile_width'], _worker['tile_height'],
+                               _worker['color'], _worker['wgs_to_dest'])
+    return [((tile.x, tile.y, tile.z), encode_tile(image, _worker['tile_format'], _worker['quality']))
+            for tile, image in rendered]
+
+
+class TileManifest:
+    """Records which metatiles have been written to an output, as a map of
+    metatile key to a hash of the inputs used to render it.
+
+    The manifest is saved as JSON beside the output every SAVE_INTERVAL
+    metatiles, so an interrupted run can be resumed.
+    """
+
+    SAVE_INTERVAL = 64
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f).get('metatiles', {})
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def is_current(self, key, digest):
+        return self.entries.get(key) == digest
+
+    def invalidate(self, key):
+        with self._lock:
+            if self.entries.pop(key, None) is not None:
+                self._unsaved += 1
+
+    def clear(self):
+        with self._lock:
+            self.entries = {}
+            self._unsaved += 1
+
+    def mark_done(self, key, digest):
+        with self._lock:
+            self.entries[key] = digest
+            self._unsaved += 1
+            if self._unsaved >= self.SAVE_INTERVAL:
+                self._save()
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'metatiles': self.entries}, f)
+        os.replace(tmp_path, self.path)
+        self._unsaved = 0
+
+
 class TilesXYZAlgorithmBase(QgisAlgorithm):
     EXTENT = 'EXTENT'
     ZOOM_MIN = 'ZOOM_MIN'
@@ -144,6 +313,9 @@ class TilesXYZAlgorithmBase(QgisAlgorithm):
     TILE_FORMAT = 'TILE_FORMAT'
     QUALITY = 'QUALITY'
     METATILESIZE = 'METATILESIZE'
+    INCREMENTAL = 'INCREMENTAL'
+    DIRTY_EXTENT = 'DIRTY_EXTENT'
+    RENDER_BACKEND = 'RENDER_BACKEND'
 
     def initAlgorithm(self, config=None):
         self.addParameter(QgsProcessingParameterExtent(self.EXTENT, self.tr('Extent')))
@@ -181,58 +353,51 @@ class TilesXYZAlgorithmBase(QgisAlgorithm):
                                                        minValue=1,
                                                        maxValue=20,
                                                        defaultValue=4))
-        self.thread_nr_re = re.compile('[0-9]+$')  # thread number regex
+        incremental_param = QgsProcessingParameterBoolean(self.INCREMENTAL,
+                                                          self.tr('Only render metatiles changed since the previous run'),
+                                                          defaultValue=False)
+        incremental_param.setFlags(incremental_param.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(incremental_param)
+        dirty_param = QgsProcessingParameterExtent(self.DIRTY_EXTENT,
+                                                   self.tr('Changed extent to re-render (incremental mode)'),
+                                                   optional=True)
+        dirty_param.setFlags(dirty_param.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(dirty_param)
+        self.backends = [self.tr('Threads'),
+                         self.tr('Processes (project must be saved)')]
+        backend_param = QgsProcessingParameterEnum(self.RENDER_BACKEND,
+                                                   self.tr('Rendering backend'),
+                                                   self.backends,
+                                                   defaultValue=0)
+        backend_param.setFlags(backend_param.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(backend_param)
 
     def prepareAlgorithm(self, parameters, context, feedback):
         project = context.project()
         visible_layers = [item.layer() for item in project.layerTreeRoot().findLayers() if item.isVisible()]
-        self.layers = [l for l in project.layerTreeRoot().layerOrder() if l in visible_layers]
+        self.layers = [layer for layer in project.layerTreeRoot().layerOrder() if layer in visible_layers]
         return True
 
-    def renderSingleMetatile(self, metatile):
-        if self.feedback.isCanceled():
-            return
-            # Haven't found a better way to break than to make all the new threads return instantly
+    def renderSingleMetatile(self, metatile, settings):
+        for tile, image in render_metatile(settings, metatile, self.tile_width, self.tile_height,
+                                           self.color, self.wgs_to_dest):
+            self.writer.write_tile(tile, image)
+        self.metatileFinished(metatile)
 
-        if "Dummy" in threading.current_thread().name or len(self.settingsDictionary) == 1:  # single thread testing
-            threadSpecificSettings = list(self.settingsDictionary.values())[0]
-        else:
-            thread_nr = self.thread_nr_re.search(threading.current_thread().name)[0]  # terminating number only
-            threadSpecificSettings = self.settingsDictionary[thread_nr]
-
-        size = QSize(self.tile_width * metatile.rows(), self.tile_height * metatile.columns())
-        extent = QgsRectangle(*metatile.extent())
-        threadSpecificSettings.setExtent(self.wgs_to_dest.transformBoundingBox(extent))
-        threadSpecificSettings.setOutputSize(size)
-
-        # Append MapSettings scope in order to update map variables (e.g @map_scale) with new extent data
-        exp_context = threadSpecificSettings.expressionContext()
-        exp_context.appendScope(QgsExpressionContextUtils.mapSettingsScope(threadSpecificSettings))
-        threadSpecificSettings.setExpressionContext(exp_context)
-
-        image = QImage(size, QImage.Format_ARGB32_Premultiplied)
-        image.fill(self.color)
-        dpm = round(threadSpecificSettings.outputDpi() / 25.4 * 1000)
-        image.setDotsPerMeterX(dpm)
-        image.setDotsPerMeterY(dpm)
-        painter = QPainter(image)
-        job = QgsMapRendererCustomPainterJob(threadSpecificSettings, painter)
-        job.renderSynchronously()
-        painter.end()
-
-        # For analysing metatiles (labels, etc.)
-        # metatile_dir = os.path.join(output_dir, str(zoom))
-        # os.makedirs(metatile_dir, exist_ok=True)
-        # image.save(os.path.join(metatile_dir, 'metatile_%s.png' % i))
-
-        for r, c, tile in metatile.tiles:
-            tileImage = image.copy(self.tile_width * r, self.tile_height * c, self.tile_width, self.tile_height)
-            self.writer.write_tile(tile, tileImage)
+    def metatileFinished(self, metatile):
+        if self.manifest is not None:
+            self.writer.metatile_done(metatile.key(), metatile.digest)
 
         # to stop thread sync issues
         with self.progressThreadLock:
             self.progress += 1
+            self.tilesDone += len(metatile.tiles)
             self.feedback.setProgress(100 * (self.progress / self.totalMetatiles))
+            now = time.monotonic()
+            if now - self.lastThroughputReport >= 10:
+                self.lastThroughputReport = now
+                self.feedback.pushInfo(self.tr('{tiles} tiles written, {rate:.1f} tiles/s').format(
+                    tiles=self.tilesDone, rate=self.tilesDone / (now - self.startTime)))
 
     def generate(self, writer, parameters, context, feedback):
         self.feedback = feedback
@@ -260,40 +425,59 @@ class TilesXYZAlgorithmBase(QgisAlgorithm):
         project = context.project()
         self.src_to_wgs = QgsCoordinateTransform(project.crs(), wgs_crs, context.transformContext())
         self.wgs_to_dest = QgsCoordinateTransform(wgs_crs, dest_crs, context.transformContext())
-        # without re-writing, we need a different settings for each thread to stop async errors
-        # naming doesn't always line up, but the last number does
-        self.settingsDictionary = {str(i): QgsMapSettings() for i in range(self.maxThreads)}
-        for thread in self.settingsDictionary:
-            self.settingsDictionary[thread].setOutputImageFormat(QImage.Format_ARGB32_Premultiplied)
-            self.settingsDictionary[thread].setDestinationCrs(dest_crs)
-            self.settingsDictionary[thread].setLayers(self.layers)
-            self.settingsDictionary[thread].setOutputDpi(dpi)
-            if self.tile_format == 'PNG':
-                self.settingsDictionary[thread].setBackgroundColor(self.color)
-
-            # disable partial labels (they would be cut at the edge of tiles)
-            labeling_engine_settings = self.settingsDictionary[thread].labelingEngineSettings()
-            labeling_engine_settings.setFlag(QgsLabelingEngineSettings.UsePartialCandidates, False)
-            self.settingsDictionary[thread].setLabelingEngineSettings(labeling_engine_settings)
-
-            # Transfer context scopes to MapSettings
-            self.settingsDictionary[thread].setExpressionContext(context.expressionContext())
+        self.dpi = dpi
+        self.backend = self.parameterAsEnum(parameters, self.RENDER_BACKEND, context)
+        if self.backend == 1:
+            self.project_path = project.fileName()
+            if not self.project_path or project.isDirty():
+                raise QgsProcessingException(self.tr('The multiprocess rendering backend needs the project '
+                                                     'to be saved first.'))
+        else:
+            # each worker thread gets its own map settings, rendering jobs must not share them
+            self.mapSettings = [create_map_settings(self.layers, dpi, self.tile_format, self.color,
+                                                    context.expressionContext())
+                                for _ in range(max(1, self.maxThreads))]
 
         self.wgs_extent = self.src_to_wgs.transformBoundingBox(extent)
         self.wgs_extent = [self.wgs_extent.xMinimum(), self.wgs_extent.yMinimum(), self.wgs_extent.xMaximum(),
                            self.wgs_extent.yMaximum()]
 
+        self.manifest = None
+        if self.parameterAsBoolean(parameters, self.INCREMENTAL, context):
+            self.manifest = TileManifest(writer.manifest_path())
+            writer.set_manifest(self.manifest)
+            signature = self.renderingSignature(dpi)
+            dirty_extent = None
+            if parameters.get(self.DIRTY_EXTENT):
+                dirty_extent = self.src_to_wgs.transformBoundingBox(
+                    self.parameterAsExtent(parameters, self.DIRTY_EXTENT, context))
+
         metatiles_by_zoom = {}
         self.totalMetatiles = 0
-        allMetatiles = []
+        skipped = 0
         for zoom in range(self.min_zoom, self.max_zoom + 1):
             metatiles = get_metatiles(self.wgs_extent, zoom, self.metatilesize)
+            if self.manifest is not None:
+                pending = []
+                for metatile in metatiles:
+                    metatile.digest = hashlib.sha1(
+                        '{}|{}'.format(signature, metatile.extent()).encode('utf-8')).hexdigest()
+                    if dirty_extent is not None and dirty_extent.intersects(QgsRectangle(*metatile.extent())):
+                        self.manifest.invalidate(metatile.key())
+                    if self.manifest.is_current(metatile.key(), metatile.digest):
+                        skipped += 1
+                    else:
+                        pending.append(metatile)
+                metatiles = pending
             metatiles_by_zoom[zoom] = metatiles
-            allMetatiles += metatiles
             self.totalMetatiles += len(metatiles)
 
-        lab_buffer_px = 100
+        if self.manifest is not None:
+            feedback.pushInfo(self.tr('Skipping {skipped} unchanged metatiles, rendering {total}').format(
+                skipped=skipped, total=self.totalMetatiles))
+
         self.progress = 0
+        self.tilesDone = 0
 
         tile_params = {
             'format': self.tile_format,
@@ -303,27 +487,111 @@ class TilesXYZAlgorithmBase(QgisAlgorithm):
             'min_zoom': self.min_zoom,
             'max_zoom': self.max_zoom,
             'extent': self.wgs_extent,
+            'incremental': self.manifest is not None,
         }
         writer.set_parameters(tile_params)
         self.writer = writer
+        if self.manifest is not None:
+            # persist invalidated metatiles before rendering, in case the run is interrupted
+            self.manifest.save()
 
         self.progressThreadLock = threading.Lock()
-        if self.maxThreads > 1:
+        try:
+            self.renderMetatiles(metatiles_by_zoom, feedback)
+        finally:
+            writer.close()
+
+    def renderMetatiles(self, metatiles_by_zoom, feedback):
+        # a single queue across all zoom levels, so workers never wait for
+        # the slowest metatile of a zoom level before starting the next one
+        metatiles = [m for zoom in range(self.min_zoom, self.max_zoom + 1) for m in metatiles_by_zoom[zoom]]
+        self.startTime = self.lastThroughputReport = time.monotonic()
+
+        if self.backend == 1:
+            feedback.pushConsoleInfo(self.tr('Using {max_threads} worker processes').format(
+                max_threads=self.maxThreads))
+            self.renderInProcesses(metatiles, feedback)
+        elif self.maxThreads > 1:
             feedback.pushConsoleInfo(self.tr('Using {max_threads} CPU Threads:').format(max_threads=self.maxThreads))
-            for zoom in range(self.min_zoom, self.max_zoom + 1):
-                feedback.pushConsoleInfo(self.tr('Generating tiles for zoom level: {zoom}').format(zoom=zoom))
-                with ThreadPoolExecutor(max_workers=self.maxThreads) as threadPool:
-                    for result in threadPool.map(self.renderSingleMetatile, metatiles_by_zoom[zoom]):
-                        # re-raise exceptions from threads
-                        _ = result
+            self.renderInThreads(metatiles, feedback)
         else:
             feedback.pushConsoleInfo(self.tr('Using 1 CPU Thread:'))
-            for zoom in range(self.min_zoom, self.max_zoom + 1):
-                feedback.pushConsoleInfo(self.tr('Generating tiles for zoom level: {zoom}').format(zoom=zoom))
-                for i, metatile in enumerate(metatiles_by_zoom[zoom]):
-                    self.renderSingleMetatile(metatile)
-
-        writer.close()
+            for metatile in metatiles:
+                if feedback.isCanceled():
+                    break
+                self.renderSingleMetatile(metatile, self.mapSettings[0])
+
+        elapsed = time.monotonic() - self.startTime
+        if self.tilesDone and elapsed > 0:
+            feedback.pushInfo(self.tr('{tiles} tiles written in {seconds:.1f} s ({rate:.1f} tiles/s)').format(
+                tiles=self.tilesDone, seconds=elapsed, rate=self.tilesDone / elapsed))
+
+    def renderInThreads(self, metatiles, feedback):
+        work = queue.Queue()
+        for metatile in metatiles:
+            work.put(metatile)
+        errors = []
+
+        def worker(settings):
+            while not feedback.isCanceled() and not errors:
+                try:
+                    metatile = work.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    self.renderSingleMetatile(metatile, settings)
+                except Exception as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(settings,), name='TilesXYZ-{}'.format(i))
+                   for i, settings in enumerate(self.mapSettings)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            # re-raise exceptions from threads
+            raise errors[0]
+
+    def renderInProcesses(self, metatiles, feedback):
+        ctx = multiprocessing.get_context('spawn')
+        if isWindows():
+            # inside QGIS sys.executable is the application, not the interpreter
+            ctx.set_executable(os.path.join(sys.exec_prefix, 'pythonw.exe'))
+        initargs = (QgsApplication.prefixPath(), self.project_path, [layer.id() for layer in self.layers], self.dpi,
+                    self.tile_format, self.quality, self.color.rgba(), self.tile_width, self.tile_height)
+
+        remaining = iter(metatiles)
+        pending = {}
+        with ProcessPoolExecutor(max_workers=max(1, self.maxThreads), mp_context=ctx,
+                                 initializer=init_tile_worker, initargs=initargs) as pool:
+            while True:
+                while len(pending) < self.maxThreads * 2 and not feedback.isCanceled():
+                    metatile = next(remaining, None)
+                    if metatile is None:
+                        break
+                    tiles = [(r, c, t.x, t.y, t.z) for r, c, t in metatile.tiles]
+                    pending[pool.submit(render_metatile_in_worker, tiles)] = metatile
+                if not pending:
+                    break
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    metatile = pending.pop(future)
+                    for (x, y, z), data in future.result():
+                        self.writer.write_tile_data(Tile(x, y, z), data)
+                    self.metatileFinished(metatile)
+
+    def renderingSignature(self, dpi):
+        """Returns a string identifying everything, besides the extent, that
+        affects how a metatile is rendered.
+        """
+        parts = [self.tile_format, self.quality, self.tile_width, self.tile_height,
+                 self.metatilesize, dpi, self.color.name(QColor.HexArgb)]
+        for layer in self.layers:
+            style = QgsMapLayerStyle()
+            style.readFromLayer(layer)
+            parts.extend([layer.id(), layer.source(), style.xmlData()])
+        return hashlib.sha1('|'.join(map(str, parts)).encode('utf-8')).hexdigest()
 
     def checkParameterValues(self, parameters, context):
         min_zoom = self.parameterAsInt(parameters, self.ZOOM_MIN, context)
@@ -338,11 +606,33 @@ class TilesXYZAlgorithmBase(QgisAlgorithm):
 # MBTiles
 ########################################################################
 class MBTilesWriter:
+    """Writes encoded tiles straight into the tiles table of an MBTiles file.
+
+    Rendering threads only encode the tile image and hand the blob over
+    through a bounded queue. A single writer thread owns the sqlite
+    connection and inserts the tiles in batched transactions.
+    """
+
+    BATCH_SIZE = 512
+    QUEUE_SIZE = 1024
 
     def __init__(self, filename):
         base_dir = os.path.dirname(filename)
         os.makedirs(base_dir, exist_ok=True)
         self.filename = filename
+        self.manifest = None
+        self._queue = None
+        self._thread = None
+        self._error = None
+
+    def manifest_path(self):
+        return self.filename + '.manifest.json'
+
+    def set_manifest(self, manifest):
+        self.manifest = manifest
+        if not os.path.exists(self.filename):
+            # tiles recorded in the manifest are gone with the old file
+            manifest.clear()
 
     def set_parameters(self, tile_params):
         self.extent = tile_params.get('extent')
@@ -350,82 +640,106 @@ class MBTilesWriter:
         self.tile_height = tile_params.get('height', 256)
         self.min_zoom = tile_params.get('min_zoom')
         self.max_zoom = tile_params.get('max_zoom')
-        tile_format = tile_params['format']
-        options = []
-        if tile_format == 'JPG':
-            tile_format = 'JPEG'
-            options = ['QUALITY=%s' % tile_params.get('quality', 75)]
-        driver = gdal.GetDriverByName('MBTiles')
-        ds = driver.Create(self.filename, 1, 1, 1, options=['TILE_FORMAT=%s' % tile_format] + options)
-        ds = None
-
-        # faster sqlite processing for parallel access https://stackoverflow.com/questions/15143871/simplest-way-to-retry-sqlite-query-if-db-is-locked
-        self._execute_sqlite("PRAGMA journal_mode=WAL")
-
-        self._execute_sqlite(
-            "INSERT INTO metadata(name, value) VALUES ('{}', '{}');".format('minzoom', self.min_zoom),
-            "INSERT INTO metadata(name, value) VALUES ('{}', '{}');".format('maxzoom', self.max_zoom),
+        self.format = tile_params['format']
+        self.quality = tile_params.get('quality', 75) if self.format == 'JPG' else -1
+
+        if tile_params.get('incremental') and os.path.exists(self.filename):
+            conn = sqlite3.connect(self.filename)
+            with conn:
+                conn.executemany("UPDATE metadata SET value=? WHERE name=?",
+                                 [(str(self.min_zoom), 'minzoom'), (str(self.max_zoom), 'maxzoom')])
+            conn.close()
+        else:
+            if os.path.exists(self.filename):
+                os.remove(self.filename)
+            self._create()
+
+        self._queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._write_loop, name='MBTilesWriter', daemon=True)
+        self._thread.start()
+
+    def _create(self):
+        conn = sqlite3.connect(self.filename)
+        conn.executescript("""
+            CREATE TABLE metadata (name TEXT, value TEXT);
+            CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB);
+            CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row);
+        """)
+        conn.executemany("INSERT INTO metadata(name, value) VALUES (?, ?)", [
+            ('name', os.path.splitext(os.path.basename(self.filename))[0]),
+            ('type', 'baselayer'),
+            ('version', '1.1'),
+            ('description', ''),
+            ('format', 'jpg' if self.format == 'JPG' else 'png'),
+            ('minzoom', str(self.min_zoom)),
+            ('maxzoom', str(self.max_zoom)),
             # will be set properly after writing all tiles
-            "INSERT INTO metadata(name, value) VALUES ('{}', '');".format('bounds')
-        )
-        self._zoom = None
-
-    def _execute_sqlite(self, *commands):
-        # wait_timeout = default timeout is 5 seconds increase it for slower disk access and more Threads to 120 seconds
-        # isolation_level = None Uses sqlite AutoCommit and disable phyton transaction management feature. https://docs.python.org/3/library/sqlite3.html#sqlite3-controlling-transactions
-        conn = sqlite3.connect(self.filename, timeout=120, isolation_level=None)
-        for cmd in commands:
-            conn.execute(cmd)
+            ('bounds', ''),
+        ])
         conn.commit()
         conn.close()
 
-    def _init_zoom_layer(self, zoom):
-        self._zoom_ds = None
-        west_edge, south_edge, east_edge, north_edge = self.extent
-        first_tile = Tile(*deg2num(north_edge, west_edge, zoom), zoom)
-        last_tile = Tile(*deg2num(south_edge, east_edge, zoom), zoom)
-
-        first_tile_extent = first_tile.extent()
-        last_tile_extent = last_tile.extent()
-        zoom_extent = [
-            first_tile_extent[0],
-            last_tile_extent[1],
-            last_tile_extent[2],
-            first_tile_extent[3]
-        ]
-
-        bounds = ','.join(map(str, zoom_extent))
-        self._execute_sqlite("UPDATE metadata SET value='{}' WHERE name='bounds'".format(bounds))
-
-        self._zoom_ds = gdal.OpenEx(self.filename, 1, open_options=['ZOOM_LEVEL=%s' % first_tile.z])
-        self._first_tile = first_tile
-        self._zoom = zoom
+    def _write_loop(self):
+        conn = sqlite3.connect(self.filename)
+        conn.execute("PRAGMA synchronous=OFF")
+        finished = False
+        try:
+            while not finished:
+                batch = [self._queue.get()]
+                # drain whatever else is ready, up to a full batch
+                while len(batch) < self.BATCH_SIZE:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if None in batch:
+                    finished = True
+                    batch = [row for row in batch if row is not None]
+                # 4-tuples are tiles, 2-tuples mark a metatile as complete
+                tiles = [row for row in batch if len(row) == 4]
+                if tiles:
+                    with conn:
+                        conn.executemany("INSERT OR REPLACE INTO tiles(zoom_level, tile_column, tile_row, tile_data) "
+                                         "VALUES (?, ?, ?, ?)", tiles)
+                if self.manifest is not None:
+                    # only record metatiles once their tiles are committed
+                    for row in batch:
+                        if len(row) == 2:
+                            self.manifest.mark_done(*row)
+        except Exception as e:
+            self._error = e
+            # keep draining so that rendering threads are never blocked on a full queue
+            while not finished:
+                finished = self._queue.get() is None
+        finally:
+            conn.close()
 
     def write_tile(self, tile, image):
-        if tile.z != self._zoom:
-            self._init_zoom_layer(tile.z)
+        self.write_tile_data(tile, encode_tile(image, self.format, self.quality))
 
-        data = QByteArray()
-        buff = QBuffer(data)
-        image.save(buff, 'PNG')
+    def write_tile_data(self, tile, data):
+        if self._error is not None:
+            raise QgsProcessingException(str(self._error))
 
-        mmap_name = '/vsimem/' + uuid4().hex
-        gdal.FileFromMemBuffer(mmap_name, data.data())
-        gdal_dataset = gdal.Open(mmap_name)
-        data = gdal_dataset.ReadRaster(0, 0, self.tile_width, self.tile_height)
-        gdal_dataset = None
-        gdal.Unlink(mmap_name)
+        self._queue.put((tile.z, tile.x, tms(tile.y, tile.z), sqlite3.Binary(data)))
 
-        xoff = (tile.x - self._first_tile.x) * self.tile_width
-        yoff = (tile.y - self._first_tile.y) * self.tile_height
-        self._zoom_ds.WriteRaster(xoff, yoff, self.tile_width, self.tile_height, data)
+    def metatile_done(self, key, digest):
+        self._queue.put((key, digest))
 
     def close(self):
-        self._zoom_ds = None
-        bounds = ','.join(map(str, self.extent))
-        self._execute_sqlite("UPDATE metadata SET value='{}' WHERE name='bounds'".format(bounds))
-        # Set Journal Mode back to default
-        self._execute_sqlite("PRAGMA journal_mode=DELETE")
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        if self.manifest is not None:
+            self.manifest.save()
+        if self._error is not None:
+            raise QgsProcessingException(str(self._error))
+
+        conn = sqlite3.connect(self.filename)
+        with conn:
+            conn.execute("UPDATE metadata SET value=? WHERE name='bounds'", (','.join(map(str, self.extent)),))
+        conn.close()
 
 
 class TilesXYZAlgorithmMBTiles(TilesXYZAlgorithmBase):
@@ -514,23 +828,44 @@ class DirectoryWriter:
     def __init__(self, folder, is_tms):
         self.folder = folder
         self.is_tms = is_tms
+        self.manifest = None
+
+    def manifest_path(self):
+        os.makedirs(self.folder, exist_ok=True)
+        return os.path.join(self.folder, 'tiles_manifest.json')
+
+    def set_manifest(self, manifest):
+        self.manifest = manifest
 
     def set_parameters(self, tile_params):
         self.format = tile_params.get('format', 'PNG')
         self.quality = tile_params.get('quality', -1)
 
-    def write_tile(self, tile, image):
+    def tile_path(self, tile):
         directory = os.path.join(self.folder, str(tile.z), str(tile.x))
         os.makedirs(directory, exist_ok=True)
         ytile = tile.y
         if self.is_tms:
             ytile = tms(ytile, tile.z)
-        path = os.path.join(directory, '{}.{}'.format(ytile, self.format.lower()))
+        return os.path.join(directory, '{}.{}'.format(ytile, self.format.lower()))
+
+    def write_tile(self, tile, image):
+        path = self.tile_path(tile)
         image.save(path, self.format, self.quality)
         return path
 
+    def write_tile_data(self, tile, data):
+        path = self.tile_path(tile)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def metatile_done(self, key, digest):
+        self.manifest.mark_done(key, digest)
+
     def close(self):
-        pass
+        if self.manifest is not None:
+            self.manifest.save()
 
 
 class TilesXYZAlgorithmDirectory(TilesXYZAlgorithmBase):
@@ -22,12 +22,15 @@ __date__ = 'February 2017'
 __copyright__ = '(C) 2017, Nyall Dawson'
 
 import os
-import operator
 import sys
 
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy
 
 from qgis.core import (QgsField,
+                       QgsFeature,
+                       QgsFeatureRequest,
                        QgsFeatureSink,
                        QgsGeometry,
                        QgsSpatialIndex,
@@ -35,6 +38,7 @@ from qgis.core import (QgsField,
                        NULL,
                        QgsProcessing,
                        QgsProcessingException,
+                       QgsProcessingMultiStepFeedback,
                        QgsProcessingParameterFeatureSource,
                        QgsProcessingParameterDistance,
                        QgsProcessingParameterNumber,
@@ -44,6 +48,7 @@ from qgis.core import (QgsField,
 from qgis.PyQt.QtCore import (QVariant)
 
 from processing.algs.qgis.QgisAlgorithm import QgisAlgorithm
+from processing.core.ProcessingConfig import ProcessingConfig
 
 pluginPath = os.path.split(os.path.split(os.path.dirname(__file__))[0])[0]
 
@@ -104,6 +109,7 @@ class TopoColor(QgisAlgorithm):
         min_colors = self.parameterAsInt(parameters, self.MIN_COLORS, context)
         balance_by = self.parameterAsEnum(parameters, self.BALANCE, context)
         min_distance = self.parameterAsDouble(parameters, self.MIN_DISTANCE, context)
+        threads = int(ProcessingConfig.getSetting(ProcessingConfig.MAX_THREADS))
 
         fields = source.fields()
         fields.append(QgsField('color_id', QVariant.Int))
@@ -113,201 +119,222 @@ class TopoColor(QgisAlgorithm):
         if sink is None:
             raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
 
-        features = {f.id(): f for f in source.getFeatures()}
+        multi_feedback = QgsProcessingMultiStepFeedback(4, feedback)
+
+        # only geometries are kept in memory, attributes are read again when writing the output
+        multi_feedback.pushInfo(self.tr('Building spatial index'))
+        request = QgsFeatureRequest().setSubsetOfAttributes([])
+        index = QgsSpatialIndex(source.getFeatures(request), multi_feedback)
+
+        multi_feedback.setCurrentStep(1)
+        ids, geometries = self.load_geometries(source, request, multi_feedback)
+
+        multi_feedback.setCurrentStep(2)
+        multi_feedback.pushInfo(self.tr('Computing adjacency graph'))
+        topology = self.compute_graph(ids, geometries, index, multi_feedback,
+                                      min_distance=min_distance, threads=threads)
+        del index
 
-        topology, id_graph = self.compute_graph(features, feedback, min_distance=min_distance)
-        feature_colors = ColoringAlgorithm.balanced(features,
-                                                    balance=balance_by,
-                                                    graph=topology,
-                                                    feedback=feedback,
-                                                    min_colors=min_colors)
+        multi_feedback.setCurrentStep(3)
+        colors = ColoringAlgorithm.balanced(geometries,
+                                            balance=balance_by,
+                                            graph=topology,
+                                            feedback=multi_feedback,
+                                            min_colors=min_colors)
+        del geometries
 
-        if len(feature_colors) == 0:
+        if feedback.isCanceled() or len(colors) == 0:
             return {self.OUTPUT: dest_id}
 
-        max_colors = max(feature_colors.values())
+        max_colors = int(colors.max())
         feedback.pushInfo(self.tr('{} colors required').format(max_colors))
 
-        total = 20.0 / len(features)
-        current = 0
-        for feature_id, input_feature in features.items():
+        # colors of features looked up by id, features without geometry get no color
+        order = numpy.argsort(ids, kind='stable')
+        sorted_ids = ids[order]
+
+        total = 20.0 / source.featureCount() if source.featureCount() else 0
+        for current, input_feature in enumerate(source.getFeatures()):
             if feedback.isCanceled():
                 break
 
             output_feature = input_feature
             attributes = input_feature.attributes()
-            if feature_id in feature_colors:
-                attributes.append(feature_colors[feature_id])
+            position = numpy.searchsorted(sorted_ids, input_feature.id())
+            if position < len(sorted_ids) and sorted_ids[position] == input_feature.id():
+                attributes.append(int(colors[order[position]]))
             else:
                 attributes.append(NULL)
             output_feature.setAttributes(attributes)
 
             sink.addFeature(output_feature, QgsFeatureSink.FastInsert)
-            current += 1
             feedback.setProgress(80 + int(current * total))
 
         return {self.OUTPUT: dest_id}
 
     @staticmethod
-    def compute_graph(features, feedback, create_id_graph=False, min_distance=0):
-        """ compute topology from a layer/field """
-        s = Graph(sort_graph=False)
-        id_graph = None
-        if create_id_graph:
-            id_graph = Graph(sort_graph=True)
-
-        # skip features without geometry
-        features_with_geometry = {f_id: f for (f_id, f) in features.items() if f.hasGeometry()}
-
-        total = 70.0 / len(features_with_geometry) if features_with_geometry else 1
-        index = QgsSpatialIndex()
-
-        i = 0
-        for feature_id, f in features_with_geometry.items():
-            if feedback.isCanceled():
-                break
-
-            g = f.geometry()
-            if min_distance > 0:
-                g = g.buffer(min_distance, 5)
-
-            engine = QgsGeometry.createGeometryEngine(g.constGet())
-            engine.prepareGeometry()
-
-            feature_bounds = g.boundingBox()
-            # grow bounds a little so we get touching features
-            feature_bounds.grow(feature_bounds.width() * 0.01)
-            intersections = index.intersects(feature_bounds)
-            for l2 in intersections:
-                f2 = features_with_geometry[l2]
-                if engine.intersects(f2.geometry().constGet()):
-                    s.add_edge(f.id(), f2.id())
-                    s.add_edge(f2.id(), f.id())
-                    if id_graph:
-                        id_graph.add_edge(f.id(), f2.id())
-
-            index.addFeature(f)
-            i += 1
-            feedback.setProgress(int(i * total))
-
-        for feature_id, f in features_with_geometry.items():
+    def load_geometries(source, request, feedback):
+        """ returns the ids and geometries of the features with a geometry """
+        ids = []
+        geometries = []
+        total = 100.0 / source.featureCount() if source.featureCount() else 0
+        for current, f in enumerate(source.getFeatures(request)):
             if feedback.isCanceled():
                 break
+            # skip features without geometry
+            if f.hasGeometry():
+                ids.append(f.id())
+                geometries.append(f.geometry())
+            feedback.setProgress(int(current * total))
+        return numpy.array(ids, dtype=numpy.int64), geometries
 
-            if feature_id not in s.node_edge:
-                s.add_edge(feature_id, None)
-
-        return s, id_graph
+    @staticmethod
+    def compute_graph(ids, geometries, index, feedback, min_distance=0, threads=1, chunk_size=2048):
+        """ compute topology from a list of geometries and a spatial index over their features
+
+        Chunks of features are tested against their candidates on worker threads. Each pair of
+        features is tested once, from the feature coming first.
+        """
+        order = numpy.argsort(ids, kind='stable')
+        sorted_ids = ids[order]
+        count = len(geometries)
+
+        def adjacent_pairs(start):
+            rows = []
+            cols = []
+            for i in range(start, min(start + chunk_size, count)):
+                if feedback.isCanceled():
+                    break
+
+                g = geometries[i]
+                if min_distance > 0:
+                    g = g.buffer(min_distance, 5)
+
+                feature_bounds = g.boundingBox()
+                # grow bounds a little so we get touching features
+                feature_bounds.grow(feature_bounds.width() * 0.01)
+                candidates = numpy.array(index.intersects(feature_bounds), dtype=numpy.int64)
+                candidates = order[numpy.searchsorted(sorted_ids, candidates)]
+                candidates = candidates[candidates > i]
+                if not len(candidates):
+                    continue
+
+                engine = QgsGeometry.createGeometryEngine(g.constGet())
+                engine.prepareGeometry()
+                for j in numpy.sort(candidates).tolist():
+                    if engine.intersects(geometries[j].constGet()):
+                        rows.append(i)
+                        cols.append(j)
+            return rows, cols
+
+        rows = []
+        cols = []
+        starts = range(0, count, chunk_size)
+        total = 100.0 / len(starts) if len(starts) else 0
+        with ThreadPoolExecutor(max_workers=max(1, threads)) as executor:
+            for current, (r, c) in enumerate(executor.map(adjacent_pairs, starts)):
+                rows.extend(r)
+                cols.extend(c)
+                feedback.setProgress(int((current + 1) * total))
+
+        return Graph.from_edges(count, numpy.array(rows, dtype=numpy.int64), numpy.array(cols, dtype=numpy.int64))
 
 
 class ColoringAlgorithm:
 
     @staticmethod
-    def balanced(features, graph, feedback, balance=0, min_colors=4):
-        feature_colors = {}
-        # start with minimum number of colors in pool
-        color_pool = set(range(1, min_colors + 1))
-
-        # calculate count of neighbours
-        neighbour_count = defaultdict(int)
-        for feature_id, neighbours in graph.node_edge.items():
-            neighbour_count[feature_id] += len(neighbours)
-
-        # sort features by neighbour count - we want to handle those with more neighbours first
-        sorted_by_count = [feature_id for feature_id in sorted(neighbour_count.items(),
-                                                               key=operator.itemgetter(1),
-                                                               reverse=True)]
-        # counts for each color already assigned
-        color_counts = defaultdict(int)
-        color_areas = defaultdict(float)
-        for c in color_pool:
-            color_counts[c] = 0
-            color_areas[c] = 0
-
-        total = 10.0 / len(sorted_by_count) if sorted_by_count else 1
-        i = 0
-
-        for (feature_id, n) in sorted_by_count:
-            if feedback.isCanceled():
-                break
+    def balanced(geometries, graph, feedback, balance=0, min_colors=4):
+        """ returns an array with the color of each node of graph, starting from 1 """
+        # handle the features with more neighbours first
+        sorted_by_count = numpy.argsort(-graph.degree(), kind='stable')
+
+        if balance == 1:
+            areas = numpy.array([g.area() for g in geometries])
+        elif balance == 2:
+            centroids = [g.centroid().asPoint() for g in geometries]
+
+        while True:
+            # start with minimum number of colors in pool, colors are 1 based
+            feature_colors = numpy.zeros(graph.node_count(), dtype=numpy.int32)
+            color_counts = numpy.zeros(min_colors + 1, dtype=numpy.int64)
+            color_areas = numpy.zeros(min_colors + 1)
+            if balance == 2:
+                color_indexes = [QgsSpatialIndex() for _ in range(min_colors + 1)]
+
+            total = 100.0 / len(sorted_by_count) if len(sorted_by_count) else 1
+            complete = True
+            for current, feature in enumerate(sorted_by_count.tolist()):
+                if feedback.isCanceled():
+                    return feature_colors
+
+                # first work out which already assigned colors are adjacent to this feature,
+                # then which colors from the pool are available (ie non-adjacent)
+                available = numpy.ones(min_colors + 1, dtype=bool)
+                available[0] = False
+                available[feature_colors[graph.neighbours(feature)]] = False
+                available_colors = numpy.flatnonzero(available)
+
+                if len(available_colors) == 0:
+                    # no existing colors available for this feature, so add new color to pool and repeat
+                    min_colors += 1
+                    complete = False
+                    break
 
-            # first work out which already assigned colors are adjacent to this feature
-            adjacent_colors = {
-                feature_colors[neighbour]
-                for neighbour in graph.node_edge[feature_id]
-                if neighbour in feature_colors
-            }
-
-            # from the existing colors, work out which are available (ie non-adjacent)
-            available_colors = color_pool.difference(adjacent_colors)
-
-            feature_color = -1
-            if len(available_colors) == 0:
-                # no existing colors available for this feature, so add new color to pool and repeat
-                min_colors += 1
-                return ColoringAlgorithm.balanced(features, graph, feedback, balance, min_colors)
-            else:
                 if balance == 0:
                     # choose least used available color
-                    counts = [(c, v) for c, v in color_counts.items() if c in available_colors]
-                    feature_color = sorted(counts, key=operator.itemgetter(1))[0][0]
+                    feature_color = available_colors[numpy.argmin(color_counts[available_colors])]
                     color_counts[feature_color] += 1
                 elif balance == 1:
-                    areas = [(c, v) for c, v in color_areas.items() if c in available_colors]
-                    feature_color = sorted(areas, key=operator.itemgetter(1))[0][0]
-                    color_areas[feature_color] += features[feature_id].geometry().area()
-                elif balance == 2:
-                    min_distances = {c: sys.float_info.max for c in available_colors}
-                    this_feature_centroid = features[feature_id].geometry().centroid().constGet()
-
-                    # find features for all available colors
-                    other_features = {f_id: c for (f_id, c) in feature_colors.items() if c in available_colors}
-
-                    # loop through these, and calculate the minimum distance from this feature to the nearest
-                    # feature with each assigned color
-                    for other_feature_id, c in other_features.items():
-                        if feedback.isCanceled():
-                            break
-
-                        other_geometry = features[other_feature_id].geometry()
-                        other_centroid = other_geometry.centroid().constGet()
-
-                        distance = this_feature_centroid.distanceSquared(other_centroid)
-                        if distance < min_distances[c]:
-                            min_distances[c] = distance
-
-                    # choose color such that minimum distance is maximised! ie we want MAXIMAL separation between
-                    # features with the same color
-                    feature_color = sorted(min_distances, key=min_distances.__getitem__, reverse=True)[0]
-
-            feature_colors[feature_id] = feature_color
-
-            i += 1
-            feedback.setProgress(70 + int(i * total))
-
-        return feature_colors
+                    feature_color = available_colors[numpy.argmin(color_areas[available_colors])]
+                    color_areas[feature_color] += areas[feature]
+                else:
+                    # calculate the minimum distance from this feature to the nearest feature with each
+                    # available color, and choose color such that minimum distance is maximised! ie we want
+                    # MAXIMAL separation between features with the same color
+                    this_feature_centroid = centroids[feature]
+                    min_distances = []
+                    for c in available_colors.tolist():
+                        nearest = color_indexes[c].nearestNeighbor(this_feature_centroid, 1)
+                        if nearest:
+                            min_distances.append(this_feature_centroid.sqrDist(centroids[nearest[0]]))
+                        else:
+                            min_distances.append(sys.float_info.max)
+                    feature_color = available_colors[int(numpy.argmax(min_distances))]
+
+                    point_feature = QgsFeature(feature)
+                    point_feature.setGeometry(QgsGeometry.fromPointXY(this_feature_centroid))
+                    color_indexes[feature_color].addFeature(point_feature)
+
+                feature_colors[feature] = feature_color
+                feedback.setProgress(int(current * total))
+
+            if complete:
+                return feature_colors
 
 
 class Graph:
+    """ undirected graph stored as compressed sparse rows: the neighbours of node i are
+    indices[indptr[i]:indptr[i + 1]] """
+
+    def __init__(self, indptr, indices):
+        self.indptr = indptr
+        self.indices = indices
 
-    def __init__(self, sort_graph=True):
-        self.sort_graph = sort_graph
-        self.node_edge = {}
-
-    def add_edge(self, i, j):
-        ij = [i, j]
-        if self.sort_graph:
-            ij.sort()
-        (i, j) = ij
-        if i in self.node_edge:
-            self.node_edge[i].add(j)
-        else:
-            self.node_edge[i] = {j}
-
-    def make_full(self):
-        g = Graph(sort_graph=False)
-        for k in self.node_edge.keys():
-            for v in self.node_edge[k]:
-                g.add_edge(v, k)
-                g.add_edge(k, v)
-        return g
+    @staticmethod
+    def from_edges(node_count, rows, cols):
+        """ builds a graph from arrays of edges, listing each edge once in either direction """
+        sources = numpy.concatenate([rows, cols])
+        targets = numpy.concatenate([cols, rows])
+        order = numpy.lexsort((targets, sources))
+        indptr = numpy.zeros(node_count + 1, dtype=numpy.int64)
+        numpy.cumsum(numpy.bincount(sources, minlength=node_count), out=indptr[1:])
+        return Graph(indptr, targets[order])
+
+    def node_count(self):
+        return len(self.indptr) - 1
+
+    def degree(self):
+        return numpy.diff(self.indptr)
+
+    def neighbours(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
@@ -86,9 +86,9 @@ class VectorLayerHistogram(QgisAlgorithm):
 
         output = self.parameterAsFileOutput(parameters, self.OUTPUT, context)
 
-        values = vector.values(source, fieldname)
+        values = vector.columns(source, fieldname, numeric=True, feedback=feedback)
 
-        data = [go.Histogram(x=values[fieldname],
+        data = [go.Histogram(x=values[fieldname].compressed(),
                              nbinsx=bins)]
         plt.offline.plot(data, filename=output, auto_open=False)
 
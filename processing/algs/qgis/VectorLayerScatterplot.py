@@ -22,6 +22,8 @@ __date__ = 'January 2013'
 __copyright__ = '(C) 2013, Victor Olaya'
 
 import warnings
+
+import numpy
 from qgis.core import (QgsProcessingException,
                        QgsProcessingParameterFeatureSource,
                        QgsProcessingParameterField,
@@ -87,9 +89,9 @@ class VectorLayerScatterplot(QgisAlgorithm):
 
         output = self.parameterAsFileOutput(parameters, self.OUTPUT, context)
 
-        values = vector.values(source, xfieldname, yfieldname)
-        data = [go.Scatter(x=values[xfieldname],
-                           y=values[yfieldname],
+        values = vector.columns(source, xfieldname, yfieldname, numeric=True, feedback=feedback)
+        data = [go.Scatter(x=values[xfieldname].filled(numpy.nan),
+                           y=values[yfieldname].filled(numpy.nan),
                            mode='markers')]
         plt.offline.plot(data, filename=output, auto_open=False)
 
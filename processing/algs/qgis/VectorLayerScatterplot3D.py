@@ -22,6 +22,8 @@ __date__ = 'January 2013'
 __copyright__ = '(C) 2013, Victor Olaya'
 
 import warnings
+
+import numpy
 from qgis.core import (QgsProcessingParameterFeatureSource,
                        QgsProcessingParameterField,
                        QgsProcessingParameterFileDestination,
@@ -94,12 +96,12 @@ class VectorLayerScatterplot3D(QgisAlgorithm):
 
         output = self.parameterAsFileOutput(parameters, self.OUTPUT, context)
 
-        values = vector.values(source, xfieldname, yfieldname, zfieldname)
+        values = vector.columns(source, xfieldname, yfieldname, zfieldname, numeric=True, feedback=feedback)
 
         data = [go.Scatter3d(
-                x=values[xfieldname],
-                y=values[yfieldname],
-                z=values[zfieldname],
+                x=values[xfieldname].filled(numpy.nan),
+                y=values[yfieldname].filled(numpy.nan),
+                z=values[zfieldname].filled(numpy.nan),
                 mode='markers')]
 
         plt.offline.plot(data, filename=output, auto_open=False)
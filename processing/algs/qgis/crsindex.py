@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    crsindex.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by QGIS Processing contributors
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Processing contributors'
+__date__ = 'October 2026'
+__copyright__ = '(C) 2026, QGIS Processing contributors'
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy
+
+from qgis.PyQt.QtCore import QCoreApplication
+from qgis.core import (Qgis,
+                       QgsApplication,
+                       QgsCoordinateReferenceSystem,
+                       QgsCoordinateTransform,
+                       QgsCoordinateTransformContext,
+                       QgsProjUtils)
+
+from processing.tools.system import userFolder
+
+
+def projectedBounds(srs_id):
+    """Returns the (authid, (xmin, ymin, xmax, ymax)) of a CRS, the bounds
+    being its area of use in its own units. Bounds are NaN when the area of
+    use is unknown or cannot be projected, and authid is None for invalid
+    CRSs.
+    """
+    unknown = (numpy.nan,) * 4
+    crs = QgsCoordinateReferenceSystem.fromSrsId(srs_id)
+    if not crs.isValid():
+        return None, unknown
+
+    area = crs.bounds()
+    if area.isEmpty():
+        return crs.authid(), unknown
+    try:
+        transform = QgsCoordinateTransform(QgsCoordinateReferenceSystem('EPSG:4326'), crs,
+                                           QgsCoordinateTransformContext())
+        transform.setBallparkTransformsAreAppropriate(True)
+        bounds = transform.transformBoundingBox(area)
+    except Exception:
+        return crs.authid(), unknown
+    if bounds.isEmpty() or not bounds.isFinite():
+        return crs.authid(), unknown
+    return crs.authid(), (bounds.xMinimum(), bounds.yMinimum(), bounds.xMaximum(), bounds.yMaximum())
+
+
+class CrsIndex:
+    """Index of the projected area of use of every valid CRS, used to find
+    the CRSs a layer extent may be expressed in without transforming it.
+
+    Building the index takes a transform for each CRS, so it is saved to the
+    processing folder and rebuilt only when QGIS, PROJ or the CRS databases
+    change.
+    """
+
+    FILENAME = 'crs_index.npz'
+    BUILD_CHUNK_SIZE = 256
+
+    _index = None
+    _lock = threading.Lock()
+
+    def __init__(self, srsIds, authIds, bounds, signature=''):
+        self.srsIds = srsIds
+        self.authIds = authIds
+        self.bounds = bounds
+        self.signature = signature
+
+    def __len__(self):
+        return len(self.srsIds)
+
+    @staticmethod
+    def filename():
+        return os.path.join(userFolder(), CrsIndex.FILENAME)
+
+    @staticmethod
+    def signature():
+        """Returns a string which changes with QGIS, PROJ and the databases
+        CRSs are read from."""
+        databases = [QgsApplication.srsDatabaseFilePath(), QgsApplication.qgisUserDatabaseFilePath()]
+        databases.extend(os.path.join(path, 'proj.db') for path in QgsProjUtils.searchPaths())
+        parts = [str(Qgis.QGIS_VERSION_INT), str(QgsProjUtils.projVersionMajor())]
+        for path in databases:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            parts.append('{}:{}:{}'.format(path, stat.st_size, stat.st_mtime_ns))
+        return '|'.join(parts)
+
+    @staticmethod
+    def build(feedback=None, threads=1):
+        srs_ids = QgsCoordinateReferenceSystem.validSrsIds()
+        auth_ids = []
+        bounds = []
+        total = 100.0 / len(srs_ids) if srs_ids else 0
+        with ThreadPoolExecutor(max_workers=max(1, threads)) as executor:
+            # CRSs are handed to the workers in chunks, so that canceling does
+            # not wait for the transforms of all the remaining ones
+            for start in range(0, len(srs_ids), CrsIndex.BUILD_CHUNK_SIZE):
+                if feedback is not None:
+                    if feedback.isCanceled():
+                        break
+                    feedback.setProgress(int(start * total))
+                for auth_id, rect in executor.map(projectedBounds,
+                                                  srs_ids[start:start + CrsIndex.BUILD_CHUNK_SIZE]):
+                    auth_ids.append(auth_id or '')
+                    bounds.append(rect)
+
+        srs_ids = srs_ids[:len(auth_ids)]
+        valid = numpy.array([bool(a) for a in auth_ids], dtype=bool)
+        return CrsIndex(numpy.array(srs_ids, dtype=numpy.int64)[valid],
+                        numpy.array(auth_ids, dtype=str)[valid],
+                        numpy.array(bounds, dtype=numpy.float64).reshape(-1, 4)[valid])
+
+    @staticmethod
+    def read(filename, signature):
+        """Returns the index saved in filename, or None if it is missing or
+        was built against other databases."""
+        try:
+            with numpy.load(filename, allow_pickle=False) as data:
+                if str(data['signature']) != signature:
+                    return None
+                return CrsIndex(data['srs_ids'], data['auth_ids'], data['bounds'], signature)
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def write(self, filename):
+        try:
+            # write then rename, so that a concurrent read never sees half a file
+            with open(filename + '.tmp', 'wb') as f:
+                numpy.savez(f, signature=numpy.array(self.signature), srs_ids=self.srsIds,
+                            auth_ids=self.authIds, bounds=self.bounds)
+            os.replace(filename + '.tmp', filename)
+        except OSError:
+            pass
+
+    @staticmethod
+    def load(feedback=None, threads=1):
+        """Returns the index, reading it from disk or building it if needed."""
+        with CrsIndex._lock:
+            signature = CrsIndex.signature()
+            index = CrsIndex._index
+            if index is None or index.signature != signature:
+                index = CrsIndex.read(CrsIndex.filename(), signature)
+                if index is None:
+                    if feedback is not None:
+                        feedback.pushInfo(QCoreApplication.translate('CrsIndex', 'Building CRS index, this is only done once'))
+                    index = CrsIndex.build(feedback, threads)
+                    if feedback is not None and feedback.isCanceled():
+                        return index
+                    index.signature = signature
+                    index.write(CrsIndex.filename())
+                CrsIndex._index = index
+            return index
+
+    def candidates(self, xmin, ymin, xmax, ymax, margin=0.5):
+        """Returns the positions of the CRSs whose projected area of use,
+        grown by margin times its size on each side, intersects a rectangle.
+
+        CRSs with an unknown area of use are always returned.
+        """
+        width = self.bounds[:, 2] - self.bounds[:, 0]
+        height = self.bounds[:, 3] - self.bounds[:, 1]
+        with numpy.errstate(invalid='ignore'):
+            hits = ((self.bounds[:, 0] - margin * width <= xmax) &
+                    (self.bounds[:, 2] + margin * width >= xmin) &
+                    (self.bounds[:, 1] - margin * height <= ymax) &
+                    (self.bounds[:, 3] + margin * height >= ymin))
+        return numpy.flatnonzero(hits | numpy.isnan(self.bounds).any(axis=1))
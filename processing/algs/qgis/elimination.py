@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    elimination.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by QGIS Processing contributors
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Processing contributors'
+__date__ = 'October 2026'
+__copyright__ = '(C) 2026, QGIS Processing contributors'
+
+import heapq
+
+from qgis.core import QgsGeometry
+
+MODE_LARGEST_AREA = 0
+MODE_SMALLEST_AREA = 1
+MODE_BOUNDARY = 2
+
+
+def sliverClusters(candidates, neighbours):
+    """Splits slivers into clusters which can be eliminated independently.
+
+    Two slivers belong to the same cluster when they have a candidate
+    polygon in common, or when their bounding boxes intersect, as merging
+    one of them may then make the other one touch the polygon it went to.
+
+    :param candidates: dict of the ids of the polygons which may receive
+        each sliver
+    :param neighbours: dict of the ids of the slivers whose bounding box
+        intersects the one of each sliver
+    :return: list of lists of sliver ids, largest first
+    """
+    parent = {fid: fid for fid in candidates}
+
+    def find(fid):
+        root = fid
+        while parent[root] != root:
+            root = parent[root]
+        while parent[fid] != root:
+            parent[fid], fid = root, parent[fid]
+        return root
+
+    def union(a, b):
+        a = find(a)
+        b = find(b)
+        if a != b:
+            parent[max(a, b)] = min(a, b)
+
+    first_sliver = {}
+    for fid, targets in candidates.items():
+        for target in targets:
+            union(fid, first_sliver.setdefault(target, fid))
+        for other in neighbours[fid]:
+            union(fid, other)
+
+    clusters = {}
+    for fid in candidates:
+        clusters.setdefault(find(fid), []).append(fid)
+    return sorted(clusters.values(), key=len, reverse=True)
+
+
+class Elimination:
+    """Merges slivers into neighbouring polygons.
+
+    Geometries of the receiving polygons are kept in a dict which is updated
+    in place as slivers are merged into them. Slivers of a cluster are taken
+    smallest first, and a sliver which touches no polygon yet is put aside
+    until one of its neighbouring slivers has been merged.
+    """
+
+    def __init__(self, slivers, geometries, candidates, neighbours, mode):
+        """
+        :param slivers: dict of sliver geometries by id
+        :param geometries: dict of the geometries of the polygons which may
+            receive slivers by id, updated as slivers are merged
+        :param candidates: dict of the ids of the polygons whose bounding box
+            intersects each sliver
+        :param neighbours: dict of the ids of the slivers whose bounding box
+            intersects each sliver
+        :param mode: one of MODE_LARGEST_AREA, MODE_SMALLEST_AREA and
+            MODE_BOUNDARY
+        """
+        self.slivers = slivers
+        self.geometries = geometries
+        self.candidates = candidates
+        self.neighbours = neighbours
+        self.mode = mode
+        # polygon each eliminated sliver has been merged into
+        self.merged = {}
+
+    def eliminate(self, cluster, feedback=None):
+        """Eliminates the slivers of a cluster, returning how many of them
+        could be merged."""
+        queue = [(self.slivers[fid].area(), fid) for fid in cluster]
+        heapq.heapify(queue)
+        waiting = {}
+        count = 0
+        while queue:
+            if feedback is not None and feedback.isCanceled():
+                break
+            area, fid = heapq.heappop(queue)
+            target = self.target(fid)
+            if target is None:
+                waiting[fid] = area
+                continue
+
+            self.geometries[target] = self.geometries[target].combine(self.slivers[fid])
+            self.merged[fid] = target
+            count += 1
+            # the polygon now reaches the slivers touching this one
+            for other in self.neighbours[fid]:
+                if other in waiting:
+                    heapq.heappush(queue, (waiting.pop(other), other))
+        return count
+
+    def target(self, fid):
+        """Returns the id of the polygon the sliver should be merged into, or
+        None if it touches none."""
+        geometry = self.slivers[fid]
+        candidates = set(self.candidates[fid])
+        candidates.update(self.merged[other] for other in self.neighbours[fid] if other in self.merged)
+        if not candidates:
+            return None
+
+        # use prepared geometries for faster intersection tests
+        engine = QgsGeometry.createGeometryEngine(geometry.constGet())
+        engine.prepareGeometry()
+
+        best = None
+        best_value = 0
+        for candidate in sorted(candidates):
+            other = self.geometries[candidate]
+            if not engine.intersects(other.constGet()):
+                continue
+            common = geometry.intersection(other)
+            if not common:
+                continue
+
+            if self.mode == MODE_BOUNDARY:
+                value = common.length()
+            elif common.length() > 0:
+                # area, a common boundary is needed in order to merge
+                value = other.area()
+            else:
+                continue
+
+            if self.mode == MODE_SMALLEST_AREA:
+                if best is None or value < best_value:
+                    best, best_value = candidate, value
+            elif value > best_value:
+                best, best_value = candidate, value
+        return best
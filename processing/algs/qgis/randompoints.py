@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    randompoints.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by QGIS Processing contributors
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Processing contributors'
+__date__ = 'October 2026'
+__copyright__ = '(C) 2026, QGIS Processing contributors'
+
+import math
+
+import numpy
+
+from qgis.core import (QgsFeature,
+                       QgsFeatureSink,
+                       QgsGeometry,
+                       QgsPoint)
+
+from processing.tools.spatial import PointGrid
+
+
+def polygonRings(geometry):
+    """Returns the rings of a polygon or multipolygon QgsGeometry as a list
+    of (n, 2) coordinate arrays. Curved geometries are segmentized.
+    """
+    if geometry.isEmpty():
+        return []
+    if geometry.constGet().hasCurvedSegments():
+        geometry = QgsGeometry(geometry.constGet().segmentize())
+    if geometry.isMultipart():
+        polygons = geometry.asMultiPolygon()
+    else:
+        polygons = [geometry.asPolygon()]
+    return [numpy.array([(p.x(), p.y()) for p in ring], dtype=numpy.float64).reshape(-1, 2)
+            for polygon in polygons for ring in polygon if len(ring) > 1]
+
+
+class PolygonMask:
+    """Vectorized point in polygon test.
+
+    The edges of the rings are bucketed in horizontal bands, so that a point
+    is only tested by ray casting against the edges crossing its band.
+    """
+
+    MAX_BANDS = 4096
+    CHUNK_SIZE = 1 << 22
+
+    def __init__(self, rings):
+        edges = [numpy.hstack([ring[:-1], ring[1:]]) for ring in rings if len(ring) > 1]
+        edges = numpy.vstack(edges) if edges else numpy.empty((0, 4))
+        # horizontal edges never cross a horizontal ray
+        self.edges = edges[edges[:, 1] != edges[:, 3]]
+
+        if len(edges):
+            xy = numpy.vstack([edges[:, 0:2], edges[:, 2:4]])
+            self.xMinimum, self.yMinimum = xy.min(axis=0)
+            self.xMaximum, self.yMaximum = xy.max(axis=0)
+        else:
+            self.xMinimum = self.yMinimum = self.xMaximum = self.yMaximum = 0.0
+        # shoelace formula, holes are oriented opposite to their exterior ring
+        self.area = abs(sum(float(numpy.dot(ring[:-1, 0], ring[1:, 1]) - numpy.dot(ring[1:, 0], ring[:-1, 1]))
+                            for ring in rings if len(ring) > 1)) / 2.0
+
+        self.bands = int(min(self.MAX_BANDS, max(1, math.sqrt(len(self.edges)))))
+        height = self.yMaximum - self.yMinimum
+        self.bandHeight = height / self.bands if height > 0 else 1.0
+        if len(self.edges):
+            low = self._bandOf(numpy.minimum(self.edges[:, 1], self.edges[:, 3]))
+            high = self._bandOf(numpy.maximum(self.edges[:, 1], self.edges[:, 3]))
+            spans = high - low + 1
+            edge_ids = numpy.repeat(numpy.arange(len(self.edges)), spans)
+            offsets = numpy.arange(len(edge_ids)) - numpy.repeat(numpy.cumsum(spans) - spans, spans)
+            band_ids = numpy.repeat(low, spans) + offsets
+            order = numpy.argsort(band_ids, kind='stable')
+            self.bandEdges = edge_ids[order]
+            self.bandStarts = numpy.searchsorted(band_ids[order], numpy.arange(self.bands + 1))
+        else:
+            self.bandEdges = numpy.empty(0, dtype=numpy.int64)
+            self.bandStarts = numpy.zeros(self.bands + 1, dtype=numpy.int64)
+
+    @staticmethod
+    def fromGeometry(geometry):
+        return PolygonMask(polygonRings(geometry))
+
+    def boundsArea(self):
+        return (self.xMaximum - self.xMinimum) * (self.yMaximum - self.yMinimum)
+
+    def _bandOf(self, y):
+        return numpy.clip(((y - self.yMinimum) // self.bandHeight).astype(numpy.int64), 0, self.bands - 1)
+
+    def contains(self, xy):
+        """Returns a boolean array telling which of the (n, 2) points lay
+        inside the polygon.
+        """
+        xy = numpy.asarray(xy, dtype=numpy.float64).reshape(-1, 2)
+        inside = numpy.zeros(len(xy), dtype=bool)
+        candidates = numpy.flatnonzero((xy[:, 0] >= self.xMinimum) & (xy[:, 0] <= self.xMaximum) &
+                                       (xy[:, 1] >= self.yMinimum) & (xy[:, 1] <= self.yMaximum))
+        if not len(candidates):
+            return inside
+
+        bands = self._bandOf(xy[candidates, 1])
+        order = numpy.argsort(bands, kind='stable')
+        candidates = candidates[order]
+        bands = bands[order]
+        limits = numpy.searchsorted(bands, numpy.arange(self.bands + 1))
+        for band in numpy.flatnonzero(numpy.diff(limits)).tolist():
+            edges = self.edges[self.bandEdges[self.bandStarts[band]:self.bandStarts[band + 1]]]
+            if not len(edges):
+                continue
+            x0, y0, x1, y1 = edges.T
+            points = candidates[limits[band]:limits[band + 1]]
+            step = max(1, self.CHUNK_SIZE // len(edges))
+            for start in range(0, len(points), step):
+                chunk = points[start:start + step]
+                x = xy[chunk, 0:1]
+                y = xy[chunk, 1:2]
+                crossings = ((y0 > y) != (y1 > y)) & (x < x0 + (y - y0) * (x1 - x0) / (y1 - y0))
+                inside[chunk] = numpy.count_nonzero(crossings, axis=1) % 2 == 1
+        return inside
+
+
+def uniformCandidates(mask, count, rng):
+    """Draws count uniform points in the bounds of mask and returns those
+    inside it.
+    """
+    xy = rng.random_sample((count, 2))
+    xy[:, 0] = mask.xMinimum + xy[:, 0] * (mask.xMaximum - mask.xMinimum)
+    xy[:, 1] = mask.yMinimum + xy[:, 1] * (mask.yMaximum - mask.yMinimum)
+    return xy[mask.contains(xy)]
+
+
+def blockSize(mask, needed, minimum=1024, maximum=1 << 18):
+    """Number of candidates to draw so that about needed fall in mask."""
+    ratio = mask.area / mask.boundsArea() if mask.boundsArea() > 0 else 1.0
+    return int(min(maximum, max(minimum, 1.1 * needed / max(ratio, 1e-6))))
+
+
+def randomPoints(mask, count, rng, maxAttempts, feedback=None):
+    """Returns a (n, 2) array of at most count points drawn uniformly in
+    mask, using at most maxAttempts candidates.
+    """
+    if mask.area <= 0:
+        return numpy.empty((0, 2))
+
+    parts = []
+    found = 0
+    attempts = 0
+    while found < count and attempts < maxAttempts:
+        if feedback is not None and feedback.isCanceled():
+            break
+        size = min(blockSize(mask, count - found), maxAttempts - attempts)
+        accepted = uniformCandidates(mask, size, rng)[:count - found]
+        attempts += size
+        parts.append(accepted)
+        found += len(accepted)
+    return numpy.vstack(parts) if parts else numpy.empty((0, 2))
+
+
+class DiskGrid:
+    """Background grid for Poisson disk sampling.
+
+    The cells are small enough to hold at most one point, so the points
+    conflicting with a candidate are found by looking at the 5x5 cells
+    around it, for whole arrays of candidates at once.
+    """
+
+    def __init__(self, mask, radius):
+        self.radius = radius
+        self.cell = radius / math.sqrt(2)
+        self.origin = (mask.xMinimum, mask.yMinimum)
+        self.nx = int((mask.xMaximum - mask.xMinimum) / self.cell) + 1
+        self.ny = int((mask.yMaximum - mask.yMinimum) / self.cell) + 1
+        self.cells = numpy.full((self.ny + 4, self.nx + 4), -1, dtype=numpy.int32)
+        self.xy = numpy.empty((1024, 2))
+        self.count = 0
+
+    @staticmethod
+    def cellCount(mask, radius):
+        cell = radius / math.sqrt(2)
+        return (int((mask.xMaximum - mask.xMinimum) / cell) + 5) * (int((mask.yMaximum - mask.yMinimum) / cell) + 5)
+
+    def _cellOf(self, xy):
+        # cells are padded by two on each side, so neighbourhoods never leave the grid
+        ix = numpy.clip(((xy[:, 0] - self.origin[0]) // self.cell).astype(numpy.int64), 0, self.nx - 1) + 2
+        iy = numpy.clip(((xy[:, 1] - self.origin[1]) // self.cell).astype(numpy.int64), 0, self.ny - 1) + 2
+        return ix, iy
+
+    def free(self, xy):
+        """Returns a boolean array telling which candidates are at least
+        radius away from all the points of the grid.
+        """
+        ix, iy = self._cellOf(xy)
+        free = numpy.ones(len(xy), dtype=bool)
+        limit = self.radius * self.radius
+        for dy in range(-2, 3):
+            for dx in range(-2, 3):
+                other = self.cells[iy + dy, ix + dx]
+                occupied = numpy.flatnonzero(other >= 0)
+                if not len(occupied):
+                    continue
+                delta = self.xy[other[occupied]] - xy[occupied]
+                free[occupied[(delta * delta).sum(axis=1) < limit]] = False
+        return free
+
+    def insert(self, xy):
+        """Inserts candidates already known to be free in order, skipping
+        those conflicting with the previous ones. Returns the inserted
+        candidates.
+        """
+        if not len(xy):
+            return xy
+        ix, iy = self._cellOf(xy)
+        # candidates of a batch are only checked against each other here
+        batch = PointGrid(self.radius)
+        keep = numpy.zeros(len(xy), dtype=bool)
+        for i, (x, y) in enumerate(xy.tolist()):
+            if self.cells[iy[i], ix[i]] < 0 and not batch.hasPointWithin(x, y, self.radius):
+                batch.insert(x, y)
+                keep[i] = True
+                self.cells[iy[i], ix[i]] = self.count
+                self._append(xy[i])
+        return xy[keep]
+
+    def _append(self, point):
+        if self.count == len(self.xy):
+            self.xy = numpy.resize(self.xy, (2 * len(self.xy), 2))
+        self.xy[self.count] = point
+        self.count += 1
+
+    def points(self):
+        return self.xy[:self.count].copy()
+
+
+def poissonDiskPoints(mask, count, radius, rng, maxAttempts, candidates=30, feedback=None):
+    """Returns a (n, 2) array of at most count points drawn in mask, none of
+    them closer than radius to another.
+
+    When count is small compared to the number of points the mask can hold,
+    candidates are drawn uniformly and rejected if too close to an accepted
+    point. Otherwise the mask is filled following Bridson's algorithm, growing
+    from randomly thrown seeds in annuli between radius and twice radius, and
+    count points are picked at random among the result.
+    """
+    if mask.area <= 0:
+        return numpy.empty((0, 2))
+
+    capacity = 0.7 * mask.area / (radius * radius)
+    dense = count > capacity / 4 and DiskGrid.cellCount(mask, radius) <= (1 << 28)
+    if not dense:
+        grid = PointGrid(radius)
+        parts = []
+        found = 0
+        attempts = 0
+        while found < count and attempts < maxAttempts:
+            if feedback is not None and feedback.isCanceled():
+                break
+            size = min(blockSize(mask, count - found), maxAttempts - attempts)
+            xy = uniformCandidates(mask, size, rng)
+            attempts += size
+            keep = numpy.zeros(len(xy), dtype=bool)
+            for i, (x, y) in enumerate(xy.tolist()):
+                if found == count:
+                    break
+                if not grid.hasPointWithin(x, y, radius):
+                    grid.insert(x, y)
+                    keep[i] = True
+                    found += 1
+            parts.append(xy[keep])
+        return numpy.vstack(parts) if parts else numpy.empty((0, 2))
+
+    grid = DiskGrid(mask, radius)
+    attempts = 0
+    while attempts < maxAttempts:
+        if feedback is not None and feedback.isCanceled():
+            break
+        # throw seeds, which also reach parts of the mask not connected to the filled ones
+        size = min(blockSize(mask, 64), maxAttempts - attempts)
+        seeds = uniformCandidates(mask, size, rng)
+        attempts += size
+        active = grid.insert(seeds[grid.free(seeds)])
+        if not len(active):
+            break
+
+        while len(active):
+            if feedback is not None and feedback.isCanceled():
+                break
+            batch = rng.permutation(len(active))[:4096]
+            sources = active[batch]
+            angles = rng.random_sample((len(sources), candidates)) * 2 * math.pi
+            distances = radius * numpy.sqrt(1 + 3 * rng.random_sample((len(sources), candidates)))
+            xy = numpy.empty((len(sources), candidates, 2))
+            xy[:, :, 0] = sources[:, 0:1] + distances * numpy.cos(angles)
+            xy[:, :, 1] = sources[:, 1:2] + distances * numpy.sin(angles)
+            xy = xy.reshape(-1, 2)
+
+            valid = mask.contains(xy)
+            valid[valid] = grid.free(xy[valid])
+            valid = valid.reshape(len(sources), candidates)
+
+            # each source keeps its first valid candidate, sources without any are retired
+            has_valid = valid.any(axis=1)
+            first = numpy.argmax(valid, axis=1)
+            chosen = xy.reshape(len(sources), candidates, 2)[numpy.flatnonzero(has_valid), first[has_valid]]
+            inserted = grid.insert(chosen)
+
+            retired = numpy.zeros(len(active), dtype=bool)
+            retired[batch[~has_valid]] = True
+            active = numpy.vstack([active[~retired], inserted])
+
+    xy = grid.points()
+    if len(xy) > count:
+        xy = xy[numpy.sort(rng.choice(len(xy), count, replace=False))]
+    return xy
+
+
+def writePoints(sink, fields, xy, firstId=0):
+    """Adds the points of a (n, 2) array to sink, numbering them in their
+    'id' attribute from firstId.
+    """
+    for i, (x, y) in enumerate(xy.tolist()):
+        f = QgsFeature(fields)
+        f.setAttributes([firstId + i])
+        f.setGeometry(QgsGeometry(QgsPoint(x, y)))
+        sink.addFeature(f, QgsFeatureSink.FastInsert)
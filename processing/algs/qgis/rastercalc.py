@@ -0,0 +1,450 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    rastercalc.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by QGIS Processing contributors
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Processing contributors'
+__date__ = 'October 2026'
+__copyright__ = '(C) 2026, QGIS Processing contributors'
+
+#############################################################################
+#
+# Tiled raster calculator
+#
+# Parses raster calculator expressions (the same "layer@band" syntax used by
+# QgsRasterCalculator) into a tree of nodes that evaluate to NumPy arrays,
+# and evaluates that tree window by window on a thread pool. Every input is
+# exposed through a warped VRT matching the output grid, so inputs with a
+# different extent, cell size or CRS are resampled on the fly.
+#
+#############################################################################
+
+import os
+import re
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy
+from osgeo import gdal
+
+from qgis.core import QgsApplication, QgsProcessingException
+
+from processing.algs.gdal.GdalUtils import GdalUtils
+from processing.tools import raster
+
+OUTPUT_NODATA = -3.4028234663852886e+38
+
+
+class ParserError(ValueError):
+    pass
+
+
+class Node:
+
+    def refs(self):
+        return set()
+
+    def evaluate(self, values):
+        raise NotImplementedError
+
+
+class NumberNode(Node):
+
+    def __init__(self, value):
+        self.value = value
+
+    def evaluate(self, values):
+        return numpy.float64(self.value)
+
+
+class RasterRefNode(Node):
+
+    def __init__(self, ref):
+        self.ref = ref
+
+    def refs(self):
+        return {self.ref}
+
+    def evaluate(self, values):
+        return values[self.ref]
+
+
+class UnaryNode(Node):
+
+    def __init__(self, func, operand):
+        self.func = func
+        self.operand = operand
+
+    def refs(self):
+        return self.operand.refs()
+
+    def evaluate(self, values):
+        return self.func(self.operand.evaluate(values))
+
+
+class BinaryNode(Node):
+
+    def __init__(self, func, left, right):
+        self.func = func
+        self.left = left
+        self.right = right
+
+    def refs(self):
+        return self.left.refs() | self.right.refs()
+
+    def evaluate(self, values):
+        return self.func(self.left.evaluate(values), self.right.evaluate(values))
+
+
+def _divide(a, b):
+    return numpy.where(b == 0, numpy.nan, numpy.true_divide(a, numpy.where(b == 0, 1, b)))
+
+
+def _boolean(func):
+    return lambda a, b: func(a, b).astype(numpy.float64)
+
+
+# precedences follow the %left declarations of qgsrastercalcparser.yy, where
+# AND binds less tightly than OR, and !=, >= and <= each have their own level
+BINARY_OPERATORS = {
+    'AND': (1, _boolean(lambda a, b: numpy.logical_and(a != 0, b != 0))),
+    'OR': (2, _boolean(lambda a, b: numpy.logical_or(a != 0, b != 0))),
+    '!=': (3, _boolean(numpy.not_equal)),
+    '>=': (4, _boolean(numpy.greater_equal)),
+    '<=': (5, _boolean(numpy.less_equal)),
+    '=': (6, _boolean(numpy.equal)),
+    '<': (6, _boolean(numpy.less)),
+    '>': (6, _boolean(numpy.greater)),
+    '+': (7, numpy.add),
+    '-': (7, numpy.subtract),
+    '*': (8, numpy.multiply),
+    '/': (8, _divide),
+    '^': (9, numpy.power),
+}
+
+UNARY_FUNCTIONS = {
+    'sqrt': numpy.sqrt,
+    'sin': numpy.sin,
+    'cos': numpy.cos,
+    'tan': numpy.tan,
+    'asin': numpy.arcsin,
+    'acos': numpy.arccos,
+    'atan': numpy.arctan,
+    'ln': numpy.log,
+    'log10': numpy.log10,
+    'abs': numpy.abs,
+}
+
+BINARY_FUNCTIONS = {
+    'min': numpy.fmin,
+    'max': numpy.fmax,
+}
+
+TOKEN_RE = re.compile(r'''
+    \s*(?:
+        (?P<quoted>"(?:\\.|[^"\\])*")
+      | (?P<ref>(?:[A-Za-z0-9_.:/]|[^\x00-\x7F]|\\[-\\])+@[0-9]+)
+      | (?P<number>(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][-+]?[0-9]+)?)
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<op><=|>=|!=|[-+*/^()<>=,])
+    )''', re.VERBOSE)
+
+
+def tokenize(expression):
+    tokens = []
+    pos = 0
+    expression = expression.rstrip()
+    while pos < len(expression):
+        match = TOKEN_RE.match(expression, pos)
+        if match is None:
+            raise ParserError('Unexpected character at position {}'.format(pos))
+        pos = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'quoted':
+            kind, value = 'ref', value[1:-1].replace('\\"', '"')
+        elif kind == 'ref':
+            # a bare "-" is always subtraction, it only belongs to a
+            # reference when escaped or quoted
+            value = re.sub(r'\\([-\\])', r'\1', value)
+        elif kind == 'name' and value.upper() in ('AND', 'OR'):
+            kind, value = 'op', value.upper()
+        tokens.append((kind, value))
+    return tokens
+
+
+class Parser:
+    """Precedence climbing parser for raster calculator expressions."""
+
+    def __init__(self, expression):
+        self.tokens = tokenize(expression)
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def next(self):
+        token = self.peek()
+        if token[0] is None:
+            raise ParserError('Unexpected end of expression')
+        self.pos += 1
+        return token
+
+    def expect(self, value):
+        if self.next() != ('op', value):
+            raise ParserError('Expected "{}"'.format(value))
+
+    def parse(self):
+        if not self.tokens:
+            raise ParserError('Empty expression')
+        node = self.parseBinary(1)
+        if self.pos != len(self.tokens):
+            raise ParserError('Unexpected token "{}"'.format(self.peek()[1]))
+        return node
+
+    def parseBinary(self, min_precedence):
+        left = self.parseUnary()
+        while True:
+            kind, value = self.peek()
+            if kind != 'op' or value not in BINARY_OPERATORS:
+                return left
+            precedence, func = BINARY_OPERATORS[value]
+            if precedence < min_precedence:
+                return left
+            self.next()
+            # all operators are left associative, ^ included, and unary minus
+            # binds more tightly than ^ as in QgsRasterCalculator
+            right = self.parseBinary(precedence + 1)
+            left = BinaryNode(func, left, right)
+
+    def parseUnary(self):
+        kind, value = self.peek()
+        if (kind, value) == ('op', '-'):
+            self.next()
+            return UnaryNode(numpy.negative, self.parseUnary())
+        if (kind, value) == ('op', '+'):
+            self.next()
+            return self.parseUnary()
+        return self.parsePrimary()
+
+    def parsePrimary(self):
+        kind, value = self.next()
+        if kind == 'number':
+            return NumberNode(float(value))
+        if kind == 'ref':
+            return RasterRefNode(value)
+        if kind == 'op' and value == '(':
+            node = self.parseBinary(1)
+            self.expect(')')
+            return node
+        if kind == 'name':
+            function = value.lower()
+            if function in UNARY_FUNCTIONS:
+                self.expect('(')
+                operand = self.parseBinary(1)
+                self.expect(')')
+                return UnaryNode(UNARY_FUNCTIONS[function], operand)
+            if function in BINARY_FUNCTIONS:
+                self.expect('(')
+                left = self.parseBinary(1)
+                self.expect(',')
+                right = self.parseBinary(1)
+                self.expect(')')
+                return BinaryNode(BINARY_FUNCTIONS[function], left, right)
+            raise ParserError('Unknown function "{}"'.format(value))
+        raise ParserError('Unexpected token "{}"'.format(value))
+
+
+def parseExpression(expression):
+    """Parses a raster calculator expression and returns the root node.
+
+    Raises ParserError if the expression is not valid.
+    """
+    return Parser(expression).parse()
+
+
+class TiledRasterCalculator:
+    """Evaluates a raster calculator expression window by window.
+
+    Takes the same arguments as QgsRasterCalculator, plus the window size in
+    pixels, the number of worker threads and a '|' separated list of GDAL
+    creation options. The output is written as Float32.
+    """
+
+    def __init__(self, expression, output, driverName, bbox, crs, width, height,
+                 entries, blockSize=512, threads=0, creationOptions=''):
+        self.expression = expression
+        self.output = output
+        self.driverName = driverName
+        self.bbox = bbox
+        self.crs = crs
+        self.width = width
+        self.height = height
+        self.entries = entries
+        self.blockSize = max(16, int(blockSize) // 16 * 16)
+        if threads <= 0:
+            threads = QgsApplication.maxThreads()
+        if threads <= 0:
+            threads = os.cpu_count() or 1
+        self.threads = threads
+        self.creationOptions = [o for o in creationOptions.split('|') if o] if creationOptions else []
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._datasets = []
+
+    def processCalculation(self, feedback):
+        try:
+            tree = parseExpression(self.expression)
+        except ParserError as e:
+            raise QgsProcessingException('Error parsing formula: {}'.format(e))
+
+        entries = {e.ref: e for e in self.entries}
+        missing = tree.refs() - set(entries)
+        if missing:
+            raise QgsProcessingException('Unknown raster references: {}'.format(', '.join(sorted(missing))))
+
+        sources = {}
+        try:
+            for ref in tree.refs():
+                sources[ref] = (self.warpedInput(entries[ref].raster), entries[ref].bandNumber)
+            self.calculate(tree, sources, feedback)
+        finally:
+            with self._lock:
+                self._datasets = []
+            for path, band in sources.values():
+                gdal.Unlink(path)
+
+    def warpedInput(self, layer):
+        """Returns the path of an in-memory VRT resampling the layer to the
+        output grid.
+        """
+        path = '/vsimem/rastercalc_{}.vrt'.format(uuid.uuid4().hex)
+        ds = gdal.Warp(path, layer.source(),
+                       format='VRT',
+                       srcSRS=GdalUtils.gdal_crs_string(layer.crs()),
+                       dstSRS=GdalUtils.gdal_crs_string(self.crs),
+                       outputBounds=(self.bbox.xMinimum(), self.bbox.yMinimum(),
+                                     self.bbox.xMaximum(), self.bbox.yMaximum()),
+                       width=self.width,
+                       height=self.height,
+                       resampleAlg='near')
+        if ds is None:
+            raise QgsProcessingException('Could not read raster {}'.format(layer.source()))
+        ds = None
+        return path
+
+    def band(self, path, bandNumber):
+        """Returns a band of a dataset opened by the current thread, as GDAL
+        handles must not be shared between threads.
+        """
+        cache = getattr(self._local, 'datasets', None)
+        if cache is None:
+            cache = self._local.datasets = {}
+        if path not in cache:
+            ds = gdal.Open(path, gdal.GA_ReadOnly)
+            cache[path] = ds
+            with self._lock:
+                self._datasets.append(ds)
+        return cache[path].GetRasterBand(bandNumber)
+
+    def evaluateWindow(self, tree, sources, window):
+        xoff, yoff, xsize, ysize = window
+        values = {}
+        invalid = numpy.zeros((ysize, xsize), dtype=bool)
+        for ref, (path, bandNumber) in sources.items():
+            band = self.band(path, bandNumber)
+            block = raster.maskNodata(band.ReadAsArray(xoff, yoff, xsize, ysize), band.GetNoDataValue())
+            invalid |= numpy.ma.getmaskarray(block)
+            values[ref] = block.data.astype(numpy.float64)
+
+        with numpy.errstate(all='ignore'):
+            result = numpy.broadcast_to(tree.evaluate(values), (ysize, xsize)).astype(numpy.float32)
+        invalid |= ~numpy.isfinite(result)
+        result[invalid] = OUTPUT_NODATA
+        return window, result
+
+    def createOutput(self):
+        driver = gdal.GetDriverByName(self.driverName)
+        if driver is None:
+            raise QgsProcessingException('Could not find GDAL driver {}'.format(self.driverName))
+
+        options = list(self.creationOptions)
+        if driver.GetMetadataItem(gdal.DCAP_CREATE) == 'YES':
+            path = self.output
+        else:
+            # drivers without Create() support get a temporary GeoTIFF copied at the end
+            path = '/vsimem/rastercalc_{}.tif'.format(uuid.uuid4().hex)
+            driver = gdal.GetDriverByName('GTiff')
+            options = []
+        if driver.ShortName == 'GTiff':
+            keys = {o.split('=')[0].upper() for o in options}
+            for key, value in (('TILED', 'YES'),
+                               ('BLOCKXSIZE', str(self.blockSize)),
+                               ('BLOCKYSIZE', str(self.blockSize)),
+                               ('BIGTIFF', 'IF_SAFER')):
+                if key not in keys:
+                    options.append('{}={}'.format(key, value))
+
+        ds = driver.Create(path, self.width, self.height, 1, gdal.GDT_Float32, options)
+        if ds is None:
+            raise QgsProcessingException('Could not create output {}'.format(self.output))
+        ds.SetGeoTransform((self.bbox.xMinimum(), (self.bbox.xMaximum() - self.bbox.xMinimum()) / self.width, 0,
+                            self.bbox.yMaximum(), 0, -(self.bbox.yMaximum() - self.bbox.yMinimum()) / self.height))
+        ds.SetProjection(self.crs.toWkt())
+        ds.GetRasterBand(1).SetNoDataValue(OUTPUT_NODATA)
+        return ds, path
+
+    def calculate(self, tree, sources, feedback):
+        ds, path = self.createOutput()
+        band = ds.GetRasterBand(1)
+
+        windows = []
+        for yoff in range(0, self.height, self.blockSize):
+            for xoff in range(0, self.width, self.blockSize):
+                windows.append((xoff, yoff,
+                                min(self.blockSize, self.width - xoff),
+                                min(self.blockSize, self.height - yoff)))
+        total = 100.0 / len(windows) if windows else 0
+
+        # keep a bounded number of windows in flight, so that the memory peak
+        # depends on the block size and thread count, not on the raster size
+        pending = set()
+        done_count = 0
+        remaining = iter(windows)
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            while True:
+                while len(pending) < self.threads * 2 and not feedback.isCanceled():
+                    window = next(remaining, None)
+                    if window is None:
+                        break
+                    pending.add(executor.submit(self.evaluateWindow, tree, sources, window))
+                if not pending:
+                    break
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    (xoff, yoff, xsize, ysize), result = future.result()
+                    band.WriteArray(result, xoff, yoff)
+                    done_count += 1
+                    feedback.setProgress(int(done_count * total))
+
+        band = None
+        if path != self.output:
+            gdal.GetDriverByName(self.driverName).CreateCopy(self.output, ds, 0, self.creationOptions)
+            ds = None
+            gdal.Unlink(path)
+        ds = None
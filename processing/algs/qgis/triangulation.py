@@ -0,0 +1,601 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    triangulation.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by QGIS Processing contributors
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Processing contributors'
+__date__ = 'October 2026'
+__copyright__ = '(C) 2026, QGIS Processing contributors'
+
+import numpy
+
+from qgis.core import (QgsGeometry,
+                       QgsPointXY)
+
+from processing.tools.spatial import PointIndex
+
+from . import voronoi
+
+try:
+    from scipy.spatial import Delaunay as QhullDelaunay
+except ImportError:
+    QhullDelaunay = None
+
+
+def uniquePoints(xy):
+    """Returns the distinct rows of a (n, 2) coordinate array, together
+    with the index in xy of the first occurrence of each of them.
+    """
+    return numpy.unique(xy, axis=0, return_index=True)
+
+
+def multiPoint(xy):
+    return QgsGeometry.fromMultiPointXY([QgsPointXY(x, y) for x, y in xy.tolist()])
+
+
+class GeosBackend:
+    """Voronoi diagrams and Delaunay triangulations computed by GEOS
+    through QgsGeometry.
+    """
+
+    def voronoiCells(self, xy, extent, chunkSize=10000, feedback=None):
+        """Yields (sites, geometries) chunks with the Voronoi cells of the
+        distinct points xy clipped to extent, sites being the indices in xy
+        of the points the cells belong to.
+        """
+        clip = QgsGeometry.fromRect(extent)
+        diagram = multiPoint(xy).voronoiDiagram(clip)
+        if diagram.isNull():
+            return
+        collection = diagram.constGet()
+        count = collection.numGeometries()
+        index = PointIndex(xy)
+        for start in range(0, count, chunkSize):
+            if feedback is not None and feedback.isCanceled():
+                break
+            geometries = []
+            centroids = []
+            for i in range(start, min(start + chunkSize, count)):
+                cell = QgsGeometry(collection.geometryN(i).clone())
+                # only the cells on the border of the diagram reach out of the extent
+                if not extent.contains(cell.boundingBox()):
+                    cell = cell.intersection(clip)
+                if cell.isEmpty():
+                    continue
+                centroid = cell.centroid().asPoint()
+                geometries.append(cell)
+                centroids.append((centroid.x(), centroid.y()))
+            # cells are convex, so their centroid is closer to their own site
+            # than to any other point
+            _, sites = index.query(centroids, 1)
+            yield sites[:, 0], geometries
+
+    def delaunayTriangles(self, xy):
+        """Returns a (m, 3) array with the indices in xy of the vertices of
+        the Delaunay triangles of the distinct points xy.
+        """
+        triangulation = multiPoint(xy).delaunayTriangulation()
+        if triangulation.isNull():
+            return numpy.empty((0, 3), dtype=numpy.int64)
+        triangles = wkbTriangles(triangulation.asWkb().data(), xy)
+        if triangles is not None:
+            return triangles
+        lookup = {point: i for i, point in enumerate(map(tuple, xy.tolist()))}
+        collection = triangulation.constGet()
+        triangles = numpy.empty((collection.numGeometries(), 3), dtype=numpy.int64)
+        for i in range(len(triangles)):
+            ring = collection.geometryN(i).exteriorRing()
+            triangles[i] = [lookup[(ring.xAt(j), ring.yAt(j))] for j in range(3)]
+        return triangles
+
+
+class PythonBackend:
+    """Voronoi diagrams and Delaunay triangulations computed by the pure
+    Python sweepline implementation in the voronoi module.
+    """
+
+    def voronoiCells(self, xy, extent, chunkSize=10000, feedback=None):
+        width = extent.width()
+        height = extent.height()
+        shifted = xy - (extent.xMinimum(), extent.yMinimum())
+        xyminmax = list(shifted.min(axis=0)) + list(shifted.max(axis=0))
+        c = voronoi.Context()
+        sl = voronoi.SiteList([voronoi.Site(x, y, sitenum=j)
+                               for (j, (x, y)) in enumerate(shifted.tolist())])
+        voronoi.voronoi(sl, c)
+
+        polygons = list(c.polygons.items())
+        for start in range(0, len(polygons), chunkSize):
+            if feedback is not None and feedback.isCanceled():
+                break
+            sites = []
+            geometries = []
+            for (site, edges) in polygons[start:start + chunkSize]:
+                boundarypoints = clipVoronoi(edges, c, width, height, extent,
+                                             QgsPointXY(*xy[site]), xyminmax)
+                ptgeom = QgsGeometry.fromMultiPointXY(boundarypoints)
+                sites.append(site)
+                geometries.append(QgsGeometry(ptgeom.convexHull()))
+            yield numpy.array(sites, dtype=numpy.int64), geometries
+
+    def delaunayTriangles(self, xy):
+        c = voronoi.Context()
+        c.triangulate = True
+        voronoi.voronoi(voronoi.SiteList([voronoi.Site(x, y) for x, y in xy.tolist()]), c)
+        return numpy.array(c.triangles, dtype=numpy.int64).reshape(-1, 3)
+
+
+BACKENDS = [GeosBackend, PythonBackend]
+
+
+def wkbTriangles(wkb, xy):
+    """Returns the triangles of a little endian collection of triangular
+    polygons in WKB as a (m, 3) array of indices in xy, or None if the WKB
+    does not have that exact layout or has vertices which are not in xy.
+    """
+    data = numpy.frombuffer(wkb, dtype=numpy.uint8)
+    # byte order, type and number of parts of the collection, then for each
+    # triangle byte order, type, number of rings and of points and 4 points
+    record = 13 + 4 * 16
+    if len(data) < 9 or data[0] != 1:
+        return None
+    count = int(numpy.ascontiguousarray(data[5:9]).view('<u4')[0])
+    if len(data) != 9 + count * record:
+        return None
+    records = data[9:].reshape(count, record)
+    header = numpy.ascontiguousarray(records[:, 1:13]).view('<u4')
+    if (records[:, 0] != 1).any() or (header != (3, 1, 4)).any():
+        return None
+    coords = numpy.ascontiguousarray(records[:, 13:13 + 3 * 16]).view('<f8').reshape(count * 3, 2)
+
+    # triangle vertices are copies of the input coordinates, so they can be
+    # looked up exactly, complex numbers being sorted by x and then by y
+    points = xy[:, 0] + 1j * xy[:, 1]
+    order = numpy.argsort(points)
+    vertices = coords[:, 0] + 1j * coords[:, 1]
+    positions = numpy.minimum(numpy.searchsorted(points[order], vertices), len(points) - 1)
+    if (points[order][positions] != vertices).any():
+        return None
+    return order[positions].reshape(count, 3).astype(numpy.int64)
+
+
+def delaunayTriangles(xy):
+    """Returns the Delaunay triangles of the distinct points xy, using Qhull
+    through scipy when it is available and GEOS otherwise.
+    """
+    if QhullDelaunay is not None:
+        if len(xy) < 3:
+            return numpy.empty((0, 3), dtype=numpy.int64)
+        try:
+            return QhullDelaunay(xy).simplices.astype(numpy.int64)
+        except Exception:
+            # Qhull refuses degenerate inputs, such as collinear points
+            return numpy.empty((0, 3), dtype=numpy.int64)
+    return GeosBackend().delaunayTriangles(xy)
+
+
+def connectedComponents(count, u, v):
+    """Labels count nodes by connected component given the edges (u, v),
+    the label of a component being its smallest node.
+    """
+    labels = numpy.arange(count)
+    while True:
+        lu = labels[u]
+        lv = labels[v]
+        different = lu != lv
+        if not different.any():
+            return labels
+        # hook the larger root of each edge on the smaller one, then
+        # compress paths until every node points to its root
+        numpy.minimum.at(labels, numpy.maximum(lu, lv)[different], numpy.minimum(lu, lv)[different])
+        while True:
+            jumped = labels[labels]
+            if (jumped == labels).all():
+                break
+            labels = jumped
+
+
+def alphaShape(xy, triangles, alpha):
+    """Keeps the triangles whose longest edge is at most alpha times the
+    longest edge of the triangulation, and returns the polygons they cover
+    as described in trianglePolygons.
+    """
+    if not len(triangles):
+        return []
+    p = xy[triangles]
+    d = p[:, [1, 2, 0]] - p
+    longest = numpy.hypot(d[..., 0], d[..., 1]).max(axis=1)
+    return trianglePolygons(xy, triangles[longest <= alpha * longest.max()])
+
+
+def trianglePolygons(xy, triangles):
+    """Returns the polygons covered by triangles of a triangulation of xy,
+    as a list of (shell, holes) with shell a (k, 2) array of coordinates
+    and holes a list of them. Rings are not closed.
+
+    Triangles are oriented counter-clockwise, so the boundary is made of the
+    edges whose reverse edge does not belong to another triangle, which are
+    then chained into rings, keeping the covered area on their left.
+    """
+    p = xy[triangles]
+    cross = (p[:, 1, 0] - p[:, 0, 0]) * (p[:, 2, 1] - p[:, 0, 1]) - \
+        (p[:, 1, 1] - p[:, 0, 1]) * (p[:, 2, 0] - p[:, 0, 0])
+    triangles = triangles[cross != 0]
+    clockwise = cross[cross != 0] < 0
+    triangles[clockwise] = triangles[clockwise][:, [0, 2, 1]]
+    if not len(triangles):
+        return []
+
+    # edge k of triangle t is edge 3 * t + k, from vertex k to vertex k + 1
+    n = len(xy)
+    a = triangles.ravel()
+    b = triangles[:, [1, 2, 0]].ravel()
+    keys = a * n + b
+    order = numpy.argsort(keys)
+    sorted_keys = keys[order]
+    twin = numpy.minimum(numpy.searchsorted(sorted_keys, b * n + a), len(keys) - 1)
+    shared = sorted_keys[twin] == b * n + a
+
+    # triangles sharing an edge belong to the same polygon
+    components = connectedComponents(len(triangles), numpy.flatnonzero(shared) // 3, order[twin[shared]] // 3)
+
+    boundary = numpy.flatnonzero(~shared)
+    start = a[boundary]
+    end = b[boundary]
+    by_start = numpy.argsort(start, kind='stable')
+    first = numpy.searchsorted(start[by_start], end, 'left')
+    last = numpy.searchsorted(start[by_start], end, 'right')
+    successor = by_start[first]
+    # where polygons or holes touch at a vertex several boundary edges leave
+    # it, follow the first one met turning clockwise from the edge coming in
+    pinched = numpy.flatnonzero(last - first > 1)
+    if len(pinched):
+        counts = (last - first)[pinched]
+        incoming = numpy.repeat(pinched, counts)
+        offsets = numpy.arange(len(incoming)) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+        candidates = by_start[first[incoming] + offsets]
+        back = xy[start[incoming]] - xy[end[incoming]]
+        out = xy[end[candidates]] - xy[end[incoming]]
+        turn = (numpy.arctan2(back[:, 1], back[:, 0]) - numpy.arctan2(out[:, 1], out[:, 0])) % (2 * numpy.pi)
+        turn[turn == 0] = 2 * numpy.pi
+        best = numpy.lexsort((turn, incoming))
+        best = best[numpy.r_[0, numpy.cumsum(counts)[:-1]]]
+        successor[incoming[best]] = candidates[best]
+
+    # walk the rings, listing their edges one ring after the other
+    successor = successor.tolist()
+    visited = bytearray(len(boundary))
+    sequence = []
+    ring_starts = []
+    for e in range(len(boundary)):
+        if visited[e]:
+            continue
+        ring_starts.append(len(sequence))
+        while not visited[e]:
+            visited[e] = 1
+            sequence.append(e)
+            e = successor[e]
+
+    sequence = numpy.array(sequence, dtype=numpy.int64)
+    ring_starts = numpy.array(ring_starts, dtype=numpy.int64)
+    coords = xy[start[sequence]]
+    ends = xy[end[sequence]]
+    areas = numpy.add.reduceat(coords[:, 0] * ends[:, 1] - ends[:, 0] * coords[:, 1], ring_starts)
+    ring_components = components[boundary[sequence[ring_starts]] // 3].tolist()
+    ring_ends = numpy.r_[ring_starts[1:], len(sequence)].tolist()
+
+    shells = {}
+    holes = {}
+    for ring_start, ring_end, area, component in zip(ring_starts.tolist(), ring_ends, areas.tolist(), ring_components):
+        if area > 0:
+            shells[component] = coords[ring_start:ring_end]
+        else:
+            holes.setdefault(component, []).append(coords[ring_start:ring_end])
+
+    return [(shell, holes.get(component, [])) for component, shell in sorted(shells.items())]
+
+
+def clipVoronoi(edges, c, width, height, extent, point, xyminmax):
+    """Clip voronoi function based on code written for Inkscape.
+    Copyright (C) 2010 Alvin Penner, penner@vaxxine.com
+    Clips one Thiessen polygon (convex polygon) to extent
+    """
+
+    pt_x = point.x() - extent.xMinimum()
+    pt_y = point.y() - extent.yMinimum()
+    (xmin, ymin, xmax, ymax) = xyminmax
+
+    def isclose(a, b, rel_tol=1e-9, abs_tol=0.0):
+        return abs(a - b) <= max(rel_tol * max(abs(a), abs(b)), abs_tol)
+
+    def clip_line(x1, y1, x2, y2, w, h):
+        if x1 < 0 and x2 < 0:
+            # Completely to the left
+            return [0, 0, 0, 0]
+        if x1 > w and x2 > w:
+            # Completely to the right
+            return [0, 0, 0, 0]
+        if y1 < 0 and y2 < 0:
+            # Completely below
+            return [0, 0, 0, 0]
+        if y1 > h and y2 > h:
+            # Completely above
+            return [0, 0, 0, 0]
+        # Clip on the left envelope boundary
+        if x1 < 0:
+            # First point to the left
+            y1 = (y1 * x2 - y2 * x1) / (x2 - x1)
+            x1 = 0
+        if x2 < 0:
+            # Last point to the left
+            y2 = (y1 * x2 - y2 * x1) / (x2 - x1)
+            x2 = 0
+        # Clip on the right envelope boundary
+        if x1 > w:
+            # First point to the right
+            y1 = y1 + (w - x1) * (y2 - y1) / (x2 - x1)
+            x1 = w
+        if x2 > w:
+            # Last point to the right
+            y2 = y1 + (w - x1) * (y2 - y1) / (x2 - x1)
+            x2 = w
+        if isclose(x1, x2) and isclose(y1, y2):
+            return [0, 0, 0, 0]
+        # Clip on the bottom envelope boundary
+        if y1 < 0:
+            # First point below
+            x1 = (x1 * y2 - x2 * y1) / (y2 - y1)
+            y1 = 0
+        if y2 < 0:
+            # Second point below
+            x2 = (x1 * y2 - x2 * y1) / (y2 - y1)
+            y2 = 0
+        # Clip on the top envelope boundary
+        if y1 > h:
+            # First point above
+            x1 = x1 + (h - y1) * (x2 - x1) / (y2 - y1)
+            y1 = h
+        if y2 > h:
+            # Second point above
+            x2 = x1 + (h - y1) * (x2 - x1) / (y2 - y1)
+            y2 = h
+        if isclose(x1, x2) and isclose(y1, y2):
+            return [0, 0, 0, 0]
+        return [x1, y1, x2, y2]
+
+    bndpoints = []
+    hasXMin = False
+    hasYMin = False
+    hasXMax = False
+    hasYMax = False
+    XMinNumber = 0
+    XMaxNumber = 0
+    YMinNumber = 0
+    YMaxNumber = 0
+    # The same line may appear twice for collinear input points,
+    # so have to remember which lines have contributed
+    XMinLine = -1
+    XMaxLine = -1
+    YMinLine = -1
+    YMaxLine = -1
+    for edge in edges:
+        if edge[1] >= 0 and edge[2] >= 0:
+            # Two vertices
+            [x1, y1, x2, y2] = clip_line(
+                c.vertices[edge[1]][0],
+                c.vertices[edge[1]][1],
+                c.vertices[edge[2]][0],
+                c.vertices[edge[2]][1],
+                width,
+                height
+            )
+        elif edge[1] >= 0:
+            # Only one (left) vertex
+            if c.lines[edge[0]][1] == 0:
+                # Vertical line
+                # xtemp = c.lines[edge[0]][2] / c.lines[edge[0]][0]
+                xtemp = c.vertices[edge[1]][0]
+                ytemp = 0 - 1
+                # if c.vertices[edge[1]][1] > height / 2:
+                #    ytemp = height
+                # else:
+                #    ytemp = 0
+            else:
+                # Create an end of the line at the right edge - OK
+                xtemp = width
+                ytemp = (c.lines[edge[0]][2] - width *
+                         c.lines[edge[0]][0]) / c.lines[edge[0]][1]
+            [x1, y1, x2, y2] = clip_line(
+                c.vertices[edge[1]][0],
+                c.vertices[edge[1]][1],
+                xtemp,
+                ytemp,
+                width,
+                height
+            )
+        elif edge[2] >= 0:
+            # Only one (right) vertex
+            if c.lines[edge[0]][1] == 0:
+                # Vertical line
+                # xtemp = c.lines[edge[0]][2] / c.lines[edge[0]][0]
+                xtemp = c.vertices[edge[2]][0]
+                ytemp = height + 1
+                # if c.vertices[edge[2]][1] > height / 2:
+                #    ytemp = height
+                # else:
+                #    ytemp = 0.0
+            else:
+                # End the line at the left edge - OK
+                xtemp = 0.0
+                ytemp = c.lines[edge[0]][2] / c.lines[edge[0]][1]
+            [x1, y1, x2, y2] = clip_line(
+                xtemp,
+                ytemp,
+                c.vertices[edge[2]][0],
+                c.vertices[edge[2]][1],
+                width,
+                height,
+            )
+        else:
+            # No vertex, only a line
+            if c.lines[edge[0]][1] == 0:
+                # Vertical line - should not happen
+                xtemp = c.lines[edge[0]][2] / c.lines[edge[0]][0]
+                ytemp = 0.0
+                xend = xtemp
+                yend = height
+            else:
+                # End the line at both edges - ???
+                xtemp = 0.0
+                ytemp = c.lines[edge[0]][2] / c.lines[edge[0]][1]
+                xend = width
+                yend = (c.lines[edge[0]][2] - width *
+                        c.lines[edge[0]][0]) / c.lines[edge[0]][1]
+            [x1, y1, x2, y2] = clip_line(
+                xtemp,
+                ytemp,
+                xend,
+                yend,
+                width,
+                height,
+            )
+        if x1 or x2 or y1 or y2:
+            bndpoints.append(QgsPointXY(x1 + extent.xMinimum(),
+                                        y1 + extent.yMinimum()))
+            bndpoints.append(QgsPointXY(x2 + extent.xMinimum(),
+                                        y2 + extent.yMinimum()))
+            if 0 in (x1, x2):
+                hasXMin = True
+                if XMinLine != edge[0]:
+                    XMinNumber = XMinNumber + 1
+                    XMinLine = edge[0]
+            if 0 in (y1, y2):
+                hasYMin = True
+                if YMinLine != edge[0]:
+                    YMinNumber = YMinNumber + 1
+                    YMinLine = edge[0]
+            if height in (y1, y2):
+                hasYMax = True
+                if YMaxLine != edge[0]:
+                    YMaxNumber = YMaxNumber + 1
+                    YMaxLine = edge[0]
+            if width in (x1, x2):
+                hasXMax = True
+                if XMaxLine != edge[0]:
+                    XMaxNumber = XMaxNumber + 1
+                    XMaxLine = edge[0]
+
+    # Add auxiliary points for corner cases, if necessary (duplicate
+    # points is not a problem - will be ignored later).
+    # a) Extreme input points (lowest, leftmost, rightmost, highest)
+    #    A point can be extreme on both axis
+    if pt_x == xmin:  # leftmost point
+        if XMinNumber == 0:
+            bndpoints.append(QgsPointXY(extent.xMinimum(),
+                                        extent.yMinimum()))
+            bndpoints.append(QgsPointXY(extent.xMinimum(),
+                                        height + extent.yMinimum()))
+        elif XMinNumber == 1:
+            if hasYMin:
+                bndpoints.append(QgsPointXY(extent.xMinimum(),
+                                            extent.yMinimum()))
+            elif hasYMax:
+                bndpoints.append(QgsPointXY(extent.xMinimum(),
+                                            height + extent.yMinimum()))
+    elif pt_x == xmax:  # rightmost point
+        if XMaxNumber == 0:
+            bndpoints.append(QgsPointXY(width + extent.xMinimum(),
+                                        extent.yMinimum()))
+            bndpoints.append(QgsPointXY(width + extent.xMinimum(),
+                                        height + extent.yMinimum()))
+        elif XMaxNumber == 1:
+            if hasYMin:
+                bndpoints.append(QgsPointXY(width + extent.xMinimum(),
+                                            extent.yMinimum()))
+            elif hasYMax:
+                bndpoints.append(QgsPointXY(width + extent.xMinimum(),
+                                            height + extent.yMinimum()))
+    if pt_y == ymin:  # lowest point
+        if YMinNumber == 0:
+            bndpoints.append(QgsPointXY(extent.xMinimum(),
+                                        extent.yMinimum()))
+            bndpoints.append(QgsPointXY(width + extent.xMinimum(),
+                                        extent.yMinimum()))
+        elif YMinNumber == 1:
+            if hasXMin:
+                bndpoints.append(QgsPointXY(extent.xMinimum(),
+                                            extent.yMinimum()))
+            elif hasXMax:
+                bndpoints.append(QgsPointXY(width + extent.xMinimum(),
+                                            extent.yMinimum()))
+    elif pt_y == ymax:  # highest point
+        if YMaxNumber == 0:
+            bndpoints.append(QgsPointXY(extent.xMinimum(),
+                                        height + extent.yMinimum()))
+            bndpoints.append(QgsPointXY(width + extent.xMinimum(),
+                                        height + extent.yMinimum()))
+        elif YMaxNumber == 1:
+            if hasXMin:
+                bndpoints.append(QgsPointXY(extent.xMinimum(),
+                                            height + extent.yMinimum()))
+            elif hasXMax:
+                bndpoints.append(QgsPointXY(width + extent.xMinimum(),
+                                            height + extent.yMinimum()))
+    # b) Polygon that covers the x or the y extent:
+    if hasYMin and hasYMax:
+        if YMaxNumber > 1:
+            if hasXMin:
+                bndpoints.append(QgsPointXY(extent.xMinimum(),
+                                            extent.yMinimum()))
+            elif hasXMax:
+                bndpoints.append(QgsPointXY(width + extent.xMinimum(),
+                                            extent.yMinimum()))
+        elif YMinNumber > 1:
+            if hasXMin:
+                bndpoints.append(QgsPointXY(extent.xMinimum(),
+                                            height + extent.yMinimum()))
+            elif hasXMax:
+                bndpoints.append(QgsPointXY(width + extent.xMinimum(),
+                                            height + extent.yMinimum()))
+    elif hasXMin and hasXMax:
+        if XMaxNumber > 1:
+            if hasYMin:
+                bndpoints.append(QgsPointXY(extent.xMinimum(),
+                                            extent.yMinimum()))
+            elif hasYMax:
+                bndpoints.append(QgsPointXY(width + extent.xMinimum(),
+                                            extent.yMinimum()))
+        elif XMinNumber > 1:
+            if hasYMin:
+                bndpoints.append(QgsPointXY(extent.xMinimum(),
+                                            height + extent.yMinimum()))
+            elif hasYMax:
+                bndpoints.append(QgsPointXY(width + extent.xMinimum(),
+                                            height + extent.yMinimum()))
+    # c) Simple corners:
+    if XMinNumber == 1 and YMinNumber == 1 and not hasXMax and not hasYMax:
+        bndpoints.append(QgsPointXY(extent.xMinimum(),
+                                    extent.yMinimum()))
+    if XMinNumber == 1 and YMaxNumber == 1 and not hasXMax and not hasYMin:
+        bndpoints.append(QgsPointXY(extent.xMinimum(),
+                                    height + extent.yMinimum()))
+    if XMaxNumber == 1 and YMinNumber == 1 and not hasXMin and not hasYMax:
+        bndpoints.append(QgsPointXY(width + extent.xMinimum(),
+                                    extent.yMinimum()))
+    if XMaxNumber == 1 and YMaxNumber == 1 and not hasXMin and not hasYMin:
+        bndpoints.append(QgsPointXY(width + extent.xMinimum(),
+                                    height + extent.yMinimum()))
+    return bndpoints
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    AlgorithmManifest.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by QGIS Processing contributors
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Processing contributors'
+__date__ = 'October 2026'
+__copyright__ = '(C) 2026, QGIS Processing contributors'
+
+import importlib
+import importlib.util
+import json
+import os
+
+from qgis.PyQt.QtGui import QIcon
+from qgis.core import (Qgis,
+                       QgsProcessingAlgorithm,
+                       QgsProcessingException,
+                       QgsProcessingProvider,
+                       QgsSettings)
+
+from processing.core.ProcessingConfig import ProcessingConfig
+from processing.tools.system import userFolder
+
+
+class AlgorithmManifest:
+    """Cache of the metadata of the algorithms of Python providers, used to
+    register them without importing their modules.
+
+    The entry of a provider is keyed by the module of the provider class and
+    is only valid while the signature of its package is unchanged.
+    """
+
+    VERSION = 2
+
+    _entries = None
+
+    @staticmethod
+    def filename():
+        return os.path.join(userFolder(), 'algorithms_manifest.json')
+
+    @staticmethod
+    def entries():
+        if AlgorithmManifest._entries is None:
+            AlgorithmManifest._entries = {}
+            try:
+                with open(AlgorithmManifest.filename(), encoding='utf-8') as f:
+                    manifest = json.load(f)
+                if manifest.get('version') == AlgorithmManifest.VERSION:
+                    AlgorithmManifest._entries = manifest['providers']
+            except (OSError, ValueError, KeyError):
+                pass
+        return AlgorithmManifest._entries
+
+    @staticmethod
+    def signature(module):
+        """Returns a string which changes when QGIS or any module of the
+        package containing module is updated.
+        """
+        spec = importlib.util.find_spec(module)
+        if spec is None or spec.origin is None:
+            return None
+        count = 0
+        newest = 0
+        with os.scandir(os.path.dirname(spec.origin)) as files:
+            for f in files:
+                if f.name.endswith('.py'):
+                    count += 1
+                    newest = max(newest, f.stat().st_mtime_ns)
+        return '{}:{}:{}'.format(Qgis.QGIS_VERSION_INT, count, newest)
+
+    @staticmethod
+    def providerEntry(module):
+        """Returns the cached entry for the provider class in module, or None
+        if there is none or it is out of date.
+        """
+        entry = AlgorithmManifest.entries().get(module)
+        if entry is None or entry.get('signature') != AlgorithmManifest.signature(module):
+            return None
+        return entry
+
+    @staticmethod
+    def addProvider(module, className, provider):
+        """Stores the metadata of a loaded provider and its algorithms."""
+        # providers which can be deactivated register an ACTIVATE_ setting when loaded
+        activate_setting = 'ACTIVATE_' + provider.id().upper()
+        if activate_setting not in ProcessingConfig.settings:
+            activate_setting = None
+        algorithms = []
+        for alg in provider.algorithms():
+            algorithms.append({'name': alg.name(),
+                               'module': type(alg).__module__,
+                               'class': type(alg).__name__,
+                               'displayName': alg.displayName(),
+                               'shortDescription': alg.shortDescription(),
+                               'group': alg.group(),
+                               'groupId': alg.groupId(),
+                               'tags': alg.tags(),
+                               'flags': int(alg.flags())})
+        AlgorithmManifest.entries()[module] = {'signature': AlgorithmManifest.signature(module),
+                                               'class': className,
+                                               'id': provider.id(),
+                                               'name': provider.name(),
+                                               'longName': provider.longName(),
+                                               'helpId': provider.helpId(),
+                                               'svgIconPath': provider.svgIconPath(),
+                                               'supportsNonFileBasedOutput': provider.supportsNonFileBasedOutput(),
+                                               'activateSetting': activate_setting,
+                                               'algorithms': algorithms}
+        try:
+            with open(AlgorithmManifest.filename(), 'w', encoding='utf-8') as f:
+                json.dump({'version': AlgorithmManifest.VERSION,
+                           'providers': AlgorithmManifest.entries()}, f)
+        except OSError:
+            pass
+
+
+class LazyAlgorithm(QgsProcessingAlgorithm):
+    """Placeholder registered from a manifest entry. It describes the
+    algorithm, and creating it imports and returns the real algorithm.
+    """
+
+    def __init__(self, entry):
+        super().__init__()
+        self.entry = entry
+
+    def name(self):
+        return self.entry['name']
+
+    def displayName(self):
+        return self.entry['displayName']
+
+    def shortDescription(self):
+        return self.entry['shortDescription']
+
+    def group(self):
+        return self.entry['group']
+
+    def groupId(self):
+        return self.entry['groupId']
+
+    def tags(self):
+        return self.entry['tags']
+
+    def flags(self):
+        return QgsProcessingAlgorithm.Flags(self.entry['flags'])
+
+    def initAlgorithm(self, config=None):
+        pass
+
+    def createInstance(self):
+        self.provider().activate()
+        module = importlib.import_module(self.entry['module'])
+        return getattr(module, self.entry['class'])()
+
+    def processAlgorithm(self, parameters, context, feedback):
+        raise QgsProcessingException('{} must be created before it is run'.format(self.name()))
+
+
+class LazyAlgorithmProvider(QgsProcessingProvider):
+    """Stands in for a Python provider using its manifest entry.
+
+    The provider module is imported, and the provider loaded, the first time
+    one of its algorithms is created. Calls depending on the provider
+    configuration are then forwarded to it.
+    """
+
+    def __init__(self, module, entry):
+        super().__init__()
+        self.module = module
+        self.entry = entry
+        self.realProvider = None
+
+    def activate(self):
+        if self.realProvider is None:
+            provider = getattr(importlib.import_module(self.module), self.entry['class'])()
+            provider.load()
+            self.realProvider = provider
+        return self.realProvider
+
+    def loadAlgorithms(self):
+        for entry in self.entry['algorithms']:
+            self.addAlgorithm(LazyAlgorithm(entry))
+
+    def id(self):
+        return self.entry['id']
+
+    def name(self):
+        return self.entry['name']
+
+    def longName(self):
+        return self.entry['longName']
+
+    def helpId(self):
+        return self.entry['helpId']
+
+    def icon(self):
+        return QIcon(self.entry['svgIconPath'])
+
+    def svgIconPath(self):
+        return self.entry['svgIconPath']
+
+    def isActive(self):
+        if self.realProvider is not None:
+            return self.realProvider.isActive()
+        setting = self.entry['activateSetting']
+        if setting is None:
+            return True
+        if setting in ProcessingConfig.settings:
+            return ProcessingConfig.getSetting(setting)
+        # the provider settings are only registered when it is loaded, until
+        # then the stored value is read, active by default as in its Setting
+        return QgsSettings().value('Processing/Configuration/' + setting, True, bool)
+
+    def setActive(self, active):
+        self.activate().setActive(active)
+
+    def canBeActivated(self):
+        return self.activate().canBeActivated()
+
+    def warningMessage(self):
+        return self.realProvider.warningMessage() if self.realProvider is not None else ''
+
+    def supportsNonFileBasedOutput(self):
+        # asked for each algorithm as it is added, so it must not activate
+        return self.entry['supportsNonFileBasedOutput']
+
+    def supportedOutputRasterLayerExtensions(self):
+        return self.activate().supportedOutputRasterLayerExtensions()
+
+    def supportedOutputVectorLayerExtensions(self):
+        return self.activate().supportedOutputVectorLayerExtensions()
+
+    def defaultVectorFileExtension(self, hasGeometry=True):
+        return self.activate().defaultVectorFileExtension(hasGeometry)
+
+    def defaultRasterFileExtension(self):
+        return self.activate().defaultRasterFileExtension()
+
+    def isSupportedOutputValue(self, outputValue, parameter, context):
+        return self.activate().isSupportedOutputValue(outputValue, parameter, context)
@@ -21,8 +21,11 @@ __author__ = 'Victor Olaya'
 __date__ = 'August 2012'
 __copyright__ = '(C) 2012, Victor Olaya'
 
+import importlib
 import os
+import time
 import traceback
+from contextlib import contextmanager
 
 from qgis.PyQt.QtCore import Qt, QCoreApplication
 from qgis.PyQt.QtWidgets import QApplication
@@ -45,20 +48,14 @@ from qgis.core import (QgsMessageLog,
 from qgis.analysis import QgsNativeAlgorithms
 
 import processing
+from processing.core.AlgorithmManifest import AlgorithmManifest, LazyAlgorithmProvider
 from processing.core.ProcessingConfig import ProcessingConfig
 from processing.gui.MessageBarProgress import MessageBarProgress
-from processing.gui.RenderingStyles import RenderingStyles
 from processing.gui.Postprocessing import handleAlgorithmResults
 from processing.gui.AlgorithmExecutor import execute
 from processing.script import ScriptUtils
 from processing.tools import dataobjects
 
-with QgsRuntimeProfiler.profile('Import QGIS Provider'):
-    from processing.algs.qgis.QgisAlgorithmProvider import QgisAlgorithmProvider  # NOQA
-
-with QgsRuntimeProfiler.profile('Import GDAL Provider'):
-    from processing.algs.gdal.GdalAlgorithmProvider import GdalAlgorithmProvider  # NOQA
-
 with QgsRuntimeProfiler.profile('Import Script Provider'):
     from processing.script.ScriptAlgorithmProvider import ScriptAlgorithmProvider  # NOQA
 
@@ -73,6 +70,49 @@ from processing.modeler.ProjectProvider import ProjectProvider  # NOQA
 class Processing(object):
     BASIC_PROVIDERS = []
 
+    # providers whose algorithms can be registered from the manifest, as
+    # (module, class name) to import them only when needed
+    PYTHON_PROVIDERS = [
+        ('processing.algs.qgis.QgisAlgorithmProvider', 'QgisAlgorithmProvider'),
+        ('processing.algs.gdal.GdalAlgorithmProvider', 'GdalAlgorithmProvider')
+    ]
+
+    # (step, seconds) for each step of initialize()
+    STARTUP_TIMINGS = []
+
+    @staticmethod
+    @contextmanager
+    def timed(step):
+        start = time.perf_counter()
+        with QgsRuntimeProfiler.profile(step):
+            yield
+        Processing.STARTUP_TIMINGS.append((step, time.perf_counter() - start))
+
+    @staticmethod
+    def startupReport():
+        """Returns the time spent in each step of initialize() as text."""
+        lines = ['{0:<40} {1:8.3f} s'.format(step, seconds) for step, seconds in Processing.STARTUP_TIMINGS]
+        lines.append('{0:<40} {1:8.3f} s'.format(Processing.tr('Total'),
+                                                 sum(seconds for _, seconds in Processing.STARTUP_TIMINGS)))
+        return '\n'.join(lines)
+
+    @staticmethod
+    def addPythonProvider(module, className, lazy):
+        """Registers a Python provider. If lazy is True and the manifest is up
+        to date the provider is registered from it without importing its
+        module, otherwise it is loaded and the manifest updated.
+        """
+        entry = AlgorithmManifest.providerEntry(module) if lazy else None
+        if entry is not None:
+            p = LazyAlgorithmProvider(module, entry)
+        else:
+            p = getattr(importlib.import_module(module), className)()
+        if not QgsApplication.processingRegistry().addProvider(p):
+            return
+        Processing.BASIC_PROVIDERS.append(p)
+        if lazy and entry is None:
+            AlgorithmManifest.addProvider(module, className, p)
+
     @staticmethod
     def activateProvider(providerOrName, activate=True):
         provider_id = providerOrName.id() if isinstance(providerOrName, QgsProcessingProvider) else providerOrName
@@ -86,7 +126,15 @@ class Processing(object):
                                      Processing.tr("Processing"))
 
     @staticmethod
-    def initialize():
+    def initialize(lazy=False):
+        """Registers the Processing providers.
+
+        With lazy set, the QGIS and GDAL providers are registered from the
+        algorithm manifest and their modules are only imported when one of
+        their algorithms is first created. Algorithms returned by
+        algorithmById() are then placeholders without parameters, so this is
+        meant for applications that always go through createAlgorithmById().
+        """
         if "model" in [p.id() for p in QgsApplication.processingRegistry().providers()]:
             return
 
@@ -94,7 +142,8 @@ class Processing(object):
 
             # add native provider if not already added
             if "native" not in [p.id() for p in QgsApplication.processingRegistry().providers()]:
-                QgsApplication.processingRegistry().addProvider(QgsNativeAlgorithms(QgsApplication.processingRegistry()))
+                with Processing.timed('Native provider'):
+                    QgsApplication.processingRegistry().addProvider(QgsNativeAlgorithms(QgsApplication.processingRegistry()))
 
             # add 3d provider if available and not already added
             if "3d" not in [p.id() for p in QgsApplication.processingRegistry().providers()]:
@@ -106,16 +155,19 @@ class Processing(object):
                     pass
 
             # Add the basic providers
+            for module, className in Processing.PYTHON_PROVIDERS:
+                with Processing.timed(className):
+                    Processing.addPythonProvider(module, className, lazy)
+
             for c in [
-                QgisAlgorithmProvider,
-                GdalAlgorithmProvider,
                 ScriptAlgorithmProvider,
                 ModelerAlgorithmProvider,
                 ProjectProvider
             ]:
-                p = c()
-                if QgsApplication.processingRegistry().addProvider(p):
-                    Processing.BASIC_PROVIDERS.append(p)
+                with Processing.timed(c.__name__):
+                    p = c()
+                    if QgsApplication.processingRegistry().addProvider(p):
+                        Processing.BASIC_PROVIDERS.append(p)
 
             if QgsApplication.platform() == 'external':
                 # for external applications we must also load the builtin providers stored in separate plugins
@@ -144,9 +196,10 @@ class Processing(object):
                     pass
 
             # And initialize
-            ProcessingConfig.initialize()
-            ProcessingConfig.readSettings()
-            RenderingStyles.loadStyles()
+            with Processing.timed('Settings'):
+                ProcessingConfig.initialize()
+                ProcessingConfig.readSettings()
+            # rendering styles are read on first use
 
     @staticmethod
     def deinitialize():
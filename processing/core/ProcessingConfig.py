@@ -59,6 +59,7 @@ class ProcessingConfig:
     SHOW_PROVIDERS_TOOLTIP = 'SHOW_PROVIDERS_TOOLTIP'
     SHOW_ALGORITHMS_KNOWN_ISSUES = 'SHOW_ALGORITHMS_KNOWN_ISSUES'
     MAX_THREADS = 'MAX_THREADS'
+    MAX_BATCH_WORKERS = 'MAX_BATCH_WORKERS'
     DEFAULT_OUTPUT_RASTER_LAYER_EXT = 'DefaultOutputRasterLayerExt'
     DEFAULT_OUTPUT_VECTOR_LAYER_EXT = 'DefaultOutputVectorLayerExt'
     TEMP_PATH = 'TEMP_PATH2'
@@ -149,6 +150,11 @@ class ProcessingConfig:
             ProcessingConfig.MAX_THREADS,
             ProcessingConfig.tr('Max Threads'), threads,
             valuetype=Setting.INT))
+        ProcessingConfig.addSetting(Setting(
+            ProcessingConfig.tr('General'),
+            ProcessingConfig.MAX_BATCH_WORKERS,
+            ProcessingConfig.tr('Max parallel batch executions'), threads,
+            valuetype=Setting.INT))
 
         extensions = QgsVectorFileWriter.supportedFormatExtensions()
         ProcessingConfig.addSetting(Setting(
@@ -24,6 +24,9 @@ __copyright__ = '(C) 2012, Victor Olaya'
 import os
 import codecs
 import datetime
+import threading
+import atexit
+from array import array
 from processing.tools.system import userFolder
 from processing.core.ProcessingConfig import ProcessingConfig
 from qgis.PyQt.QtCore import QCoreApplication
@@ -34,15 +37,43 @@ LOG_SEPARATOR = '|~|'
 class ProcessingLog:
     DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
+    # the log is rotated to processing.log.1 ... processing.log.N when it
+    # grows over MAX_LOG_SIZE bytes
+    MAX_LOG_SIZE = 16 * 1024 * 1024
+    LOG_BACKUPS = 5
+
+    # entries are written to disk once FLUSH_ENTRIES are pending,
+    # FLUSH_INTERVAL seconds after the oldest pending one was added, before
+    # the log is read and at exit
+    FLUSH_ENTRIES = 64
+    FLUSH_INTERVAL = 2.0
+
+    _filename = None
+    _pending = []
+    _timer = None
+    _indexes = {}
+    _rotations = 0
+    _lock = threading.RLock()
+
     @staticmethod
     def logFilename():
-        logFilename = userFolder() + os.sep + 'processing.log'
-        if not os.path.isfile(logFilename):
-            with codecs.open(logFilename, 'w', encoding='utf-8') as logfile:
+        if ProcessingLog._filename is None:
+            ProcessingLog._filename = userFolder() + os.sep + 'processing.log'
+        if not os.path.isfile(ProcessingLog._filename):
+            with codecs.open(ProcessingLog._filename, 'w', encoding='utf-8') as logfile:
                 logfile.write('Started logging at ' +
                               datetime.datetime.now().strftime(ProcessingLog.DATE_FORMAT) + '\n')
 
-        return logFilename
+        return ProcessingLog._filename
+
+    @staticmethod
+    def logFilenames():
+        """Returns the paths of the current log and its rotated backups,
+        newest first.
+        """
+        current = ProcessingLog.logFilename()
+        backups = ['{}.{}'.format(current, i) for i in range(1, ProcessingLog.LOG_BACKUPS + 1)]
+        return [current] + [f for f in backups if os.path.isfile(f)]
 
     @staticmethod
     def addToLog(msg):
@@ -54,42 +85,112 @@ class ProcessingLog:
             line = 'ALGORITHM' + LOG_SEPARATOR + datetime.datetime.now().strftime(
                 ProcessingLog.DATE_FORMAT) + LOG_SEPARATOR \
                 + msg + '\n'
-            with codecs.open(ProcessingLog.logFilename(), 'a',
-                             encoding='utf-8') as logfile:
-                logfile.write(line)
+            with ProcessingLog._lock:
+                ProcessingLog._pending.append(line)
+                if len(ProcessingLog._pending) >= ProcessingLog.FLUSH_ENTRIES:
+                    ProcessingLog.flush()
+                elif ProcessingLog._timer is None:
+                    ProcessingLog._timer = threading.Timer(ProcessingLog.FLUSH_INTERVAL, ProcessingLog.flush)
+                    ProcessingLog._timer.daemon = True
+                    ProcessingLog._timer.start()
         except:
             pass
 
     @staticmethod
-    def getLogEntries():
-        entries = []
+    def flush():
+        """Writes pending entries to the log, rotating it when it has grown
+        too large.
+        """
+        with ProcessingLog._lock:
+            if ProcessingLog._timer is not None:
+                ProcessingLog._timer.cancel()
+                ProcessingLog._timer = None
+            if not ProcessingLog._pending:
+                return
+            lines, ProcessingLog._pending = ProcessingLog._pending, []
+            filename = ProcessingLog.logFilename()
+            with open(filename, 'a', encoding='utf-8') as logfile:
+                logfile.write(''.join(lines))
+                size = logfile.tell()
+            if size > ProcessingLog.MAX_LOG_SIZE:
+                ProcessingLog.rotate()
 
-        with open(ProcessingLog.logFilename(), encoding='utf-8') as f:
-            lines = f.readlines()
-        for line in lines:
-            line = line.strip('\n').strip()
-            tokens = line.split(LOG_SEPARATOR)
-            if len(tokens) <= 1:
-                # try old format log separator
-                tokens = line.split('|')
-
-            text = ''.join(
-                tokens[i] + LOG_SEPARATOR for i in range(2, len(tokens))
-            )
-            if line.startswith('ALGORITHM'):
-                entries.append(LogEntry(tokens[1], tokens[2]))
+    @staticmethod
+    def rotate():
+        with ProcessingLog._lock:
+            current = ProcessingLog.logFilename()
+            try:
+                for i in range(ProcessingLog.LOG_BACKUPS, 0, -1):
+                    source = current if i == 1 else '{}.{}'.format(current, i - 1)
+                    target = '{}.{}'.format(current, i)
+                    for suffix in ('', LogIndex.SUFFIX):
+                        if os.path.isfile(source + suffix):
+                            os.replace(source + suffix, target + suffix)
+                        elif os.path.isfile(target + suffix):
+                            os.unlink(target + suffix)
+            except OSError:
+                # another process may hold the log open, try again on the
+                # next flush
+                pass
+            ProcessingLog._indexes = {}
+            ProcessingLog._rotations += 1
 
-        return entries
+    @staticmethod
+    def logIndexes():
+        """Returns an up to date LogIndex for each log file, newest first."""
+        with ProcessingLog._lock:
+            ProcessingLog.flush()
+            indexes = []
+            for filename in ProcessingLog.logFilenames():
+                index = ProcessingLog._indexes.get(filename)
+                if index is None:
+                    index = ProcessingLog._indexes[filename] = LogIndex(filename)
+                index.update()
+                indexes.append(index)
+            return indexes
+
+    @staticmethod
+    def iterEntries(newestFirst=True, blockSize=256):
+        """Yields the log entries, reading them block by block through the
+        log indexes, so that only the entries actually consumed are read.
+
+        No file is held open between blocks, and iteration stops if the log
+        gets rotated meanwhile.
+        """
+        rotations = ProcessingLog._rotations
+        indexes = ProcessingLog.logIndexes()
+        if not newestFirst:
+            indexes.reverse()
+        for index in indexes:
+            starts = range(len(index) - blockSize, -blockSize, -blockSize) if newestFirst \
+                else range(0, len(index), blockSize)
+            for start in starts:
+                if ProcessingLog._rotations != rotations:
+                    return
+                entries = index.entries(max(start, 0), start + blockSize)
+                if newestFirst:
+                    entries.reverse()
+                yield from entries
+
+    @staticmethod
+    def getLogEntries():
+        return list(ProcessingLog.iterEntries(newestFirst=False))
 
     @staticmethod
     def clearLog():
-        os.unlink(ProcessingLog.logFilename())
+        with ProcessingLog._lock:
+            ProcessingLog._pending = []
+            for filename in ProcessingLog.logFilenames():
+                for path in (filename, filename + LogIndex.SUFFIX):
+                    if os.path.isfile(path):
+                        os.unlink(path)
+            ProcessingLog._indexes = {}
+            ProcessingLog._rotations += 1
 
     @staticmethod
     def saveLog(fileName):
-        entries = ProcessingLog.getLogEntries()
         with codecs.open(fileName, 'w', encoding='utf-8') as f:
-            for entry in entries:
+            for entry in ProcessingLog.iterEntries(newestFirst=False):
                 f.write('ALGORITHM{}{}{}{}\n'.format(LOG_SEPARATOR, entry.date, LOG_SEPARATOR, entry.text))
 
     @staticmethod
@@ -99,8 +200,113 @@ class ProcessingLog:
         return QCoreApplication.translate(context, string)
 
 
+atexit.register(ProcessingLog.flush)
+
+
 class LogEntry:
 
     def __init__(self, date, text):
         self.date = date
         self.text = text
+
+    @staticmethod
+    def fromLine(line):
+        line = line.strip('\n').strip()
+        tokens = line.split(LOG_SEPARATOR)
+        if len(tokens) <= 1:
+            # try old format log separator
+            tokens = line.split('|')
+        return LogEntry(tokens[1], tokens[2])
+
+
+class LogIndex:
+    """Byte offsets and lengths of the entries of a log file.
+
+    The index is kept next to the log in a .idx file and extended by
+    scanning only the part of the log written since the last update.
+    """
+
+    SUFFIX = '.idx'
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.index_filename = filename + LogIndex.SUFFIX
+        self.offsets = array('q')
+        self.lengths = array('q')
+        self.scanned = 0
+        self.load()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def load(self):
+        # the index starts with the number of bytes of the log which have
+        # been scanned, followed by pairs of offset and length
+        try:
+            with open(self.index_filename, 'rb') as f:
+                data = array('q')
+                data.frombytes(f.read())
+        except (OSError, ValueError):
+            return
+        if len(data) % 2 != 1 or data[0] > os.path.getsize(self.filename):
+            return
+        self.scanned = data[0]
+        self.offsets = data[1::2]
+        self.lengths = data[2::2]
+
+    def save(self):
+        data = array('q', [self.scanned])
+        pairs = array('q', [0]) * (2 * len(self.offsets))
+        pairs[0::2] = self.offsets
+        pairs[1::2] = self.lengths
+        data.extend(pairs)
+        try:
+            with open(self.index_filename, 'wb') as f:
+                f.write(data.tobytes())
+        except OSError:
+            pass
+
+    def update(self):
+        try:
+            size = os.path.getsize(self.filename)
+        except OSError:
+            size = 0
+        if size < self.scanned:
+            # the log has been replaced
+            self.offsets = array('q')
+            self.lengths = array('q')
+            self.scanned = 0
+        if size == self.scanned:
+            return
+        with open(self.filename, 'rb') as f:
+            f.seek(self.scanned)
+            offset = self.scanned
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # partially written entry, it will be indexed next time
+                    break
+                if line.startswith(b'ALGORITHM'):
+                    self.offsets.append(offset)
+                    self.lengths.append(len(line))
+                offset += len(line)
+        self.scanned = offset
+        self.save()
+
+    def entries(self, start, end):
+        """Returns the entries from start to end, in log order."""
+        end = min(end, len(self.offsets))
+        if start >= end:
+            return []
+        first = self.offsets[start]
+        with open(self.filename, 'rb') as f:
+            f.seek(first)
+            data = f.read(self.offsets[end - 1] + self.lengths[end - 1] - first)
+        entries = []
+        for i in range(start, end):
+            begin = self.offsets[i] - first
+            line = data[begin:begin + self.lengths[i]].decode('utf-8', errors='replace')
+            try:
+                entries.append(LogEntry.fromLine(line))
+            except IndexError:
+                pass
+        return entries
@@ -22,10 +22,18 @@ __date__ = 'August 2012'
 __copyright__ = '(C) 2012, Victor Olaya'
 
 import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pprint import pformat
+
 from qgis.PyQt.QtCore import QCoreApplication
 from qgis.core import (Qgis,
                        QgsFeatureSink,
+                       QgsProcessingAlgorithm,
+                       QgsProcessingContext,
                        QgsProcessingFeedback,
+                       QgsProcessingMultiStepFeedback,
                        QgsProcessingUtils,
                        QgsMessageLog,
                        QgsProcessingException,
@@ -35,11 +43,11 @@ from qgis.core import (Qgis,
                        QgsProject,
                        QgsFeatureRequest,
                        QgsFeature,
-                       QgsExpression,
                        QgsWkbTypes,
                        QgsGeometry,
                        QgsVectorLayerUtils,
                        QgsVectorLayer)
+from processing.core.ProcessingConfig import ProcessingConfig
 from processing.gui.Postprocessing import handleAlgorithmResults
 from processing.tools import dataobjects
 from qgis.utils import iface
@@ -72,6 +80,130 @@ def execute(alg, parameters, context=None, feedback=None, catch_exceptions=True)
         return ok, results
 
 
+def prepare_algorithm(alg, parameters, context, feedback):
+    """Creates an instance of alg and prepares it on the calling thread,
+    which must be the thread of context.
+
+    Returns the prepared instance, or None if preparing failed. Only
+    runPrepared() of the instance may then be called from a worker thread,
+    postProcess() belongs to the calling thread again, as in
+    QgsProcessingAlgRunnerTask.
+    """
+    instance = alg.create()
+    try:
+        if instance.prepare(parameters, context, feedback):
+            return instance
+    except QgsProcessingException as e:
+        feedback.reportError(e.msg)
+    return None
+
+
+def run_prepared(instance, parameters, context, feedback):
+    """Runs a prepared algorithm instance, returning (ok, results). Safe to
+    call from a worker thread.
+    """
+    try:
+        return True, instance.runPrepared(parameters, context, feedback)
+    except QgsProcessingException as e:
+        QgsMessageLog.logMessage(str(sys.exc_info()[0]), 'Processing', Qgis.Critical)
+        feedback.reportError(e.msg)
+        return False, {}
+
+
+def post_process(instance, context, feedback, ok, results):
+    """Post-processes an algorithm instance once it has run, on the thread
+    it was prepared on. Returns the final (ok, results).
+    """
+    if not ok:
+        return False, {}
+    try:
+        post_results = instance.postProcess(context, feedback)
+    except QgsProcessingException as e:
+        feedback.reportError(e.msg)
+        return False, {}
+    return True, post_results or results
+
+
+class InPlaceEdits:
+    """Buffers the changes of an in-place execution and applies them to the
+    layer edit buffer in chunks.
+
+    Deletions and additions go through the bulk deleteFeatures/addFeatures
+    calls, and the ids of added features are collected from the
+    featureAdded signal instead of being searched for in the layer.
+    """
+
+    CHUNK_SIZE = 10000
+
+    def __init__(self, layer, context):
+        self.layer = layer
+        self.context = context
+        self.deleted_ids = []
+        self.geometries = {}
+        self.attributes = {}
+        self.features_data = []
+        self.features = []
+        self.added_ids = []
+        self.size = 0
+
+    def deleteFeature(self, fid):
+        self.deleted_ids.append(fid)
+        self.size += 1
+
+    def changeFeature(self, feature, new_feature):
+        if not feature.geometry().equals(new_feature.geometry()):
+            self.geometries[feature.id()] = new_feature.geometry()
+        old_attributes = feature.attributes()
+        new_attributes = new_feature.attributes()
+        if old_attributes != new_attributes:
+            changed = [i for i, (new, old) in enumerate(zip(new_attributes, old_attributes)) if new != old]
+            self.attributes[feature.id()] = ({i: new_attributes[i] for i in changed},
+                                             {i: old_attributes[i] for i in changed})
+        self.size += 1
+
+    def createFeatures(self, features):
+        # features replacing a single input feature go through createFeatures
+        # to manage constraints correctly
+        for f in features:
+            self.features_data.append(QgsVectorLayerUtils.QgsFeatureData(f.geometry(), dict(enumerate(f.attributes()))))
+        self.size += len(features)
+
+    def addFeatures(self, features):
+        self.features.extend(features)
+        self.size += len(features)
+
+    def isFull(self):
+        return self.size >= self.CHUNK_SIZE
+
+    def flush(self):
+        if self.deleted_ids:
+            self.layer.deleteFeatures(self.deleted_ids)
+        for fid, geometry in self.geometries.items():
+            self.layer.changeGeometry(fid, geometry)
+        for fid, (new_values, old_values) in self.attributes.items():
+            self.layer.changeAttributeValues(fid, new_values, old_values)
+        features = self.features
+        if self.features_data:
+            features = features + QgsVectorLayerUtils.createFeatures(self.layer, self.features_data,
+                                                                     self.context.expressionContext())
+        if features:
+            self.layer.featureAdded.connect(self._featureAdded)
+            try:
+                if not self.layer.addFeatures(features):
+                    raise QgsProcessingException(tr("Error adding processed features back into the layer."))
+            finally:
+                self.layer.featureAdded.disconnect(self._featureAdded)
+        self.deleted_ids = []
+        self.geometries = {}
+        self.attributes = {}
+        self.features_data = []
+        self.features = []
+        self.size = 0
+
+    def _featureAdded(self, fid):
+        self.added_ids.append(fid)
+
+
 def execute_in_place_run(alg, parameters, context=None, feedback=None, raise_exceptions=False):
     """Executes an algorithm modifying features in-place in the input layer.
 
@@ -149,10 +281,6 @@ def execute_in_place_run(alg, parameters, context=None, feedback=None, raise_exc
     parameters[in_place_input_parameter_name] = QgsProcessingFeatureSourceDefinition(active_layer.id(), True)
     parameters['OUTPUT'] = 'memory:'
 
-    req = QgsFeatureRequest(QgsExpression(r"$id < 0"))
-    req.setFlags(QgsFeatureRequest.NoGeometry)
-    req.setSubsetOfAttributes([])
-
     # Start the execution
     # If anything goes wrong and raise_exceptions is True an exception
     # is raised, else the execution is aborted and the error reported in
@@ -179,7 +307,7 @@ def execute_in_place_run(alg, parameters, context=None, feedback=None, raise_exc
             _ = alg.outputWkbType(active_layer.wkbType())
             _ = alg.outputCrs(active_layer.crs())
 
-            field_idxs = range(len(active_layer.fields()))
+            edits = InPlaceEdits(active_layer, context)
             iterator_req = QgsFeatureRequest(active_layer.selectedFeatureIds())
             iterator_req.setInvalidGeometryCheck(context.invalidGeometryCheck())
             feature_iterator = active_layer.getFeatures(iterator_req)
@@ -199,31 +327,21 @@ def execute_in_place_run(alg, parameters, context=None, feedback=None, raise_exc
                 new_features = QgsVectorLayerUtils.makeFeaturesCompatible(new_features, active_layer)
 
                 if len(new_features) == 0:
-                    active_layer.deleteFeature(f.id())
+                    edits.deleteFeature(f.id())
                 elif len(new_features) == 1:
-                    new_f = new_features[0]
-                    if not f.geometry().equals(new_f.geometry()):
-                        active_layer.changeGeometry(f.id(), new_f.geometry())
-                    if f.attributes() != new_f.attributes():
-                        active_layer.changeAttributeValues(f.id(), dict(zip(field_idxs, new_f.attributes())), dict(zip(field_idxs, f.attributes())))
+                    edits.changeFeature(f, new_features[0])
                     new_feature_ids.append(f.id())
                 else:
-                    active_layer.deleteFeature(f.id())
-                    # Get the new ids
-                    old_ids = set([f.id() for f in active_layer.getFeatures(req)])
-                    # If multiple new features were created, we need to pass
-                    # them to createFeatures to manage constraints correctly
-                    features_data = []
-                    for f in new_features:
-                        features_data.append(QgsVectorLayerUtils.QgsFeatureData(f.geometry(), dict(enumerate(f.attributes()))))
-                    new_features = QgsVectorLayerUtils.createFeatures(active_layer, features_data, context.expressionContext())
-                    if not active_layer.addFeatures(new_features):
-                        raise QgsProcessingException(tr("Error adding processed features back into the layer."))
-                    new_ids = set([f.id() for f in active_layer.getFeatures(req)])
-                    new_feature_ids += list(new_ids - old_ids)
+                    edits.deleteFeature(f.id())
+                    edits.createFeatures(new_features)
 
+                if edits.isFull():
+                    edits.flush()
                 feedback.setProgress(int((current + 1) * step))
 
+            edits.flush()
+            new_feature_ids += edits.added_ids
+
             results, ok = {'__count': current + 1}, True
 
         else:  # Traditional 'run' with delete and add features cycle
@@ -261,12 +379,11 @@ def execute_in_place_run(alg, parameters, context=None, feedback=None, raise_exc
                     new_features.extend(QgsVectorLayerUtils.
                                         makeFeaturesCompatible([f], active_layer, sink_flags))
 
-                # Get the new ids
-                old_ids = set([f.id() for f in active_layer.getFeatures(req)])
-                if not active_layer.addFeatures(new_features):
-                    raise QgsProcessingException(tr("Error adding processed features back into the layer."))
-                new_ids = set([f.id() for f in active_layer.getFeatures(req)])
-                new_feature_ids += list(new_ids - old_ids)
+                edits = InPlaceEdits(active_layer, context)
+                for i in range(0, len(new_features), edits.CHUNK_SIZE):
+                    edits.addFeatures(new_features[i:i + edits.CHUNK_SIZE])
+                    edits.flush()
+                new_feature_ids += edits.added_ids
                 results['__count'] = len(new_feature_ids)
 
         active_layer.endEditCommand()
@@ -333,28 +450,30 @@ def execute_in_place(alg, parameters, context=None, feedback=None):
     return ok, results
 
 
-def executeIterating(alg, parameters, paramToIter, context, feedback):
-    # Generate all single-feature layers
+def executeIterating(alg, parameters, paramToIter, context, feedback, max_workers=None):
+    """Executes an algorithm once for each feature of the source in
+    paramToIter, writing outputs to destinations generated from the ones
+    in parameters.
+
+    Single-feature sources are created lazily as iterations start, so at
+    most max_workers of them are alive at any time. Iterations are
+    prepared and post-processed on the calling thread and processed on
+    worker threads, unless the algorithm cannot run in a thread, and stop
+    at the first failure. runPrepared() works on a thread safe copy of the
+    context without its temporary layers, so on worker threads the
+    single-feature sources are temporary files loaded by path.
+    """
     parameter_definition = alg.parameterDefinition(paramToIter)
     if not parameter_definition:
         return False
 
     iter_source = QgsProcessingParameters.parameterAsSource(parameter_definition, parameters, context)
-    sink_list = []
     if iter_source.featureCount() == 0:
         return False
 
-    step = 100.0 / iter_source.featureCount()
-    for current, feat in enumerate(iter_source.getFeatures()):
-        if feedback.isCanceled():
-            return False
-
-        sink, sink_id = QgsProcessingUtils.createFeatureSink('memory:', context, iter_source.fields(), iter_source.wkbType(), iter_source.sourceCrs())
-        sink_list.append(sink_id)
-        sink.addFeature(feat, QgsFeatureSink.FastInsert)
-        del sink
-
-        feedback.setProgress(int((current + 1) * step))
+    if max_workers is None:
+        max_workers = ProcessingConfig.getSetting(ProcessingConfig.MAX_BATCH_WORKERS) or 1
+    threaded = max_workers > 1 and not (alg.flags() & QgsProcessingAlgorithm.FlagNoThreading)
 
     # store output values to use them later as basenames for all outputs
     outputs = {}
@@ -362,28 +481,298 @@ def executeIterating(alg, parameters, paramToIter, context, feedback):
         if out.name() in parameters:
             outputs[out.name()] = parameters[out.name()]
 
-    # now run all the algorithms
-    for i, f in enumerate(sink_list):
-        if feedback.isCanceled():
-            return False
+    fields = iter_source.fields()
+    wkb_type = iter_source.wkbType()
+    crs = iter_source.sourceCrs()
+    total = iter_source.featureCount()
+    features = enumerate(iter_source.getFeatures())
 
-        parameters[paramToIter] = f
-        for out in alg.destinationParameterDefinitions():
-            if out.name() not in outputs:
-                continue
+    def next_iteration():
+        """Builds the context, the single-feature source and the prepared
+        algorithm of the next iteration, on the calling thread."""
+        try:
+            i, feature = next(features)
+        except StopIteration:
+            return None
+        iteration_parameters = dict(parameters)
+        for name, o in outputs.items():
+            iteration_parameters[name] = QgsProcessingUtils.generateIteratingDestination(o, i, context)
+        iteration_feedback = BatchRowFeedback()
+        iteration_context = QgsProcessingContext()
+        iteration_context.copyThreadSafeSettings(context)
+        iteration_context.setFeedback(iteration_feedback)
+        if threaded:
+            destination = QgsProcessingUtils.generateTempFilename(
+                'iteration_{}.{}'.format(i, QgsProcessingUtils.defaultVectorExtension()))
+        else:
+            destination = 'memory:'
+        sink, sink_id = QgsProcessingUtils.createFeatureSink(destination, iteration_context, fields, wkb_type, crs)
+        sink.addFeature(feature, QgsFeatureSink.FastInsert)
+        del sink
+        iteration_parameters[paramToIter] = sink_id
+        instance = prepare_algorithm(alg, iteration_parameters, iteration_context, iteration_feedback)
+        return i, (instance, iteration_parameters, iteration_context, iteration_feedback, sink_id)
 
-            o = outputs[out.name()]
-            parameters[out.name()] = QgsProcessingUtils.generateIteratingDestination(o, i, context)
-        feedback.setProgressText(QCoreApplication.translate('AlgorithmExecutor', 'Executing iteration {0}/{1}…').format(i + 1, len(sink_list)))
-        feedback.setProgress(int((i + 1) * 100 / len(sink_list)))
-        ret, results = execute(alg, parameters, context, feedback)
-        if not ret:
-            return False
+    def run_iteration(iteration):
+        instance, iteration_parameters, iteration_context, iteration_feedback, _ = iteration
+        if instance is None:
+            return False, {}
+        return run_prepared(instance, iteration_parameters, iteration_context, iteration_feedback)
+
+    def iteration_finished(iteration, outcome):
+        instance, _, iteration_context, iteration_feedback, sink_id = iteration
+        ok, results = outcome
+        if instance is not None:
+            ok, results = post_process(instance, iteration_context, iteration_feedback, ok, results)
+        iteration_feedback.replay(feedback)
+        # release the single-feature source right away, only outputs are kept
+        source_layer = QgsProcessingUtils.mapLayerFromString(sink_id, iteration_context, False)
+        if source_layer is not None:
+            iteration_context.temporaryLayerStore().removeMapLayer(source_layer)
+        context.takeResultsFrom(iteration_context)
+        return ok
+
+    def progress_text(i):
+        return QCoreApplication.translate('AlgorithmExecutor', 'Executing iteration {0}/{1}…').format(i + 1, total)
+
+    ok = True
+    completed = 0
+    if not threaded:
+        while ok and not feedback.isCanceled():
+            iteration = next_iteration()
+            if iteration is None:
+                break
+            i, iteration = iteration
+            feedback.setProgressText(progress_text(i))
+            iteration_feedback = iteration[3]
+            feedback.canceled.connect(iteration_feedback.cancel)
+            try:
+                outcome = run_iteration(iteration)
+            finally:
+                feedback.canceled.disconnect(iteration_feedback.cancel)
+            ok = iteration_finished(iteration, outcome)
+            completed += 1
+            feedback.setProgress(int(completed * 100 / total))
+    else:
+        running = {}
+        exhausted = False
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while running or (ok and not exhausted):
+                while ok and not exhausted and len(running) < max_workers and not feedback.isCanceled():
+                    iteration = next_iteration()
+                    if iteration is None:
+                        exhausted = True
+                        break
+                    i, iteration = iteration
+                    running[executor.submit(run_iteration, iteration)] = iteration
+
+                # only runPrepared() happens on workers, everything else stays on this thread
+                done, _ = wait(list(running), timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    iteration = running.pop(future)
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        iteration[3].reportError(str(e))
+                        outcome = (False, {})
+                    ok = iteration_finished(iteration, outcome) and ok
+                    completed += 1
+                    feedback.setProgressText(progress_text(completed - 1))
+
+                if not ok or feedback.isCanceled():
+                    exhausted = True
+                    for iteration in running.values():
+                        iteration[3].cancel()
+
+                feedback.setProgress(int((completed + sum(it[3].progress() for it in running.values()) / 100.0) * 100 / total))
+
+    if not ok or feedback.isCanceled():
+        return False
 
     handleAlgorithmResults(alg, context, feedback, False)
     return True
 
 
+class BatchFeedback(QgsProcessingMultiStepFeedback):
+
+    def __init__(self, steps, feedback):
+        super().__init__(steps, feedback)
+        self.steps = steps
+        self.errors = []
+
+    def reportError(self, error: str, fatalError: bool = False):
+        self.errors.append(error)
+        super().reportError(error, fatalError)
+
+    def setRowsProgress(self, rows):
+        """Sets the overall progress from a number of completed rows, which
+        may be fractional when rows are running in parallel.
+        """
+        step = min(int(rows), self.steps - 1)
+        self.setCurrentStep(step)
+        self.setProgress((rows - step) * 100)
+
+
+class BatchRowFeedback(QgsProcessingFeedback):
+    """Feedback for a batch row running on a worker thread.
+
+    Messages are recorded and replayed on the calling thread once the row
+    completes, so that the log of every row stays in one block.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.errors = []
+
+    def setProgressText(self, text):
+        self.messages.append(('setProgressText', (text,)))
+
+    def reportError(self, error, fatalError=False):
+        self.errors.append(error)
+        self.messages.append(('reportError', (error, fatalError)))
+
+    def pushInfo(self, info):
+        self.messages.append(('pushInfo', (info,)))
+
+    def pushCommandInfo(self, info):
+        self.messages.append(('pushCommandInfo', (info,)))
+
+    def pushDebugInfo(self, info):
+        self.messages.append(('pushDebugInfo', (info,)))
+
+    def pushConsoleInfo(self, info):
+        self.messages.append(('pushConsoleInfo', (info,)))
+
+    def replay(self, feedback):
+        messages, self.messages = self.messages, []
+        for name, arguments in messages:
+            getattr(feedback, name)(*arguments)
+
+
+def executeBatch(alg, parameters_list, feedback=None, max_workers=None, on_row_finished=None):
+    """Executes an algorithm once for each dict of parameters in
+    parameters_list, running up to max_workers rows at the same time on
+    worker threads.
+
+    Each row gets its own context and feedback. Contexts are created, and
+    algorithms prepared and post-processed, on the calling thread, only
+    processing itself runs on the workers. Algorithms which cannot run in a
+    thread are executed row after row on the calling thread. Messages
+    of a row are forwarded to feedback when it completes, and the overall
+    progress aggregates the progress of the running rows.
+
+    on_row_finished(row, parameters, context, ok, results) is called on the
+    calling thread as rows complete, in completion order.
+
+    Returns a tuple of two lists in row order: the results of successful
+    rows as {'row', 'parameters', 'results'} dicts, and the errors of failed
+    rows as {'row', 'parameters', 'errors'} dicts.
+    """
+    if feedback is None:
+        feedback = QgsProcessingFeedback()
+    if max_workers is None:
+        max_workers = ProcessingConfig.getSetting(ProcessingConfig.MAX_BATCH_WORKERS) or 1
+    threaded = max_workers > 1 and not (alg.flags() & QgsProcessingAlgorithm.FlagNoThreading)
+
+    batch_feedback = BatchFeedback(len(parameters_list), feedback)
+    outcomes = [None] * len(parameters_list)
+
+    def prepare_row(parameters, row_feedback):
+        # important - we create a new context for each row
+        # this avoids holding onto resources and layers from earlier rows,
+        # and allows batch processing of many more items then is possible
+        # if we hold on to these layers
+        # contexts are created and algorithms prepared on the calling thread,
+        # workers only get runPrepared()
+        context = dataobjects.createContext(row_feedback)
+        start_time = time.time()
+        instance = prepare_algorithm(alg, parameters, context, row_feedback)
+        return instance, context, start_time
+
+    def run_row(prepared, parameters, row_feedback):
+        instance, context, _ = prepared
+        if instance is None:
+            return False, {}
+        return run_prepared(instance, parameters, context, row_feedback)
+
+    def row_finished(row, parameters, row_feedback, prepared, outcome):
+        instance, context, start_time = prepared
+        ok, results = outcome
+        if instance is not None:
+            ok, results = post_process(instance, context, row_feedback, ok, results)
+        elapsed = time.time() - start_time
+        batch_feedback.pushInfo(tr('Row {0}/{1} input parameters:').format(row + 1, len(parameters_list)))
+        batch_feedback.pushCommandInfo(pformat(parameters))
+        batch_feedback.pushInfo('')
+        row_feedback.replay(batch_feedback)
+        if ok:
+            batch_feedback.pushInfo(tr('Execution completed in {0:0.2f} seconds').format(elapsed))
+            batch_feedback.pushInfo(tr('Results:'))
+            batch_feedback.pushCommandInfo(pformat(results))
+            outcomes[row] = {'row': row, 'parameters': parameters, 'results': results}
+        else:
+            batch_feedback.reportError(tr('Execution failed after {0:0.2f} seconds').format(elapsed),
+                                       fatalError=False)
+            outcomes[row] = {'row': row, 'parameters': parameters, 'errors': row_feedback.errors}
+        batch_feedback.pushInfo('')
+        if on_row_finished is not None:
+            on_row_finished(row, parameters, context, ok, results)
+
+    pending = deque((row, alg.preprocessParameters(parameters)) for row, parameters in enumerate(parameters_list))
+    completed = 0
+    if not threaded:
+        while pending and not feedback.isCanceled():
+            row, parameters = pending.popleft()
+            batch_feedback.setCurrentStep(row)
+            batch_feedback.setProgressText(tr('Processing algorithm {0}/{1}…').format(row + 1, len(parameters_list)))
+            row_feedback = BatchRowFeedback()
+            row_feedback.progressChanged.connect(batch_feedback.setProgress)
+            feedback.canceled.connect(row_feedback.cancel)
+            try:
+                prepared = prepare_row(parameters, row_feedback)
+                outcome = run_row(prepared, parameters, row_feedback)
+            finally:
+                feedback.canceled.disconnect(row_feedback.cancel)
+            row_finished(row, parameters, row_feedback, prepared, outcome)
+    else:
+        running = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending or running:
+                while pending and len(running) < max_workers and not feedback.isCanceled():
+                    row, parameters = pending.popleft()
+                    row_feedback = BatchRowFeedback()
+                    prepared = prepare_row(parameters, row_feedback)
+                    running[executor.submit(run_row, prepared, parameters, row_feedback)] = (row, parameters, row_feedback, prepared)
+
+                done, _ = wait(list(running), timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    row, parameters, row_feedback, prepared = running.pop(future)
+                    completed += 1
+                    batch_feedback.setProgressText(tr('Completed {0}/{1} algorithms…').format(completed, len(parameters_list)))
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        row_feedback.reportError(str(e))
+                        outcome = (False, {})
+                    row_finished(row, parameters, row_feedback, prepared, outcome)
+
+                if feedback.isCanceled():
+                    pending.clear()
+                    for row, parameters, row_feedback, prepared in running.values():
+                        row_feedback.cancel()
+
+                if len(parameters_list):
+                    batch_feedback.setRowsProgress(completed + sum(r[2].progress() for r in running.values()) / 100.0)
+
+    if parameters_list and not feedback.isCanceled():
+        batch_feedback.setRowsProgress(len(parameters_list))
+
+    algorithm_results = [o for o in outcomes if o is not None and 'results' in o]
+    errors = [o for o in outcomes if o is not None and 'errors' in o]
+    return algorithm_results, errors
+
+
 def tr(string, context=''):
     if context == '':
         context = 'AlgorithmExecutor'
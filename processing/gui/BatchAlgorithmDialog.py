@@ -21,7 +21,6 @@ __author__ = 'Victor Olaya'
 __date__ = 'August 2012'
 __copyright__ = '(C) 2012, Victor Olaya'
 
-from pprint import pformat
 import time
 
 from qgis.PyQt.QtWidgets import QPushButton, QDialogButtonBox
@@ -32,36 +31,22 @@ from qgis.core import (QgsProcessingOutputHtml,
                        QgsProcessingOutputString,
                        QgsProcessingOutputBoolean,
                        QgsProject,
-                       QgsProcessingMultiStepFeedback,
-                       QgsScopedProxyProgressTask,
-                       QgsProcessingException)
+                       QgsScopedProxyProgressTask)
 
 from qgis.gui import QgsProcessingAlgorithmDialogBase
 from qgis.utils import OverrideCursor, iface
 
 from processing.gui.BatchPanel import BatchPanel
-from processing.gui.AlgorithmExecutor import execute
+from processing.gui.AlgorithmExecutor import BatchFeedback, executeBatch  # NOQA
 from processing.gui.Postprocessing import handleAlgorithmResults
 
 from processing.core.ProcessingResults import resultsList
 
 from processing.tools.system import getTempFilename
-from processing.tools import dataobjects
 
 import codecs
 
 
-class BatchFeedback(QgsProcessingMultiStepFeedback):
-
-    def __init__(self, steps, feedback):
-        super().__init__(steps, feedback)
-        self.errors = []
-
-    def reportError(self, error: str, fatalError: bool = False):
-        self.errors.append(error)
-        super().reportError(error, fatalError)
-
-
 class BatchAlgorithmDialog(QgsProcessingAlgorithmDialogBase):
 
     def __init__(self, alg, parent=None):
@@ -109,11 +94,18 @@ class BatchAlgorithmDialog(QgsProcessingAlgorithmDialogBase):
             return
 
         task = QgsScopedProxyProgressTask(self.tr('Batch Processing - {0}').format(self.algorithm().displayName()))
-        multi_feedback = BatchFeedback(len(alg_parameters), feedback)
         feedback.progressChanged.connect(task.setProgress)
 
-        algorithm_results = []
-        errors = []
+        def row_finished(row, parameters, context, ok, results):
+            if ok:
+                self.setInfo(
+                    QCoreApplication.translate('BatchAlgorithmDialog', 'Algorithm {0} correctly executed…').format(
+                        self.algorithm().displayName()), escapeHtml=False)
+                handleAlgorithmResults(self.algorithm(), context, feedback, False, parameters)
+            else:
+                self.setInfo(
+                    QCoreApplication.translate('BatchAlgorithmDialog', 'Algorithm {0} failed…').format(
+                        self.algorithm().displayName()), escapeHtml=False)
 
         with OverrideCursor(Qt.WaitCursor):
 
@@ -129,53 +121,10 @@ class BatchAlgorithmDialog(QgsProcessingAlgorithmDialogBase):
                 pass
 
             start_time = time.time()
-
-            for count, parameters in enumerate(alg_parameters):
-                if feedback.isCanceled():
-                    break
-                self.setProgressText(
-                    QCoreApplication.translate('BatchAlgorithmDialog', '\nProcessing algorithm {0}/{1}…').format(
-                        count + 1, len(alg_parameters)))
-                self.setInfo(self.tr('<b>Algorithm {0} starting&hellip;</b>').format(self.algorithm().displayName()),
-                             escapeHtml=False)
-                multi_feedback.setCurrentStep(count)
-
-                parameters = self.algorithm().preprocessParameters(parameters)
-
-                feedback.pushInfo(self.tr('Input parameters:'))
-                feedback.pushCommandInfo(pformat(parameters))
-                feedback.pushInfo('')
-
-                # important - we create a new context for each iteration
-                # this avoids holding onto resources and layers from earlier iterations,
-                # and allows batch processing of many more items then is possible
-                # if we hold on to these layers
-                context = dataobjects.createContext(feedback)
-
-                alg_start_time = time.time()
-                multi_feedback.errors = []
-                results, ok = self.algorithm().run(parameters, context, multi_feedback)
-                if ok:
-                    self.setInfo(
-                        QCoreApplication.translate('BatchAlgorithmDialog', 'Algorithm {0} correctly executed…').format(
-                            self.algorithm().displayName()), escapeHtml=False)
-                    feedback.pushInfo(
-                        self.tr('Execution completed in {0:0.2f} seconds'.format(time.time() - alg_start_time)))
-                    feedback.pushInfo(self.tr('Results:'))
-                    feedback.pushCommandInfo(pformat(results))
-                    feedback.pushInfo('')
-                    algorithm_results.append({'parameters': parameters, 'results': results})
-
-                    handleAlgorithmResults(self.algorithm(), context, multi_feedback, False, parameters)
-                else:
-                    err = [e for e in multi_feedback.errors]
-                    self.setInfo(
-                        QCoreApplication.translate('BatchAlgorithmDialog', 'Algorithm {0} failed…').format(
-                            self.algorithm().displayName()), escapeHtml=False)
-                    feedback.reportError(
-                        self.tr('Execution failed after {0:0.2f} seconds'.format(time.time() - alg_start_time)),
-                        fatalError=False)
-                    errors.append({'parameters': parameters, 'errors': err})
+            self.setInfo(self.tr('<b>Algorithm {0} starting&hellip;</b>').format(self.algorithm().displayName()),
+                         escapeHtml=False)
+            algorithm_results, errors = executeBatch(self.algorithm(), alg_parameters, feedback,
+                                                     on_row_finished=row_finished)
 
         feedback.pushInfo(self.tr('Batch execution completed in {0:0.2f} seconds'.format(time.time() - start_time)))
         if errors:
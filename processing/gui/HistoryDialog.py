@@ -29,7 +29,7 @@ from datetime import datetime
 from qgis.core import QgsApplication
 from qgis.gui import QgsGui, QgsHelp
 from qgis.PyQt import uic
-from qgis.PyQt.QtCore import Qt, QCoreApplication, QDate
+from qgis.PyQt.QtCore import Qt, QCoreApplication, QDate, QTimer
 from qgis.PyQt.QtWidgets import QAction, QPushButton, QDialogButtonBox, QStyle, QMessageBox, QFileDialog, QMenu, QTreeWidgetItem, QShortcut
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.Qsci import QsciScintilla
@@ -47,6 +47,14 @@ with warnings.catch_warnings():
 
 class HistoryDialog(BASE, WIDGET):
 
+    # number of entries added to the tree each time its end is reached
+    PAGE_SIZE = 500
+    # number of log entries searched at most at once, so that a search for
+    # rare entries never blocks the dialog
+    SCAN_SIZE = 5000
+    # delay before the tree is filtered once the search text changes
+    SEARCH_DELAY = 300
+
     def __init__(self):
         super(HistoryDialog, self).__init__(None)
         self.setupUi(self)
@@ -88,7 +96,24 @@ class HistoryDialog(BASE, WIDGET):
         self.tree.setContextMenuPolicy(Qt.CustomContextMenu)
         self.tree.customContextMenuRequested.connect(self.showPopupMenu)
 
+        self.searchBox.setShowSearchIcon(True)
+        self.searchBox.setPlaceholderText(QCoreApplication.translate('HistoryDialog', 'Search…'))
+        self.searchTimer = QTimer(self)
+        self.searchTimer.setSingleShot(True)
+        self.searchTimer.setInterval(self.SEARCH_DELAY)
+        self.searchTimer.timeout.connect(self.fillTree)
+        self.searchBox.textChanged.connect(self.searchChanged)
+        self.tree.verticalScrollBar().valueChanged.connect(self.scrolled)
+        self.tree.itemExpanded.connect(self.contentsResized)
+        self.tree.itemCollapsed.connect(self.contentsResized)
+
         self.contextDateStrings = {}
+        self.names = {}
+        self.icons = {}
+        self.entries = None
+        self.search = ''
+        self.currentDate = None
+        self.currentGroupItem = None
 
         self.fillTree()
 
@@ -134,47 +159,77 @@ class HistoryDialog(BASE, WIDGET):
                 self.contextDateStrings[date] = QDate.fromString(date, 'yyyy-MM-dd').toString('MMMM yyyy')
         return self.contextDateString(date)
 
+    def searchChanged(self):
+        self.searchTimer.start()
+
     def fillTree(self):
+        self.searchTimer.stop()
         self.tree.clear()
-        entries = ProcessingLog.getLogEntries()
-
-        if not entries:
+        self.currentDate = None
+        self.currentGroupItem = None
+        # entries are read lazily, newest first, as the tree is scrolled
+        self.search = self.searchBox.value().lower()
+        self.entries = ProcessingLog.iterEntries()
+        self.loadPage()
+
+        if self.tree.topLevelItemCount():
+            self.tree.topLevelItem(0).setExpanded(True)
+
+    def scrolled(self, value):
+        if value == self.tree.verticalScrollBar().maximum():
+            self.loadPage()
+
+    def contentsResized(self):
+        # the scroll bar range is only updated once the tree is laid out
+        QTimer.singleShot(0, self.fillViewport)
+
+    def fillViewport(self):
+        """Loads more entries while the tree does not overflow its viewport,
+        as it cannot be scrolled to request them."""
+        if self.entries is not None and self.tree.verticalScrollBar().maximum() == 0:
+            self.loadPage()
+
+    def loadPage(self):
+        if self.entries is None:
             return
 
-        names = {}
-        icons = {}
-        group_items = []
-        current_group_item = -1
-        current_date = ''
+        entries = []
+        for scanned, entry in enumerate(self.entries, 1):
+            if not self.search or self.search in entry.text.lower():
+                entries.append(entry)
+            if len(entries) == self.PAGE_SIZE or scanned == self.SCAN_SIZE:
+                break
+        else:
+            self.entries = None
+
         for entry in entries:
             date = self.contextDateString(entry.date[0:10])
-            if date != current_date:
-                current_date = date
-                current_group_item += 1
-                group_items.append(QTreeWidgetItem())
-                group_items[current_group_item].setText(0, date)
-                group_items[current_group_item].setIcon(0, self.groupIcon)
+            if date != self.currentDate:
+                self.currentDate = date
+                self.currentGroupItem = QTreeWidgetItem()
+                self.currentGroupItem.setText(0, date)
+                self.currentGroupItem.setIcon(0, self.groupIcon)
+                self.tree.addTopLevelItem(self.currentGroupItem)
             icon = self.keyIcon
             name = ''
             match = re.search('processing.run\\("(.*?)"', entry.text)
-            if match.group:
+            if match:
                 algorithm_id = match.group(1)
-                if algorithm_id not in names:
+                if algorithm_id not in self.names:
                     algorithm = QgsApplication.processingRegistry().algorithmById(algorithm_id)
                     if algorithm:
-                        names[algorithm_id] = algorithm.displayName()
-                        icons[algorithm_id] = QgsApplication.processingRegistry().algorithmById(algorithm_id).icon()
+                        self.names[algorithm_id] = algorithm.displayName()
+                        self.icons[algorithm_id] = algorithm.icon()
                     else:
-                        names[algorithm_id] = ''
-                        icons[algorithm_id] = self.keyIcon
-                name = names[algorithm_id]
-                icon = icons[algorithm_id]
+                        self.names[algorithm_id] = ''
+                        self.icons[algorithm_id] = self.keyIcon
+                name = self.names[algorithm_id]
+                icon = self.icons[algorithm_id]
             item = TreeLogEntryItem(entry, True, name)
             item.setIcon(0, icon)
-            group_items[current_group_item].insertChild(0, item)
+            self.currentGroupItem.addChild(item)
 
-        self.tree.addTopLevelItems(reversed(group_items))
-        self.tree.topLevelItem(0).setExpanded(True)
+        self.contentsResized()
 
     def executeAlgorithm(self):
         item = self.tree.currentItem()
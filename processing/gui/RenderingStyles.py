@@ -27,9 +27,11 @@ from processing.tools.system import userFolder
 
 class RenderingStyles:
     styles = {}
+    loaded = False
 
     @staticmethod
     def addAlgStylesAndSave(algname, styles):
+        RenderingStyles.loadStyles()
         RenderingStyles.styles[algname] = styles
         RenderingStyles.saveSettings()
 
@@ -39,6 +41,9 @@ class RenderingStyles:
 
     @staticmethod
     def loadStyles():
+        if RenderingStyles.loaded:
+            return
+        RenderingStyles.loaded = True
         if not os.path.isfile(RenderingStyles.configFile()):
             return
         with open(RenderingStyles.configFile()) as lines:
@@ -63,6 +68,7 @@ class RenderingStyles:
 
     @staticmethod
     def getStyle(algname, outputname):
+        RenderingStyles.loadStyles()
         if algname in RenderingStyles.styles:
             if outputname in RenderingStyles.styles[algname]:
                 return RenderingStyles.styles[algname][outputname]
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    CrsIndexTest.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by QGIS Processing contributors
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Processing contributors'
+__date__ = 'October 2026'
+__copyright__ = '(C) 2026, QGIS Processing contributors'
+
+import os
+import shutil
+import tempfile
+
+import numpy
+
+from qgis.core import QgsCoordinateReferenceSystem, QgsProcessingFeedback
+from qgis.testing import start_app, unittest
+
+from processing.algs.qgis.crsindex import CrsIndex, projectedBounds
+
+start_app()
+
+
+class CrsIndexTest(unittest.TestCase):
+
+    def testProjectedBounds(self):
+        auth_id, bounds = projectedBounds(QgsCoordinateReferenceSystem('EPSG:32633').srsid())
+        self.assertEqual(auth_id, 'EPSG:32633')
+        # UTM zone 33N, between 12 and 18 degrees east
+        self.assertGreater(bounds[0], 0)
+        self.assertLess(bounds[2], 1000000)
+        self.assertGreater(bounds[3], 8000000)
+
+    def testCandidates(self):
+        index = CrsIndex(numpy.array([1, 2, 3]),
+                         numpy.array(['A:1', 'A:2', 'A:3']),
+                         numpy.array([[0, 0, 10, 10],
+                                      [100, 100, 110, 110],
+                                      [numpy.nan] * 4]))
+        self.assertEqual(index.candidates(2, 2, 3, 3).tolist(), [0, 2])
+        self.assertEqual(index.candidates(12, 2, 13, 3).tolist(), [0, 2])
+        self.assertEqual(index.candidates(12, 2, 13, 3, margin=0).tolist(), [2])
+        self.assertEqual(index.candidates(50, 50, 105, 105).tolist(), [1, 2])
+
+    def testBuildCanceled(self):
+        # canceled as soon as progress is reported, after the first chunk of CRSs
+        feedback = QgsProcessingFeedback()
+        feedback.progressChanged.connect(lambda progress: feedback.cancel())
+        index = CrsIndex.build(feedback, threads=2)
+        self.assertGreater(len(index), 0)
+        self.assertLessEqual(len(index), 2 * CrsIndex.BUILD_CHUNK_SIZE)
+        self.assertEqual(index.bounds.shape, (len(index), 4))
+
+    def testReadWrite(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmp_dir, CrsIndex.FILENAME)
+            index = CrsIndex(numpy.array([1, 2]), numpy.array(['A:1', 'B:22']),
+                             numpy.array([[0, 0, 1, 1], [2, 2, 3, 3]], dtype=float), 'sig')
+            index.write(filename)
+            self.assertIsNone(CrsIndex.read(filename, 'other'))
+            read = CrsIndex.read(filename, 'sig')
+            self.assertEqual(read.srsIds.tolist(), [1, 2])
+            self.assertEqual(read.authIds.tolist(), ['A:1', 'B:22'])
+            self.assertEqual(read.bounds.tolist(), index.bounds.tolist())
+            self.assertIsNone(CrsIndex.read(os.path.join(tmp_dir, 'missing.npz'), 'sig'))
+        finally:
+            shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
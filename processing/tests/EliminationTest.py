@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    EliminationTest.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by QGIS Processing contributors
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Processing contributors'
+__date__ = 'October 2026'
+__copyright__ = '(C) 2026, QGIS Processing contributors'
+
+from qgis.core import QgsGeometry
+from qgis.testing import start_app, unittest
+
+from processing.algs.qgis import elimination
+
+start_app()
+
+
+def box(xmin, ymin, xmax, ymax):
+    return QgsGeometry.fromWkt('Polygon(({0} {1}, {2} {1}, {2} {3}, {0} {3}, {0} {1}))'.format(xmin, ymin, xmax, ymax))
+
+
+class EliminationTest(unittest.TestCase):
+
+    def testSliverClusters(self):
+        candidates = {1: [5], 2: [5], 3: [6], 4: [], 7: []}
+        neighbours = {1: [], 2: [], 3: [4], 4: [3], 7: []}
+        clusters = elimination.sliverClusters(candidates, neighbours)
+        self.assertEqual([sorted(c) for c in clusters], [[1, 2], [3, 4], [7]])
+
+    def testEliminate(self):
+        # polygon 1 is larger than polygon 2, sliver 11 only touches polygon 2
+        # and sliver 10, which is merged first into polygon 1
+        geometries = {1: box(0, 0, 5, 1), 2: box(7, 0, 8, 1)}
+        slivers = {10: box(5, 0, 6, 1), 11: box(6, 0, 7, 2), 12: box(20, 20, 21, 21)}
+        candidates = {10: [1], 11: [2], 12: []}
+        neighbours = {10: [11], 11: [10], 12: []}
+
+        eliminator = elimination.Elimination(slivers, dict(geometries), candidates, neighbours,
+                                             elimination.MODE_LARGEST_AREA)
+        self.assertEqual(sum(eliminator.eliminate(c) for c in elimination.sliverClusters(candidates, neighbours)), 2)
+        self.assertEqual(eliminator.merged, {10: 1, 11: 1})
+        self.assertAlmostEqual(eliminator.geometries[1].area(), 8)
+        self.assertAlmostEqual(eliminator.geometries[2].area(), 1)
+
+        eliminator = elimination.Elimination(slivers, dict(geometries), candidates, neighbours,
+                                             elimination.MODE_SMALLEST_AREA)
+        eliminator.eliminate([10, 11])
+        self.assertEqual(eliminator.merged, {10: 1, 11: 2})
+
+    def testEliminateWaiting(self):
+        # the smallest sliver only touches the polygon once the other one is merged
+        geometries = {1: box(0, 0, 5, 1)}
+        slivers = {10: box(5, 0, 6, 2), 11: box(6, 0, 7, 1)}
+        eliminator = elimination.Elimination(slivers, geometries, {10: [1], 11: []}, {10: [11], 11: [10]},
+                                             elimination.MODE_BOUNDARY)
+        self.assertEqual(eliminator.eliminate([10, 11]), 2)
+        self.assertEqual(eliminator.merged, {10: 1, 11: 1})
+        self.assertAlmostEqual(geometries[1].area(), 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
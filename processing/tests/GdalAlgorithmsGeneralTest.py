@@ -44,6 +44,7 @@ from qgis.testing import (start_app,
                           unittest)
 
 from processing.algs.gdal.GdalUtils import GdalUtils
+from processing.algs.gdal.GdalInProcess import GdalInProcess
 from processing.algs.gdal.ogr2ogr import ogr2ogr
 from processing.algs.gdal.OgrToPostGis import OgrToPostGis
 
@@ -341,6 +342,58 @@ class TestGdalAlgorithms(unittest.TestCase):
         self.assertEqual(GdalUtils.escapeAndJoin([1, "a", "a b", "a&b", "a(b)", ";"]), '1 a "a b" "a&b" "a(b)" ";"')
         self.assertEqual(GdalUtils.escapeAndJoin([1, "-srcnodata", "--srcnodata", "-9999 9999"]), '1 -srcnodata --srcnodata "-9999 9999"')
 
+    def testInProcessCommand(self):
+        command = GdalInProcess.command(['gdalwarp', '-t_srs EPSG:3857 -dstnodata -9999.0 -r near -ot Float32 '
+                                                     '--config GDAL_CACHEMAX 64 "/data/my dem.tif" /tmp/does_not_exist.tif'])
+        self.assertEqual(command.program, 'gdalwarp')
+        self.assertEqual(command.positionals, ['/data/my dem.tif', '/tmp/does_not_exist.tif'])
+        self.assertEqual(command.arguments(), ['-t_srs', 'EPSG:3857', '-dstnodata', '-9999.0', '-r', 'near',
+                                               '-ot', 'Float32'])
+        self.assertEqual(command.config, {'GDAL_CACHEMAX': '64'})
+        # unknown options are left to the command line programs
+        self.assertIsNone(GdalInProcess.command(['gdalwarp', '-unknown in.tif out.tif']))
+        self.assertIsNone(GdalInProcess.command(['gdal_merge.py', '-pct -o out.tif --optfile list.txt']))
+        self.assertIsNone(GdalInProcess.command(['gdal_contour', '-a ELEV in.tif out.shp']))
+        command = GdalInProcess.command(['gdal_merge.bat', '-separate -ot Byte -o /tmp/does_not_exist.tif in.tif'])
+        self.assertEqual(command.program, 'gdal_merge')
+
+    def testInProcessRun(self):
+        from osgeo import gdal
+        outdir = tempfile.mkdtemp()
+        self.cleanup_paths.append(outdir)
+        feedback = QgsProcessingFeedback()
+
+        sources = []
+        for i in range(2):
+            source = os.path.join(outdir, 'tile{}.tif'.format(i))
+            ds = gdal.GetDriverByName('GTiff').Create(source, 10, 10, 1, gdal.GDT_Byte)
+            ds.SetGeoTransform([i * 10, 1, 0, 10, 0, -1])
+            ds.GetRasterBand(1).Fill(i + 1)
+            ds = None
+            sources.append(source)
+
+        merged = os.path.join(outdir, 'merged.tif')
+        command = GdalInProcess.command(['gdal_merge.py', '-ot Byte -of GTiff -o', merged, sources[0], sources[1]])
+        GdalInProcess.run(command, feedback)
+        ds = gdal.Open(merged)
+        self.assertEqual((ds.RasterXSize, ds.RasterYSize), (20, 10))
+        values = ds.GetRasterBand(1).ReadAsArray()
+        self.assertEqual((values[0, 0], values[9, 19]), (1, 2))
+        ds = None
+
+        translated = os.path.join(outdir, 'translated.tif')
+        command = GdalInProcess.command(['gdal_translate', '-a_nodata 1 -of GTiff --config GDAL_PAM_ENABLED NO',
+                                         merged, translated])
+        GdalInProcess.run(command, feedback)
+        self.assertEqual(gdal.Open(translated).GetRasterBand(1).GetNoDataValue(), 1)
+        # --config options only apply to the command, and are not set for other threads
+        self.assertIsNone(gdal.GetConfigOption('GDAL_PAM_ENABLED'))
+        self.assertIsNone(gdal.GetThreadLocalConfigOption('GDAL_PAM_ENABLED'))
+
+        feedback.cancel()
+        command = GdalInProcess.command(['gdalwarp', '-of GTiff', merged, os.path.join(outdir, 'canceled.tif')])
+        GdalInProcess.run(command, feedback)
+
 
 if __name__ == '__main__':
     nose2.main()
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    KNearestConcaveHullTest.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by QGIS Processing contributors
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Processing contributors'
+__date__ = 'October 2026'
+__copyright__ = '(C) 2026, QGIS Processing contributors'
+
+import numpy
+
+from qgis.testing import start_app, unittest
+
+from processing.algs.qgis.KNearestConcaveHull import concave_hull, points_in_polygon
+
+start_app()
+
+
+class KNearestConcaveHullTest(unittest.TestCase):
+
+    def testSmallSets(self):
+        self.assertIsNone(concave_hull([(0, 0), (1, 0), (1, 0)], 3))
+        # duplicates are dropped and three points are already a hull
+        self.assertEqual(concave_hull([(0, 0), (1, 0), (0, 1), (0, 0)], 3),
+                         [(0.0, 0.0), (0.0, 1.0), (1.0, 0.0), (0.0, 0.0)])
+
+    def testConcaveHull(self):
+        # a U shaped grid, the hull follows the notch
+        points = [(x, y) for x in range(7) for y in range(7) if x <= 1 or x >= 5 or y <= 1]
+        hull = concave_hull(points, 3)
+        self.assertEqual(hull, [(0, 0), (1, 0), (2, 0), (3, 0), (4, 0), (5, 0), (6, 0),
+                                (6, 1), (6, 2), (6, 3), (6, 4), (6, 5), (6, 6),
+                                (5, 6), (5, 5), (5, 4), (5, 3), (4, 1), (3, 1), (2, 1),
+                                (1, 2), (1, 3), (1, 4), (1, 5), (1, 6),
+                                (0, 6), (0, 5), (0, 4), (0, 3), (0, 2), (0, 1), (0, 0)])
+        self.assertEqual(points_in_polygon(numpy.array([[3.0, 4.0], [0.5, 3.0], [5.5, 5.5]]), hull).tolist(),
+                         [False, True, True])
+
+    def testRandomPoints(self):
+        points = numpy.random.RandomState(5).random_sample((300, 2))
+        hull = concave_hull(points, 5)
+        self.assertEqual(hull[0], hull[-1])
+        vertices = set(hull)
+        self.assertTrue(vertices <= set(map(tuple, points.tolist())))
+        # every other point lies inside the hull
+        others = numpy.array([p for p in points.tolist() if tuple(p) not in vertices])
+        self.assertTrue(points_in_polygon(others, hull).all())
+        x, y = numpy.array(hull).T
+        area = abs(numpy.dot(x[:-1], y[1:]) - numpy.dot(x[1:], y[:-1])) / 2
+        self.assertLess(area, 1)
+        self.assertGreater(area, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
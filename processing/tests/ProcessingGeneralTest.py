@@ -22,12 +22,18 @@ __date__ = 'January 2019'
 __copyright__ = '(C) 2019, Nyall Dawson'
 
 import nose2
+import os
 import shutil
 import gc
+import tempfile
 
 from qgis.core import (QgsApplication,
+                       QgsFeature,
+                       QgsGeometry,
                        QgsProcessing,
                        QgsProcessingContext,
+                       QgsProcessingException,
+                       QgsProcessingFeedback,
                        QgsVectorLayer,
                        QgsProject)
 from qgis.PyQt import sip
@@ -107,6 +113,130 @@ class TestProcessingGeneral(unittest.TestCase):
         # Python should NOT have ownership
         self.assertFalse(sip.ispyowned(layer))
 
+    def testRunBatch(self):
+        outdir = tempfile.mkdtemp()
+        self.cleanup_paths.append(outdir)
+        parameters = [{'DISTANCE': d, 'INPUT': points(), 'OUTPUT': os.path.join(outdir, 'buffer{}.shp'.format(d))}
+                      for d in range(1, 6)]
+        feedback = QgsProcessingFeedback()
+        res = processing.runBatch('qgis:buffer', parameters, feedback=feedback, maxWorkers=3)
+        self.assertEqual(len(res), 5)
+        for d, r in zip(range(1, 6), res):
+            self.assertEqual(r['OUTPUT'], os.path.join(outdir, 'buffer{}.shp'.format(d)))
+            self.assertTrue(QgsVectorLayer(r['OUTPUT']).isValid())
+        self.assertEqual(feedback.progress(), 100)
+
+        with self.assertRaises(QgsProcessingException):
+            processing.runBatch('qgis:buffer', [{'DISTANCE': 1, 'OUTPUT': QgsProcessing.TEMPORARY_OUTPUT}])
+
+    def testExecuteIterating(self):
+        from processing.gui.AlgorithmExecutor import executeIterating
+        outdir = tempfile.mkdtemp()
+        self.cleanup_paths.append(outdir)
+        alg = QgsApplication.processingRegistry().createAlgorithmById('native:buffer')
+        parameters = {'INPUT': points(), 'DISTANCE': 1, 'OUTPUT': os.path.join(outdir, 'buffer.shp')}
+        context = QgsProcessingContext()
+        feedback = QgsProcessingFeedback()
+        self.assertTrue(executeIterating(alg, parameters, 'INPUT', context, feedback, max_workers=3))
+        for i in range(9):
+            layer = QgsVectorLayer(os.path.join(outdir, 'buffer_{}.shp'.format(i)))
+            self.assertTrue(layer.isValid())
+            self.assertEqual(layer.featureCount(), 1)
+        self.assertEqual(parameters['INPUT'], points())
+
+    def inPlaceLayer(self):
+        layer = QgsVectorLayer('MultiPoint?crs=epsg:4326&field=id:integer', 'in place', 'memory')
+        features = []
+        for i in range(10):
+            f = QgsFeature(layer.fields())
+            f.setAttributes([i])
+            # every third feature is split into 3 parts
+            parts = 3 if i % 3 == 0 else 1
+            f.setGeometry(QgsGeometry.fromWkt('MultiPoint({})'.format(
+                ', '.join('({} {})'.format(i, j) for j in range(parts)))))
+            features.append(f)
+        layer.dataProvider().addFeatures(features)
+        QgsProject.instance().addMapLayer(layer)
+        return layer
+
+    def testInPlaceEditChunks(self):
+        from processing.gui.AlgorithmExecutor import InPlaceEdits, execute_in_place_run
+
+        def run(chunk_size):
+            InPlaceEdits.CHUNK_SIZE = chunk_size
+            layer = self.inPlaceLayer()
+            try:
+                for alg_id, parameters in (('native:multiparttosingleparts', {}),
+                                           ('native:translategeometry', {'DELTA_X': 1, 'DELTA_Y': 2})):
+                    alg = QgsApplication.processingRegistry().createAlgorithmById(alg_id)
+                    parameters['INPUT'] = layer
+                    ok, _ = execute_in_place_run(alg, parameters, raise_exceptions=True)
+                    self.assertTrue(ok)
+                return (sorted((f.geometry().asWkt(), f.attributes()) for f in layer.getFeatures()),
+                        sorted(f.geometry().asWkt() for f in layer.selectedFeatures()))
+            finally:
+                QgsProject.instance().removeMapLayer(layer)
+
+        try:
+            features, selected = run(10000)
+            self.assertEqual(len(features), 18)
+            self.assertEqual(len(selected), 18)
+            self.assertIn(('MultiPoint ((1 4))', [0]), features)
+            # edits flushed every few features give the same layer and selection
+            for chunk_size in (1, 2, 5):
+                self.assertEqual(run(chunk_size), (features, selected))
+        finally:
+            InPlaceEdits.CHUNK_SIZE = 10000
+
+    def testLazyProvider(self):
+        from processing.algs.qgis.BarPlot import BarPlot
+        from processing.core.AlgorithmManifest import AlgorithmManifest, LazyAlgorithmProvider
+        module = 'processing.algs.qgis.QgisAlgorithmProvider'
+        AlgorithmManifest.addProvider(module, 'QgisAlgorithmProvider',
+                                      QgsApplication.processingRegistry().providerById('qgis'))
+        entry = AlgorithmManifest.providerEntry(module)
+        self.assertIsNotNone(entry)
+        provider = LazyAlgorithmProvider(module, entry)
+        self.assertTrue(provider.load())
+        self.assertIsNone(provider.realProvider)
+        placeholder = provider.algorithm('barplot')
+        self.assertEqual(placeholder.displayName(), 'Bar plot')
+        self.assertEqual(placeholder.parameterDefinitions(), [])
+        alg = placeholder.create()
+        self.assertIsInstance(alg, BarPlot)
+        self.assertTrue(alg.parameterDefinitions())
+        self.assertIsNotNone(provider.realProvider)
+
+    def testLazyProviderActivation(self):
+        from processing.core.AlgorithmManifest import AlgorithmManifest, LazyAlgorithmProvider
+        from processing.core.ProcessingConfig import ProcessingConfig
+        module = 'processing.algs.gdal.GdalAlgorithmProvider'
+        gdal_provider = QgsApplication.processingRegistry().providerById('gdal')
+        AlgorithmManifest.addProvider(module, 'GdalAlgorithmProvider', gdal_provider)
+        entry = AlgorithmManifest.providerEntry(module)
+        self.assertEqual(entry['activateSetting'], 'ACTIVATE_GDAL')
+        # the QGIS provider cannot be deactivated
+        qgis_module = 'processing.algs.qgis.QgisAlgorithmProvider'
+        AlgorithmManifest.addProvider(qgis_module, 'QgisAlgorithmProvider',
+                                      QgsApplication.processingRegistry().providerById('qgis'))
+        self.assertIsNone(AlgorithmManifest.providerEntry(qgis_module)['activateSetting'])
+
+        provider = LazyAlgorithmProvider(module, entry)
+        try:
+            gdal_provider.setActive(False)
+            self.assertFalse(provider.isActive())
+            # without the setting registered, the stored value is read
+            setting = ProcessingConfig.settings.pop('ACTIVATE_GDAL')
+            try:
+                self.assertFalse(provider.isActive())
+            finally:
+                ProcessingConfig.settings['ACTIVATE_GDAL'] = setting
+            gdal_provider.setActive(True)
+            self.assertTrue(provider.isActive())
+        finally:
+            gdal_provider.setActive(True)
+        self.assertIsNone(provider.realProvider)
+
     def testProviders(self):
         """
         When run from a standalone script (like this test), ensure that the providers from separate plugins are available
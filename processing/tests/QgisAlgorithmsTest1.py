@@ -26,12 +26,17 @@ import AlgorithmsTestBase
 import nose2
 import shutil
 
-from qgis.core import (QgsApplication,
+from qgis.core import (NULL,
+                       QgsApplication,
+                       QgsFeature,
                        QgsProcessingAlgorithm,
                        QgsProcessingFeedback,
-                       QgsProcessingException)
+                       QgsProcessingException,
+                       QgsVectorLayer)
 from qgis.testing import start_app, unittest
+from processing.algs.qgis.StatisticsByCategories import StatisticsByCategories
 from processing.tools.dataobjects import createContext
+from processing.tools.general import run
 
 
 class TestAlg(QgsProcessingAlgorithm):
@@ -99,6 +104,35 @@ class TestQgisAlgorithms(unittest.TestCase, AlgorithmsTestBase.AlgorithmsTest):
             else:
                 exec('test = {}(\'id\',\'name\')\nself.assertIsNotNone(test)'.format(t.className()))
 
+    def testStatisticsByCategories(self):
+        layer = QgsVectorLayer('None?field=cat:integer&field=value:double', 'values', 'memory')
+        features = []
+        for i in range(3000):
+            # category 7 only holds NULL values
+            f = QgsFeature(layer.fields())
+            f.setAttributes([i % 1000, NULL if i % 1000 == 7 else float(i)])
+            features.append(f)
+        layer.dataProvider().addFeatures(features)
+
+        budget = StatisticsByCategories.MEMORY_BUDGET
+        StatisticsByCategories.MEMORY_BUDGET = 100
+        try:
+            output = run('qgis:statisticsbycategories', {'INPUT': layer,
+                                                         'VALUES_FIELD_NAME': 'value',
+                                                         'CATEGORIES_FIELD_NAME': ['cat'],
+                                                         'OUTPUT': 'memory:'})['OUTPUT']
+        finally:
+            StatisticsByCategories.MEMORY_BUDGET = budget
+
+        stats = {f['cat']: f for f in output.getFeatures()}
+        self.assertEqual(len(stats), 999)
+        self.assertNotIn(7, stats)
+        self.assertEqual(stats[3]['count'], 3)
+        self.assertEqual(stats[3]['median'], 1003)
+        self.assertEqual(stats[3]['q1'], 503)
+        self.assertEqual(stats[3]['unique'], 3)
+        self.assertEqual(stats[999]['sum'], 999 + 1999 + 2999)
+
 
 if __name__ == '__main__':
     nose2.main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    RandomPointsTest.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by QGIS Processing contributors
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Processing contributors'
+__date__ = 'October 2026'
+__copyright__ = '(C) 2026, QGIS Processing contributors'
+
+import numpy
+
+from qgis.core import QgsGeometry, QgsPointXY
+from qgis.testing import start_app, unittest
+
+from processing.algs.qgis import randompoints
+
+start_app()
+
+
+def squareWithHole():
+    return QgsGeometry.fromWkt('MultiPolygon(((0 0, 10 0, 10 10, 0 10, 0 0), (2 2, 2 8, 8 8, 8 2, 2 2)),'
+                               '((20 0, 30 0, 20 10, 20 0)))')
+
+
+class RandomPointsTest(unittest.TestCase):
+
+    def testPolygonMask(self):
+        geometry = squareWithHole()
+        mask = randompoints.PolygonMask.fromGeometry(geometry)
+        self.assertAlmostEqual(mask.area, geometry.area())
+        xy = numpy.random.RandomState(1).uniform(-1, 31, (2000, 2))
+        expected = [geometry.contains(QgsGeometry.fromPointXY(QgsPointXY(x, y))) for x, y in xy.tolist()]
+        self.assertEqual(mask.contains(xy).tolist(), expected)
+
+    def testRandomPoints(self):
+        mask = randompoints.PolygonMask.fromGeometry(squareWithHole())
+        xy = randompoints.randomPoints(mask, 5000, numpy.random.RandomState(1), 1000000)
+        self.assertEqual(len(xy), 5000)
+        self.assertTrue(mask.contains(xy).all())
+        again = randompoints.randomPoints(mask, 5000, numpy.random.RandomState(1), 1000000)
+        self.assertTrue((xy == again).all())
+
+    def testPoissonDiskPoints(self):
+        mask = randompoints.PolygonMask.fromGeometry(squareWithHole())
+        for count in (50, 100000):
+            xy = randompoints.poissonDiskPoints(mask, count, 0.5, numpy.random.RandomState(1), count * 200)
+            self.assertTrue(mask.contains(xy).all())
+            distances = numpy.hypot(xy[:, None, 0] - xy[None, :, 0], xy[:, None, 1] - xy[None, :, 1])
+            numpy.fill_diagonal(distances, numpy.inf)
+            self.assertGreaterEqual(distances.min(), 0.5)
+        # the mask cannot hold that many points, it gets filled instead
+        self.assertLess(len(xy), 100000)
+        self.assertGreater(len(xy), 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
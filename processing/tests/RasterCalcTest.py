@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    RasterCalcTest.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by QGIS Processing contributors
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Processing contributors'
+__date__ = 'October 2026'
+__copyright__ = '(C) 2026, QGIS Processing contributors'
+
+import os
+import shutil
+import tempfile
+
+import numpy
+from osgeo import gdal
+
+from qgis.testing import start_app, unittest
+
+import processing
+from processing.algs.qgis.rastercalc import ParserError, parseExpression, tokenize
+
+start_app()
+
+
+def evaluate(expression, values=None):
+    return float(parseExpression(expression).evaluate({k: numpy.float64(v) for k, v in (values or {}).items()}))
+
+
+class RasterCalcTest(unittest.TestCase):
+
+    def testTokenizeSubtraction(self):
+        self.assertEqual(tokenize('100-b@1'), [('number', '100'), ('op', '-'), ('ref', 'b@1')])
+        self.assertEqual(tokenize('1-b@1'), [('number', '1'), ('op', '-'), ('ref', 'b@1')])
+        self.assertEqual(tokenize('b@1*2-b@1'),
+                         [('ref', 'b@1'), ('op', '*'), ('number', '2'), ('op', '-'), ('ref', 'b@1')])
+        self.assertEqual(tokenize('a@1-b@2'), [('ref', 'a@1'), ('op', '-'), ('ref', 'b@2')])
+
+    def testTokenizeRefs(self):
+        self.assertEqual(tokenize('dem_2020.tif@1'), [('ref', 'dem_2020.tif@1')])
+        self.assertEqual(tokenize(r'my\-layer@1-1'), [('ref', 'my-layer@1'), ('op', '-'), ('number', '1')])
+        self.assertEqual(tokenize('"my-layer@1" - 1'), [('ref', 'my-layer@1'), ('op', '-'), ('number', '1')])
+        self.assertEqual(tokenize(r'"a \"b\"@2"'), [('ref', 'a "b"@2')])
+        self.assertEqual(tokenize('a@1 and b@1'), [('ref', 'a@1'), ('op', 'AND'), ('ref', 'b@1')])
+        self.assertEqual(tokenize('高程_dem@1-1'), [('ref', '高程_dem@1'), ('op', '-'), ('number', '1')])
+        self.assertEqual(parseExpression('高程@1*2').refs(), {'高程@1'})
+        with self.assertRaises(ParserError):
+            tokenize('a@1 # 2')
+
+    def testSubtraction(self):
+        self.assertEqual(evaluate('100-b@1', {'b@1': 30}), 70)
+        self.assertEqual(evaluate('b@1*2-b@1', {'b@1': 5}), 5)
+        self.assertEqual(evaluate('10-2-3'), 5)
+        self.assertEqual(parseExpression('"x-y@1" - b@1').refs(), {'x-y@1', 'b@1'})
+        self.assertEqual(evaluate(r'x\-y@1-b@1', {'x-y@1': 8, 'b@1': 3}), 5)
+
+    def testUnaryMinus(self):
+        self.assertEqual(evaluate('-b@1', {'b@1': 4}), -4)
+        self.assertEqual(evaluate('2*-b@1', {'b@1': 4}), -8)
+        self.assertEqual(evaluate('--3'), 3)
+        self.assertEqual(evaluate('-(1-4)'), 3)
+        self.assertEqual(evaluate('+2'), 2)
+
+    def testPrecedence(self):
+        self.assertEqual(evaluate('1+2*3'), 7)
+        self.assertEqual(evaluate('(1+2)*3'), 9)
+        self.assertEqual(evaluate('2^3*2'), 16)
+        self.assertEqual(evaluate('8/4/2'), 1)
+        self.assertEqual(evaluate('1+1=2'), 1)
+        # as in qgsrastercalcparser.yy: ^ is left associative and binds less
+        # tightly than unary minus, AND binds less tightly than OR
+        self.assertEqual(evaluate('2^3^2'), 64)
+        self.assertEqual(evaluate('-2^2'), 4)
+        self.assertEqual(evaluate('1<2 AND 3<2 OR 1'), 1)
+        self.assertEqual(evaluate('1 OR 0 AND 0'), 0)
+        self.assertEqual(evaluate('0 AND 0 OR 1'), 0)
+        self.assertEqual(evaluate('3 >= 1 <= 0'), 1)
+        self.assertEqual(evaluate('1 != 2 = 2'), 0)
+        self.assertEqual(evaluate('max(1, 2) - min(b@1, 5)', {'b@1': 3}), -1)
+        self.assertEqual(evaluate('sqrt(16)-abs(-1)'), 3)
+
+    def testParserErrors(self):
+        for expression in ('', '1+', '(1', 'foo(1)', 'max(1)', '1 2'):
+            with self.assertRaises(ParserError):
+                parseExpression(expression)
+
+
+class RasterCalcEnginesTest(unittest.TestCase):
+    """Runs expressions through the QGIS raster calculator and the tiled
+    engine, which must give the same results."""
+
+    EXPRESSIONS = [
+        'a@1 - 高程@1 - 1',
+        'a@1 / 高程@1 / 2',
+        'a@1 ^ 2 ^ 0.5 + 0 * 高程@1',
+        '-a@1 ^ 2 + 高程@1',
+        'a@1 * 0 + 2 ^ 3 ^ 2',
+        'a@1 > 2 OR 高程@1 < 3 AND a@1 < 5',
+        'a@1 * 0 + 1 OR 0 AND 0',
+        'a@1 >= 高程@1 <= 0.5',
+        'a@1 != 高程@1 = 0',
+        '1 + a@1 * 高程@1 < 10 AND 高程@1 >= 2',
+        'max(a@1, 高程@1) - min(a@1 * 2, sqrt(高程@1))',
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        from processing.core.Processing import Processing
+        Processing.initialize()
+
+    @classmethod
+    def tearDownClass(cls):
+        from processing.core.Processing import Processing
+        Processing.deinitialize()
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        random = numpy.random.RandomState(3)
+        self.layers = []
+        for name in ('a', '高程'):
+            filename = os.path.join(self.tmp_dir, name + '.tif')
+            ds = gdal.GetDriverByName('GTiff').Create(filename, 20, 10, 1, gdal.GDT_Float32)
+            ds.SetGeoTransform([0, 1, 0, 10, 0, -1])
+            ds.SetProjection('EPSG:4326')
+            ds.GetRasterBand(1).WriteArray(random.randint(1, 6, (10, 20)).astype(numpy.float32))
+            ds = None
+            self.layers.append(filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def calculate(self, expression, engine):
+        output = os.path.join(self.tmp_dir, 'output{}.tif'.format(engine))
+        processing.run('qgis:rastercalculator', {'EXPRESSION': expression,
+                                                 'LAYERS': self.layers,
+                                                 'ENGINE': engine,
+                                                 'OUTPUT': output})
+        ds = gdal.Open(output)
+        values = ds.GetRasterBand(1).ReadAsArray().astype(numpy.float64)
+        ds = None
+        gdal.Unlink(output)
+        return values
+
+    def testEngines(self):
+        for expression in self.EXPRESSIONS:
+            expected = self.calculate(expression, 0)
+            numpy.testing.assert_allclose(self.calculate(expression, 1), expected, rtol=1e-6,
+                                          err_msg=expression)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    TilesXYZTest.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by QGIS Processing contributors
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Processing contributors'
+__date__ = 'October 2026'
+__copyright__ = '(C) 2026, QGIS Processing contributors'
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+from qgis.core import QgsCoordinateReferenceSystem, QgsProcessingFeedback, QgsProject
+from qgis.testing import start_app, unittest
+
+import processing
+from processing.algs.qgis.TilesXYZ import MBTilesWriter, Tile, TilesXYZAlgorithmDirectory, get_metatiles, tms
+
+start_app()
+
+
+class MessageFeedback(QgsProcessingFeedback):
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def pushInfo(self, info):
+        self.messages.append(info)
+        super().pushInfo(info)
+
+
+class TilesXYZTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        from processing.core.Processing import Processing
+        Processing.initialize()
+
+    @classmethod
+    def tearDownClass(cls):
+        from processing.core.Processing import Processing
+        Processing.deinitialize()
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def writeTiles(self, writer, tiles, threads=4):
+        # tiles are handed over from several rendering threads at once
+        def work(part):
+            for tile in part:
+                writer.write_tile_data(tile, '{}/{}/{}'.format(tile.z, tile.x, tile.y).encode('utf-8'))
+
+        workers = [threading.Thread(target=work, args=(tiles[i::threads],)) for i in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    def readTiles(self, filename):
+        conn = sqlite3.connect(filename)
+        try:
+            return sorted((z, x, y, bytes(data))
+                          for z, x, y, data in conn.execute('SELECT zoom_level, tile_column, tile_row, tile_data FROM tiles'))
+        finally:
+            conn.close()
+
+    def testMBTilesWriter(self):
+        filename = os.path.join(self.tmp_dir, 'tiles.mbtiles')
+        writer = MBTilesWriter(filename)
+        # small batches and queue, so that the writer thread commits many times
+        writer.BATCH_SIZE = 7
+        writer.QUEUE_SIZE = 16
+        writer.set_parameters({'format': 'PNG', 'min_zoom': 4, 'max_zoom': 5, 'extent': [0, 0, 1, 1]})
+        tiles = [Tile(x, y, z) for z in (4, 5) for x in range(10) for y in range(10)]
+        self.writeTiles(writer, tiles)
+        writer.close()
+
+        self.assertEqual(self.readTiles(filename),
+                         sorted((t.z, t.x, tms(t.y, t.z), '{}/{}/{}'.format(t.z, t.x, t.y).encode('utf-8')) for t in tiles))
+        conn = sqlite3.connect(filename)
+        metadata = dict(conn.execute('SELECT name, value FROM metadata'))
+        conn.close()
+        self.assertEqual(metadata['bounds'], '0,0,1,1')
+        self.assertEqual(metadata['minzoom'], '4')
+        self.assertEqual(metadata['format'], 'png')
+
+    def renderMetatiles(self, metatiles_by_zoom, threads):
+        """Runs the metatile scheduler, recording the metatiles rendered by
+        each thread instead of rendering them."""
+        alg = TilesXYZAlgorithmDirectory()
+        alg.min_zoom = min(metatiles_by_zoom)
+        alg.max_zoom = max(metatiles_by_zoom)
+        alg.backend = 0
+        alg.maxThreads = threads
+        alg.mapSettings = [object() for _ in range(threads)]
+        alg.manifest = None
+        alg.feedback = QgsProcessingFeedback()
+        alg.progressThreadLock = threading.Lock()
+        alg.progress = 0
+        alg.tilesDone = 0
+        alg.totalMetatiles = sum(len(m) for m in metatiles_by_zoom.values())
+
+        rendered = []
+
+        def render(metatile, settings):
+            rendered.append((metatile.key(), alg.mapSettings.index(settings)))
+            alg.metatileFinished(metatile)
+
+        alg.renderSingleMetatile = render
+        alg.renderMetatiles(metatiles_by_zoom, alg.feedback)
+        return alg, rendered
+
+    def testMetatileScheduling(self):
+        metatiles_by_zoom = {zoom: get_metatiles([-20, -20, 20, 20], zoom, 2) for zoom in range(2, 6)}
+        keys = [m.key() for zoom in range(2, 6) for m in metatiles_by_zoom[zoom]]
+        tiles = sum(len(m.tiles) for zoom in range(2, 6) for m in metatiles_by_zoom[zoom])
+        self.assertEqual(len(set(keys)), len(keys))
+
+        # a single thread follows the queue, zoom level after zoom level
+        alg, rendered = self.renderMetatiles(metatiles_by_zoom, 1)
+        self.assertEqual(rendered, [(key, 0) for key in keys])
+        self.assertEqual(alg.tilesDone, tiles)
+
+        # threads share one queue across all zoom levels and render every metatile once
+        alg, rendered = self.renderMetatiles(metatiles_by_zoom, 4)
+        self.assertEqual(sorted(key for key, _ in rendered), sorted(keys))
+        self.assertEqual(alg.progress, len(keys))
+        self.assertEqual(alg.tilesDone, tiles)
+        self.assertEqual(alg.feedback.progress(), 100)
+
+    def testResume(self):
+        QgsProject.instance().setCrs(QgsCoordinateReferenceSystem('EPSG:4326'))
+        filename = os.path.join(self.tmp_dir, 'tiles.mbtiles')
+        # one metatile for each of the 4 zoom levels
+        parameters = {'EXTENT': '10,11,45,46 [EPSG:4326]',
+                      'ZOOM_MIN': 0,
+                      'ZOOM_MAX': 3,
+                      'INCREMENTAL': True,
+                      'OUTPUT_FILE': filename}
+
+        feedback = MessageFeedback()
+        processing.run('qgis:tilesxyzmbtiles', parameters, feedback=feedback)
+        self.assertIn('Skipping 0 unchanged metatiles, rendering 4', feedback.messages)
+        tiles = self.readTiles(filename)
+        self.assertEqual([t[:3] for t in tiles], [(0, 0, 0), (1, 1, 1), (2, 2, 2), (3, 4, 5)])
+
+        # nothing changed, the tiles of the previous run are kept as they are
+        feedback = MessageFeedback()
+        processing.run('qgis:tilesxyzmbtiles', parameters, feedback=feedback)
+        self.assertIn('Skipping 4 unchanged metatiles, rendering 0', feedback.messages)
+        self.assertEqual(self.readTiles(filename), tiles)
+
+        # metatiles intersecting a changed extent are rendered again
+        parameters['DIRTY_EXTENT'] = '10,10.5,45,45.5 [EPSG:4326]'
+        feedback = MessageFeedback()
+        processing.run('qgis:tilesxyzmbtiles', parameters, feedback=feedback)
+        self.assertIn('Skipping 0 unchanged metatiles, rendering 4', feedback.messages)
+        self.assertEqual(len(self.readTiles(filename)), 4)
+
+        # without the incremental mode everything is rendered from scratch
+        del parameters['DIRTY_EXTENT']
+        parameters['INCREMENTAL'] = False
+        feedback = MessageFeedback()
+        processing.run('qgis:tilesxyzmbtiles', parameters, feedback=feedback)
+        self.assertFalse([m for m in feedback.messages if m.startswith('Skipping')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -23,12 +23,16 @@ __copyright__ = '(C) 2016, Nyall Dawson'
 
 import os
 import shutil
+import tempfile
 
-from qgis.core import NULL, QgsVectorLayer
+import numpy
+from osgeo import gdal
+
+from qgis.core import NULL, QgsGeometry, QgsRectangle, QgsVectorLayer
 from qgis.testing import start_app, unittest
 
 from processing.tests.TestData import points
-from processing.tools import vector
+from processing.tools import raster, spatial, statistics, vector
 
 testDataPath = os.path.join(os.path.dirname(__file__), 'testdata')
 
@@ -73,6 +77,40 @@ class VectorTest(unittest.TestCase):
         self.assertEqual(res['id'], [1, 2, 3, 4, 5, 6, 7, 8, 9])
         self.assertEqual(res[2], [2, 1, 0, 2, 1, 0, 0, 0, 0])
 
+    def testColumns(self):
+        test_layer = QgsVectorLayer(points(), 'test', 'ogr')
+
+        res = vector.columns(test_layer, 'id', 2, chunk_size=4)
+        self.assertEqual(res['id'].dtype, numpy.int64)
+        self.assertEqual(res['id'].tolist(), [1, 2, 3, 4, 5, 6, 7, 8, 9])
+        self.assertEqual(res[2].tolist(), [2, 1, 0, 2, 1, 0, 0, 0, 0])
+
+        res = vector.columns(test_layer, 'id', 'id2', numeric=['id2'], limit=3)
+        self.assertEqual(res['id'].dtype, numpy.int64)
+        self.assertEqual(res['id2'].dtype, numpy.float64)
+        self.assertEqual(res['id2'].tolist(), [2.0, 1.0, 0.0])
+
+        res = vector.columns(test_layer, 'id', sample=3)
+        self.assertEqual(res['id'].tolist(), [1, 4, 7])
+
+        res = vector.columnsInBackground(test_layer, 'id').result()
+        self.assertEqual(res['id'].tolist(), [1, 2, 3, 4, 5, 6, 7, 8, 9])
+
+    def testColumnNulls(self):
+        data, mask = vector._columnChunk([1, NULL, 3], numpy.float64)
+        self.assertEqual(mask.tolist(), [False, True, False])
+        self.assertEqual(data[[0, 2]].tolist(), [1.0, 3.0])
+        data, mask = vector._columnChunk(['1.5', 'a', NULL], numpy.float64)
+        self.assertEqual(mask.tolist(), [False, True, True])
+        self.assertEqual(data[0], 1.5)
+        data, mask = vector._columnChunk(['a', NULL], object)
+        self.assertEqual(numpy.ma.MaskedArray(data, mask=mask).tolist(), ['a', None])
+        # unsigned 64 bit values past the int64 range
+        data, mask = vector._columnChunk([2 ** 64 - 1, NULL, 2 ** 63], numpy.uint64)
+        self.assertEqual(numpy.ma.MaskedArray(data, mask=mask).tolist(), [2 ** 64 - 1, None, 2 ** 63])
+        data, mask = vector._columnChunk([2 ** 63, 1], numpy.int64)
+        self.assertEqual(numpy.ma.MaskedArray(data, mask=mask).tolist(), [None, 1])
+
     def testConvertNulls(self):
         self.assertEqual(vector.convert_nulls([]), [])
         self.assertEqual(vector.convert_nulls([], '_'), [])
@@ -85,5 +123,244 @@ class VectorTest(unittest.TestCase):
         self.assertEqual(vector.convert_nulls([1, NULL, 3, NULL], '_'), [1, '_', 3, '_'])
 
 
+class RasterTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.mkdtemp()
+        cls.raster_path = os.path.join(cls.tmp_dir, 'blocks.tif')
+        ds = gdal.GetDriverByName('GTiff').Create(cls.raster_path, 5, 300, 1, gdal.GDT_Int16)
+        ds.SetGeoTransform((0, 1, 0, 300, 0, -1))
+        band = ds.GetRasterBand(1)
+        band.SetNoDataValue(-1)
+        data = numpy.arange(1500, dtype=numpy.int16).reshape(300, 5)
+        data[0, 0] = -1
+        band.WriteArray(data)
+        ds = None
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir)
+
+    def testScanBlocks(self):
+        blocks = list(raster.scanblocks(self.raster_path, block_size=(5, 100)))
+        self.assertEqual([(x, y) for x, y, _ in blocks], [(0, 0), (0, 100), (0, 200)])
+        self.assertTrue(blocks[0][2].mask[0, 0])
+        self.assertEqual(blocks[0][2].count(), 499)
+
+    def testReducers(self):
+        stats, histogram = raster.reduceraster(self.raster_path,
+                                               [raster.StatisticsReducer(),
+                                                raster.HistogramReducer(3, 0, 1499)])
+        self.assertEqual(stats.count, 1499)
+        self.assertEqual(stats.min, 1)
+        self.assertEqual(stats.max, 1499)
+        self.assertEqual(stats.sum, sum(range(1, 1500)))
+        counts, edges = histogram.result()
+        self.assertEqual(counts.sum(), 1499)
+        self.assertEqual(len(edges), 4)
+
+    def testScanRaster(self):
+        values = list(raster.scanraster(self.raster_path, None))
+        self.assertEqual(len(values), 1500)
+        self.assertIsNone(values[0])
+        self.assertEqual(values[1:], list(range(1, 1500)))
+
+    def testTraverseCells(self):
+        cols, rows = raster.traverseCells([0, 4, 4, 2], [0, 2, 5, 5])
+        self.assertEqual(list(zip(cols.tolist(), rows.tolist())),
+                         [(0, 0), (1, 1), (2, 1), (3, 2), (4, 2),
+                          (4, 2), (4, 3), (4, 4), (4, 5),
+                          (2, 5), (3, 5), (4, 5)])
+        cols, rows = raster.traverseCells([1], [1])
+        self.assertEqual(len(cols), 0)
+
+    def testRasterSampler(self):
+        sampler = raster.RasterSampler(self.raster_path)
+        cols, rows = sampler.toPixel([0.5, 4.5, 2.2], [299.5, 0.5, 150.1])
+        self.assertEqual(cols.tolist(), [0, 4, 2])
+        self.assertEqual(rows.tolist(), [0, 299, 149])
+        self.assertEqual(sampler.toMap([0, 4], [0, 299]).tolist(), [[0.5, 299.5], [4.5, 0.5]])
+
+        values = sampler.values([0, 1, 4, 2, 7], [0, 0, 299, 149, 1])
+        self.assertEqual(values.tolist(), [None, 1, 1499, 747, None])
+
+    def testZoneRasterizer(self):
+        zones = [QgsGeometry.fromRect(QgsRectangle(0, 290, 2, 300)),
+                 QgsGeometry.fromRect(QgsRectangle(2, 295, 5, 300))]
+        rasterizer = raster.ZoneRasterizer((0, 1, 0, 300, 0, -1), [bytes(g.asWkb()) for g in zones], [1, 2])
+        labels = rasterizer.labels(0, 0, 5, 12)
+        self.assertEqual(labels[0].tolist(), [1, 1, 2, 2, 2])
+        self.assertEqual(labels[9].tolist(), [1, 1, 0, 0, 0])
+        self.assertEqual(labels[10].tolist(), [0, 0, 0, 0, 0])
+        self.assertEqual(rasterizer.labels(0, 100, 5, 10).max(), 0)
+
+    def testZonalReducers(self):
+        labels = numpy.array([[1, 1, 1, 0], [2, 2, 1, 1]])
+        block = numpy.ma.MaskedArray([[0.0, 1.0, 2.5, 9.0], [5.0, 5.0, 2.0, 7.0]],
+                                     mask=[[False, False, False, False], [False, False, False, True]])
+        ranges = raster.ZonalRangeReducer(2)
+        ranges.update(labels, block)
+        self.assertEqual(ranges.count.tolist(), [0, 4, 2])
+        self.assertEqual(ranges.min.tolist()[1:], [0.0, 5.0])
+        self.assertEqual(ranges.max.tolist()[1:], [2.5, 5.0])
+
+        histograms = raster.ZonalHistogramReducer(ranges.min, ranges.max, 1.0)
+        histograms.update(labels[:1], block[:1])
+        histograms.update(labels[1:], block[1:])
+        counts, edges = histograms.histogram(1)
+        self.assertEqual(counts.tolist(), [1, 1, 2])
+        self.assertEqual(edges.tolist(), [1.0, 2.0, 3.0])
+        # a zone with a single value has no bins
+        self.assertEqual(len(histograms.histogram(2)[0]), 0)
+
+    def testZonalHistogramEdges(self):
+        # accumulated decimal edges are not multiples of the step, 0.6 lies
+        # exactly on an edge while 0.6 / 0.1 rounds below 6
+        values = numpy.array([0.0, 0.3, 0.6, 0.6, 0.7, 0.8, 0.9, 1.0])
+        block = numpy.ma.MaskedArray(values.reshape(1, -1))
+        labels = numpy.ones(block.shape, dtype=numpy.int64)
+        histograms = raster.ZonalHistogramReducer(numpy.array([0.0, 0.0]), numpy.array([0.0, 1.0]), 0.1)
+        histograms.update(labels, block)
+        counts, edges = histograms.histogram(1)
+
+        expected_counts = []
+        expected_edges = []
+        start, edge = 0.0, 0.1
+        while start < 1.0:
+            expected_counts.append(int(((start <= values) & (values < edge)).sum()))
+            expected_edges.append(edge)
+            start = edge
+            edge += 0.1
+        self.assertEqual(edges.tolist(), expected_edges)
+        self.assertEqual(counts.tolist(), expected_counts)
+        self.assertEqual(counts[6], 2)
+
+
+class SpatialTest(unittest.TestCase):
+
+    def testPointIndex(self):
+        xy = numpy.array([[0, 0], [1, 0], [5, 5], [10, 10], [10, 11], [0.5, 0.2]])
+        index = spatial.PointIndex(xy)
+        distances, indices = index.query([[0, 0], [10, 10.4]], 2)
+        self.assertEqual(indices[0].tolist(), [0, 5])
+        self.assertEqual(sorted(indices[1].tolist()), [3, 4])
+        self.assertAlmostEqual(distances[1, 0], 0.4)
+        self.assertEqual(sorted(index.queryRadius(0, 0, 1.0).tolist()), [0, 1, 5])
+
+    def testPointGrid(self):
+        grid = spatial.PointGrid(1.0)
+        grid.insert(0, 0)
+        grid.insert(3, 3)
+        self.assertTrue(grid.hasPointWithin(0.9, 0, 1.0))
+        self.assertFalse(grid.hasPointWithin(1.0, 0, 1.0))
+        self.assertEqual(grid.inBox(1, -1, 1.0), [0])
+        self.assertEqual(grid.inBox(-5, -5, 1.0), [])
+
+    def testPointClusters(self):
+        clusters = spatial.PointClusters(1.0)
+        clusters.addPoints([[0, 0], [10, 10], [0.5, 0]])
+        clusters.addPoints([[10, 10.5], [0.2, 0.1], [5, 5]])
+        self.assertEqual(clusters.groups().tolist(), [0, 1, 0, 1, 0, 2])
+        self.assertEqual(clusters.ranks().tolist(), [0, 0, 1, 1, 2, 0])
+        self.assertEqual(clusters.sizes().tolist(), [3, 2, 1])
+        self.assertAlmostEqual(clusters.centers()[0, 0], 0.7 / 3)
+        self.assertAlmostEqual(clusters.centers()[1, 1], 10.25)
+
+    def testGeodesicDistances(self):
+        d, failed = spatial.geodesicDistances(numpy.array([[0.0, 0.0], [2.3522, 48.8566]]),
+                                              numpy.array([[1.0, 0.0], [-0.1276, 51.5072]]),
+                                              6378137.0, 6356752.314245)
+        self.assertAlmostEqual(d[0], 111319.491, 2)
+        self.assertAlmostEqual(d[1], 343896.891, 2)
+        self.assertFalse(failed.any())
+
+
+class StatisticsTest(unittest.TestCase):
+
+    def testNumericSummary(self):
+        stat = statistics.NumericSummary()
+        for v in [4, 1, NULL, 9, 4, 'x', 7, 2]:
+            stat.addVariant(v)
+        stat.finalize()
+        self.assertEqual(stat.count(), 6)
+        self.assertEqual(stat.sum(), 27)
+        self.assertEqual(stat.min(), 1)
+        self.assertEqual(stat.max(), 9)
+        self.assertAlmostEqual(stat.stDev(), 2.7537853, 6)
+        self.assertEqual(stat.median(), 4)
+        self.assertEqual(stat.firstQuartile(), 2)
+        self.assertEqual(stat.thirdQuartile(), 7)
+        self.assertEqual(stat.variety(), 5)
+        self.assertEqual(stat.majority(), 4)
+        self.assertEqual(stat.minority(), 1)
+
+    def testKllSketch(self):
+        values = numpy.random.RandomState(1).permutation(100000)
+        a = statistics.KllSketch()
+        b = statistics.KllSketch()
+        for v in values[:50000].tolist():
+            a.add(v)
+        for v in values[50000:].tolist():
+            b.add(v)
+        a.merge(b)
+        self.assertFalse(a.isExact())
+        self.assertLess(a.size, 1000)
+        for q in (0.25, 0.5, 0.75):
+            self.assertAlmostEqual(a.quantile(q) / 100000.0, q, 1)
+
+    def testExactSummary(self):
+        values = numpy.random.RandomState(1).randint(0, 1000, 10001).astype(float)
+        stat = statistics.NumericSummary(exact=True, runSize=1000)
+        for i in range(0, len(values), 500):
+            stat.addArray(values[i:i + 500])
+        self.assertEqual(len(stat.spilled.paths), 10)
+        stat.finalize()
+        self.assertEqual(stat.spilled.paths, [])
+        self.assertEqual(stat.median(), numpy.median(values))
+        unique, counts = numpy.unique(values, return_counts=True)
+        self.assertEqual(stat.variety(), len(unique))
+        self.assertEqual(stat.majority(), unique[numpy.argmax(counts)])
+        self.assertEqual(stat.minority(), unique[numpy.argmin(counts)])
+
+    def testSpillBudget(self):
+        # 500 categories sharing room for 1000 values, much less than they hold together
+        random = numpy.random.RandomState(2)
+        budget = statistics.SpillBudget(1000)
+        stats = [statistics.NumericSummary(exact=True, budget=budget) for _ in range(500)]
+        values = [[] for _ in stats]
+        for _ in range(20):
+            for i, stat in enumerate(stats):
+                batch = random.randint(0, 100, random.randint(0, 2 * i // 50 + 1)).astype(float)
+                stat.addArray(batch)
+                values[i].extend(batch)
+                self.assertLessEqual(budget.buffered, 1000)
+        self.assertEqual(budget.buffered, sum(s.spilled.buffered for s in stats))
+        self.assertGreater(sum(len(s.spilled.paths) for s in stats), 0)
+        # the largest categories are spilled first
+        self.assertGreater(len(stats[-1].spilled.paths), len(stats[0].spilled.paths))
+
+        for stat, v in zip(stats, values):
+            stat.finalize()
+            self.assertEqual(stat.count(), len(v))
+            if v:
+                self.assertEqual(stat.median(), numpy.median(v))
+                self.assertEqual(stat.variety(), len(set(v)))
+        self.assertEqual(budget.buffered, 0)
+        self.assertFalse(budget.members)
+
+    def testAccumulate(self):
+        values = numpy.arange(100000, dtype=float)
+        batches = [(i, values[i:i + 1000]) for i in range(0, len(values), 1000)]
+        stat = statistics.accumulate(iter(batches), statistics.NumericSummary,
+                                     statistics.NumericSummary.addArray, statistics.NumericSummary.merge,
+                                     threads=4, partitionSize=1000)
+        stat.finalize()
+        self.assertEqual(stat.count(), 100000)
+        self.assertEqual(stat.sum(), values.sum())
+        self.assertAlmostEqual(stat.stDev(), values.std(), 6)
+        self.assertAlmostEqual(stat.median() / 100000.0, 0.5, 1)
+
+
 if __name__ == '__main__':
     unittest.main()
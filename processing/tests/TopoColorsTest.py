@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    TopoColorsTest.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by QGIS Processing contributors
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Processing contributors'
+__date__ = 'October 2026'
+__copyright__ = '(C) 2026, QGIS Processing contributors'
+
+import numpy
+
+from qgis.core import (QgsFeature,
+                       QgsGeometry,
+                       QgsProcessingFeedback,
+                       QgsRectangle,
+                       QgsSpatialIndex)
+from qgis.testing import start_app, unittest
+
+from processing.algs.qgis.TopoColors import ColoringAlgorithm, Graph, TopoColor
+
+start_app()
+
+
+def adjacency(graph):
+    return [graph.neighbours(i).tolist() for i in range(graph.node_count())]
+
+
+class TopoColorsTest(unittest.TestCase):
+
+    def testGraphFromEdges(self):
+        graph = Graph.from_edges(5, numpy.array([0, 0, 1, 2], dtype=numpy.int64),
+                                 numpy.array([3, 1, 2, 3], dtype=numpy.int64))
+        self.assertEqual(graph.indptr.tolist(), [0, 2, 4, 6, 8, 8])
+        self.assertEqual(adjacency(graph), [[1, 3], [0, 2], [1, 3], [0, 2], []])
+        self.assertEqual(graph.degree().tolist(), [2, 2, 2, 2, 0])
+
+        graph = Graph.from_edges(0, numpy.array([], dtype=numpy.int64), numpy.array([], dtype=numpy.int64))
+        self.assertEqual(graph.node_count(), 0)
+
+    def testComputeGraph(self):
+        # a 3x3 grid of squares, feature ids don't follow the order of the geometries
+        ids = numpy.array([17, 3, 8, 12, 1, 30, 5, 21, 9], dtype=numpy.int64)
+        geometries = []
+        index = QgsSpatialIndex()
+        for i, fid in enumerate(ids.tolist()):
+            x, y = i % 3, i // 3
+            f = QgsFeature(fid)
+            f.setGeometry(QgsGeometry.fromRect(QgsRectangle(x, y, x + 1, y + 1)))
+            index.addFeature(f)
+            geometries.append(f.geometry())
+
+        expected = [[j for j in range(9) if j != i and abs(j % 3 - i % 3) <= 1 and abs(j // 3 - i // 3) <= 1]
+                    for i in range(9)]
+        # the result does not depend on how features are split between threads
+        for chunk_size in (1, 2, 4, 100):
+            graph = TopoColor.compute_graph(ids, geometries, index, QgsProcessingFeedback(),
+                                            threads=3, chunk_size=chunk_size)
+            self.assertEqual(adjacency(graph), expected)
+
+        # squares two units apart only touch with a minimum distance
+        geometries = [QgsGeometry.fromRect(QgsRectangle(x, 0, x + 1, 1)) for x in (0, 2)]
+        index = QgsSpatialIndex()
+        for fid, g in zip((4, 2), geometries):
+            f = QgsFeature(fid)
+            f.setGeometry(g)
+            index.addFeature(f)
+        ids = numpy.array([4, 2], dtype=numpy.int64)
+        self.assertEqual(adjacency(TopoColor.compute_graph(ids, geometries, index, QgsProcessingFeedback())),
+                         [[], []])
+        self.assertEqual(adjacency(TopoColor.compute_graph(ids, geometries, index, QgsProcessingFeedback(),
+                                                           min_distance=1.5)),
+                         [[1], [0]])
+
+    def testColoring(self):
+        # a wheel with an odd rim needs 4 colors, a complete graph of 6 nodes needs 6
+        rim = numpy.arange(1, 6)
+        wheel = Graph.from_edges(6, numpy.concatenate([numpy.zeros(5, dtype=numpy.int64), rim]),
+                                 numpy.concatenate([rim, numpy.roll(rim, 1)]))
+        rows, cols = numpy.triu_indices(6, 1)
+        complete = Graph.from_edges(6, rows.astype(numpy.int64), cols.astype(numpy.int64))
+
+        for graph, colors_required in ((wheel, 4), (complete, 6)):
+            colors = ColoringAlgorithm.balanced([], graph, QgsProcessingFeedback(), min_colors=3)
+            self.assertEqual(int(colors.max()), colors_required)
+            self.assertGreaterEqual(int(colors.min()), 1)
+            for i in range(graph.node_count()):
+                self.assertNotIn(colors[i], colors[graph.neighbours(i)].tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    TriangulationTest.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by QGIS Processing contributors
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+
+Run with the "benchmark" argument to time the triangulation backends
+against each other instead of running the tests.
+"""
+
+__author__ = 'QGIS Processing contributors'
+__date__ = 'October 2026'
+__copyright__ = '(C) 2026, QGIS Processing contributors'
+
+import numpy
+
+from qgis.core import QgsGeometry, QgsPointXY, QgsRectangle
+from qgis.testing import start_app, unittest
+
+from processing.algs.qgis import triangulation
+from processing.algs.qgis.triangulation import multiPoint
+
+start_app()
+
+
+def randomPoints(count, seed=1):
+    return numpy.random.RandomState(seed).uniform(0, 1000, (count, 2))
+
+
+class TriangulationTest(unittest.TestCase):
+
+    def testDelaunayBackends(self):
+        xy = randomPoints(500)
+        triangles = [set(tuple(sorted(t)) for t in backend().delaunayTriangles(xy).tolist())
+                     for backend in triangulation.BACKENDS]
+        self.assertEqual(len(triangles[0]), len(triangles[1]))
+        self.assertEqual(triangles[0], triangles[1])
+
+    def testVoronoiBackends(self):
+        xy = randomPoints(500)
+        extent = QgsRectangle(-10, -10, 1010, 1010)
+        for backend in triangulation.BACKENDS:
+            areas = {}
+            for sites, geometries in backend().voronoiCells(xy, extent, chunkSize=100):
+                for site, geom in zip(sites.tolist(), geometries):
+                    self.assertTrue(geom.contains(QgsGeometry.fromPointXY(QgsPointXY(*xy[site]))))
+                    areas[site] = geom.area()
+            self.assertEqual(sorted(areas), list(range(len(xy))))
+            self.assertAlmostEqual(sum(areas.values()), extent.width() * extent.height(), 3)
+
+    def testTrianglePolygons(self):
+        # 3x3 grid of squares without the central one, touching a separate
+        # square at a corner
+        xy = numpy.array([[x, y] for y in range(4) for x in range(4)] + [[4, 4], [3, 4]], dtype=numpy.float64)
+        triangles = []
+        for y in range(3):
+            for x in range(3):
+                if (x, y) != (1, 1):
+                    i = y * 4 + x
+                    triangles += [[i, i + 1, i + 5], [i, i + 5, i + 4]]
+        triangles.append([15, 16, 17])
+        polygons = triangulation.trianglePolygons(xy, numpy.array(triangles))
+        self.assertEqual(len(polygons), 2)
+        self.assertEqual([len(holes) for _, holes in polygons], [1, 0])
+        shell, holes = polygons[0]
+        self.assertEqual(len(shell), 12)
+        self.assertEqual(sorted(map(tuple, holes[0].tolist())), [(1, 1), (1, 2), (2, 1), (2, 2)])
+
+    def testAlphaShape(self):
+        xy, _ = triangulation.uniquePoints(randomPoints(2000))
+        triangles = triangulation.GeosBackend().delaunayTriangles(xy)
+        hull = triangulation.alphaShape(xy, triangles, 1)
+        self.assertEqual(len(hull), 1)
+        polygon = QgsGeometry.fromPolygonXY([[QgsPointXY(x, y) for x, y in hull[0][0].tolist() + hull[0][0][:1].tolist()]])
+        self.assertAlmostEqual(polygon.area(), multiPoint(xy).convexHull().area(), 6)
+        for shell, holes in triangulation.alphaShape(xy, triangles, 0.05):
+            rings = [[QgsPointXY(x, y) for x, y in ring.tolist() + ring[:1].tolist()] for ring in [shell] + holes]
+            self.assertTrue(QgsGeometry.fromPolygonXY(rings).isGeosValid())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -28,10 +28,13 @@ from qgis.core import (QgsApplication,
                        QgsProcessingParameterVectorDestination,
                        QgsProcessingParameterRasterDestination,
                        QgsProcessingOutputLayerDefinition,
+                       QgsProcessingException,
                        QgsProject)
 from processing.core.Processing import Processing
 from processing.gui.Postprocessing import handleAlgorithmResults
 from processing.gui.AlgorithmDialog import AlgorithmDialog
+from processing.gui.AlgorithmExecutor import executeBatch
+from processing.tools import dataobjects
 from qgis.utils import iface
 
 
@@ -116,6 +119,46 @@ def run(algOrName, parameters, onFinish=None, feedback=None, context=None, is_ch
         return Processing.runAlgorithm(algOrName, parameters, onFinish=post_process, feedback=feedback, context=context)
 
 
+def runBatch(algOrName, parametersList, feedback=None, maxWorkers=None, onFinish=None):
+    """
+    Executes given algorithm once for each dictionary of parameters, running
+    independent executions in parallel.
+
+    :param algOrName: Either an instance of an algorithm, or an algorithm's ID
+    :param parametersList: List of algorithm parameters dictionaries
+    :param feedback: Processing feedback object, receiving the overall progress and the log of each execution
+    :param maxWorkers: Maximum number of executions running at the same time, defaults to the
+    "Max parallel batch executions" Processing setting
+    :param onFinish: optional function to run after each successful execution, with the algorithm,
+    the context of the execution and the feedback
+
+    :returns list of the results dictionaries of the executions, in order, with None for failed executions
+    :rtype: list
+    """
+    if isinstance(algOrName, QgsProcessingAlgorithm):
+        alg = algOrName
+    else:
+        alg = QgsApplication.processingRegistry().createAlgorithmById(algOrName)
+    if alg is None:
+        raise QgsProcessingException('Error: Algorithm {0} not found\n'.format(algOrName))
+
+    context = dataobjects.createContext(feedback)
+    for row, parameters in enumerate(parametersList):
+        ok, msg = alg.checkParameterValues(parameters, context)
+        if not ok:
+            raise QgsProcessingException('Unable to execute algorithm for row {0}\n{1}'.format(row + 1, msg))
+
+    def row_finished(row, parameters, context, ok, results):
+        if ok and onFinish is not None:
+            onFinish(alg, context, feedback)
+
+    algorithm_results, errors = executeBatch(alg, parametersList, feedback, maxWorkers, row_finished)
+    results = [None] * len(parametersList)
+    for res in algorithm_results:
+        results[res['row']] = res['results']
+    return results
+
+
 def runAndLoadResults(algOrName, parameters, feedback=None, context=None):
     """
     Executes given algorithm and load its results into the current QGIS project
@@ -21,42 +21,178 @@ __author__ = 'Victor Olaya  and Alexander Bruy'
 __date__ = 'February 2013'
 __copyright__ = '(C) 2013, Victor Olaya  and Alexander Bruy'
 
-import struct
-
-from osgeo import gdal
+import numpy
+from osgeo import gdal, ogr
 
 from qgis.core import QgsProcessingException
 
 
-def scanraster(layer, feedback, band_number=1):
-    filename = str(layer.source())
+def openBand(layer, band_number=1):
+    """Opens a raster layer (or a path to a raster file) read-only with
+    GDAL and returns a (dataset, band) tuple.
+
+    The dataset must be kept alive for as long as the band is used.
+    """
+    filename = layer if isinstance(layer, str) else str(layer.source())
     dataset = gdal.Open(filename, gdal.GA_ReadOnly)
-    band = dataset.GetRasterBand(band_number)
+    if dataset is None:
+        raise QgsProcessingException('Could not open raster {}'.format(filename))
+    return dataset, dataset.GetRasterBand(band_number)
+
+
+def blockWindows(band, block_size=None):
+    """Returns a list of (xoff, yoff, xsize, ysize) windows covering the
+    whole band.
+
+    By default the natural block size of the band is used. Strip-organized
+    rasters report one-row blocks, so those are grown to full-width strips
+    of at least 256 rows to keep the number of reads low.
+    """
+    if block_size is None:
+        block_x, block_y = band.GetBlockSize()
+        if block_y < 256 and block_x >= band.XSize:
+            block_y = (256 // block_y + (256 % block_y > 0)) * block_y
+    else:
+        block_x, block_y = block_size
+
+    windows = []
+    for yoff in range(0, band.YSize, block_y):
+        ysize = min(block_y, band.YSize - yoff)
+        for xoff in range(0, band.XSize, block_x):
+            xsize = min(block_x, band.XSize - xoff)
+            windows.append((xoff, yoff, xsize, ysize))
+    return windows
+
+
+def maskNodata(array, nodata):
+    """Returns a masked array hiding nodata (and NaN) values."""
+    if array.dtype.kind == 'f':
+        mask = numpy.isnan(array)
+        if nodata is not None and not numpy.isnan(nodata):
+            mask |= array == nodata
+    elif nodata is not None:
+        mask = array == nodata
+    else:
+        mask = numpy.ma.nomask
+    return numpy.ma.MaskedArray(array, mask=mask)
+
+
+def scanblocks(layer, feedback=None, band_number=1, block_size=None):
+    """Reads a raster band block by block.
+
+    Yields (xoff, yoff, block) tuples, where block is a 2D NumPy masked
+    array with nodata values masked out. Blocks follow the natural block
+    layout of the dataset unless an explicit (xsize, ysize) block_size is
+    passed.
+    """
+    dataset, band = openBand(layer, band_number)
     nodata = band.GetNoDataValue()
-    bandtype = gdal.GetDataTypeName(band.DataType)
-    for y in range(band.YSize):
-        feedback.setProgress(y / float(band.YSize) * 100)
-        scanline = band.ReadRaster(0, y, band.XSize, 1, band.XSize, 1,
-                                   band.DataType)
-        if bandtype == 'Byte':
-            values = struct.unpack('B' * band.XSize, scanline)
-        elif bandtype == 'Int16':
-            values = struct.unpack('h' * band.XSize, scanline)
-        elif bandtype == 'UInt16':
-            values = struct.unpack('H' * band.XSize, scanline)
-        elif bandtype == 'Int32':
-            values = struct.unpack('i' * band.XSize, scanline)
-        elif bandtype == 'UInt32':
-            values = struct.unpack('I' * band.XSize, scanline)
-        elif bandtype == 'Float32':
-            values = struct.unpack('f' * band.XSize, scanline)
-        elif bandtype == 'Float64':
-            values = struct.unpack('d' * band.XSize, scanline)
-        else:
-            raise QgsProcessingException('Raster format not supported')
-        for value in values:
-            if value == nodata:
-                value = None
+    windows = blockWindows(band, block_size)
+    total = 100.0 / len(windows) if windows else 0
+    for current, (xoff, yoff, xsize, ysize) in enumerate(windows):
+        if feedback is not None:
+            if feedback.isCanceled():
+                break
+            feedback.setProgress(int(current * total))
+        array = band.ReadAsArray(xoff, yoff, xsize, ysize)
+        if array is None:
+            raise QgsProcessingException('Could not read raster block at {}, {}'.format(xoff, yoff))
+        yield xoff, yoff, maskNodata(array, nodata)
+
+
+class StatisticsReducer:
+    """Accumulates count, min, max and sum of the valid pixels."""
+
+    def __init__(self):
+        self.count = 0
+        self.min = None
+        self.max = None
+        self.sum = 0.0
+
+    def update(self, block):
+        valid = block.compressed()
+        if valid.size == 0:
+            return
+        self.count += valid.size
+        self.sum += float(valid.sum(dtype=numpy.float64))
+        block_min = float(valid.min())
+        block_max = float(valid.max())
+        self.min = block_min if self.min is None else min(self.min, block_min)
+        self.max = block_max if self.max is None else max(self.max, block_max)
+
+    def merge(self, other):
+        self.count += other.count
+        self.sum += other.sum
+        for attr, func in (('min', min), ('max', max)):
+            value = getattr(other, attr)
+            if value is not None:
+                current = getattr(self, attr)
+                setattr(self, attr, value if current is None else func(current, value))
+
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    def result(self):
+        return {'count': self.count,
+                'min': self.min,
+                'max': self.max,
+                'sum': self.sum,
+                'mean': self.mean()}
+
+
+class HistogramReducer:
+    """Accumulates a histogram of the valid pixels over a fixed range.
+
+    Values outside [minimum, maximum] are ignored, matching
+    numpy.histogram semantics (the last bin is closed).
+    """
+
+    def __init__(self, bins, minimum, maximum):
+        self.edges = numpy.linspace(minimum, maximum, bins + 1)
+        self.counts = numpy.zeros(bins, dtype=numpy.int64)
+
+    def update(self, block):
+        valid = block.compressed()
+        if valid.size:
+            self.counts += numpy.histogram(valid, bins=self.edges)[0]
+
+    def merge(self, other):
+        self.counts += other.counts
+
+    def result(self):
+        return self.counts, self.edges
+
+
+def reduceraster(layer, reducers, feedback=None, band_number=1, block_size=None):
+    """Runs a list of reducers over all blocks of a raster band in a single
+    pass and returns the reducers.
+
+    Reducers accumulate partial results in update(), which receives each
+    masked block in turn, and expose the final value through result().
+    Reducers of the same kind can be combined with merge().
+    """
+    for xoff, yoff, block in scanblocks(layer, feedback, band_number, block_size):
+        for reducer in reducers:
+            reducer.update(block)
+    return reducers
+
+
+def scanraster(layer, feedback, band_number=1):
+    """Yields every pixel value of a raster band in row order, with
+    nodata values replaced by None.
+
+    Kept for compatibility, prefer scanblocks() and reducers for new code.
+    """
+    dataset, band = openBand(layer, band_number)
+    if gdal.GetDataTypeName(band.DataType) not in ('Byte', 'Int16', 'UInt16', 'Int32',
+                                                   'UInt32', 'Float32', 'Float64'):
+        raise QgsProcessingException('Raster format not supported')
+    width = band.XSize
+
+    # full-width strips keep the original scanline order when each block is
+    # flattened in C order; masked values come out of tolist() as None
+    for xoff, yoff, block in scanblocks(layer, feedback, band_number, (width, 256)):
+        for value in block.ravel().tolist():
             yield value
 
 
@@ -68,3 +204,238 @@ def mapToPixel(mX, mY, geoTransform):
 
 def pixelToMap(pX, pY, geoTransform):
     return gdal.ApplyGeoTransform(geoTransform, pX + 0.5, pY + 0.5)
+
+
+def traverseCells(cols, rows):
+    """Returns the (cols, rows) arrays of the cells crossed by a polyline
+    given by the pixel coordinates of its vertices.
+
+    Each segment is walked with Bresenham's algorithm, computed in closed
+    form for all its steps at once. Both ends of every segment are
+    included, so shared vertices appear twice, and horizontal or vertical
+    segments are walked from their lower end.
+    """
+    cols = numpy.asarray(cols, dtype=numpy.int64)
+    rows = numpy.asarray(rows, dtype=numpy.int64)
+    if len(cols) < 2:
+        return numpy.empty(0, dtype=numpy.int64), numpy.empty(0, dtype=numpy.int64)
+
+    width = cols[1:] - cols[:-1]
+    height = rows[1:] - rows[:-1]
+    aligned = (width == 0) | (height == 0)
+    startX = numpy.where(aligned, numpy.minimum(cols[:-1], cols[1:]), cols[:-1])
+    startY = numpy.where(aligned, numpy.minimum(rows[:-1], rows[1:]), rows[:-1])
+    stepX = numpy.where(aligned, 1, numpy.sign(width))
+    stepY = numpy.where(aligned, 1, numpy.sign(height))
+    xMajor = numpy.abs(width) > numpy.abs(height)
+    longest = numpy.maximum(numpy.abs(width), numpy.abs(height))
+    shortest = numpy.minimum(numpy.abs(width), numpy.abs(height))
+
+    counts = longest + 1
+    segment = numpy.repeat(numpy.arange(len(counts)), counts)
+    step = numpy.arange(counts.sum()) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+    # steps taken along the minor axis, the error term starting at half the longest side
+    longest = longest[segment]
+    minor = (longest + 2 * step * shortest[segment]) // numpy.maximum(2 * longest, 1)
+    xMajor = xMajor[segment]
+    return (startX[segment] + stepX[segment] * numpy.where(xMajor, step, minor),
+            startY[segment] + stepY[segment] * numpy.where(xMajor, minor, step))
+
+
+class RasterSampler:
+    """Maps coordinates to the cells of a raster band and reads their values.
+
+    The geotransform is inverted once, so whole coordinate arrays are
+    converted at a time, and values are read with one request for each
+    block holding sampled cells.
+    """
+
+    def __init__(self, layer, band_number=1):
+        self.dataset, self.band = openBand(layer, band_number)
+        self.geoTransform = self.dataset.GetGeoTransform()
+        self.inverse = gdal.InvGeoTransform(self.geoTransform)
+        if self.inverse is None:
+            raise QgsProcessingException('Could not invert the geotransform of raster {}'.format(self.dataset.GetDescription()))
+        self.nodata = self.band.GetNoDataValue()
+
+    def toPixel(self, x, y):
+        """Returns the (cols, rows) arrays of the cells containing map
+        coordinates, truncated like mapToPixel()."""
+        x = numpy.asarray(x, dtype=numpy.float64)
+        y = numpy.asarray(y, dtype=numpy.float64)
+        g = self.inverse
+        return ((g[0] + g[1] * x + g[2] * y).astype(numpy.int64),
+                (g[3] + g[4] * x + g[5] * y).astype(numpy.int64))
+
+    def toMap(self, cols, rows):
+        """Returns a (n, 2) array of the map coordinates of cell centres."""
+        cols = numpy.asarray(cols, dtype=numpy.float64) + 0.5
+        rows = numpy.asarray(rows, dtype=numpy.float64) + 0.5
+        g = self.geoTransform
+        return numpy.column_stack((g[0] + g[1] * cols + g[2] * rows,
+                                   g[3] + g[4] * cols + g[5] * rows))
+
+    def lineCells(self, x, y):
+        """Returns the (cols, rows) arrays of the cells crossed by the
+        polyline with vertices x, y."""
+        return traverseCells(*self.toPixel(x, y))
+
+    def values(self, cols, rows):
+        """Returns a masked array of the values of cells, with nodata cells
+        and cells outside the raster masked out."""
+        cols = numpy.asarray(cols, dtype=numpy.int64)
+        rows = numpy.asarray(rows, dtype=numpy.int64)
+        width = self.band.XSize
+        height = self.band.YSize
+        inside = numpy.flatnonzero((cols >= 0) & (cols < width) & (rows >= 0) & (rows < height))
+        if len(inside) == 0:
+            return numpy.ma.masked_all(len(cols))
+
+        block_x, block_y = self.band.GetBlockSize()
+        blocks = (rows[inside] // block_y) * ((width + block_x - 1) // block_x) + cols[inside] // block_x
+        order = numpy.argsort(blocks, kind='stable')
+        inside = inside[order]
+        starts = numpy.flatnonzero(numpy.diff(blocks[order], prepend=-1))
+        result = None
+        for cells in numpy.split(inside, starts[1:]):
+            xoff = int(cols[cells[0]] // block_x * block_x)
+            yoff = int(rows[cells[0]] // block_y * block_y)
+            block = self.band.ReadAsArray(xoff, yoff, min(block_x, width - xoff), min(block_y, height - yoff))
+            if block is None:
+                raise QgsProcessingException('Could not read raster block at {}, {}'.format(xoff, yoff))
+            if result is None:
+                result = numpy.zeros(len(cols), dtype=block.dtype)
+            result[cells] = block[rows[cells] - yoff, cols[cells] - xoff]
+
+        values = maskNodata(result, self.nodata)
+        outside = numpy.ones(len(cols), dtype=bool)
+        outside[inside] = False
+        values.mask = numpy.ma.getmaskarray(values) | outside
+        return values
+
+
+class ZoneRasterizer:
+    """Burns zone labels into arrays matching windows of a raster.
+
+    Zones are polygons in the raster CRS, given as WKB, and must not
+    overlap. A cell takes the label of the zone containing its centre, or 0
+    if there is none.
+    """
+
+    def __init__(self, geoTransform, geometries, labels):
+        self.geoTransform = geoTransform
+        self.dataSource = ogr.GetDriverByName('Memory').CreateDataSource('zones')
+        self.layer = self.dataSource.CreateLayer('zones', None, ogr.wkbUnknown)
+        self.layer.CreateField(ogr.FieldDefn('zone', ogr.OFTInteger))
+        definition = self.layer.GetLayerDefn()
+        for wkb, label in zip(geometries, labels):
+            feature = ogr.Feature(definition)
+            feature.SetField('zone', int(label))
+            feature.SetGeometry(ogr.CreateGeometryFromWkb(wkb))
+            self.layer.CreateFeature(feature)
+        self.driver = gdal.GetDriverByName('MEM')
+
+    def labels(self, xoff, yoff, xsize, ysize):
+        """Returns the uint32 label array of a window of the raster."""
+        g = self.geoTransform
+        originX = g[0] + xoff * g[1] + yoff * g[2]
+        originY = g[3] + xoff * g[4] + yoff * g[5]
+        cornersX = [originX + col * g[1] + row * g[2] for col in (0, xsize) for row in (0, ysize)]
+        cornersY = [originY + col * g[4] + row * g[5] for col in (0, xsize) for row in (0, ysize)]
+        # only zones reaching the window are rasterized
+        self.layer.SetSpatialFilterRect(min(cornersX), min(cornersY), max(cornersX), max(cornersY))
+
+        dataset = self.driver.Create('', xsize, ysize, 1, gdal.GDT_UInt32)
+        dataset.SetGeoTransform((originX, g[1], g[2], originY, g[4], g[5]))
+        gdal.RasterizeLayer(dataset, [1], self.layer, options=['ATTRIBUTE=zone'])
+        return dataset.GetRasterBand(1).ReadAsArray()
+
+
+def zoneValues(labels, block):
+    """Returns the (zones, values) arrays of the valid cells of a block lying
+    in a zone, values as float64."""
+    valid = (labels > 0) & ~numpy.ma.getmaskarray(block)
+    return labels[valid].astype(numpy.int64), numpy.ma.getdata(block)[valid].astype(numpy.float64)
+
+
+class ZonalRangeReducer:
+    """Accumulates count, min and max of the valid pixels of each zone.
+
+    Arrays are indexed by zone label, label 0 standing for cells outside all
+    zones.
+    """
+
+    def __init__(self, zoneCount):
+        self.count = numpy.zeros(zoneCount + 1, dtype=numpy.int64)
+        self.min = numpy.full(zoneCount + 1, numpy.inf)
+        self.max = numpy.full(zoneCount + 1, -numpy.inf)
+
+    def update(self, labels, block):
+        zones, values = zoneValues(labels, block)
+        if zones.size == 0:
+            return
+        self.count += numpy.bincount(zones, minlength=len(self.count))
+
+        order = numpy.argsort(zones, kind='stable')
+        zones = zones[order]
+        values = values[order]
+        starts = numpy.flatnonzero(numpy.diff(zones, prepend=-1))
+        found = zones[starts]
+        self.min[found] = numpy.minimum(self.min[found], numpy.minimum.reduceat(values, starts))
+        self.max[found] = numpy.maximum(self.max[found], numpy.maximum.reduceat(values, starts))
+
+    def merge(self, other):
+        self.count += other.count
+        numpy.minimum(self.min, other.min, out=self.min)
+        numpy.maximum(self.max, other.max, out=self.max)
+
+
+class ZonalHistogramReducer:
+    """Counts the valid pixels of each zone in bins of a fixed width.
+
+    Bin edges are accumulated from the minimum of each zone, adding step
+    until the maximum is reached, so a maximum lying on the last edge is
+    left out. Bin k of a zone holds the values from edge k - 1, or the
+    minimum, up to but excluding edge k. The bins of all zones share one
+    array.
+    """
+
+    def __init__(self, minimums, maximums, step):
+        edges = []
+        offsets = [0]
+        for minimum, maximum in zip(minimums.tolist(), maximums.tolist()):
+            start = minimum
+            edge = minimum + step
+            while start < maximum:
+                edges.append(edge)
+                start = edge
+                edge += step
+            offsets.append(len(edges))
+        self.edges = numpy.array(edges, dtype=numpy.float64)
+        self.offsets = numpy.array(offsets, dtype=numpy.int64)
+        self.counts = numpy.zeros(len(self.edges), dtype=numpy.int64)
+
+    def update(self, labels, block):
+        zones, values = zoneValues(labels, block)
+        if zones.size == 0:
+            return
+        order = numpy.argsort(zones, kind='stable')
+        zones = zones[order]
+        values = values[order]
+        starts = numpy.flatnonzero(numpy.diff(zones, prepend=-1))
+        ends = numpy.append(starts[1:], len(zones))
+        for zone, start, end in zip(zones[starts].tolist(), starts.tolist(), ends.tolist()):
+            first, last = self.offsets[zone], self.offsets[zone + 1]
+            if first == last:
+                continue
+            # values on an edge belong to the next bin, values past the last edge to none
+            bin_index = numpy.searchsorted(self.edges[first:last], values[start:end], side='right')
+            self.counts[first:last] += numpy.bincount(bin_index, minlength=last - first + 1)[:last - first]
+
+    def merge(self, other):
+        self.counts += other.counts
+
+    def histogram(self, zone):
+        """Returns the (counts, upper bin edges) arrays of a zone."""
+        first, last = self.offsets[zone], self.offsets[zone + 1]
+        return self.counts[first:last], self.edges[first:last]
@@ -0,0 +1,435 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    spatial.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by QGIS Processing contributors
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Processing contributors'
+__date__ = 'October 2026'
+__copyright__ = '(C) 2026, QGIS Processing contributors'
+
+import math
+
+import numpy
+
+from qgis.core import (QgsCoordinateTransform,
+                       QgsFeatureRequest,
+                       QgsPointXY,
+                       QgsWkbTypes)
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+
+def pointArrays(source, request=None, attributes=None, feedback=None):
+    """Loads the point features of a source in a single pass.
+
+    Returns a (fids, xy, values) tuple: an int64 array of feature ids, a
+    (n, 2) float64 array of coordinates and, for each index in attributes,
+    a list of the attribute values. Features without geometry are skipped,
+    and multipoint features give one row for each of their parts.
+    """
+    if request is None:
+        request = QgsFeatureRequest()
+    attributes = attributes or []
+    request.setSubsetOfAttributes(attributes)
+
+    fids = []
+    coords = []
+    values = [[] for _ in attributes]
+    total = 100.0 / source.featureCount() if source.featureCount() else 0
+    for current, f in enumerate(source.getFeatures(request)):
+        if feedback is not None:
+            if feedback.isCanceled():
+                break
+            feedback.setProgress(int(current * total))
+        if not f.hasGeometry():
+            continue
+        geometry = f.geometry().constGet()
+        if QgsWkbTypes.isMultiType(geometry.wkbType()):
+            parts = [geometry.geometryN(i) for i in range(geometry.numGeometries())]
+        else:
+            parts = [geometry]
+        for point in parts:
+            fids.append(f.id())
+            coords.append((point.x(), point.y()))
+            for i, index in enumerate(attributes):
+                values[i].append(f[index])
+
+    xy = numpy.array(coords, dtype=numpy.float64).reshape(-1, 2)
+    return numpy.array(fids, dtype=numpy.int64), xy, values
+
+
+class PointIndex:
+    """Nearest neighbour index over a (n, 2) array of points.
+
+    Uses scipy's cKDTree when scipy is available, and otherwise a uniform
+    grid whose cells are stored as contiguous runs of a sorted index array,
+    so that every row of cells around a query is a single array slice.
+    """
+
+    POINTS_PER_CELL = 4
+
+    def __init__(self, xy):
+        self.xy = numpy.asarray(xy, dtype=numpy.float64).reshape(-1, 2)
+        self.tree = None
+        if cKDTree is not None:
+            self.tree = cKDTree(self.xy)
+        elif len(self.xy):
+            self._buildGrid()
+
+    def _buildGrid(self):
+        xmin, ymin = self.xy.min(axis=0)
+        xmax, ymax = self.xy.max(axis=0)
+        area = max((xmax - xmin) * (ymax - ymin), 0.0)
+        cell = math.sqrt(area * self.POINTS_PER_CELL / len(self.xy)) if area > 0 else 0.0
+        if cell <= 0:
+            cell = max(xmax - xmin, ymax - ymin, 1.0)
+        self.cell = cell
+        self.origin = (xmin, ymin)
+        self.nx = int((xmax - xmin) / cell) + 1
+        self.ny = int((ymax - ymin) / cell) + 1
+
+        ix, iy = self._cellOf(self.xy[:, 0], self.xy[:, 1])
+        keys = iy * self.nx + ix
+        self.order = numpy.argsort(keys, kind='stable')
+        self.starts = numpy.searchsorted(keys[self.order], numpy.arange(self.nx * self.ny + 1))
+
+    def _cellOf(self, x, y):
+        ix = numpy.clip(((x - self.origin[0]) // self.cell).astype(numpy.int64), 0, self.nx - 1)
+        iy = numpy.clip(((y - self.origin[1]) // self.cell).astype(numpy.int64), 0, self.ny - 1)
+        return ix, iy
+
+    def _square(self, ix, iy, r):
+        """Returns the indices of the points in the cells at most r cells away
+        from (ix, iy).
+        """
+        x0 = max(ix - r, 0)
+        x1 = min(ix + r, self.nx - 1)
+        parts = []
+        for row in range(max(iy - r, 0), min(iy + r, self.ny - 1) + 1):
+            parts.append(self.order[self.starts[row * self.nx + x0]:self.starts[row * self.nx + x1 + 1]])
+        return numpy.concatenate(parts) if parts else numpy.empty(0, dtype=numpy.int64)
+
+    def _gridQueryOne(self, x, y, k):
+        ix, iy = self._cellOf(numpy.array([x]), numpy.array([y]))
+        ix, iy = int(ix[0]), int(iy[0])
+        # distance in cells from the query to the grid, for queries outside of it
+        offset = int(max(0.0, self.origin[0] - x, x - self.origin[0] - self.nx * self.cell,
+                         self.origin[1] - y, y - self.origin[1] - self.ny * self.cell) // self.cell)
+        max_r = max(self.nx, self.ny)
+        r = offset
+        candidates = self._square(ix, iy, r)
+        while len(candidates) < k and r < max_r:
+            r += 1
+            candidates = self._square(ix, iy, r)
+
+        d = numpy.hypot(self.xy[candidates, 0] - x, self.xy[candidates, 1] - y)
+        # the k-th candidate distance bounds the search radius, make sure
+        # the square of cells covers the whole circle
+        kth = numpy.partition(d, k - 1)[k - 1]
+        reach = int(math.ceil(kth / self.cell)) + offset
+        if reach > r:
+            candidates = self._square(ix, iy, reach)
+            d = numpy.hypot(self.xy[candidates, 0] - x, self.xy[candidates, 1] - y)
+        best = numpy.argsort(d, kind='stable')[:k]
+        return d[best], candidates[best]
+
+    def query(self, points, k):
+        """Returns (distances, indices) arrays of shape (m, k) with the k
+        nearest points of each of the m query points, nearest first.
+
+        k is capped to the number of indexed points.
+        """
+        points = numpy.asarray(points, dtype=numpy.float64).reshape(-1, 2)
+        k = min(k, len(self.xy))
+        if k == 0 or len(points) == 0:
+            return numpy.empty((len(points), 0)), numpy.empty((len(points), 0), dtype=numpy.int64)
+        if self.tree is not None:
+            distances, indices = self.tree.query(points, k)
+            return distances.reshape(len(points), k), indices.reshape(len(points), k)
+
+        distances = numpy.empty((len(points), k))
+        indices = numpy.empty((len(points), k), dtype=numpy.int64)
+        for i, (x, y) in enumerate(points):
+            distances[i], indices[i] = self._gridQueryOne(x, y, k)
+        return distances, indices
+
+    def queryRadius(self, x, y, radius):
+        """Returns the indices of the points within radius of (x, y)."""
+        if len(self.xy) == 0:
+            return numpy.empty(0, dtype=numpy.int64)
+        if self.tree is not None:
+            return numpy.array(self.tree.query_ball_point((x, y), radius), dtype=numpy.int64)
+        ix, iy = self._cellOf(numpy.array([x]), numpy.array([y]))
+        reach = int(math.ceil(radius / self.cell)) + 1
+        candidates = self._square(int(ix[0]), int(iy[0]), reach)
+        d = numpy.hypot(self.xy[candidates, 0] - x, self.xy[candidates, 1] - y)
+        return candidates[d <= radius]
+
+
+class PointGrid:
+    """Uniform grid hash over points inserted one at a time.
+
+    Cells are keyed by their integer coordinates in a dict, so looking up the
+    neighbours of a location only visits the few cells covering the search
+    distance. Lookups are cheapest when the cell size matches the distance
+    used for searching.
+    """
+
+    def __init__(self, cellSize):
+        self.cellSize = float(cellSize) if cellSize > 0 else 1.0
+        self.cells = {}
+        self.x = []
+        self.y = []
+
+    def __len__(self):
+        return len(self.x)
+
+    def insert(self, x, y):
+        """Adds a point and returns its index, starting from 0."""
+        i = len(self.x)
+        self.x.append(x)
+        self.y.append(y)
+        key = (math.floor(x / self.cellSize), math.floor(y / self.cellSize))
+        cell = self.cells.get(key)
+        if cell is None:
+            self.cells[key] = [i]
+        else:
+            cell.append(i)
+        return i
+
+    def candidates(self, x, y, distance):
+        """Yields the indices of the points in the cells overlapping the
+        square of half side distance centred on (x, y).
+        """
+        size = self.cellSize
+        x0 = math.floor((x - distance) / size)
+        x1 = math.floor((x + distance) / size)
+        y0 = math.floor((y - distance) / size)
+        y1 = math.floor((y + distance) / size)
+        cells = self.cells
+        for ix in range(x0, x1 + 1):
+            for iy in range(y0, y1 + 1):
+                cell = cells.get((ix, iy))
+                if cell is not None:
+                    yield from cell
+
+    def inBox(self, x, y, distance):
+        """Returns the indices of the points inside the square of half side
+        distance centred on (x, y), boundary included.
+        """
+        px = self.x
+        py = self.y
+        return [i for i in self.candidates(x, y, distance)
+                if abs(px[i] - x) <= distance and abs(py[i] - y) <= distance]
+
+    def hasPointWithin(self, x, y, distance):
+        """Returns True if a point lies closer than distance to (x, y)."""
+        px = self.x
+        py = self.y
+        limit = distance * distance
+        for i in self.candidates(x, y, distance):
+            dx = px[i] - x
+            dy = py[i] - y
+            if dx * dx + dy * dy < limit:
+                return True
+        return False
+
+
+class PointClusters:
+    """Streaming clustering of points closer than a tolerance.
+
+    This follows QgsPointDistanceRenderer: a point joins the group with the
+    nearest center among the groups whose first point lies in the square of
+    half side tolerance around it, or starts a new group. Group centers are
+    the running means of their points.
+
+    Points are fed in batches with addPoints, in a single pass.
+    """
+
+    def __init__(self, tolerance):
+        self.tolerance = tolerance
+        # first point of each group, indexed by group number
+        self.seeds = PointGrid(tolerance)
+        self.centerX = []
+        self.centerY = []
+        self.counts = []
+        self._groups = []
+        self._ranks = []
+
+    def groupCount(self):
+        return len(self.counts)
+
+    def addPoints(self, xy):
+        """Assigns a (n, 2) array of points to groups."""
+        xy = numpy.asarray(xy, dtype=numpy.float64).reshape(-1, 2)
+        groups = numpy.empty(len(xy), dtype=numpy.int64)
+        ranks = numpy.empty(len(xy), dtype=numpy.int64)
+        seeds = self.seeds
+        center_x = self.centerX
+        center_y = self.centerY
+        counts = self.counts
+        tolerance = self.tolerance
+        for i, (x, y) in enumerate(xy.tolist()):
+            best = -1
+            best_distance = 0.0
+            for g in seeds.inBox(x, y, tolerance):
+                dx = center_x[g] - x
+                dy = center_y[g] - y
+                distance = dx * dx + dy * dy
+                if best < 0 or distance < best_distance or (distance == best_distance and g < best):
+                    best = g
+                    best_distance = distance
+
+            if best < 0:
+                best = seeds.insert(x, y)
+                center_x.append(x)
+                center_y.append(y)
+                counts.append(1)
+                ranks[i] = 0
+            else:
+                n = counts[best]
+                center_x[best] = (center_x[best] * n + x) / (n + 1.0)
+                center_y[best] = (center_y[best] * n + y) / (n + 1.0)
+                counts[best] = n + 1
+                ranks[i] = n
+            groups[i] = best
+
+        self._groups.append(groups)
+        self._ranks.append(ranks)
+
+    def groups(self):
+        """Returns the group of every point added, in insertion order."""
+        return numpy.concatenate(self._groups) if self._groups else numpy.empty(0, dtype=numpy.int64)
+
+    def ranks(self):
+        """Returns the position of every point added within its group."""
+        return numpy.concatenate(self._ranks) if self._ranks else numpy.empty(0, dtype=numpy.int64)
+
+    def centers(self):
+        """Returns a (groups, 2) array with the center of every group."""
+        return numpy.column_stack([numpy.array(self.centerX, dtype=numpy.float64),
+                                   numpy.array(self.centerY, dtype=numpy.float64)]).reshape(-1, 2)
+
+    def sizes(self):
+        """Returns the number of points in every group."""
+        return numpy.array(self.counts, dtype=numpy.int64)
+
+
+def planarDistances(a, b):
+    """Euclidean distances between matching rows of two coordinate arrays."""
+    return numpy.hypot(a[..., 0] - b[..., 0], a[..., 1] - b[..., 1])
+
+
+def geodesicDistances(a, b, semi_major, semi_minor, iterations=200, tolerance=1e-12):
+    """Vectorized Vincenty inverse formula.
+
+    a and b hold (longitude, latitude) pairs in degrees, broadcastable to
+    each other. Returns the distances in meters, and a boolean array
+    flagging the (nearly antipodal) pairs the iteration did not converge
+    for, which callers should measure another way.
+    """
+    f = (semi_major - semi_minor) / semi_major
+    lon1, lat1 = numpy.radians(a[..., 0]), numpy.radians(a[..., 1])
+    lon2, lat2 = numpy.radians(b[..., 0]), numpy.radians(b[..., 1])
+    lon1, lat1, lon2, lat2 = numpy.broadcast_arrays(lon1, lat1, lon2, lat2)
+
+    L = lon2 - lon1
+    U1 = numpy.arctan((1 - f) * numpy.tan(lat1))
+    U2 = numpy.arctan((1 - f) * numpy.tan(lat2))
+    sinU1, cosU1 = numpy.sin(U1), numpy.cos(U1)
+    sinU2, cosU2 = numpy.sin(U2), numpy.cos(U2)
+
+    lam = L.copy()
+    active = numpy.ones(L.shape, dtype=bool)
+    sinSigma = cosSigma = sigma = cosSqAlpha = cos2SigmaM = numpy.zeros(L.shape)
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        for _ in range(iterations):
+            sinLam, cosLam = numpy.sin(lam), numpy.cos(lam)
+            sinSigma = numpy.hypot(cosU2 * sinLam, cosU1 * sinU2 - sinU1 * cosU2 * cosLam)
+            cosSigma = sinU1 * sinU2 + cosU1 * cosU2 * cosLam
+            sigma = numpy.arctan2(sinSigma, cosSigma)
+            sinAlpha = numpy.where(sinSigma == 0, 0.0, cosU1 * cosU2 * sinLam / sinSigma)
+            cosSqAlpha = 1 - sinAlpha ** 2
+            # equatorial lines have cosSqAlpha == 0
+            cos2SigmaM = numpy.where(cosSqAlpha == 0, 0.0, cosSigma - 2 * sinU1 * sinU2 / cosSqAlpha)
+            C = f / 16 * cosSqAlpha * (4 + f * (4 - 3 * cosSqAlpha))
+            previous = lam
+            lam = L + (1 - C) * f * sinAlpha * (
+                sigma + C * sinSigma * (cos2SigmaM + C * cosSigma * (-1 + 2 * cos2SigmaM ** 2)))
+            active = numpy.abs(lam - previous) > tolerance
+            if not active.any():
+                break
+
+        uSq = cosSqAlpha * (semi_major ** 2 - semi_minor ** 2) / semi_minor ** 2
+        A = 1 + uSq / 16384 * (4096 + uSq * (-768 + uSq * (320 - 175 * uSq)))
+        B = uSq / 1024 * (256 + uSq * (-128 + uSq * (74 - 47 * uSq)))
+        deltaSigma = B * sinSigma * (cos2SigmaM + B / 4 * (
+            cosSigma * (-1 + 2 * cos2SigmaM ** 2) -
+            B / 6 * cos2SigmaM * (-3 + 4 * sinSigma ** 2) * (-3 + 4 * cos2SigmaM ** 2)))
+        distances = semi_minor * A * (sigma - deltaSigma)
+
+    failed = active | ~numpy.isfinite(distances)
+    distances = numpy.where(sinSigma == 0, 0.0, distances)
+    return distances, failed & (sinSigma != 0)
+
+
+class DistanceCalculator:
+    """Measures distances between coordinate arrays the same way a
+    QgsDistanceArea does: planar in the source CRS units, or geodesic on
+    the ellipsoid when one is set.
+    """
+
+    def __init__(self, distance_area, transform_context):
+        self.da = distance_area
+        self.ellipsoidal = distance_area.willUseEllipsoid()
+        if self.ellipsoidal:
+            self.transform = QgsCoordinateTransform(distance_area.sourceCrs(),
+                                                    distance_area.ellipsoidCrs(),
+                                                    transform_context)
+            self.semi_major = distance_area.ellipsoidSemiMajor()
+            self.semi_minor = distance_area.ellipsoidSemiMinor()
+
+    def toEllipsoid(self, xy):
+        """Returns the coordinates as (longitude, latitude) on the ellipsoid."""
+        if not self.ellipsoidal:
+            return xy
+        if self.transform.isShortCircuited():
+            return numpy.array(xy, dtype=numpy.float64)
+        out = numpy.empty_like(xy, dtype=numpy.float64)
+        for i, (x, y) in enumerate(xy):
+            p = self.transform.transform(x, y)
+            out[i] = (p.x(), p.y())
+        return out
+
+    def distances(self, a, b):
+        """Distances between matching rows of a and b, both already passed
+        through toEllipsoid() and broadcastable to each other.
+        """
+        if not self.ellipsoidal:
+            return planarDistances(a, b)
+
+        d, failed = geodesicDistances(a, b, self.semi_major, self.semi_minor)
+        if failed.any():
+            a, b = numpy.broadcast_arrays(a, b)
+            for i in zip(*numpy.nonzero(failed)):
+                # measureLine expects source CRS coordinates
+                p1 = self.transform.transform(QgsPointXY(*a[i]), self.transform.ReverseTransform)
+                p2 = self.transform.transform(QgsPointXY(*b[i]), self.transform.ReverseTransform)
+                d[i] = self.da.measureLine(p1, p2)
+        return d
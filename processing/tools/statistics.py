@@ -0,0 +1,635 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    statistics.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by QGIS Processing contributors
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Processing contributors'
+__date__ = 'October 2026'
+__copyright__ = '(C) 2026, QGIS Processing contributors'
+
+import math
+import os
+import queue
+import tempfile
+import threading
+
+import numpy
+
+from qgis.core import NULL
+
+
+class Moments:
+    """Count, sum, extremes, mean and variance of a stream of numbers,
+    updated with Welford's algorithm.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.nan
+        self.max = math.nan
+
+    def add(self, value):
+        if self.count == 0:
+            self.min = self.max = value
+        elif value < self.min:
+            self.min = value
+        elif value > self.max:
+            self.max = value
+        self.count += 1
+        self.sum += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def addArray(self, values):
+        """Adds an array of values at once."""
+        if len(values) == 0:
+            return
+        other = Moments()
+        other.count = len(values)
+        other.sum = float(values.sum())
+        other.mean = other.sum / other.count
+        other.m2 = float(numpy.square(values - other.mean).sum())
+        other.min = float(values.min())
+        other.max = float(values.max())
+        self.merge(other)
+
+    def merge(self, other):
+        """Adds the values seen by another Moments instance."""
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.__dict__.update(other.__dict__)
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def variance(self):
+        """Population variance, as computed by QgsStatisticalSummary."""
+        return self.m2 / self.count if self.count else math.nan
+
+
+class KllSketch:
+    """Mergeable quantile sketch after Karnin, Lang and Liberty, "Optimal
+    Quantile Approximation in Streams" (2016).
+
+    Values are kept in a stack of compactors, an item at level h standing
+    for 2^h values. Compactions sort a full level and promote every other
+    item, alternating between odd and even items so that results are
+    reproducible. Until the first compaction the sketch holds all values
+    and its quantiles are exact.
+    """
+
+    def __init__(self, k=200, c=2.0 / 3.0):
+        self.k = k
+        self.c = c
+        self.compactors = [[]]
+        self.offsets = [0]
+        self.size = 0
+        self.maxSize = self._capacity(0)
+
+    def _capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return int(math.ceil(self.k * self.c ** depth)) + 1
+
+    def _grow(self):
+        self.compactors.append([])
+        self.offsets.append(0)
+        self.maxSize = sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def _compress(self):
+        for h, items in enumerate(self.compactors):
+            if len(items) >= self._capacity(h):
+                if h + 1 == len(self.compactors):
+                    self._grow()
+                items.sort()
+                kept = [items.pop()] if len(items) % 2 else []
+                self.compactors[h + 1].extend(items[self.offsets[h]::2])
+                self.offsets[h] = 1 - self.offsets[h]
+                self.compactors[h] = kept
+                self.size = sum(len(c) for c in self.compactors)
+                return
+
+    def add(self, value):
+        self.compactors[0].append(value)
+        self.size += 1
+        if self.size >= self.maxSize:
+            self._compress()
+
+    def addArray(self, values):
+        """Adds an array of values at once."""
+        self.compactors[0].extend(values.tolist())
+        self.size += len(values)
+        while self.size >= self.maxSize:
+            self._compress()
+
+    def merge(self, other):
+        """Adds the values seen by another sketch."""
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for h, items in enumerate(other.compactors):
+            self.compactors[h].extend(items)
+        self.size = sum(len(c) for c in self.compactors)
+        while self.size >= self.maxSize:
+            self._compress()
+
+    def isExact(self):
+        return len(self.compactors) == 1
+
+    def values(self):
+        """Returns the retained values in ascending order along with their
+        weights.
+        """
+        pairs = sorted((v, 1 << h) for h, items in enumerate(self.compactors) for v in items)
+        return [p[0] for p in pairs], [p[1] for p in pairs]
+
+    def quantile(self, q):
+        """Returns the smallest retained value whose rank reaches the
+        fraction q of the values seen.
+        """
+        values, weights = self.values()
+        if not values:
+            return math.nan
+        target = q * sum(weights)
+        rank = 0
+        for value, weight in zip(values, weights):
+            rank += weight
+            if rank >= target:
+                return value
+        return values[-1]
+
+
+def hashValues(values):
+    """Scrambles float64 values into uniformly distributed uint64 hashes
+    (splitmix64 finalizer).
+    """
+    h = (numpy.asarray(values, dtype=numpy.float64) + 0.0).view(numpy.uint64)
+    h = (h ^ (h >> numpy.uint64(30))) * numpy.uint64(0xbf58476d1ce4e5b9)
+    h = (h ^ (h >> numpy.uint64(27))) * numpy.uint64(0x94d049bb133111eb)
+    return h ^ (h >> numpy.uint64(31))
+
+
+class FrequentValues:
+    """Counts of the distinct values of a stream.
+
+    Counts are exact up to capacity distinct values. Beyond that only a
+    Misra-Gries summary of the heavy hitters is kept, which still holds
+    every value occurring more than n / (capacity + 1) times, and the
+    number of distinct values is estimated from the k minimum hashes of
+    the values. Both summaries are mergeable.
+    """
+
+    def __init__(self, capacity=10000, k=1024):
+        self.capacity = capacity
+        self.k = k
+        self.counts = {}
+        self.exact = True
+        self.hashes = numpy.empty(0, dtype=numpy.uint64)
+
+    def addArray(self, values):
+        """Adds an array of values at once."""
+        if len(values) == 0:
+            return
+        unique, counts = numpy.unique(values, return_counts=True)
+        self._update(zip(unique.tolist(), counts.tolist()))
+        self.hashes = numpy.union1d(self.hashes, hashValues(unique))[:self.k]
+
+    def _update(self, items):
+        counts = self.counts
+        for value, count in items:
+            counts[value] = counts.get(value, 0) + count
+        if len(counts) > self.capacity:
+            # subtract the (capacity + 1)th largest count from all counts
+            self.exact = False
+            cut = sorted(counts.values(), reverse=True)[self.capacity]
+            self.counts = {v: c - cut for v, c in counts.items() if c > cut}
+
+    def merge(self, other):
+        self._update(other.counts.items())
+        self.exact = self.exact and other.exact
+        self.hashes = numpy.union1d(self.hashes, other.hashes)[:self.k]
+
+    def variety(self):
+        if self.exact:
+            return len(self.counts)
+        return int(round((self.k - 1) * 2.0 ** 64 / float(self.hashes[self.k - 1])))
+
+    def minority(self):
+        """Rarest value, the smallest one on ties. Only known while counts
+        are exact.
+        """
+        if not self.counts or not self.exact:
+            return math.nan
+        return min(self.counts.items(), key=lambda item: (item[1], item[0]))[0]
+
+    def majority(self):
+        """Most frequent value, the smallest one on ties."""
+        if not self.counts:
+            return math.nan
+        return min(self.counts.items(), key=lambda item: (-item[1], item[0]))[0]
+
+
+class SpillBudget:
+    """Number of values a group of SpilledValues may buffer in memory
+    together. When the limit is exceeded, the largest buffers are spilled
+    until half of it is free, so memory stays bounded however many
+    instances share the budget.
+
+    A budget is not thread safe, all its instances must be fed from the
+    same thread.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.buffered = 0
+        self.members = set()
+
+    def add(self, count):
+        self.buffered += count
+        if self.buffered > self.limit:
+            for spilled in sorted(self.members, key=lambda m: m.buffered, reverse=True):
+                if self.buffered <= self.limit // 2 or not spilled.buffered:
+                    break
+                spilled._spill()
+
+
+class SpilledValues:
+    """Keeps all the values of a stream for exact statistics, writing them
+    to disk in sorted runs of runSize values so that memory stays bounded.
+
+    Instances may also share a SpillBudget, which spills their buffers
+    early when they hold too many values together.
+    """
+
+    RUN_SIZE = 1 << 22
+
+    def __init__(self, directory=None, runSize=RUN_SIZE, budget=None):
+        self.directory = directory
+        self.runSize = runSize
+        self.budget = budget
+        self.buffer = []
+        self.buffered = 0
+        self.paths = []
+        if budget is not None:
+            budget.members.add(self)
+
+    def _grow(self, count):
+        self.buffered += count
+        if self.budget is not None:
+            self.budget.add(count)
+        if self.buffered >= self.runSize:
+            self._spill()
+
+    def addArray(self, values):
+        if len(values) == 0:
+            return
+        self.buffer.append(numpy.array(values, dtype=numpy.float64))
+        self._grow(len(values))
+
+    def _release(self):
+        if self.budget is not None:
+            self.budget.buffered -= self.buffered
+        self.buffer = []
+        self.buffered = 0
+
+    def _spill(self):
+        run = numpy.sort(numpy.concatenate(self.buffer))
+        handle, path = tempfile.mkstemp(suffix='.npy', dir=self.directory)
+        with os.fdopen(handle, 'wb') as f:
+            numpy.save(f, run)
+        self.paths.append(path)
+        self._release()
+
+    def merge(self, other):
+        """Takes over the values of another instance."""
+        self.paths.extend(other.paths)
+        other.paths = []
+        buffer, buffered = other.buffer, other.buffered
+        other._release()
+        if buffered:
+            self.buffer.extend(buffer)
+            self._grow(buffered)
+
+    def sortedCounts(self, chunkSize=1 << 20):
+        """Yields (values, counts) arrays of distinct values in ascending
+        order with their number of occurrences, merging the sorted runs by
+        chunks of about chunkSize values.
+        """
+        runs = [numpy.load(path, mmap_mode='r') for path in self.paths]
+        if self.buffer:
+            runs.append(numpy.sort(numpy.concatenate(self.buffer)))
+        positions = [0] * len(runs)
+        step = max(1, chunkSize // max(len(runs), 1))
+        while True:
+            active = [i for i in range(len(runs)) if positions[i] < len(runs[i])]
+            if not active:
+                return
+            # all the values up to the smallest of the next step values of
+            # each run can be merged now
+            upper = min(runs[i][min(positions[i] + step, len(runs[i])) - 1] for i in active)
+            parts = []
+            upperCount = 0
+            for i in active:
+                run = runs[i]
+                below = positions[i] + int(numpy.searchsorted(run[positions[i]:], upper, side='left'))
+                end = below + int(numpy.searchsorted(run[below:], upper, side='right'))
+                parts.append(numpy.asarray(run[positions[i]:below]))
+                upperCount += end - below
+                positions[i] = end
+            values, counts = numpy.unique(numpy.concatenate(parts), return_counts=True)
+            yield numpy.append(values, upper), numpy.append(counts, upperCount)
+
+    def close(self):
+        for path in self.paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.paths = []
+        self._release()
+        if self.budget is not None:
+            self.budget.members.discard(self)
+
+
+def middleRanks(start, n):
+    """0-based ranks of the values averaged into the median of the n
+    sorted values starting at rank start.
+    """
+    if n % 2:
+        return [start + n // 2]
+    return [start + n // 2 - 1, start + n // 2]
+
+
+def quartileRanks(n):
+    """Ranks of the values averaged into the first quartile, median and
+    third quartile of n sorted values, as computed by QgsStatisticalSummary:
+    the quartiles are the medians of the lower and upper halves, both
+    halves holding the median for odd counts.
+    """
+    half = n // 2 if n % 2 == 0 else n // 2 + 1
+    return middleRanks(0, half), middleRanks(0, n), middleRanks(n - half, half)
+
+
+class NumericSummary:
+    """Streaming replacement for QgsStatisticalSummary.
+
+    Moments are always exact. With exact set, values are spilled to disk
+    and the median, quartiles and distinct value statistics are computed
+    exactly from them by finalize(), in runs of runSize values or earlier
+    when the values buffered under a shared SpillBudget exceed its limit.
+    Otherwise the median and quartiles
+    come from a KllSketch and distinct values from FrequentValues, which
+    are both exact for small inputs. Quantiles and distinct values are
+    only tracked when requested.
+
+    Accessors are named after the QgsStatisticalSummary ones and return
+    NaN when no value was added; as with QgsStatisticalSummary, finalize()
+    must be called first. Summaries of parts of a stream can be merged.
+    """
+
+    PENDING_SIZE = 4096
+
+    def __init__(self, quantiles=True, distinct=True, exact=False, directory=None,
+                 runSize=SpilledValues.RUN_SIZE, budget=None):
+        self.quantiles = quantiles
+        self.distinct = distinct
+        self.moments = Moments()
+        self.missing = 0
+        self.pending = []
+        self.sketch = None
+        self.frequent = None
+        self.spilled = None
+        if exact and (quantiles or distinct):
+            self.spilled = SpilledValues(directory, runSize, budget)
+        else:
+            if quantiles:
+                self.sketch = KllSketch()
+            if distinct:
+                self.frequent = FrequentValues()
+        self.quartileValues = (math.nan, math.nan, math.nan)
+        self.distinctValues = (0, math.nan, math.nan)
+
+    def addVariant(self, value):
+        """Adds a value, counting NULL and values that are not numbers as
+        missing.
+        """
+        if value is None or value == NULL:
+            self.missing += 1
+            return
+        try:
+            self.pending.append(float(value))
+        except (TypeError, ValueError):
+            self.missing += 1
+            return
+        if len(self.pending) >= self.PENDING_SIZE:
+            self._flush()
+
+    def addValues(self, values):
+        for value in values:
+            self.addVariant(value)
+        self._flush()
+
+    def addArray(self, values):
+        """Adds an array of numbers at once."""
+        self.moments.addArray(values)
+        if self.spilled is not None:
+            self.spilled.addArray(values)
+        if self.sketch is not None:
+            self.sketch.addArray(values)
+        if self.frequent is not None:
+            self.frequent.addArray(values)
+
+    def _flush(self):
+        if self.pending:
+            values = numpy.array(self.pending, dtype=numpy.float64)
+            self.pending = []
+            self.addArray(values)
+
+    def merge(self, other):
+        self._flush()
+        other._flush()
+        self.missing += other.missing
+        self.moments.merge(other.moments)
+        if self.spilled is not None:
+            self.spilled.merge(other.spilled)
+        if self.sketch is not None:
+            self.sketch.merge(other.sketch)
+        if self.frequent is not None:
+            self.frequent.merge(other.frequent)
+
+    def finalize(self):
+        """Computes the median, quartiles and distinct value statistics, to
+        be called once all values have been added.
+        """
+        self._flush()
+        if self.spilled is not None:
+            self._finalizeExact()
+            return
+        if self.sketch is not None:
+            if self.sketch.isExact():
+                values = sorted(self.sketch.compactors[0])
+                self.quartileValues = tuple(sum(values[r] for r in ranks) / len(ranks) if values else math.nan
+                                            for ranks in quartileRanks(len(values)))
+            else:
+                self.quartileValues = tuple(self.sketch.quantile(q) for q in (0.25, 0.5, 0.75))
+        if self.frequent is not None:
+            self.distinctValues = (self.frequent.variety(), self.frequent.minority(), self.frequent.majority())
+
+    def _finalizeExact(self):
+        n = self.moments.count
+        ranks = quartileRanks(n) if self.quantiles and n else ([], [], [])
+        wanted = numpy.array(sorted(set(r for group in ranks for r in group)), dtype=numpy.int64)
+        found = {}
+        variety = 0
+        minority = majority = (0, math.nan)
+        position = 0
+        for values, counts in self.spilled.sortedCounts():
+            ends = position + numpy.cumsum(counts)
+            inside = wanted[(wanted >= position) & (wanted < ends[-1])]
+            for rank, index in zip(inside.tolist(), numpy.searchsorted(ends, inside, side='right').tolist()):
+                found[rank] = values[index]
+            position = int(ends[-1])
+
+            # chunks hold increasing values, so keeping the first extreme
+            # count of each chunk selects the smallest value on ties
+            variety += len(values)
+            i = int(numpy.argmin(counts))
+            if minority[0] == 0 or counts[i] < minority[0]:
+                minority = (counts[i], values[i])
+            i = int(numpy.argmax(counts))
+            if counts[i] > majority[0]:
+                majority = (counts[i], values[i])
+        self.spilled.close()
+
+        if self.quantiles and n:
+            self.quartileValues = tuple(sum(found[r] for r in group) / len(group) for group in ranks)
+        if self.distinct:
+            self.distinctValues = (variety, float(minority[1]), float(majority[1]))
+
+    def close(self):
+        """Removes the values spilled to disk."""
+        if self.spilled is not None:
+            self.spilled.close()
+
+    def count(self):
+        return self.moments.count
+
+    def countMissing(self):
+        return self.missing
+
+    def sum(self):
+        return self.moments.sum
+
+    def min(self):
+        return self.moments.min
+
+    def max(self):
+        return self.moments.max
+
+    def range(self):
+        return self.moments.max - self.moments.min
+
+    def mean(self):
+        return self.moments.mean if self.moments.count else math.nan
+
+    def stDev(self):
+        return math.sqrt(self.moments.variance()) if self.moments.count else math.nan
+
+    def variety(self):
+        return self.distinctValues[0]
+
+    def minority(self):
+        return self.distinctValues[1]
+
+    def majority(self):
+        return self.distinctValues[2]
+
+    def median(self):
+        return self.quartileValues[1]
+
+    def firstQuartile(self):
+        return self.quartileValues[0]
+
+    def thirdQuartile(self):
+        return self.quartileValues[2]
+
+    def interQuartileRange(self):
+        return self.quartileValues[2] - self.quartileValues[0]
+
+
+def accumulate(batches, create, consume, merge, threads=1, partitionSize=65536, queueSize=4):
+    """Feeds batches of values to accumulators and returns their merged
+    result.
+
+    batches yields (fid, batch) pairs, fid being the id of the first
+    feature of the batch. With several threads, every worker thread owns
+    one accumulator made by create() and the source is partitioned by
+    blocks of partitionSize feature ids, each batch going to the worker of
+    its block. consume(accumulator, batch) adds a batch to an accumulator
+    and merge(accumulator, other) adds the partial result of another
+    worker. Worker queues are bounded so that memory use does not depend on
+    the size of the source.
+    """
+    if threads <= 1:
+        accumulator = create()
+        for _, batch in batches:
+            consume(accumulator, batch)
+        return accumulator
+
+    queues = [queue.Queue(maxsize=queueSize) for _ in range(threads)]
+    partials = [create() for _ in range(threads)]
+    errors = []
+
+    def work(i):
+        while True:
+            batch = queues[i].get()
+            if batch is None:
+                return
+            if not errors:
+                try:
+                    consume(partials[i], batch)
+                except Exception as e:
+                    errors.append(e)
+
+    workers = [threading.Thread(target=work, args=(i,), daemon=True) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    try:
+        for fid, batch in batches:
+            if errors:
+                break
+            queues[(fid // partitionSize) % threads].put(batch)
+    finally:
+        for q in queues:
+            q.put(None)
+        for worker in workers:
+            worker.join()
+    if errors:
+        raise errors[0]
+
+    result = partials[0]
+    for partial in partials[1:]:
+        merge(result, partial)
+    return result
@@ -21,9 +21,18 @@ __author__ = 'Victor Olaya'
 __date__ = 'February 2013'
 __copyright__ = '(C) 2013, Victor Olaya'
 
+import itertools
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy
+
+from qgis.PyQt.QtCore import QVariant
 from qgis.core import (NULL,
                        QgsFeatureRequest)
 
+from processing.tools.spatial import PointGrid
+
 
 def resolveFieldIndex(source, attr):
     """This method takes an object and returns the index field it
@@ -45,6 +54,135 @@ def resolveFieldIndex(source, attr):
         return index
 
 
+# number of features read at once by columns()
+COLUMN_CHUNK_SIZE = 10000
+
+_INTEGER_TYPES = (QVariant.Int, QVariant.UInt, QVariant.LongLong)
+
+
+def _columnChunk(chunk, dtype):
+    """Converts a list of attribute values to a (data, mask) pair of arrays
+    of the given dtype, masking NULL values and values which cannot be
+    parsed as numbers or do not fit in dtype."""
+    if dtype in (numpy.int64, numpy.uint64, numpy.float64):
+        try:
+            # most chunks hold no NULL, so they convert in one go
+            return numpy.array(chunk, dtype=dtype), numpy.zeros(len(chunk), dtype=bool)
+        except (TypeError, ValueError, OverflowError):
+            pass
+
+    mask = numpy.array([v is None or v == NULL for v in chunk], dtype=bool).reshape(-1)
+    if dtype is object:
+        data = numpy.empty(len(chunk), dtype=object)
+        for i, v in enumerate(chunk):
+            data[i] = None if mask[i] else v
+        return data, mask
+
+    filled = [0 if null else v for v, null in zip(chunk, mask.tolist())]
+    try:
+        return numpy.array(filled, dtype=dtype), mask
+    except (TypeError, ValueError, OverflowError):
+        pass
+
+    data = numpy.zeros(len(chunk), dtype=dtype)
+    for i, v in enumerate(filled):
+        try:
+            data[i] = v if isinstance(v, int) else float(v)
+        except (TypeError, ValueError, OverflowError):
+            mask[i] = True
+    return data, mask
+
+
+def columns(source, *attributes, numeric=False, limit=-1, sample=0, feedback=None,
+            chunk_size=COLUMN_CHUNK_SIZE):
+    """Returns the values of fields of a feature source as NumPy masked
+    arrays, NULL values being masked.
+
+    Fields can be passed as field names or as zero-based field indices, and
+    the returned dict uses the passed field identifiers as keys. Integer
+    fields give int64 arrays, unsigned 64 bit integer fields uint64 arrays,
+    decimal fields float64 arrays, boolean fields bool arrays and other
+    fields object arrays.
+
+    numeric is True to read all fields as float64, or a list of the field
+    identifiers to read as float64. Values which cannot be parsed as a
+    number are then masked.
+
+    Features are read without geometry in chunks of chunk_size. No more
+    than limit features are read unless limit is -1, and if sample is set
+    only every n-th feature is kept so that about sample values are
+    returned.
+    """
+    fields = source.fields()
+    indices = [resolveFieldIndex(source, attr) for attr in attributes]
+    dtypes = []
+    for attr, index in zip(attributes, indices):
+        field_type = fields.at(index).type()
+        if numeric is True or (numeric and attr in numeric):
+            dtypes.append(numpy.float64)
+        elif field_type in _INTEGER_TYPES:
+            dtypes.append(numpy.int64)
+        elif field_type == QVariant.ULongLong:
+            dtypes.append(numpy.uint64)
+        elif field_type == QVariant.Double:
+            dtypes.append(numpy.float64)
+        elif field_type == QVariant.Bool:
+            dtypes.append(numpy.bool_)
+        else:
+            dtypes.append(object)
+
+    # use an optimised feature request
+    request = QgsFeatureRequest().setSubsetOfAttributes(indices).setFlags(QgsFeatureRequest.NoGeometry)
+    if limit >= 0:
+        request.setLimit(limit)
+    count = source.featureCount()
+    if limit >= 0 and (count < 0 or limit < count):
+        count = limit
+    features = source.getFeatures(request)
+    if sample and count > sample:
+        features = itertools.islice(features, 0, None, math.ceil(count / sample))
+        count = math.ceil(count / math.ceil(count / sample))
+
+    chunks = [[] for _ in indices]
+    total = 100.0 / count if count > 0 else 0
+    read = 0
+    while True:
+        if feedback is not None and feedback.isCanceled():
+            break
+        rows = [f.attributes() for f in itertools.islice(features, chunk_size)]
+        if not rows:
+            break
+        for chunk, index, dtype in zip(chunks, indices, dtypes):
+            chunk.append(_columnChunk([row[index] for row in rows], dtype))
+        read += len(rows)
+        if feedback is not None:
+            feedback.setProgress(int(read * total))
+
+    result = {}
+    for attr, chunk, dtype in zip(attributes, chunks, dtypes):
+        if chunk:
+            data = numpy.concatenate([c[0] for c in chunk])
+            mask = numpy.concatenate([c[1] for c in chunk])
+        else:
+            data = numpy.empty(0, dtype=dtype)
+            mask = numpy.empty(0, dtype=bool)
+        result[attr] = numpy.ma.MaskedArray(data, mask=mask)
+    return result
+
+
+def columnsInBackground(source, *attributes, **kwargs):
+    """Starts columns() on a background thread and returns a
+    concurrent.futures.Future of its result.
+
+    The source must not be used by the calling thread until the result is
+    ready.
+    """
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(columns, source, *attributes, **kwargs)
+    executor.shutdown(wait=False)
+    return future
+
+
 def values(source, *attributes):
     """Returns the values in the attributes table of a feature source,
     for the passed fields.
@@ -54,34 +192,9 @@ def values(source, *attributes):
     It considers the existing selection.
 
     It assumes fields are numeric or contain values that can be parsed
-    to a number.
+    to a number. Kept for compatibility, prefer columns() for new code.
     """
-    ret = {}
-    indices = []
-    attr_keys = {}
-    for attr in attributes:
-        index = resolveFieldIndex(source, attr)
-        indices.append(index)
-        attr_keys[index] = attr
-
-    # use an optimised feature request
-    request = QgsFeatureRequest().setSubsetOfAttributes(indices).setFlags(QgsFeatureRequest.NoGeometry)
-
-    for feature in source.getFeatures(request):
-        for i in indices:
-
-            # convert attribute value to number
-            try:
-                v = float(feature[i])
-            except:
-                v = None
-
-            k = attr_keys[i]
-            if k in ret:
-                ret[k].append(v)
-            else:
-                ret[k] = [v]
-    return ret
+    return {attr: column.tolist() for attr, column in columns(source, *attributes, numeric=True).items()}
 
 
 def convert_nulls(values, replacement=None):
@@ -94,13 +207,19 @@ def convert_nulls(values, replacement=None):
     return [i if i != NULL else replacement for i in values]
 
 
-def checkMinDistance(point, index, distance, points):
+def checkMinDistance(point, index, distance, points=None):
     """Check if distance from given point to all other points is greater
     than given value.
+
+    index is either a PointGrid of the accepted points, or a QgsSpatialIndex
+    together with a dict of the accepted points keyed by feature id.
     """
     if distance == 0:
         return True
 
+    if isinstance(index, PointGrid):
+        return not index.hasPointWithin(point.x(), point.y(), distance)
+
     neighbors = index.nearestNeighbor(point, 1)
     if len(neighbors) == 0:
         return True
@@ -1,4 +1,5 @@
 import csv
+import functools
 import typing
 
 from PyQt5.QtCore import QAbstractItemModel, QModelIndex, Qt, QVariant, QSortFilterProxyModel, QRegExp
@@ -19,8 +20,11 @@ def _load_algs_from_file(file):
     return algorithms
 
 
-_algorithms = {"gdal": _load_algs_from_file('res/algs/gdal.csv'),
-               "qgis": _load_algs_from_file('res/algs/qgis.csv')}
+@functools.lru_cache(maxsize=None)
+def algorithms():
+    """各提供者下的算法，第一次使用时才读取 csv"""
+    return {"gdal": _load_algs_from_file('res/algs/gdal.csv'),
+            "qgis": _load_algs_from_file('res/algs/qgis.csv')}
 
 
 class ProcessingTreeWidget(QTreeWidget):
@@ -29,8 +33,7 @@ class ProcessingTreeWidget(QTreeWidget):
         super(ProcessingTreeWidget, self).__init__(parent=parent)
         self.setHeaderHidden(True)
 
-        for provider, algs in _algorithms.items():
-            Processing.initialize()
+        for provider, algs in algorithms().items():
             child = QTreeWidgetItem()
             child.setText(0, provider)
             for alg in algs.keys():
@@ -43,7 +46,7 @@ class ProcessingTreeWidget(QTreeWidget):
         self.filtered_model = QSortFilterProxyModel()
 
     def onDoubleClick(self, index: QModelIndex):
-        _id = _algorithms[index.parent().data()][index.data()]
+        _id = algorithms()[index.parent().data()][index.data()]
         alg = QgsApplication.processingRegistry().createAlgorithmById(_id)
         dlg = AlgorithmDialog(alg, parent=self)
         dlg.show()
@@ -71,18 +74,22 @@ class ProcessingTreeItem:
         return len(self.children)
 
 
-tree_root = ProcessingTreeItem('', 'processing')
-for provider, alg in _algorithms.items():
-    child = ProcessingTreeItem('', provider, tree_root)
-    for name, _id in alg.items():
-        ProcessingTreeItem(_id, name, child)
+@functools.lru_cache(maxsize=None)
+def algorithm_tree():
+    """算法树，第一次创建模型时才构建"""
+    root = ProcessingTreeItem('', 'processing')
+    for provider, alg in algorithms().items():
+        child = ProcessingTreeItem('', provider, root)
+        for name, _id in alg.items():
+            ProcessingTreeItem(_id, name, child)
+    return root
 
 
 class ProcessingTreeModel(QAbstractItemModel):
 
     def __init__(self):
         super(ProcessingTreeModel, self).__init__()
-        self.root = tree_root
+        self.root = algorithm_tree()
         self.icon_provider = QIcon('res/icon/cc/259806.png')
         self.icon_algorithm = QIcon("res/icon/cc/259796.png")
 
@@ -163,7 +170,7 @@ class ProcessingTreeView(QTreeView):
             self.expand(index.parent())
         else:
             # 没有处理找不到算法的情况
-            _id = _algorithms[index.parent().data()][index.data()]
+            _id = algorithms()[index.parent().data()][index.data()]
             alg = QgsApplication.processingRegistry().createAlgorithmById(_id)
             dlg = AlgorithmDialog(alg, parent=self)
             dlg.show()
@@ -175,7 +182,7 @@ if __name__ == '__main__':
     app.initQgis()
     app.setQuitOnLastWindowClosed(True)
 
-    Processing.initialize()
+    Processing.initialize(lazy=True)
     win = ProcessingTreeView()
 
     # win.expandAll()